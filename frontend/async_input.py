@@ -0,0 +1,156 @@
+"""
+Asking the user without blocking the event loop.
+
+`input()` inside a coroutine freezes the whole event loop until the user presses enter, including background
+work like starting the MCP servers and every other session of the process. An `InputSource` is awaited
+instead:
+
+- `TerminalInput` reads stdin in a single reader thread shared by every terminal session of the process.
+  Sessions take turns at the prompt, a `label` tells the user which session asks,
+- `QueueInput` is answered programmatically, e.g. by a web handler or a test, through `answer()`.
+
+A line is only read from stdin when a session asks for one, a line whose question was cancelled in the
+meantime is kept for the next question.
+"""
+
+import asyncio
+import concurrent.futures
+import queue
+import sys
+import threading
+import weakref
+from abc import ABC, abstractmethod
+from collections import deque
+from typing import TextIO
+
+# How often the reader thread checks whether the event loop of an undelivered line was closed
+CLOSED_LOOP_POLL_SECONDS = 0.1
+
+
+class InputSource(ABC):
+    """Where a session gets the answers of its user from."""
+
+    @abstractmethod
+    async def ask(self, prompt: str) -> str:
+        """Show `prompt` and wait for the answer, raises `EOFError` when no answer can come anymore."""
+
+
+class StdinReader:
+    """
+    Reads lines of a stream in a daemon thread, one line per `readline` call.
+
+    Args:
+        stream: Stream to read, `sys.stdin` at the time of reading by default.
+
+    """
+
+    def __init__(self, stream: TextIO | None = None) -> None:
+        self._stream = stream
+        self._requests: queue.SimpleQueue[tuple[asyncio.AbstractEventLoop, asyncio.Future]] = queue.SimpleQueue()
+        # lines read for a question that was cancelled before the line arrived, only used by the reader thread
+        self._unclaimed: deque[str | None] = deque()
+        self._thread: threading.Thread | None = None
+        self._start_lock = threading.Lock()
+        self._turns: weakref.WeakKeyDictionary[asyncio.AbstractEventLoop, asyncio.Lock] = weakref.WeakKeyDictionary()
+
+    def turn(self) -> asyncio.Lock:
+        """Lock held by the session currently at the prompt, one per event loop."""
+        loop = asyncio.get_running_loop()
+        if loop not in self._turns:
+            self._turns[loop] = asyncio.Lock()
+        return self._turns[loop]
+
+    async def readline(self) -> str:
+        """Next line without its line break, raises `EOFError` at the end of the stream."""
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._start()
+        self._requests.put((loop, future))
+        line = await future
+        if line is None:
+            raise EOFError
+        return line
+
+    def _start(self) -> None:
+        with self._start_lock:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._read_forever, name="stdin-reader", daemon=True)
+                self._thread.start()
+
+    def _read_forever(self) -> None:
+        while True:
+            loop, future = self._requests.get()
+            line = self._unclaimed.popleft() if self._unclaimed else self._read()
+            # decided before taking the next question, which would otherwise read past the unclaimed line
+            if not self._deliver_threadsafe(loop, future, line):
+                self._unclaimed.appendleft(line)
+
+    def _read(self) -> str | None:
+        line = (self._stream or sys.stdin).readline()
+        return line.rstrip("\r\n") if line else None
+
+    def _deliver_threadsafe(self, loop: asyncio.AbstractEventLoop, future: asyncio.Future, line: str | None) -> bool:
+        """Whether the question of `future` took `line`, waits for its event loop to answer."""
+        claimed: concurrent.futures.Future[bool] = concurrent.futures.Future()
+        try:
+            loop.call_soon_threadsafe(self._deliver, future, line, claimed)
+        except RuntimeError:  # the event loop of the question is closed
+            return False
+        while True:
+            try:
+                return claimed.result(timeout=CLOSED_LOOP_POLL_SECONDS)
+            except TimeoutError:
+                if loop.is_closed():
+                    return False
+
+    @staticmethod
+    def _deliver(future: asyncio.Future, line: str | None, claimed: concurrent.futures.Future[bool]) -> None:
+        claimed.set_result(not future.done())
+        if not future.done():
+            future.set_result(line)
+
+
+stdin_reader = StdinReader()
+
+
+class TerminalInput(InputSource):
+    """
+    Answers typed in the terminal.
+
+    Args:
+        label: Shown before every prompt when several sessions share the terminal.
+        reader: Reader of the terminal, shared by all sessions by default.
+
+    """
+
+    def __init__(self, label: str = "", reader: StdinReader = stdin_reader) -> None:
+        self.label = label
+        self.reader = reader
+
+    async def ask(self, prompt: str) -> str:
+        async with self.reader.turn():
+            print(f"[{self.label}] {prompt}" if self.label else prompt, end="", flush=True)
+            return (await self.reader.readline()).strip()
+
+
+class QueueInput(InputSource):
+    """Answers given through `answer()`, the questions asked are available in `questions`."""
+
+    def __init__(self) -> None:
+        self.questions: asyncio.Queue[str] = asyncio.Queue()
+        self._answers: asyncio.Queue[str | None] = asyncio.Queue()
+
+    def answer(self, text: str) -> None:
+        self._answers.put_nowait(text)
+
+    def close(self) -> None:
+        """Make every further question raise `EOFError`."""
+        self._answers.put_nowait(None)
+
+    async def ask(self, prompt: str) -> str:
+        self.questions.put_nowait(prompt)
+        answer = await self._answers.get()
+        if answer is None:
+            self._answers.put_nowait(None)  # stay closed for the next question
+            raise EOFError
+        return answer.strip()
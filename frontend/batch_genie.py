@@ -0,0 +1,281 @@
+"""
+Batch mode of Project Planning Genie: plans for many project ideas without any interaction.
+
+Ideas are read from a directory (one `*.md` / `*.txt` file per idea, named after the file) or from a JSONL
+file (one `{"id": ..., "idea": ...}` object per line, `description` or `brief` are accepted as well, a
+missing id is derived from the idea). Every idea runs through the graph with `allow_clarification` off and
+the report saved directly to `<output>/reports/<id>/`.
+
+- `--max-concurrent-runs` ideas are planned at once, their search calls share one `--max-search-calls`
+  budget of the process wide tool executor, so a large batch does not multiply the provider load,
+- all runs share the node cache, the tool registry and the MCP sessions, research already done for a
+  similar idea of the batch (or of an earlier one) is taken from the node cache,
+- after each idea one line with its status, duration, token usage, estimated cost, time per node and plan
+  shape is appended to `<output>/metrics.jsonl`, the totals end up in `<output>/summary.json` and the
+  process metrics in the Prometheus text format in `<output>/metrics.prom`,
+- the batch is resumable: ideas completed in `metrics.jsonl` are skipped on restart, and checkpoints in
+  `<output>/checkpoints.sqlite` let an idea interrupted by a crash continue from its last completed node.
+
+Usage:
+    python frontend/batch_genie.py ideas.jsonl --output batch_runs/2025-08 --max-concurrent-runs 4
+"""
+
+import argparse
+import asyncio
+import hashlib
+import json
+import re
+import time
+from contextlib import AsyncExitStack
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Any
+
+import rootutils
+from langchain_core.callbacks import UsageMetadataCallbackHandler
+from langchain_core.messages import HumanMessage
+from langgraph.graph.state import CompiledStateGraph
+from loguru import logger
+
+rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+from frontend.utils import setup_logging  # noqa: E402
+from src.agent.configuration import ReportSaveMode  # noqa: E402
+from src.agent.durable_checkpointer import open_durable_checkpointer  # noqa: E402
+from src.agent.final_report_generation import mcp_tool_service  # noqa: E402
+from src.agent.instrumentation import GraphMetrics, graph_metrics  # noqa: E402
+from src.agent.node_cache import DEFAULT_NODE_CACHE_DB, DiskNodeCache  # noqa: E402
+from src.agent.plan_ir import parse_plan  # noqa: E402
+from src.agent.project_planning_genie import agent_builder  # noqa: E402
+from src.agent.states import StatesKeys  # noqa: E402
+from src.agent.utils import atomic_write_text  # noqa: E402
+
+IDEA_KEYS = ("idea", "description", "brief")
+IDEA_SUFFIXES = (".md", ".txt")
+
+
+@dataclass(frozen=True)
+class BatchItem:
+    """One project idea of a batch."""
+
+    id: str
+    idea: str
+
+
+def _item_id(value: str) -> str:
+    return re.sub(r"[^A-Za-z0-9_-]+", "_", value).strip("_") or hashlib.sha1(value.encode()).hexdigest()[:12]  # noqa: S324
+
+
+def load_items(source: Path) -> list[BatchItem]:
+    """Ideas of a directory of `*.md` / `*.txt` files or of a JSONL file, duplicate ids are refused."""
+    items = []
+    if source.is_dir():
+        for path in sorted(p for p in source.iterdir() if p.suffix in IDEA_SUFFIXES):
+            items.append(BatchItem(_item_id(path.stem), path.read_text(encoding="utf-8").strip()))
+    else:
+        for line_number, line in enumerate(source.read_text(encoding="utf-8").splitlines(), start=1):
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            idea = next((str(record[key]).strip() for key in IDEA_KEYS if record.get(key)), "")
+            if not idea:
+                msg = f"{source}:{line_number} has none of the keys {', '.join(IDEA_KEYS)}"
+                raise ValueError(msg)
+            item_id = str(record.get("id") or hashlib.sha1(idea.encode()).hexdigest()[:12])  # noqa: S324
+            items.append(BatchItem(_item_id(item_id), idea))
+
+    ids = [item.id for item in items]
+    if duplicates := sorted({item_id for item_id in ids if ids.count(item_id) > 1}):
+        msg = f"duplicate ids in {source}: {', '.join(duplicates)}"
+        raise ValueError(msg)
+    return [item for item in items if item.idea]
+
+
+def completed_ids(metrics_path: Path) -> set[str]:
+    """Ids whose last recorded run completed and whose report still exists."""
+    last: dict[str, dict] = {}
+    if metrics_path.exists():
+        for line in metrics_path.read_text(encoding="utf-8").splitlines():
+            if line.strip():
+                record = json.loads(line)
+                last[record["id"]] = record
+    return {
+        item_id
+        for item_id, record in last.items()
+        if record["status"] == "completed" and record.get("report_path") and Path(record["report_path"]).exists()
+    }
+
+
+class BatchRunner:
+    """
+    Runs batch items on one compiled graph and records a metrics line per item.
+
+    Args:
+        graph: Graph compiled with a checkpointer, thread ids are `batch-<item id>`.
+        output: Directory of the reports, `metrics.jsonl` and `summary.json`.
+        max_concurrent_runs: Items planned at the same time.
+        max_search_calls: Search calls running at the same time across all items.
+        configurable: Further configuration for every run.
+
+    """
+
+    def __init__(
+        self,
+        graph: CompiledStateGraph,
+        output: Path,
+        *,
+        max_concurrent_runs: int = 4,
+        max_search_calls: int = 8,
+        configurable: dict[str, Any] | None = None,
+    ) -> None:
+        self.graph = graph
+        self.output = output
+        self.metrics_path = output / "metrics.jsonl"
+        self.max_search_calls = max_search_calls
+        self.configurable = configurable or {}
+        self._runs = asyncio.Semaphore(max_concurrent_runs)
+
+    def config(self, item: BatchItem, callbacks: list) -> dict[str, Any]:
+        return {
+            "configurable": {
+                **self.configurable,
+                "thread_id": f"batch-{item.id}",
+                "allow_clarification": False,
+                "report_save_mode": ReportSaveMode.DIRECT.value,
+                "report_root": str(self.output),
+                "report_directory": f"reports/{item.id}",
+                "max_concurrent_search_calls": self.max_search_calls,
+            },
+            "callbacks": callbacks,
+        }
+
+    async def run(self, items: list[BatchItem]) -> list[dict[str, Any]]:
+        """Run every item not completed before, returns the metrics of this run."""
+        done = completed_ids(self.metrics_path)
+        pending = [item for item in items if item.id not in done]
+        logger.info(f"Batch of {len(items)} ideas, {len(items) - len(pending)} already completed")
+        started = time.perf_counter()
+        metrics = await asyncio.gather(*(self.run_item(item) for item in pending))
+        summary = self.summarize(metrics, skipped=len(items) - len(pending), seconds=time.perf_counter() - started)
+        atomic_write_text(self.output / "summary.json", json.dumps(summary, indent=2))
+        logger.info("Batch summary: {}", summary)
+        return metrics
+
+    async def run_item(self, item: BatchItem) -> dict[str, Any]:
+        async with self._runs:
+            usage = UsageMetadataCallbackHandler()
+            item_metrics = GraphMetrics()
+            config = self.config(item, [usage, item_metrics, graph_metrics])
+            metrics: dict[str, Any] = {"id": item.id, "started_at": time.time()}
+            started = time.perf_counter()
+            try:
+                state = await self.graph.aget_state(config)
+                # continue an item interrupted by a crash from its last checkpoint
+                resumed = bool(state.created_at and state.next)
+                graph_input = None if resumed else {StatesKeys.MSGS.value: [HumanMessage(content=item.idea)]}
+                await self.graph.ainvoke(graph_input, config)
+                state = await self.graph.aget_state(config)
+                metrics.update(self._outcome(state.values, state.interrupts), resumed=resumed)
+            except Exception as e:
+                logger.exception(f"Batch item {item.id} failed")
+                metrics.update(status="failed", error=f"{type(e).__name__}: {e}")
+            metrics.update(
+                duration_seconds=round(time.perf_counter() - started, 3),
+                usage=usage.usage_metadata,
+                **self._spend(item_metrics),
+            )
+            self._record(metrics)
+            logger.info(f"Batch item {item.id}: {metrics['status']} in {metrics['duration_seconds']}s")
+            return metrics
+
+    def _outcome(self, values: dict[str, Any], interrupts: tuple) -> dict[str, Any]:
+        if interrupts:
+            return {"status": "needs_review", "error": "the run is waiting for a tool review"}
+        report = values.get(StatesKeys.FINAL_REPORT.value)
+        if not report:
+            return {"status": "failed", "error": "no report was written"}
+        plan = parse_plan(report)
+        return {
+            "status": "completed",
+            "report_path": values.get(StatesKeys.REPORT_PATH.value),
+            "report_chars": len(report),
+            "plan": {
+                "phases": len(plan.phases),
+                "tasks": sum(len(phase.tasks) for phase in plan.phases),
+                "features": len(plan.features),
+            },
+        }
+
+    @staticmethod
+    def _spend(item_metrics: GraphMetrics) -> dict[str, Any]:
+        totals = item_metrics.totals
+        return {
+            "cost_usd": round(totals.cost_usd, 6),
+            "node_seconds": {node: round(stats.wall_seconds, 3) for node, stats in totals.nodes.items()},
+        }
+
+    def _record(self, metrics: dict[str, Any]) -> None:
+        self.metrics_path.parent.mkdir(parents=True, exist_ok=True)
+        with self.metrics_path.open("a", encoding="utf-8") as f:
+            f.write(json.dumps(metrics, default=str) + "\n")
+
+    def summarize(self, metrics: list[dict[str, Any]], skipped: int, seconds: float) -> dict[str, Any]:
+        statuses: dict[str, int] = {}
+        tokens: dict[str, int] = {"input_tokens": 0, "output_tokens": 0, "total_tokens": 0}
+        cost_usd = 0.0
+        for record in metrics:
+            cost_usd += record["cost_usd"]
+            statuses[record["status"]] = statuses.get(record["status"], 0) + 1
+            for usage in record["usage"].values():
+                for key in tokens:
+                    tokens[key] += usage.get(key, 0)
+        cache = self.graph.cache
+        return {
+            "runs": len(metrics),
+            "skipped": skipped,
+            "statuses": statuses,
+            "seconds": round(seconds, 3),
+            "tokens": tokens,
+            "cost_usd": round(cost_usd, 6),
+            "node_cache": cache.stats() if isinstance(cache, DiskNodeCache) else None,
+        }
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Plan many project ideas with Project Planning Genie.")
+    parser.add_argument("source", type=Path, help="Directory of *.md / *.txt ideas or a JSONL file.")
+    parser.add_argument("--output", type=Path, default=Path("batch_runs"), help="Directory of reports and metrics.")
+    parser.add_argument("--max-concurrent-runs", type=int, default=4, help="Ideas planned at the same time.")
+    parser.add_argument("--max-search-calls", type=int, default=8, help="Concurrent search calls of all runs.")
+    parser.add_argument(
+        "--node-cache",
+        default=str(DEFAULT_NODE_CACHE_DB),
+        help="SQLite file caching research and report nodes across runs and batches.",
+    )
+    parser.add_argument("--no-node-cache", action="store_true", help="Always re-run every node.")
+    return parser.parse_args()
+
+
+@logger.catch
+async def main(args: argparse.Namespace) -> None:
+    setup_logging()
+    items = load_items(args.source)
+    async with AsyncExitStack() as stack:
+        stack.push_async_callback(mcp_tool_service.aclose)
+        checkpointer = await stack.enter_async_context(open_durable_checkpointer(args.output / "checkpoints.sqlite"))
+        node_cache = None if args.no_node_cache else DiskNodeCache(args.node_cache)
+        if node_cache is not None:
+            stack.callback(node_cache.close)
+            graph_metrics.register_component("node_cache", node_cache.stats)
+        graph = agent_builder.compile(name="Project Planning Genie Batch", checkpointer=checkpointer, cache=node_cache)
+        runner = BatchRunner(
+            graph,
+            args.output,
+            max_concurrent_runs=args.max_concurrent_runs,
+            max_search_calls=args.max_search_calls,
+        )
+        await runner.run(items)
+        graph_metrics.write(args.output / "metrics.prom")
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
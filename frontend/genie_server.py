@@ -0,0 +1,448 @@
+"""
+HTTP service running many planning sessions of the Project Planning Genie concurrently.
+
+`local_genie.py` runs a single thread and blocks on `input()`. This service compiles `agent_builder` once and
+runs every submitted idea as a job on its own thread id:
+
+- `POST /jobs` submits an idea, answered with `202` and the job id, or `429` when the queue is full,
+- `GET /jobs/{job_id}` returns the status, the pending question or tool review and, once done, the report,
+- `GET /jobs/{job_id}/events` streams the `stream_graph_responses` output and status changes as server-sent
+  events, a reconnecting client passes `Last-Event-ID` to continue where it left off,
+- `POST /jobs/{job_id}/resume` answers a clarification question (`{"answer": ...}`) or a tool review
+  (`{"action": "accept"}` / `{"action": "feedback", "feedback": ...}`),
+- `GET /jobs/{job_id}/metrics` returns the time, tokens and estimated cost per node, model and tool of the
+  runs of a job, `GET /jobs/{job_id}/trace` their spans as a Chrome trace to open in https://ui.perfetto.dev,
+- `GET /health` returns the queue and cache statistics, `GET /metrics` the process totals in the Prometheus
+  text exposition format.
+
+At most `max_concurrent_jobs` jobs run at once, the others wait in the queue. New jobs are refused once
+`max_queued_jobs` are waiting, resumed jobs were admitted before and are always queued. A job waiting for an
+answer does not hold a worker.
+
+All jobs share one checkpointer, the node cache (search results with their summaries, research and report
+model calls), the tool registry (toolsets and bound models) and the MCP sessions.
+
+Usage:
+    python frontend/genie_server.py --port 8000 --durable
+"""
+
+import argparse
+import asyncio
+import contextlib
+import json
+import time
+import uuid
+from collections import deque
+from collections.abc import AsyncIterator, Callable
+from contextlib import AbstractAsyncContextManager, AsyncExitStack, asynccontextmanager
+from dataclasses import dataclass, field
+from enum import Enum
+from typing import Any, Self
+
+import rootutils
+import uvicorn
+from langchain_core.messages import AIMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Command, StateSnapshot
+from loguru import logger
+from starlette.applications import Starlette
+from starlette.requests import Request
+from starlette.responses import JSONResponse, PlainTextResponse, Response, StreamingResponse
+from starlette.routing import Route
+
+rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+from frontend.utils import setup_logging, stream_graph_responses  # noqa: E402
+from src.agent.checkpoint_serializer import CompactSerializer  # noqa: E402
+from src.agent.durable_checkpointer import DEFAULT_CHECKPOINT_DB, open_durable_checkpointer  # noqa: E402
+from src.agent.final_report_generation import mcp_tool_service  # noqa: E402
+from src.agent.instrumentation import GraphMetrics, graph_metrics  # noqa: E402
+from src.agent.node_cache import DEFAULT_NODE_CACHE_DB, DiskNodeCache  # noqa: E402
+from src.agent.project_planning_genie import agent_builder  # noqa: E402
+from src.agent.states import StatesKeys  # noqa: E402
+from src.agent.timeline import SpanRecorder, to_chrome_trace  # noqa: E402
+from src.agent.tool_registry import tool_registry  # noqa: E402
+
+
+class JobStatus(Enum):
+    """Lifecycle of a planning job."""
+
+    QUEUED = "queued"
+    RUNNING = "running"
+    WAITING_FOR_INPUT = "waiting_for_input"  # a clarification question or a tool review is pending
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+FINISHED = frozenset({JobStatus.COMPLETED, JobStatus.FAILED})
+
+
+class QueueFullError(RuntimeError):
+    """Raised when a job is submitted while `max_queued_jobs` jobs are already waiting."""
+
+
+@dataclass
+class Job:
+    """A planning session, its thread id is the job id."""
+
+    id: str
+    configurable: dict[str, Any] = field(default_factory=dict)
+    status: JobStatus = JobStatus.QUEUED
+    pending: dict[str, Any] | None = None
+    error: str | None = None
+    final_report: str | None = None
+    report_path: str | None = None
+    created_at: float = field(default_factory=time.time)
+    updated_at: float = field(default_factory=time.time)
+    # (event id, event name, data), older events are dropped once `maxlen` is reached
+    events: deque[tuple[int, str, dict]] = field(default_factory=lambda: deque(maxlen=10_000))
+    changed: asyncio.Condition = field(default_factory=asyncio.Condition)
+    _next_event_id: int = 0
+
+    async def emit(self, event: str, data: dict) -> None:
+        self._next_event_id += 1
+        self.events.append((self._next_event_id, event, data))
+        async with self.changed:
+            self.changed.notify_all()
+
+    async def set_status(self, status: JobStatus, **fields: Any) -> None:
+        self.status, self.updated_at = status, time.time()
+        for name, value in fields.items():
+            setattr(self, name, value)
+        await self.emit("status", self.summary())
+
+    def summary(self) -> dict[str, Any]:
+        return {
+            "job_id": self.id,
+            "status": self.status.value,
+            "pending": self.pending,
+            "error": self.error,
+            "report_path": self.report_path,
+            "created_at": self.created_at,
+            "updated_at": self.updated_at,
+        }
+
+    async def subscribe(self, after: int = 0, keepalive: float = 15.0) -> AsyncIterator[tuple[int, str, dict] | None]:
+        """Events after the id `after` until the job is finished, `None` every `keepalive` seconds of silence."""
+        while True:
+            for event in list(self.events):
+                if event[0] > after:
+                    after = event[0]
+                    yield event
+            if self.status in FINISHED:
+                return
+            async with self.changed:
+                if self._next_event_id > after:
+                    continue
+                try:
+                    await asyncio.wait_for(self.changed.wait(), keepalive)
+                except TimeoutError:
+                    yield None
+
+
+class PlanningService:
+    """
+    Runs planning jobs on a shared compiled graph with a bounded queue.
+
+    Args:
+        graph: The graph compiled with a checkpointer, shared by all jobs.
+        max_concurrent_jobs: Number of jobs streaming the graph at the same time.
+        max_queued_jobs: Number of new jobs that may wait for a worker before submissions are refused.
+        max_finished_jobs: Finished jobs kept for status requests, the oldest are forgotten first.
+
+    """
+
+    def __init__(
+        self,
+        graph: CompiledStateGraph,
+        *,
+        max_concurrent_jobs: int = 4,
+        max_queued_jobs: int = 32,
+        max_finished_jobs: int = 1_000,
+    ) -> None:
+        self.graph = graph
+        self.max_concurrent_jobs = max_concurrent_jobs
+        self.max_queued_jobs = max_queued_jobs
+        self.max_finished_jobs = max_finished_jobs
+        # recorders of every run of every job
+        self.metrics: GraphMetrics = graph_metrics
+        self.spans = SpanRecorder(max_runs=max_finished_jobs)
+        self.jobs: dict[str, Job] = {}
+        self._queue: asyncio.Queue[tuple[Job, dict | Command]] = asyncio.Queue()
+        self._workers: list[asyncio.Task] = []
+
+    async def __aenter__(self) -> Self:
+        self._workers = [
+            asyncio.create_task(self._work(), name=f"genie-worker-{i}") for i in range(self.max_concurrent_jobs)
+        ]
+        return self
+
+    async def __aexit__(self, *exc_info: object) -> None:
+        for worker in self._workers:
+            worker.cancel()
+        await asyncio.gather(*self._workers, return_exceptions=True)
+        self._workers = []
+
+    def stats(self) -> dict[str, Any]:
+        counts = {status.value: 0 for status in JobStatus}
+        for job in self.jobs.values():
+            counts[job.status.value] += 1
+        return {
+            "jobs": counts,
+            "max_concurrent_jobs": self.max_concurrent_jobs,
+            "max_queued_jobs": self.max_queued_jobs,
+        }
+
+    async def submit(self, idea: str, configurable: dict[str, Any] | None = None) -> Job:
+        """Queue a new job for `idea`, raises `QueueFullError` when the queue is full."""
+        queued = sum(job.status is JobStatus.QUEUED for job in self.jobs.values())
+        if queued >= self.max_queued_jobs:
+            msg = f"{queued} jobs are already waiting"
+            raise QueueFullError(msg)
+        self._forget_finished()
+        job = Job(id=uuid.uuid4().hex, configurable=configurable or {})
+        self.jobs[job.id] = job
+        await job.emit("status", job.summary())
+        self._queue.put_nowait((job, {StatesKeys.MSGS.value: [HumanMessage(content=idea)]}))
+        return job
+
+    async def resume(self, job_id: str, answer: dict[str, Any]) -> Job:
+        """
+        Continue a job waiting for input.
+
+        Raises:
+            KeyError: The job does not exist.
+            ValueError: The job is not waiting for input, or `answer` does not fit what it waits for.
+
+        """
+        job = self.jobs[job_id]
+        if job.status is not JobStatus.WAITING_FOR_INPUT or job.pending is None:
+            msg = f"job {job_id} is {job.status.value}, not waiting for input"
+            raise ValueError(msg)
+
+        if job.pending["kind"] == "clarification":
+            if not str(answer.get("answer") or "").strip():
+                msg = "an `answer` to the clarification question is required"
+                raise ValueError(msg)
+            graph_input = {StatesKeys.MSGS.value: [HumanMessage(content=str(answer["answer"]).strip())]}
+        else:
+            action = answer.get("action")
+            if action not in {"accept", "feedback"}:
+                msg = "`action` must be 'accept' or 'feedback'"
+                raise ValueError(msg)
+            graph_input = Command(resume={"action": action, "feedback": answer.get("feedback")})
+
+        await job.set_status(JobStatus.QUEUED, pending=None)
+        self._queue.put_nowait((job, graph_input))
+        return job
+
+    def _forget_finished(self) -> None:
+        finished = sorted((job for job in self.jobs.values() if job.status in FINISHED), key=lambda job: job.updated_at)
+        for job in finished[: max(0, len(finished) - self.max_finished_jobs + 1)]:
+            del self.jobs[job.id]
+
+    async def _work(self) -> None:
+        while True:
+            job, graph_input = await self._queue.get()
+            try:
+                await self._run(job, graph_input)
+            finally:
+                self._queue.task_done()
+
+    async def _run(self, job: Job, graph_input: dict | Command) -> None:
+        """Stream the graph for `job` until it finishes, fails or waits for input."""
+        await job.set_status(JobStatus.RUNNING)
+        config = {"configurable": {**job.configurable, "thread_id": job.id}, "callbacks": [self.metrics, self.spans]}
+        try:
+            async for text, node in stream_graph_responses(user_input=graph_input, graph=self.graph, config=config):
+                if text:
+                    await job.emit("message", {"node": node, "text": text})
+            state = await self.graph.aget_state(config)
+        except Exception as e:
+            logger.exception(f"Job {job.id} failed")
+            await job.set_status(JobStatus.FAILED, error=f"{type(e).__name__}: {e}")
+            return
+        await self._settle(job, state)
+
+    async def _settle(self, job: Job, state: StateSnapshot) -> None:
+        if state.interrupts:
+            pending = {
+                "kind": "tool_review",
+                "interrupts": [{"id": interrupt.id, "value": interrupt.value} for interrupt in state.interrupts],
+            }
+            await job.set_status(JobStatus.WAITING_FOR_INPUT, pending=pending)
+        elif state.next:
+            await job.set_status(JobStatus.FAILED, error=f"stopped before {', '.join(state.next)}")
+        elif state.values.get(StatesKeys.FINAL_REPORT.value):
+            await job.set_status(
+                JobStatus.COMPLETED,
+                final_report=state.values[StatesKeys.FINAL_REPORT.value],
+                report_path=state.values.get(StatesKeys.REPORT_PATH.value),
+            )
+        else:
+            # `clarify_with_user` ended the run with a question for the user
+            messages = state.values.get(StatesKeys.MSGS.value) or []
+            question = messages[-1].content if messages and isinstance(messages[-1], AIMessage) else ""
+            await job.set_status(JobStatus.WAITING_FOR_INPUT, pending={"kind": "clarification", "question": question})
+
+
+def _sse(event_id: int, event: str, data: dict) -> str:
+    return f"id: {event_id}\nevent: {event}\ndata: {json.dumps(data, default=str)}\n\n"
+
+
+def _not_found() -> Response:
+    return JSONResponse({"error": "job not found"}, status_code=404)
+
+
+async def submit_job(request: Request) -> Response:
+    body = await request.json()
+    idea = str(body.get("idea") or "").strip()
+    if not idea:
+        return JSONResponse({"error": "`idea` is required"}, status_code=400)
+    try:
+        job = await request.app.state.service.submit(idea, body.get("configurable"))
+    except QueueFullError as e:
+        headers = {"Retry-After": str(request.app.state.retry_after)}
+        return JSONResponse({"error": str(e)}, status_code=429, headers=headers)
+    return JSONResponse(job.summary(), status_code=202)
+
+
+async def job_status(request: Request) -> Response:
+    if (job := request.app.state.service.jobs.get(request.path_params["job_id"])) is None:
+        return _not_found()
+    return JSONResponse({**job.summary(), "final_report": job.final_report}, headers={"Cache-Control": "no-store"})
+
+
+async def job_events(request: Request) -> Response:
+    if (job := request.app.state.service.jobs.get(request.path_params["job_id"])) is None:
+        return _not_found()
+    after = request.headers.get("last-event-id", request.query_params.get("after", "0"))
+
+    async def stream() -> AsyncIterator[str]:
+        async for event in job.subscribe(int(after) if after.isdigit() else 0):
+            yield ": keepalive\n\n" if event is None else _sse(*event)
+
+    headers = {"Cache-Control": "no-store", "X-Accel-Buffering": "no"}
+    return StreamingResponse(stream(), media_type="text/event-stream", headers=headers)
+
+
+async def job_metrics(request: Request) -> Response:
+    service: PlanningService = request.app.state.service
+    if (job_id := request.path_params["job_id"]) not in service.jobs:
+        return _not_found()
+    return JSONResponse(service.metrics.report(job_id), headers={"Cache-Control": "no-store"})
+
+
+async def job_trace(request: Request) -> Response:
+    service: PlanningService = request.app.state.service
+    if (job_id := request.path_params["job_id"]) not in service.jobs:
+        return _not_found()
+    return JSONResponse(to_chrome_trace(service.spans.spans(job_id)), headers={"Cache-Control": "no-store"})
+
+
+async def resume_job(request: Request) -> Response:
+    try:
+        job = await request.app.state.service.resume(request.path_params["job_id"], await request.json())
+    except KeyError:
+        return _not_found()
+    except ValueError as e:
+        return JSONResponse({"error": str(e)}, status_code=409)
+    return JSONResponse(job.summary(), status_code=202)
+
+
+async def health(request: Request) -> Response:
+    service: PlanningService = request.app.state.service
+    node_cache = service.graph.cache
+    return JSONResponse(
+        {
+            **service.stats(),
+            "node_cache": node_cache.stats() if isinstance(node_cache, DiskNodeCache) else None,
+            "tool_registry": tool_registry.stats(),
+            "mcp_sessions": mcp_tool_service.stats(),
+        },
+    )
+
+
+async def prometheus_metrics(request: Request) -> Response:
+    service: PlanningService = request.app.state.service
+    return PlainTextResponse(service.metrics.to_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+def create_app(
+    lifespan: Callable[[Starlette], AbstractAsyncContextManager[None]] | None = None,
+    retry_after: int = 5,
+) -> Starlette:
+    """
+    HTTP routes of the started `PlanningService` in `app.state.service`.
+
+    Args:
+        lifespan: Starts the service and sets `app.state.service`, see `serve`.
+        retry_after: Seconds a client is asked to wait when the queue is full.
+
+    """
+    app = Starlette(
+        routes=[
+            Route("/jobs", submit_job, methods=["POST"]),
+            Route("/jobs/{job_id}", job_status, methods=["GET"]),
+            Route("/jobs/{job_id}/events", job_events, methods=["GET"]),
+            Route("/jobs/{job_id}/resume", resume_job, methods=["POST"]),
+            Route("/jobs/{job_id}/metrics", job_metrics, methods=["GET"]),
+            Route("/jobs/{job_id}/trace", job_trace, methods=["GET"]),
+            Route("/health", health, methods=["GET"]),
+            Route("/metrics", prometheus_metrics, methods=["GET"]),
+        ],
+        lifespan=lifespan,
+    )
+    app.state.retry_after = retry_after
+    return app
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Serve Project Planning Genie over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8000)
+    parser.add_argument("--max-concurrent-jobs", type=int, default=4, help="Jobs running the graph at once.")
+    parser.add_argument("--max-queued-jobs", type=int, default=32, help="Waiting jobs before new ones are refused.")
+    parser.add_argument("--durable", action="store_true", help="Persist checkpoints in a local SQLite database.")
+    parser.add_argument("--db", default=str(DEFAULT_CHECKPOINT_DB), help="SQLite file used with --durable.")
+    parser.add_argument("--node-cache", default=str(DEFAULT_NODE_CACHE_DB), help="SQLite file of the node cache.")
+    parser.add_argument("--no-node-cache", action="store_true", help="Always re-run every node.")
+    return parser.parse_args()
+
+
+def serve(args: argparse.Namespace) -> None:
+    """Run the service with one graph, checkpointer and node cache shared by every job."""
+
+    @asynccontextmanager
+    async def lifespan(app: Starlette) -> AsyncIterator[None]:
+        async with AsyncExitStack() as stack:
+            stack.push_async_callback(mcp_tool_service.aclose)
+            if args.durable:
+                checkpointer = await stack.enter_async_context(open_durable_checkpointer(args.db))
+            else:
+                checkpointer = MemorySaver(serde=CompactSerializer())
+            node_cache = None if args.no_node_cache else DiskNodeCache(args.node_cache)
+            if node_cache is not None:
+                stack.callback(node_cache.close)
+                graph_metrics.register_component("node_cache", node_cache.stats)
+            graph = agent_builder.compile(
+                name="Project Planning Genie Server",
+                checkpointer=checkpointer,
+                cache=node_cache,
+            )
+            service = PlanningService(
+                graph,
+                max_concurrent_jobs=args.max_concurrent_jobs,
+                max_queued_jobs=args.max_queued_jobs,
+            )
+            app.state.service = await stack.enter_async_context(service)
+            yield
+            logger.info("Planning service stats: {}", service.stats())
+
+    setup_logging()
+    uvicorn.run(create_app(lifespan), host=args.host, port=args.port)
+
+
+if __name__ == "__main__":
+    with contextlib.suppress(KeyboardInterrupt):
+        serve(parse_args())
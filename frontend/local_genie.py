@@ -4,23 +4,76 @@ reference: https://github.com/kenneth-liao/crm-agent/blob/main/frontend/chat_loc
 you should find best and simple solution for those questions
 """
 
+import argparse
+import asyncio
+from contextlib import AsyncExitStack
+from pathlib import Path
+
 import rootutils
-from langchain_core.caches import InMemoryCache
 from langchain_core.messages import HumanMessage
 from langgraph.checkpoint.memory import MemorySaver
 from loguru import logger
 
 rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
-from frontend.utils import handle_clarification, handle_interrupts, setup_logging, stream_graph_responses  # noqa: E402
+from frontend.async_input import InputSource, TerminalInput  # noqa: E402
+from frontend.utils import (  # noqa: E402
+    describe_resume_point,
+    handle_clarification,
+    handle_interrupts,
+    setup_logging,
+    stream_graph_responses,
+    warm_up_tools,
+)
+from src.agent.checkpoint_serializer import CompactSerializer  # noqa: E402
+from src.agent.durable_checkpointer import DEFAULT_CHECKPOINT_DB, open_durable_checkpointer  # noqa: E402
+from src.agent.final_report_generation import mcp_tool_service  # noqa: E402
+from src.agent.instrumentation import graph_metrics  # noqa: E402
+from src.agent.node_cache import DEFAULT_NODE_CACHE_DB, DiskNodeCache  # noqa: E402
 from src.agent.project_planning_genie import agent_builder  # noqa: E402
 from src.agent.states import AgentState  # noqa: E402
+from src.agent.timeline import SpanRecorder  # noqa: E402
 
 # set_llm_cache(SQLiteCache(database_path=".langchain.db"))
 THINK_REGEX = r"<think>(.*?)</think>"
 
 
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run Project Planning Genie locally.")
+    parser.add_argument("--thread-id", default="1", help="Conversation thread to run or resume.")
+    parser.add_argument(
+        "--durable",
+        action="store_true",
+        help="Persist checkpoints in a local SQLite database instead of memory.",
+    )
+    parser.add_argument("--db", default=str(DEFAULT_CHECKPOINT_DB), help="SQLite file used with --durable.")
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Continue the thread from its last completed node (implies --durable).",
+    )
+    parser.add_argument(
+        "--node-cache",
+        default=str(DEFAULT_NODE_CACHE_DB),
+        help="SQLite file caching research and report nodes across runs.",
+    )
+    parser.add_argument("--no-node-cache", action="store_true", help="Always re-run every node.")
+    parser.add_argument(
+        "--metrics",
+        type=Path,
+        help="Write time, tokens and estimated cost per node, model and tool to this file "
+        "(JSON, or the Prometheus text format for a .prom file).",
+    )
+    parser.add_argument(
+        "--trace",
+        type=Path,
+        help="Write the span timeline as a Chrome trace, open it in https://ui.perfetto.dev or analyze it with "
+        "`python -m src.agent.timeline`.",
+    )
+    return parser.parse_args()
+
+
 @logger.catch
-async def main() -> None:
+async def main(args: argparse.Namespace) -> None:
     setup_logging()
     graph_input = AgentState(
         messages=[
@@ -59,41 +112,36 @@ Entire codebase written in Python, using established libraries for AI, vision, a
     )
 
     try:
-        configurable = {"configurable": {"thread_id": "1"}}
-        graph = agent_builder.compile(
-            name="Project Planning Genie Local",
-            checkpointer=MemorySaver(),
-            cache=InMemoryCache(),
-        )  # test_graph_builder()
-        # Clarification with User Graph
-        while True:
-            full_response = ""
-            print(" ---- 🧞‍♀️ Assistant ---- \n")
-            async for message, subgraph_name in stream_graph_responses(
-                user_input=graph_input,
-                graph=graph,
-                config=configurable,
-            ):
-                # can't stream, because we need to format the questions from LLM
-                if subgraph_name == "clarify_with_user":
-                    full_response += message
-                    continue
-
-                print(full_response, end="", flush=True)
-
-            # Handle clarification
-            if subgraph_name == "clarify_with_user":
-                graph_input = await handle_clarification(full_response)
-                continue
-
-            # Handle interrupts
-            await handle_interrupts(graph, configurable)
-
-            # Check if we should continue or break
-            thread_state = graph.get_state(config=configurable)
-            if not thread_state.interrupts and thread_state.next == ():
-                logger.info("\n\n🎉 Process completed successfully!")
-                break
+        async with AsyncExitStack() as stack:
+            configurable = {"configurable": {"thread_id": args.thread_id}, "callbacks": [graph_metrics]}
+            if args.metrics:
+                stack.callback(graph_metrics.write, args.metrics, args.thread_id)
+            if args.trace:
+                span_recorder = SpanRecorder()
+                configurable["callbacks"].append(span_recorder)
+                stack.callback(span_recorder.write, args.trace)
+            # MCP servers are started on first use and kept running for the whole session
+            stack.push_async_callback(mcp_tool_service.aclose)
+            if args.durable or args.resume:
+                checkpointer = await stack.enter_async_context(open_durable_checkpointer(args.db))
+            else:
+                checkpointer = MemorySaver(serde=CompactSerializer())
+            node_cache = None if args.no_node_cache else DiskNodeCache(args.node_cache)
+            if node_cache is not None:
+                stack.callback(node_cache.close)
+                stack.callback(lambda: logger.info("Node cache stats: {}", node_cache.stats()))
+                graph_metrics.register_component("node_cache", node_cache.stats)
+            graph = agent_builder.compile(
+                name="Project Planning Genie Local",
+                checkpointer=checkpointer,
+                cache=node_cache,
+            )  # test_graph_builder()
+            if args.resume:
+                if not await describe_resume_point(graph, configurable):
+                    return
+                # `None` input continues from the last checkpoint, completed tasks are not re-run
+                graph_input = None
+            await run_session(graph, graph_input, configurable)
 
     except KeyboardInterrupt:
         logger.error("\n\n⚠️ Process interrupted by user")
@@ -103,7 +151,58 @@ Entire codebase written in Python, using established libraries for AI, vision, a
         return
 
 
-if __name__ == "__main__":
-    import asyncio
+async def run_session(
+    graph,
+    graph_input: dict | None,
+    configurable: dict,
+    input_source: InputSource | None = None,
+) -> None:
+    """
+    Stream the graph until it finishes, asking the user for clarification and tool approvals.
+
+    Questions are awaited on `input_source` (the terminal by default) without blocking the event loop, the
+    tools of the run are loaded in the meantime.
+    """
+    input_source = input_source or TerminalInput()
+    warm_up = asyncio.create_task(warm_up_tools(configurable))
+    try:
+        await _stream_session(graph, graph_input, configurable, input_source)
+    finally:
+        warm_up.cancel()
+
+
+async def _stream_session(graph, graph_input: dict | None, configurable: dict, input_source: InputSource) -> None:
+    # Clarification with User Graph
+    while True:
+        full_response = ""
+        subgraph_name = ""
+        print(" ---- 🧞‍♀️ Assistant ---- \n")
+        async for message, subgraph_name in stream_graph_responses(
+            user_input=graph_input,
+            graph=graph,
+            config=configurable,
+        ):
+            # can't stream, because we need to format the questions from LLM
+            if subgraph_name == "clarify_with_user":
+                full_response += message
+                continue
+
+            print(full_response, end="", flush=True)
 
-    asyncio.run(main())
+        # Handle clarification
+        if subgraph_name == "clarify_with_user":
+            graph_input = await handle_clarification(full_response, input_source)
+            continue
+
+        # Handle interrupts
+        await handle_interrupts(graph, configurable, input_source)
+
+        # Check if we should continue or break
+        thread_state = await graph.aget_state(config=configurable)
+        if not thread_state.interrupts and thread_state.next == ():
+            logger.info("\n\n🎉 Process completed successfully!")
+            break
+
+
+if __name__ == "__main__":
+    asyncio.run(main(parse_args()))
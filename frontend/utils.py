@@ -1,6 +1,6 @@
+import asyncio
 import json
 import re
-import sys
 from collections.abc import AsyncGenerator
 from pathlib import Path
 from typing import Any
@@ -12,23 +12,17 @@ from langgraph.types import Command
 from loguru import logger
 
 rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+from frontend.async_input import InputSource, TerminalInput  # noqa: E402
+from src.agent.configuration import Configuration, ReportSaveMode  # noqa: E402
+from src.agent.final_report_generation import mcp_tool_service  # noqa: E402
+from src.agent.log_utils import configure_logging  # noqa: E402
 from src.agent.states import ClarifyWithUser  # noqa: E402
+from src.agent.tool_registry import tool_registry  # noqa: E402
 
 
 def setup_logging() -> None:
     """Configure logging for the application."""
-    logging_config = {
-        "handlers": [
-            {"sink": sys.stdout, "level": "INFO", "colorize": True},
-            {
-                "sink": f"{Path.cwd().parent / f'{__name__}.log'}",
-                "enqueue": True,
-                "level": "DEBUG",
-                "rotation": "1 MB",
-            },
-        ],
-    }
-    logger.configure(**logging_config)
+    configure_logging(Path.cwd().parent / f"{__name__}.log", max_bytes=1024 * 1024)
 
 
 async def process_tool_call_chunk(chunk: ToolCallChunk):
@@ -81,7 +75,7 @@ async def stream_graph_responses(
                 yield message.content, subgraph_name
 
 
-async def handle_clarification(full_response: str) -> dict:
+async def handle_clarification(full_response: str, input_source: InputSource | None = None) -> dict:
     """Handle user clarification workflow."""
     pattern = r"\{.*\}"
     match_str = re.search(pattern, full_response, re.DOTALL)
@@ -90,15 +84,16 @@ async def handle_clarification(full_response: str) -> dict:
     question: ClarifyWithUser = ClarifyWithUser.model_validate(str_to_dict)
     print(question.question, end="", flush=True)
 
-    user_input = input("\n\nUser Clarification needed: ").strip()
+    user_input = await (input_source or TerminalInput()).ask("\n\nUser Clarification needed: ")
     print(f"\n\n ----- 🥷 Human ----- \n\n{user_input}\n")
 
     return {"messages": [HumanMessage(content=user_input)]}
 
 
-async def handle_interrupts(graph: CompiledStateGraph, config: dict) -> None:
+async def handle_interrupts(graph: CompiledStateGraph, config: dict, input_source: InputSource | None = None) -> None:
     """Handle human-in-the-loop interrupts."""
-    thread_state = graph.get_state(config=config)
+    input_source = input_source or TerminalInput()
+    thread_state = await graph.aget_state(config=config)
 
     while thread_state.interrupts:
         for interrupt in thread_state.interrupts:
@@ -109,7 +104,7 @@ async def handle_interrupts(graph: CompiledStateGraph, config: dict) -> None:
 
             # Get user action
             while True:
-                user_input = input("Action (accept/feedback): ").strip().lower()
+                user_input = (await input_source.ask("Action (accept/feedback): ")).lower()
                 if user_input in ["accept", "feedback"]:
                     break
                 print("Please enter 'accept' or 'feedback'")
@@ -118,7 +113,7 @@ async def handle_interrupts(graph: CompiledStateGraph, config: dict) -> None:
             if user_input == "accept":
                 user_response = Command(resume={"action": "accept", "feedback": None})
             else:
-                feedback = input("Please provide your feedback: ").strip()
+                feedback = await input_source.ask("Please provide your feedback: ")
                 user_response = Command(resume={"action": "feedback", "feedback": feedback})
 
             # Continue execution
@@ -130,7 +125,41 @@ async def handle_interrupts(graph: CompiledStateGraph, config: dict) -> None:
             ):
                 logger.debug(message, end="", flush=True)
 
-        thread_state = graph.get_state(config=config)
+        thread_state = await graph.aget_state(config=config)
+
+
+async def warm_up_tools(config: dict) -> None:
+    """
+    Load the tools the run is going to need, meant to run while the user answers a question.
+
+    The research toolset is bound and, when the tool manager saves the report, the MCP servers are started.
+    Failures are only logged, the actual tool use reports them.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    warm_ups = [tool_registry.get_toolset(configurable)]
+    if configurable.report_save_mode is ReportSaveMode.TOOL_MANAGER:
+        warm_ups.append(mcp_tool_service.get_tools())
+    for result in await asyncio.gather(*warm_ups, return_exceptions=True):
+        if isinstance(result, Exception):
+            logger.debug("Tool warm-up failed: {}", result)
+
+
+async def describe_resume_point(graph: CompiledStateGraph, config: dict) -> bool:
+    """Log where a persisted thread stopped, returns False when there is nothing left to resume."""
+    thread_state = await graph.aget_state(config=config)
+    thread_id = config["configurable"]["thread_id"]
+    if not thread_state.created_at:
+        logger.error(f"No checkpoint found for thread {thread_id}")
+        return False
+    if not thread_state.next and not thread_state.interrupts:
+        logger.info(f"Thread {thread_id} already completed, nothing to resume")
+        return False
+    step = (thread_state.metadata or {}).get("step")
+    logger.info(
+        f"Resuming thread {thread_id} at step {step}, next: {', '.join(thread_state.next)} "
+        f"(checkpoint {thread_state.config['configurable'].get('checkpoint_id')})",
+    )
+    return True
 
 
 final_report_generation_input = {
@@ -0,0 +1,99 @@
+"""
+Declarative auto-approval of protected tool calls.
+
+By default every call of a protected tool (`write_file`, `create_directory`, ...) interrupts the graph for a
+human review. An `ApprovalPolicy` lists what may run unattended; `should_continue` sends calls that satisfy
+it straight to `mcp_tool_call` and only interrupts for violations. Evaluating a policy is a few glob matches
+and at most one `stat` per written path.
+
+Set it through the `tool_approval_policy` configuration, e.g. the `TOOL_APPROVAL_POLICY` environment variable:
+
+    {"allowed_tools": ["create_directory", "write_file"],
+     "allowed_paths": ["/projects/workspace/generated_examples/**"],
+     "max_file_bytes": 1000000, "allow_overwrite": false}
+"""
+
+import posixpath
+from collections.abc import Sequence
+from pathlib import Path, PurePosixPath
+
+from langchain_core.messages import ToolCall
+from pydantic import BaseModel, ConfigDict, Field
+
+try:
+    from .filesystem_tools import DEFAULT_MOUNT
+    from .tool_call_planner import get_path_access
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.filesystem_tools import DEFAULT_MOUNT
+    from src.agent.tool_call_planner import get_path_access
+
+
+def _matches(path: str, pattern: str) -> bool:
+    # "dir/**" covers the directory itself as well, so that it may be created
+    return PurePosixPath(path).full_match(pattern) or (
+        pattern.endswith("/**") and PurePosixPath(path).full_match(pattern.removesuffix("/**"))
+    )
+
+
+class ApprovalPolicy(BaseModel):
+    """Protected tool calls that are approved without asking."""
+
+    model_config = ConfigDict(frozen=True)
+
+    allowed_tools: tuple[str, ...] = Field(
+        default=("create_directory", "write_file"),
+        description="Tools that may be auto-approved, any other protected tool is reviewed.",
+    )
+    allowed_paths: tuple[str, ...] = Field(
+        default=(f"{DEFAULT_MOUNT}/**",),
+        description="Globs every written path must match, `**` matches any number of directories.",
+    )
+    max_file_bytes: int = Field(default=1_000_000, description="Largest content a single call may write.")
+    allow_overwrite: bool = Field(default=False, description="Whether existing files may be replaced.")
+    mount: str = Field(default=DEFAULT_MOUNT, description="Path the workspace is exposed under to the model.")
+
+    def violations(self, tool_calls: Sequence[ToolCall], workspace: str | Path | None = None) -> list[str]:
+        """
+        Why `tool_calls` can not be auto-approved, an empty list when they all can.
+
+        Args:
+            tool_calls: Calls to check.
+            workspace: Local directory behind `mount`, used to detect overwrites. Without it, writes to files
+                can only be approved when `allow_overwrite` is set.
+
+        """
+        return [violation for tool_call in tool_calls for violation in self._check(tool_call, workspace)]
+
+    def _check(self, tool_call: ToolCall, workspace: str | Path | None) -> list[str]:
+        name, args = tool_call["name"], tool_call["args"]
+        if name not in self.allowed_tools:
+            return [f"{name} is not an auto-approved tool"]
+        access = get_path_access(tool_call)
+        if access is None:
+            return [f"{name} has no known path arguments"]
+
+        violations = [
+            f"{name} writes {path} outside of the allowed paths"
+            for path in sorted(access.writes)
+            if not any(_matches(path, pattern) for pattern in self.allowed_paths)
+        ]
+        size = len(str(args.get("content", "")).encode()) + sum(
+            len(str(edit.get("newText", "")).encode()) for edit in args.get("edits", []) if isinstance(edit, dict)
+        )
+        if size > self.max_file_bytes:
+            violations.append(f"{name} writes {size} bytes, more than {self.max_file_bytes}")
+        # edit_file changes an existing file in place, like a write over it
+        if not self.allow_overwrite and name in {"write_file", "edit_file", "move_file"}:
+            target = args.get("path") or args.get("destination")
+            if self._may_exist(str(target), workspace):
+                violations.append(f"{name} may overwrite {target}")
+        return violations
+
+    def _may_exist(self, path: str, workspace: str | Path | None) -> bool:
+        virtual = PurePosixPath(posixpath.normpath(path))
+        if workspace is None or not virtual.is_relative_to(self.mount):
+            return True
+        return (Path(workspace) / virtual.relative_to(self.mount)).exists()
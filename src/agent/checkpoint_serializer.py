@@ -0,0 +1,252 @@
+"""
+Compact checkpoint serializer.
+
+Long planning threads checkpoint the full message history, search dumps and the final report at every
+super-step, so the same large strings are written again and again. `CompactSerializer` wraps any LangGraph
+serializer and
+
+1. encodes LangChain messages and research notes as small positional records instead of full dumps,
+2. replaces large strings with a content hash stored once in a shared `ContentStore`, and
+3. compresses the resulting payload with zstd (falls back to zlib when `zstandard` is not installed).
+
+It plugs into any checkpointer through the `serde` argument, e.g. `MemorySaver(serde=CompactSerializer())`.
+"""
+
+import hashlib
+import sqlite3
+import threading
+import zlib
+from pathlib import Path
+from typing import Any, Protocol
+
+from langchain_core.messages import (
+    AIMessage,
+    AIMessageChunk,
+    BaseMessage,
+    ChatMessage,
+    FunctionMessage,
+    HumanMessage,
+    SystemMessage,
+    ToolMessage,
+)
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+
+try:
+    from .states import CHECKPOINTED_TYPES, Note, NoteLog
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.states import CHECKPOINTED_TYPES, Note, NoteLog
+
+try:
+    import zstandard
+except ImportError:  # pragma: no cover - zstandard is pulled in by langsmith
+    zstandard = None
+
+TYPE_PREFIX = "compact"
+MESSAGE_MARKER = "__pg_msg__"
+REF_MARKER = "__pg_ref__"
+NOTE_MARKER = "__pg_note__"
+
+MESSAGE_TYPES: dict[str, type[BaseMessage]] = {
+    "ai": AIMessage,
+    "AIMessageChunk": AIMessageChunk,
+    "human": HumanMessage,
+    "system": SystemMessage,
+    "tool": ToolMessage,
+    "function": FunctionMessage,
+    "chat": ChatMessage,
+}
+
+
+def state_serializer() -> JsonPlusSerializer:
+    """`JsonPlusSerializer` deserializing the custom state types, without warnings and in strict msgpack mode."""
+    return JsonPlusSerializer(allowed_msgpack_modules=[(cls.__module__, cls.__name__) for cls in CHECKPOINTED_TYPES])
+
+
+class ContentStore(Protocol):
+    """Content addressed storage shared by every checkpoint written with the same serializer."""
+
+    def get(self, key: str) -> str | None: ...
+
+    def put(self, key: str, value: str) -> None: ...
+
+
+class InMemoryContentStore:
+    """Thread safe in-process `ContentStore`, suitable for `MemorySaver`."""
+
+    def __init__(self) -> None:
+        self._data: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def get(self, key: str) -> str | None:
+        return self._data.get(key)
+
+    def put(self, key: str, value: str) -> None:
+        with self._lock:
+            self._data.setdefault(key, value)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate size of the stored contents in bytes."""
+        return sum(len(value) for value in self._data.values())
+
+
+class SqliteContentStore:
+    """
+    `ContentStore` persisted in a SQLite table, used with durable checkpointers.
+
+    Contents are committed before the checkpoint referencing them is written, so a checkpoint never points
+    at a missing entry after a crash.
+    """
+
+    def __init__(self, path: str | Path) -> None:
+        self._conn = sqlite3.connect(str(path), check_same_thread=False, isolation_level=None)
+        self._lock = threading.Lock()
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS checkpoint_contents (key TEXT PRIMARY KEY, value TEXT NOT NULL)",
+            )
+        self._known: set[str] = set()
+
+    def get(self, key: str) -> str | None:
+        with self._lock:
+            row = self._conn.execute("SELECT value FROM checkpoint_contents WHERE key = ?", (key,)).fetchone()
+        return row[0] if row else None
+
+    def put(self, key: str, value: str) -> None:
+        if key in self._known:
+            return
+        with self._lock:
+            self._conn.execute("INSERT OR IGNORE INTO checkpoint_contents (key, value) VALUES (?, ?)", (key, value))
+            self._known.add(key)
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+class CompactSerializer(SerializerProtocol):
+    """
+    Deduplicating, compressing wrapper around a LangGraph serializer.
+
+    Args:
+        serde: Inner serializer used for everything that is not a message or a large string.
+            Defaults to `state_serializer()`.
+        store: Where deduplicated contents are kept. Must outlive the checkpoints that reference it.
+        min_dedup_chars: Strings shorter than this are inlined instead of being stored by reference.
+        compression_level: zstd (or zlib) compression level.
+
+    """
+
+    def __init__(
+        self,
+        serde: SerializerProtocol | None = None,
+        store: ContentStore | None = None,
+        min_dedup_chars: int = 256,
+        compression_level: int = 3,
+    ) -> None:
+        self.serde = serde or state_serializer()
+        self.store = store if store is not None else InMemoryContentStore()
+        self.min_dedup_chars = min_dedup_chars
+        self.compression_level = compression_level
+        self.codec = "zstd" if zstandard is not None else "zlib"
+
+    # --- SerializerProtocol ------------------------------------------------------------------------
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        inner_type, payload = self.serde.dumps_typed(self._encode(obj))
+        return f"{TYPE_PREFIX}:{self.codec}:{inner_type}", self._compress(payload)
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        type_, payload = data
+        if not type_.startswith(f"{TYPE_PREFIX}:"):
+            # Checkpoints written before the serializer was enabled
+            return self.serde.loads_typed(data)
+        _, codec, inner_type = type_.split(":", 2)
+        return self._decode(self.serde.loads_typed((inner_type, self._decompress(codec, payload))))
+
+    # --- compression -------------------------------------------------------------------------------
+
+    def _compress(self, payload: bytes) -> bytes:
+        if self.codec == "zstd":
+            # Module level helpers: (de)compressor objects are not safe to share across threads
+            return zstandard.compress(payload, self.compression_level)
+        return zlib.compress(payload, self.compression_level)
+
+    def _decompress(self, codec: str, payload: bytes) -> bytes:
+        if codec == "zstd":
+            if zstandard is None:
+                msg = "Checkpoint was written with zstd but `zstandard` is not installed"
+                raise RuntimeError(msg)
+            return zstandard.decompress(payload)
+        return zlib.decompress(payload)
+
+    # --- compact encoding --------------------------------------------------------------------------
+
+    def _encode(self, obj: Any) -> Any:
+        if isinstance(obj, str):
+            return self._encode_str(obj)
+        if isinstance(obj, BaseMessage) and obj.type in MESSAGE_TYPES:
+            return self._encode_message(obj)
+        if isinstance(obj, Note):
+            return {NOTE_MARKER: [self._encode(obj.content), obj.topic]}
+        if isinstance(obj, (list, tuple, NoteLog)):
+            items = [self._encode(item) for item in obj]
+            return tuple(items) if isinstance(obj, tuple) else items
+        if type(obj) is dict:
+            return {key: self._encode(value) for key, value in obj.items()}
+        return obj
+
+    def _encode_str(self, value: str) -> str | dict[str, str]:
+        if len(value) < self.min_dedup_chars:
+            return value
+        key = hashlib.blake2b(value.encode("utf-8"), digest_size=16).hexdigest()
+        self.store.put(key, value)
+        return {REF_MARKER: key}
+
+    def _encode_message(self, message: BaseMessage) -> dict[str, list[Any]]:
+        """Encode a message as `[type, content, id, extra_fields]`, dropping every default valued field."""
+        extra = message.model_dump(exclude_defaults=True, exclude={"type", "content", "id"})
+        return {
+            MESSAGE_MARKER: [
+                message.type,
+                self._encode(message.content),
+                message.id,
+                self._encode(extra) if extra else None,
+            ],
+        }
+
+    def _decode(self, obj: Any) -> Any:
+        if isinstance(obj, (list, tuple)):
+            items = [self._decode(item) for item in obj]
+            return tuple(items) if isinstance(obj, tuple) else items
+        if type(obj) is dict:
+            if len(obj) == 1 and REF_MARKER in obj:
+                return self._resolve(obj[REF_MARKER])
+            if len(obj) == 1 and MESSAGE_MARKER in obj:
+                return self._decode_message(obj[MESSAGE_MARKER])
+            if len(obj) == 1 and NOTE_MARKER in obj:
+                content, topic = obj[NOTE_MARKER]
+                return Note(content=self._decode(content), topic=topic)
+            return {key: self._decode(value) for key, value in obj.items()}
+        return obj
+
+    def _decode_message(self, record: list[Any]) -> BaseMessage:
+        type_, content, id_, extra = record
+        fields = self._decode(extra) if extra else {}
+        return MESSAGE_TYPES[type_](content=self._decode(content), id=id_, **fields)
+
+    def _resolve(self, key: str) -> str:
+        value = self.store.get(key)
+        if value is None:
+            msg = f"Content {key} referenced by checkpoint is missing from the content store"
+            raise KeyError(msg)
+        return value
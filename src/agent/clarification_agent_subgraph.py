@@ -1,5 +1,6 @@
 """Clarification Agent Subgraph."""
 
+import re
 from typing import Literal
 
 from langchain.chat_models import init_chat_model
@@ -12,24 +13,48 @@ from loguru import logger
 
 try:
     from .configuration import Configuration
+    from .log_utils import brief, sampled_debug
+    from .prefetch import start_prefetch
     from .prompts import (
+        CLARIFY_WITH_USER_AND_BRIEF_INSTRUCTIONS,
         CLARIFY_WITH_USER_INSTRUCTIONS,
         LEAD_RESEARCHER_PROMPT,
         TRANSFORM_MESSAGES_INTO_RESEARCH_TOPIC_PROMPT,
     )
-    from .states import AgentInputState, AgentState, ClarifyWithUser, ResearchQuestion, StatesKeys
+    from .retry import RetryPolicy, retry_engine
+    from .search_cache import scope_of, search_cache
+    from .states import (
+        AgentInputState,
+        AgentState,
+        ClarifyWithUser,
+        ClarifyWithUserAndBrief,
+        ResearchQuestion,
+        StatesKeys,
+    )
     from .utils import get_today_str
 except ImportError:
     import rootutils
 
     rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
     from src.agent.configuration import Configuration
+    from src.agent.log_utils import brief, sampled_debug
+    from src.agent.prefetch import start_prefetch
     from src.agent.prompts import (
+        CLARIFY_WITH_USER_AND_BRIEF_INSTRUCTIONS,
         CLARIFY_WITH_USER_INSTRUCTIONS,
         LEAD_RESEARCHER_PROMPT,
         TRANSFORM_MESSAGES_INTO_RESEARCH_TOPIC_PROMPT,
     )
-    from src.agent.states import AgentInputState, AgentState, ClarifyWithUser, ResearchQuestion, StatesKeys
+    from src.agent.retry import RetryPolicy, retry_engine
+    from src.agent.search_cache import scope_of, search_cache
+    from src.agent.states import (
+        AgentInputState,
+        AgentState,
+        ClarifyWithUser,
+        ClarifyWithUserAndBrief,
+        ResearchQuestion,
+        StatesKeys,
+    )
     from src.agent.utils import get_today_str
 
 # Initialize a configurable model that we will use throughout the agent
@@ -37,35 +62,81 @@ clarification_model = init_chat_model(
     configurable_fields=("model", "max_tokens", "model_provider"),
 )
 
+# Sentences or lines of at least this many words count as one requirement of the request
+MIN_DETAIL_WORDS = 3
+# Requirements a long request needs to be considered well specified
+MIN_DETAILS = 4
+
+
+def is_well_specified(messages: list, min_words: int) -> bool:
+    """
+    Cheap check whether the user's messages describe the project well enough to skip clarification.
+
+    The user's text needs at least `min_words` words spread over `MIN_DETAILS` sentences or list items, a long
+    single run-on sentence or pasted blob is still clarified by the model. A `min_words` of 0 disables the check.
+    """
+    if min_words <= 0:
+        return False
+    text = "\n".join(str(message.content) for message in messages if isinstance(message, HumanMessage))
+    details = [part for part in re.split(r"[.!?;\n]+", text) if len(part.split()) >= MIN_DETAIL_WORDS]
+    return len(text.split()) >= min_words and len(details) >= MIN_DETAILS
+
+
+def research_brief_update(research_brief: str, config: Configuration) -> dict:
+    """State update handing the research brief to the supervisor."""
+    return {
+        StatesKeys.RESEARCH_BRIEF.value: research_brief,
+        StatesKeys.SUPERVISOR_MSGS.value: [
+            SystemMessage(
+                content=LEAD_RESEARCHER_PROMPT.format(
+                    date=get_today_str(),
+                    max_concurrent_research_units=config.max_concurrent_research_units,
+                ),
+            ),
+            HumanMessage(content=research_brief),
+        ],
+    }
+
 
 async def clarify_with_user(
     state: AgentState,
     config: RunnableConfig,
-) -> Command[Literal["write_research_brief", "__end__"]]:
+) -> Command[Literal["write_research_brief", "supervisor_subgraph", "__end__"]]:
     """
     Clarify the user's project idea through interaction.
 
     This function engages with the user to clarify their project description,
     ensuring all necessary details are gathered before moving to the research phase.
-    If clarification is not allowed by the configuration, it directly proceeds to
-    writing the research brief.
+    If clarification is not allowed by the configuration, or the request is already long and detailed, it directly
+    proceeds to writing the research brief. With `clarification_brief_fast_path` the same call also writes the
+    research brief and, when no clarification is needed, goes straight to the supervisor. With
+    `speculative_prefetch` a question to the user starts prefetching likely research topics in the background.
 
     Args:
         state (AgentState): The current state containing messages exchanged with the user.
         config (RunnableConfig): Configuration parameters determining model and clarification settings.
 
     Returns:
-        Command: An instruction indicating the next step, either updating the messages for further clarification
-        or proceeding to write the research brief.
+        Command: An instruction indicating the next step, either updating the messages for further clarification,
+        proceeding to write the research brief or handing the research brief to the supervisor.
 
     """
     logger.info("Clarifying with user...")
+    scope = scope_of(config)
     config = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for clarification: {}", config)
+    sampled_debug("Configuration for clarification: {}", brief(config))
     if not config.allow_clarification:
         return Command(goto="write_research_brief")
 
     messages = state[StatesKeys.MSGS.value]
+    if is_well_specified(messages, config.skip_clarification_min_words):
+        logger.info("Request is well specified, skipping clarification.")
+        return Command(goto="write_research_brief")
+    schema, instructions = (
+        (ClarifyWithUserAndBrief, CLARIFY_WITH_USER_AND_BRIEF_INSTRUCTIONS)
+        if config.clarification_brief_fast_path
+        else (ClarifyWithUser, CLARIFY_WITH_USER_INSTRUCTIONS)
+    )
     model_config = {
         "model": config.clarification_model,
         "max_tokens": config.clarification_model_max_tokens,
@@ -74,55 +145,51 @@ async def clarify_with_user(
     }
     logger.debug("Model configuration for clarification: {}", model_config)
     model = (
-        clarification_model.with_structured_output(ClarifyWithUser)
+        clarification_model.with_structured_output(schema)
         .with_retry(stop_after_attempt=config.max_structured_output_retries)
         .with_config(model_config)
     )
-    synthesize_attempts = 0
-    while synthesize_attempts < config.clarification_attempts:
-        try:
-            response: ClarifyWithUser = await model.ainvoke(
-                [
-                    HumanMessage(
-                        content=CLARIFY_WITH_USER_INSTRUCTIONS.format(
-                            messages=get_buffer_string(messages),
-                            date=get_today_str(),
-                        ),
-                    ),
-                ],
-            )
-            if response.need_clarification:
-                logger.info("User needs clarification.")
-                return Command(
-                    goto=END,
-                    update={
-                        StatesKeys.MSGS.value: [*messages, AIMessage(content=response.question)],
-                    },
-                )
-            logger.info("User does not need clarification.")
-            break
-        except Exception as e:
-            logger.error(e)
-            synthesize_attempts += 1
-            logger.warning("Attempts: " + str(synthesize_attempts) + ". Retrying...")
-            print("Attempts: " + str(synthesize_attempts) + ". Retrying...")
-            if synthesize_attempts == config.clarification_attempts:
-                logger.error("Failed to synthesize response after " + str(synthesize_attempts) + " attempts.")
-                raise
+    prompt = instructions.format(messages=get_buffer_string(messages), date=get_today_str())
+    try:
+        response: ClarifyWithUser = await retry_engine.call(
+            lambda: model.ainvoke([HumanMessage(content=prompt)]),
+            model=config.clarification_model,
+            policy=RetryPolicy(max_attempts=config.clarification_attempts),
+        )
+    except Exception:
+        logger.exception("Failed to synthesize the clarification response.")
+        raise
+    if response.need_clarification:
+        logger.info("User needs clarification.")
+        if config.speculative_prefetch:
+            start_prefetch(messages, config, scope)
+        return Command(
+            goto=END,
+            update={
+                StatesKeys.MSGS.value: [*messages, AIMessage(content=response.question)],
+            },
+        )
+    logger.info("User does not need clarification.")
+    messages_update = {StatesKeys.MSGS.value: [*messages, AIMessage(content=response.verification)]}
+    research_brief = getattr(response, "research_brief", "")
+    if research_brief:
+        sampled_debug("Research brief created with the clarification: {}", brief(research_brief))
+        search_cache.settle(scope, research_brief)
+        logger.info("Clarification complete, proceeding to supervisor subgraph.")
+        return Command(
+            goto="supervisor_subgraph",
+            update={**messages_update, **research_brief_update(research_brief, config)},
+        )
     logger.info("Clarification complete, proceeding to write research brief.")
-    return Command(
-        goto="write_research_brief",
-        update={
-            StatesKeys.MSGS.value: [*messages, AIMessage(content=response.verification)],
-        },
-    )
+    return Command(goto="write_research_brief", update=messages_update)
 
 
 async def write_research_brief(state: AgentState, config: RunnableConfig) -> Command[Literal["supervisor_subgraph"]]:
     """Create the research brief from previous conversations to prepare for research."""
     logger.info("Writing research brief...")
+    scope = scope_of(config)
     config = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for writing research brief: {}", config)
+    sampled_debug("Configuration for writing research brief: {}", brief(config))
     research_model_config = {
         "model": config.research_model,
         "max_tokens": config.research_model_max_tokens,
@@ -142,23 +209,11 @@ async def write_research_brief(state: AgentState, config: RunnableConfig) -> Com
             ),
         ],
     )
-    logger.debug("Research brief created: {}", response.research_brief)
+    sampled_debug("Research brief created: {}", brief(response.research_brief))
+    # Keep the speculative prefetches of the brief's topics, drop the others
+    search_cache.settle(scope, response.research_brief)
     logger.info("Proceeding to supervisor subgraph for further processing.")
-    return Command(
-        goto="supervisor_subgraph",
-        update={
-            StatesKeys.RESEARCH_BRIEF.value: response.research_brief,
-            StatesKeys.SUPERVISOR_MSGS.value: [
-                SystemMessage(
-                    content=LEAD_RESEARCHER_PROMPT.format(
-                        date=get_today_str(),
-                        max_concurrent_research_units=config.max_concurrent_research_units,
-                    ),
-                ),
-                HumanMessage(content=response.research_brief),
-            ],
-        },
-    )
+    return Command(goto="supervisor_subgraph", update=research_brief_update(response.research_brief, config))
 
 
 clarify_builder = StateGraph(
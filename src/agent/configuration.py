@@ -1,11 +1,20 @@
 """Configuration for the Agent/App."""
 
+import json
 import os
 from enum import Enum
 from typing import Any
 
 from langchain_core.runnables import RunnableConfig
-from pydantic import BaseModel, Field
+from pydantic import BaseModel, Field, field_validator
+
+try:
+    from .approval_policy import ApprovalPolicy
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.approval_policy import ApprovalPolicy
 
 # ---------- Available models in .env files --------------------------------------------
 LOCAL_QWEN2_5_14B: str = "ollama:qwen2.5:14b"  # context windows 128K
@@ -26,6 +35,20 @@ class SearchAPI(Enum):
     NONE = "none"
 
 
+class ReportSaveMode(Enum):
+    """How the final report is saved."""
+
+    DIRECT = "direct"  # written by the graph to <report_root>/<report_directory>/<title>.md
+    TOOL_MANAGER = "tool_manager"  # an LLM with the MCP filesystem tools decides where and how to save it
+
+
+class ModelTier(BaseModel):
+    """A model taking requests of up to `max_input_tokens` estimated input tokens."""
+
+    model: str
+    max_input_tokens: int
+
+
 class Defaults(Enum):
     """all Defaults settings."""
 
@@ -38,6 +61,7 @@ class Defaults(Enum):
     MCP_TOOL_MANAGER_MODEL: str = GEMINI_2_0_FLASH
 
     SEARCH_API: SearchAPI = SearchAPI.TAVILY
+    REPORT_SAVE_MODE: ReportSaveMode = ReportSaveMode.DIRECT
 
 
 class Configuration(BaseModel):
@@ -151,6 +175,52 @@ class Configuration(BaseModel):
             },
         },
     )
+    min_research_novelty: float = Field(
+        default=0.15,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "slider",
+                "default": 0.15,
+                "min": 0.0,
+                "max": 1.0,
+                "step": 0.05,
+                "description": "Stop a researcher's search loop when less than this share of the new search results is new to it. 0 disables early stopping.",
+            },
+        },
+    )
+    max_concurrent_search_calls: int = Field(
+        default=4,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "slider",
+                "default": 4,
+                "min": 1,
+                "max": 20,
+                "step": 1,
+                "description": "Maximum number of search tool calls running at the same time across all researchers.",
+            },
+        },
+    )
+    tool_call_timeout: float = Field(
+        default=90.0,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 90.0,
+                "description": "Seconds a single research tool call may take before it is reported as timed out.",
+            },
+        },
+    )
+    research_complete_grace_period: float = Field(
+        default=5.0,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 5.0,
+                "description": "Seconds other tool calls may keep running once ResearchComplete is called, stragglers are cancelled.",
+            },
+        },
+    )
     # --- Compression Model --------------------------------------------------------------------------
     compression_model: str = Field(
         default=Defaults.COMPRESSION_MODEL.value,
@@ -182,6 +252,16 @@ class Configuration(BaseModel):
             },
         },
     )
+    compression_model_tiers: list[ModelTier] = Field(
+        default=[],
+        metadata={
+            "x_oap_ui_config": {
+                "type": "json",
+                "default": [],
+                "description": 'Smaller models for small research bundles, e.g. [{"model": "openai:gpt-4o-mini", "max_input_tokens": 8000}]. A bundle goes to the smallest tier it fits, larger bundles and failed calls go to the next tier and finally to the compression model.',
+            },
+        },
+    )
     # --- Summarization Model --------------------------------------------------------------------------
     summarization_model: str = Field(
         default=Defaults.SUMMARIZATION_MODEL.value,
@@ -203,6 +283,16 @@ class Configuration(BaseModel):
             },
         },
     )
+    summarization_model_tiers: list[ModelTier] = Field(
+        default=[],
+        metadata={
+            "x_oap_ui_config": {
+                "type": "json",
+                "default": [],
+                "description": 'Smaller models for short pages, e.g. [{"model": "ollama:qwen3:8b", "max_input_tokens": 1500}]. A page goes to the smallest tier it fits, longer pages and failed calls go to the next tier and finally to the summarization model.',
+            },
+        },
+    )
     max_structured_output_retries: int = Field(
         default=3,
         metadata={
@@ -225,6 +315,49 @@ class Configuration(BaseModel):
             },
         },
     )
+    clarification_brief_fast_path: bool = Field(
+        default=True,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "boolean",
+                "default": True,
+                "description": "Whether the clarification call also writes the research brief, skipping the separate brief call when no clarification is needed",
+            },
+        },
+    )
+    speculative_prefetch: bool = Field(
+        default=False,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "boolean",
+                "default": False,
+                "description": "Whether to prefetch searches of likely research topics while the user answers a clarification question",
+            },
+        },
+    )
+    speculative_prefetch_queries: int = Field(
+        default=3,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 3,
+                "min": 1,
+                "max": 10,
+                "description": "Maximum number of likely research topics searched speculatively during clarification",
+            },
+        },
+    )
+    skip_clarification_min_words: int = Field(
+        default=150,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 150,
+                "min": 0,
+                "description": "Skip clarification for detailed requests of at least this many words (0 always asks the model)",
+            },
+        },
+    )
     # --- Final Report Model --------------------------------------------------------------------------
     final_report_generation_model: str = Field(
         default=Defaults.FINAL_REPORT_GENERATION_MODEL.value,
@@ -267,6 +400,164 @@ class Configuration(BaseModel):
             },
         },
     )
+    # --- Report Saving --------------------------------------------------------------------------
+    report_save_mode: ReportSaveMode = Field(
+        default=Defaults.REPORT_SAVE_MODE.value,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "select",
+                "default": Defaults.REPORT_SAVE_MODE.value.value,
+                "options": [
+                    {"label": "Direct", "value": ReportSaveMode.DIRECT.value},
+                    {"label": "LLM Tool Manager", "value": ReportSaveMode.TOOL_MANAGER.value},
+                ],
+                "description": "Direct writes the report file without any model call, the tool manager lets a model save it with the MCP filesystem tools.",
+            },
+        },
+    )
+    report_root: str | None = Field(
+        default=None,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "text",
+                "description": "Directory reports are saved under. Defaults to the WORKSPACE environment variable mounted into the filesystem MCP server, or the current directory.",
+            },
+        },
+    )
+    report_directory: str = Field(
+        default="generated_examples",
+        metadata={
+            "x_oap_ui_config": {
+                "type": "text",
+                "default": "generated_examples",
+                "description": "Sub directory of the report root reports are saved in.",
+            },
+        },
+    )
+    tool_approval_policy: ApprovalPolicy | None = Field(
+        default=None,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "json",
+                "description": 'Protected tool calls matching this policy run without human review, e.g. {"allowed_paths": ["/projects/workspace/generated_examples/**"]}. Without a policy every protected call is reviewed.',
+            },
+        },
+    )
+
+    # --- Hedged Requests ----------------------------------------------------------------------------
+    hedged_nodes: list[str] = Field(
+        default=[],
+        metadata={
+            "x_oap_ui_config": {
+                "type": "json",
+                "default": [],
+                "description": 'Nodes whose slow model calls start a backup request, e.g. ["supervisor", "research_agent", "final_report_generation"]. A backup costs a second call.',
+            },
+        },
+    )
+    hedge_percentile: float = Field(
+        default=0.95,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "slider",
+                "default": 0.95,
+                "min": 0.5,
+                "max": 0.99,
+                "step": 0.01,
+                "description": "A backup request is started when a call is slower than this percentile of the recent calls of the same node and model.",
+            },
+        },
+    )
+    max_hedge_rate: float = Field(
+        default=0.1,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "slider",
+                "default": 0.1,
+                "min": 0.0,
+                "max": 0.5,
+                "step": 0.01,
+                "description": "Share of the recent calls of a node and model that may start a backup request.",
+            },
+        },
+    )
+    hedge_backup_model: str = Field(
+        default="",
+        metadata={
+            "x_oap_ui_config": {
+                "type": "text",
+                "default": "",
+                "description": "Model of the backup requests, e.g. openai:gpt-4o-mini. Empty sends the backup to the same model.",
+            },
+        },
+    )
+    # --- Knowledge Base ----------------------------------------------------------------------------
+    knowledge_base: bool = Field(
+        default=False,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "boolean",
+                "default": False,
+                "description": "Whether to store research findings locally and answer similar research topics of later runs from them",
+            },
+        },
+    )
+    knowledge_base_path: str = Field(
+        default=".genie/knowledge_base.sqlite",
+        metadata={
+            "x_oap_ui_config": {
+                "type": "text",
+                "default": ".genie/knowledge_base.sqlite",
+                "description": "SQLite file of the knowledge base, shared by every run on this machine",
+            },
+        },
+    )
+    knowledge_base_max_age_days: float = Field(
+        default=30,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "number",
+                "default": 30,
+                "min": 0,
+                "description": "Findings older than this many days are researched again",
+            },
+        },
+    )
+    knowledge_base_min_score: float = Field(
+        default=0.6,
+        metadata={
+            "x_oap_ui_config": {
+                "type": "slider",
+                "default": 0.6,
+                "min": 0.0,
+                "max": 1.0,
+                "step": 0.05,
+                "description": "Minimum topic similarity for a stored finding to answer a research topic, 1 only reuses identical topics",
+            },
+        },
+    )
+
+    @field_validator("summarization_model_tiers", "compression_model_tiers", mode="before")
+    @classmethod
+    def parse_model_tiers(cls, value: Any) -> Any:
+        """Accept the tiers as a JSON string, as they come from the environment."""
+        return json.loads(value) if isinstance(value, str) else value
+
+    @field_validator("hedged_nodes", mode="before")
+    @classmethod
+    def parse_hedged_nodes(cls, value: Any) -> Any:
+        """Accept the nodes as a JSON list or a comma separated string, as they come from the environment."""
+        if not isinstance(value, str):
+            return value
+        if value.lstrip().startswith("["):
+            return json.loads(value)
+        return [node.strip() for node in value.split(",") if node.strip()]
+
+    @field_validator("tool_approval_policy", mode="before")
+    @classmethod
+    def parse_tool_approval_policy(cls, value: Any) -> Any:
+        """Accept the policy as a JSON string, as it comes from the environment."""
+        return json.loads(value) if isinstance(value, str) else value
 
     @classmethod
     def from_runnable_config(
@@ -0,0 +1,173 @@
+"""
+Durable local checkpointer.
+
+`MemorySaver` loses every supervisor and researcher step when the process dies. `DurableSqliteSaver` keeps
+the checkpoints in a local SQLite file so a thread can be resumed from its last completed node:
+
+- the database runs in WAL mode with `synchronous=NORMAL`, a commit is an append to the WAL without fsync,
+- pending task writes (e.g. a finished researcher while its siblings are still running) are batched and
+  committed together, either with the next checkpoint or after `flush_interval` seconds,
+- large contents are deduplicated through `CompactSerializer` backed by a sibling `*.contents.sqlite` file.
+  It is a separate database so that serializing never waits on the checkpoint transaction.
+
+Usage:
+    async with open_durable_checkpointer(".genie/checkpoints.sqlite") as checkpointer:
+        graph = agent_builder.compile(checkpointer=checkpointer)
+"""
+
+import asyncio
+from collections.abc import AsyncIterator, Sequence
+from contextlib import asynccontextmanager
+from pathlib import Path
+from typing import Any
+
+import aiosqlite
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.base import WRITES_IDX_MAP, ChannelVersions, Checkpoint, CheckpointMetadata
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.sqlite.aio import AsyncSqliteSaver
+from loguru import logger
+
+try:
+    from .checkpoint_serializer import CompactSerializer, SqliteContentStore, state_serializer
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.checkpoint_serializer import CompactSerializer, SqliteContentStore, state_serializer
+
+DEFAULT_CHECKPOINT_DB = Path(".genie") / "checkpoints.sqlite"
+
+
+class DurableSqliteSaver(AsyncSqliteSaver):
+    """
+    `AsyncSqliteSaver` tuned for cheap, crash safe checkpointing.
+
+    Args:
+        conn: Open aiosqlite connection.
+        serde: Serializer for checkpoints and writes, defaults to `state_serializer()`.
+        max_pending_writes: Commit as soon as this many task writes are waiting.
+        flush_interval: Maximum number of seconds a task write waits before it is committed.
+
+    """
+
+    def __init__(
+        self,
+        conn: aiosqlite.Connection,
+        *,
+        serde: SerializerProtocol | None = None,
+        max_pending_writes: int = 64,
+        flush_interval: float = 0.05,
+    ) -> None:
+        super().__init__(conn, serde=serde or state_serializer())
+        self.max_pending_writes = max_pending_writes
+        self.flush_interval = flush_interval
+        self._pending_writes = 0
+        self._flush_task: asyncio.Task | None = None
+
+    async def setup(self) -> None:
+        if self.is_setup:
+            return
+        await super().setup()
+        async with self.lock:
+            await self.conn.execute("PRAGMA synchronous=NORMAL")
+            await self.conn.execute("PRAGMA busy_timeout=5000")
+            await self.conn.commit()
+
+    async def aput(
+        self,
+        config: RunnableConfig,
+        checkpoint: Checkpoint,
+        metadata: CheckpointMetadata,
+        new_versions: ChannelVersions,
+    ) -> RunnableConfig:
+        # The checkpoint commit also commits every batched write
+        result = await super().aput(config, checkpoint, metadata, new_versions)
+        self._pending_writes = 0
+        return result
+
+    async def aput_writes(
+        self,
+        config: RunnableConfig,
+        writes: Sequence[tuple[str, Any]],
+        task_id: str,
+        task_path: str = "",
+    ) -> None:
+        """Store task writes in the open transaction, the commit is batched."""
+        query = (
+            "INSERT OR REPLACE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+            if all(w[0] in WRITES_IDX_MAP for w in writes)
+            else "INSERT OR IGNORE INTO writes (thread_id, checkpoint_ns, checkpoint_id, task_id, task_path, idx, channel, type, value) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)"
+        )
+        await self.setup()
+        rows = [
+            (
+                str(config["configurable"]["thread_id"]),
+                str(config["configurable"]["checkpoint_ns"]),
+                str(config["configurable"]["checkpoint_id"]),
+                task_id,
+                task_path,
+                WRITES_IDX_MAP.get(channel, idx),
+                channel,
+                *self.serde.dumps_typed(value),
+            )
+            for idx, (channel, value) in enumerate(writes)
+        ]
+        async with self.lock, self.conn.cursor() as cur:
+            await cur.executemany(query, rows)
+            self._pending_writes += len(rows)
+            if self._pending_writes >= self.max_pending_writes:
+                await self._commit_locked()
+                return
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._delayed_flush())
+
+    async def aflush(self) -> None:
+        """Commit every batched write now."""
+        async with self.lock:
+            await self._commit_locked()
+
+    async def aclose(self) -> None:
+        """Cancel the scheduled flush and commit what is left."""
+        if self._flush_task is not None:
+            self._flush_task.cancel()
+        await self.aflush()
+
+    async def _delayed_flush(self) -> None:
+        await asyncio.sleep(self.flush_interval)
+        await self.aflush()
+
+    async def _commit_locked(self) -> None:
+        if self._pending_writes:
+            await self.conn.commit()
+            self._pending_writes = 0
+
+
+@asynccontextmanager
+async def open_durable_checkpointer(
+    path: str | Path = DEFAULT_CHECKPOINT_DB,
+    *,
+    compact: bool = True,
+) -> AsyncIterator[DurableSqliteSaver]:
+    """
+    Open a `DurableSqliteSaver` on a local database file.
+
+    Args:
+        path: SQLite file, created with its parent directories if needed.
+        compact: Deduplicate and compress checkpoints with `CompactSerializer`.
+
+    """
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    store = SqliteContentStore(path.with_suffix(".contents.sqlite")) if compact else None
+    serde = CompactSerializer(store=store) if store is not None else state_serializer()
+    logger.info("Opening durable checkpointer at {}", path)
+    async with aiosqlite.connect(str(path)) as conn:
+        checkpointer = DurableSqliteSaver(conn, serde=serde)
+        await checkpointer.setup()
+        try:
+            yield checkpointer
+        finally:
+            await checkpointer.aclose()
+            if store is not None:
+                store.close()
@@ -0,0 +1,301 @@
+"""
+In-process filesystem tools.
+
+Drop-in replacement for the `mcp/filesystem` server: the tools have the same names and arguments, and accept
+the same `/projects/workspace/...` paths the tool manager prompt refers to, but run in the graph process.
+Every path is resolved inside a workspace root, symlinks included, and anything outside is refused.
+
+Select it in `mcp_config.json` instead of the docker server:
+
+    "filesystem": {"transport": "in_process", "provider": "filesystem", "root": "${WORKSPACE}"}
+"""
+
+import difflib
+import fnmatch
+import json
+import os
+from datetime import UTC, datetime
+from pathlib import Path, PurePosixPath
+from typing import Any
+
+from langchain_core.tools import BaseTool, StructuredTool, ToolException
+from pydantic import BaseModel, Field
+
+DEFAULT_MOUNT = "/projects/workspace"
+
+
+class PathArgs(BaseModel):
+    path: str
+
+
+class ReadFileArgs(BaseModel):
+    path: str
+    head: int | None = Field(default=None, description="If provided, returns only the first N lines of the file")
+    tail: int | None = Field(default=None, description="If provided, returns only the last N lines of the file")
+
+
+class ReadMultipleFilesArgs(BaseModel):
+    paths: list[str]
+
+
+class WriteFileArgs(BaseModel):
+    path: str
+    content: str
+
+
+class EditOperation(BaseModel):
+    oldText: str = Field(description="Text to search for - must match exactly")  # noqa: N815
+    newText: str = Field(description="Text to replace with")  # noqa: N815
+
+
+class EditFileArgs(BaseModel):
+    path: str
+    edits: list[EditOperation]
+    dryRun: bool = Field(default=False, description="Preview changes using git-style diff format")  # noqa: N815
+
+
+class MoveFileArgs(BaseModel):
+    source: str
+    destination: str
+
+
+class SearchFilesArgs(BaseModel):
+    path: str
+    pattern: str
+    excludePatterns: list[str] = Field(default_factory=list)  # noqa: N815
+
+
+class NoArgs(BaseModel):
+    pass
+
+
+class WorkspaceFilesystem:
+    """
+    Filesystem operations confined to `root`.
+
+    Args:
+        root: Workspace directory, created if missing.
+        mount: Path under which the workspace is exposed to the model, `/projects/workspace` like the docker
+            server. Relative paths are resolved against the root as well.
+
+    """
+
+    def __init__(self, root: str | Path, mount: str = DEFAULT_MOUNT) -> None:
+        self.root = Path(root).expanduser().resolve()
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.mount = PurePosixPath(mount)
+
+    def resolve(self, path: str) -> Path:
+        """Real path of `path` inside the workspace, raise `ToolException` for anything outside of it."""
+        virtual = PurePosixPath(path)
+        if virtual.is_relative_to(self.mount):
+            candidate = self.root / virtual.relative_to(self.mount)
+        elif virtual.is_absolute() and Path(path).is_relative_to(self.root):
+            candidate = Path(path)
+        elif virtual.is_absolute():
+            msg = f"Access denied - path outside allowed directories: {path} not in {self.mount}"
+            raise ToolException(msg)
+        else:
+            candidate = self.root / virtual
+        # strict=False resolves symlinks of the existing part, so a link pointing outside is refused too
+        real = candidate.resolve()
+        if not real.is_relative_to(self.root):
+            msg = f"Access denied - path outside allowed directories: {path} not in {self.mount}"
+            raise ToolException(msg)
+        return real
+
+    def display(self, real: Path) -> str:
+        """Path of `real` as the model sees it."""
+        return str(self.mount / real.relative_to(self.root).as_posix()) if real != self.root else str(self.mount)
+
+    # --- tools -------------------------------------------------------------------------------------
+
+    def read_file(self, path: str, head: int | None = None, tail: int | None = None) -> str:
+        if head is not None and tail is not None:
+            msg = "Cannot specify both head and tail parameters simultaneously"
+            raise ToolException(msg)
+        text = self._read(path)
+        if head is not None:
+            return "\n".join(text.splitlines()[:head])
+        if tail is not None:
+            return "\n".join(text.splitlines()[-tail:])
+        return text
+
+    def read_multiple_files(self, paths: list[str]) -> str:
+        results = []
+        for path in paths:
+            try:
+                results.append(f"{path}:\n{self._read(path)}\n")
+            except ToolException as e:
+                results.append(f"{path}: Error - {e}")
+        return "\n---\n".join(results)
+
+    def write_file(self, path: str, content: str) -> str:
+        real = self.resolve(path)
+        if not real.parent.is_dir():
+            msg = f"Parent directory does not exist: {self.display(real.parent)}"
+            raise ToolException(msg)
+        real.write_text(content, encoding="utf-8")
+        return f"Successfully wrote to {path}"
+
+    def edit_file(self, path: str, edits: list[EditOperation | dict], dryRun: bool = False) -> str:  # noqa: FBT001, FBT002, N803
+        real = self.resolve(path)
+        original = self._read(path)
+        modified = original
+        for edit in edits:
+            edit = EditOperation.model_validate(edit)  # noqa: PLW2901
+            if edit.oldText not in modified:
+                msg = f"Could not find exact match for edit:\n{edit.oldText}"
+                raise ToolException(msg)
+            modified = modified.replace(edit.oldText, edit.newText, 1)
+        diff = "".join(
+            difflib.unified_diff(
+                original.splitlines(keepends=True),
+                modified.splitlines(keepends=True),
+                fromfile=path,
+                tofile=path,
+            ),
+        )
+        if not dryRun:
+            real.write_text(modified, encoding="utf-8")
+        return f"```diff\n{diff}```\n\n"
+
+    def create_directory(self, path: str) -> str:
+        self.resolve(path).mkdir(parents=True, exist_ok=True)
+        return f"Successfully created directory {path}"
+
+    def list_directory(self, path: str) -> str:
+        real = self._directory(path)
+        return "\n".join(f"{'[DIR]' if entry.is_dir() else '[FILE]'} {entry.name}" for entry in sorted(real.iterdir()))
+
+    def directory_tree(self, path: str) -> str:
+        def tree(directory: Path) -> list[dict[str, Any]]:
+            return [
+                {"name": entry.name, "type": "directory", "children": tree(entry)}
+                if entry.is_dir()
+                else {"name": entry.name, "type": "file"}
+                for entry in sorted(directory.iterdir())
+            ]
+
+        return json.dumps(tree(self._directory(path)), indent=2)
+
+    def move_file(self, source: str, destination: str) -> str:
+        real_source, real_destination = self.resolve(source), self.resolve(destination)
+        if not real_source.exists():
+            msg = f"Source does not exist: {source}"
+            raise ToolException(msg)
+        if real_destination.exists():
+            msg = f"Destination already exists: {destination}"
+            raise ToolException(msg)
+        real_source.rename(real_destination)
+        return f"Successfully moved {source} to {destination}"
+
+    def search_files(self, path: str, pattern: str, excludePatterns: list[str] | None = None) -> str:  # noqa: N803
+        real = self._directory(path)
+        matches = []
+        for dirpath, dirnames, filenames in os.walk(real):
+            for name in [*dirnames, *filenames]:
+                relative = (Path(dirpath) / name).relative_to(real).as_posix()
+                if any(fnmatch.fnmatch(relative, exclude) for exclude in excludePatterns or []):
+                    continue
+                if pattern.lower() in name.lower() or fnmatch.fnmatch(relative, pattern):
+                    matches.append(self.display(Path(dirpath) / name))
+        return "\n".join(sorted(matches)) if matches else "No matches found"
+
+    def get_file_info(self, path: str) -> str:
+        real = self.resolve(path)
+        if not real.exists():
+            msg = f"File does not exist: {path}"
+            raise ToolException(msg)
+        stat = real.stat()
+        info = {
+            "size": stat.st_size,
+            "created": datetime.fromtimestamp(stat.st_ctime, tz=UTC).isoformat(),
+            "modified": datetime.fromtimestamp(stat.st_mtime, tz=UTC).isoformat(),
+            "isDirectory": real.is_dir(),
+            "isFile": real.is_file(),
+            "permissions": oct(stat.st_mode)[-3:],
+        }
+        return "\n".join(f"{key}: {value}" for key, value in info.items())
+
+    def list_allowed_directories(self) -> str:
+        return f"Allowed directories:\n{self.mount}"
+
+    # --- helpers -----------------------------------------------------------------------------------
+
+    def _read(self, path: str) -> str:
+        real = self.resolve(path)
+        if not real.is_file():
+            msg = f"File does not exist: {path}"
+            raise ToolException(msg)
+        return real.read_text(encoding="utf-8")
+
+    def _directory(self, path: str) -> Path:
+        real = self.resolve(path)
+        if not real.is_dir():
+            msg = f"Directory does not exist: {path}"
+            raise ToolException(msg)
+        return real
+
+
+# name: (description, argument schema, read only)
+TOOL_SPECS: dict[str, tuple[str, type[BaseModel], bool]] = {
+    "read_file": ("Read the complete contents of a file as text.", ReadFileArgs, True),
+    "read_text_file": ("Read the complete contents of a file as text.", ReadFileArgs, True),
+    "read_multiple_files": ("Read the contents of multiple files simultaneously.", ReadMultipleFilesArgs, True),
+    "write_file": (
+        "Create a new file or completely overwrite an existing file with new content.",
+        WriteFileArgs,
+        False,
+    ),
+    "edit_file": (
+        "Make line-based edits to a text file. Returns a git-style diff showing the changes made.",
+        EditFileArgs,
+        False,
+    ),
+    "create_directory": (
+        "Create a new directory or ensure a directory exists, including nested directories.",
+        PathArgs,
+        False,
+    ),
+    "list_directory": ("Get a detailed listing of all files and directories in a specified path.", PathArgs, True),
+    "directory_tree": ("Get a recursive tree view of files and directories as a JSON structure.", PathArgs, True),
+    "move_file": ("Move or rename files and directories.", MoveFileArgs, False),
+    "search_files": ("Recursively search for files and directories matching a pattern.", SearchFilesArgs, True),
+    "get_file_info": ("Retrieve detailed metadata about a file or directory.", PathArgs, True),
+    "list_allowed_directories": (
+        "Returns the list of directories that this server is allowed to access.",
+        NoArgs,
+        True,
+    ),
+}
+
+
+def _handle_tool_error(error: ToolException) -> str:
+    # Same shape as the error results of the MCP server
+    return f"Error: {error}"
+
+
+def get_filesystem_tools(root: str | Path, mount: str = DEFAULT_MOUNT) -> list[BaseTool]:
+    """Filesystem tools confined to `root`, with the names and arguments of the `mcp/filesystem` server."""
+    filesystem = WorkspaceFilesystem(root, mount)
+    tools = []
+    for name, (description, args_schema, read_only) in TOOL_SPECS.items():
+        func = getattr(filesystem, "read_file" if name == "read_text_file" else name)
+
+        async def coroutine(_func=func, **kwargs: Any) -> Any:
+            # Local file operations take microseconds, running them inline beats a thread hop
+            return _func(**kwargs)
+
+        tools.append(
+            StructuredTool.from_function(
+                func=func,
+                coroutine=coroutine,
+                name=name,
+                description=description,
+                args_schema=args_schema,
+                metadata={"readOnlyHint": read_only, "destructiveHint": not read_only},
+                handle_tool_error=_handle_tool_error,
+            ),
+        )
+    return tools
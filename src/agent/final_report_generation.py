@@ -1,27 +1,39 @@
 import asyncio
+import os
+from pathlib import Path
 from typing import Literal
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage, get_buffer_string
-from langchain_core.runnables import RunnableConfig
-from langgraph.func import END, Any, CachePolicy
+from langchain_core.runnables import Runnable, RunnableConfig
+from langgraph.func import END, Any
 from langgraph.graph import START, StateGraph
 from langgraph.types import Command, interrupt
 from loguru import logger
 
 try:
-    from .configuration import Configuration
+    from .configuration import Configuration, ReportSaveMode
+    from .hedging import hedged_ainvoke
+    from .log_utils import brief, sampled_debug
     from .mcp_tool_service import MCPToolService
+    from .node_cache import final_report_cache_policy
     from .prompts import SYSTEM_PROMPT_PROJECT_PLAN_STRUCTURE, TOOL_MANAGER_PROMPT
+    from .retry import RetryPolicy, retry_engine
     from .states import ReportGeneratorState, StatesKeys
-    from .utils import execute_tool_safely, get_today_str
+    from .tool_call_planner import run_tool_calls
+    from .utils import atomic_write_text, execute_tool_safely, get_today_str, report_file_name
 except ImportError:
     # rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
-    from src.agent.configuration import Configuration
+    from src.agent.configuration import Configuration, ReportSaveMode
+    from src.agent.hedging import hedged_ainvoke
+    from src.agent.log_utils import brief, sampled_debug
     from src.agent.mcp_tool_service import MCPToolService
+    from src.agent.node_cache import final_report_cache_policy
     from src.agent.prompts import SYSTEM_PROMPT_PROJECT_PLAN_STRUCTURE, TOOL_MANAGER_PROMPT
+    from src.agent.retry import RetryPolicy, retry_engine
     from src.agent.states import ReportGeneratorState, StatesKeys
-    from src.agent.utils import execute_tool_safely, get_today_str
+    from src.agent.tool_call_planner import run_tool_calls
+    from src.agent.utils import atomic_write_text, execute_tool_safely, get_today_str, report_file_name
 
 protected_tools: tuple[str] = (
     "create_directory",
@@ -31,19 +43,21 @@ protected_tools: tuple[str] = (
 )
 # https://github.com/modelcontextprotocol/servers/tree/main/src/filesystem
 mcp_tool_service = MCPToolService()
+# the first call and up to 3 retries
+MODEL_CALL_POLICY = RetryPolicy(max_attempts=4)
 
 
 @logger.catch
 async def final_report_generation(
     state: ReportGeneratorState,
     config: RunnableConfig,
-) -> Command[Literal["tool_manager"]]:
+) -> Command[Literal["save_report", "tool_manager"]]:
     """
     Generate final report from the  research notes and findings.
 
     Takes in a state and config and generates a final report by calling
-    the report generator model. If the model fails to generate a report, it retries
-    up to `max_retries` times before giving up and returning an error message.
+    the report generator model. Failed calls are retried by the shared retry engine,
+    when it gives up an error message is returned as the report.
     """
     logger.info("Generating final report...")
     notes = state.get(StatesKeys.NOTES.value, [])
@@ -65,46 +79,45 @@ async def final_report_generation(
 
     findings = "\n".join(note.content if hasattr(note, "content") else str(note) for note in notes)
 
-    max_retries: int = 3
-    current_retry: int = 0
-
     final_report_prompt = SYSTEM_PROMPT_PROJECT_PLAN_STRUCTURE.format(
         research_brief=research_brief,
         findings=findings,
         date=get_today_str(),
         messages=get_buffer_string(messages),
     )
-    report_generator_model = model_shell.with_retry(
-        stop_after_attempt=config.max_structured_output_retries,
-    ).with_config(report_generator_config)
-
-    last_exception = None
-    while current_retry <= max_retries:
-        try:
-            response = await report_generator_model.ainvoke([HumanMessage(content=final_report_prompt)])
-
-            logger.info("Final report generated: {}", response)
-            return Command(
-                goto="tool_manager",
-                update={
-                    StatesKeys.TOOL_MANAGER_MESSAGES.value: [
-                        SystemMessage(content=TOOL_MANAGER_PROMPT),
-                    ],
-                    StatesKeys.FINAL_REPORT.value: response.content,
-                },
-            )
-        except Exception as e:
-            last_exception = e
-            current_retry += 1
-            logger.warning(f"Attempt {current_retry} to generate report failed: {e}")
-            if current_retry <= max_retries:
-                await asyncio.sleep(2)  # Small delay before retrying
-
-    error = f"Error generating final report: Maximum retries exceeded, Last error: {last_exception}"
+
+    def report_generator_model(model: str) -> Runnable:
+        return model_shell.with_config({**report_generator_config, "model": model})
+
+    try:
+        response = await retry_engine.call(
+            lambda: hedged_ainvoke(
+                report_generator_model,
+                [HumanMessage(content=final_report_prompt)],
+                node="final_report_generation",
+                model=config.final_report_generation_model,
+                config=config,
+            ),
+            model=config.final_report_generation_model,
+            policy=MODEL_CALL_POLICY,
+        )
+    except Exception as e:
+        error = f"Error generating final report: Maximum retries exceeded, Last error: {e}"
+        return Command(
+            goto=END,
+            update={
+                StatesKeys.FINAL_REPORT.value: error,
+            },
+        )
+
+    logger.info("Final report generated: {}", brief(response))
     return Command(
-        goto=END,
+        goto="save_report" if config.report_save_mode == ReportSaveMode.DIRECT else "tool_manager",
         update={
-            StatesKeys.FINAL_REPORT.value: error,
+            StatesKeys.TOOL_MANAGER_MESSAGES.value: [
+                SystemMessage(content=TOOL_MANAGER_PROMPT),
+            ],
+            StatesKeys.FINAL_REPORT.value: response.content,
         },
     )
 
@@ -135,6 +148,39 @@ async def final_report_generation(
 #     return Command(goto="tool_manager", update={"mcp_tools": tools, "mcp_tools_by_name": tools_by_name})
 
 
+@logger.catch
+async def save_report(
+    state: ReportGeneratorState,
+    config: RunnableConfig,
+) -> Command[Literal["tool_manager", "__end__"]]:
+    """
+    Save the final report to `<report_root>/<report_directory>/<title>.md` without any model call.
+
+    The report root defaults to the WORKSPACE environment variable, then to the current directory. The file name
+    comes from the research brief title and the file is replaced atomically. When it can not be written the LLM
+    tool manager takes over.
+    """
+    configurable = Configuration.from_runnable_config(config)
+    report_root = Path(configurable.report_root or os.environ.get("WORKSPACE") or Path.cwd())
+    path = report_root / configurable.report_directory / report_file_name(state.get(StatesKeys.RESEARCH_BRIEF.value))
+    try:
+        await asyncio.to_thread(atomic_write_text, path, state.get(StatesKeys.FINAL_REPORT.value) or "")
+    except OSError as e:
+        logger.warning("Could not save report to {}: {}, falling back to the tool manager", path, e)
+        return Command(goto="tool_manager")
+
+    logger.info("Report saved to {}", path)
+    return Command(
+        goto=END,
+        update={
+            StatesKeys.TOOL_MANAGER_MESSAGES.value: [
+                AIMessage(content=f"Report saved successfully to {path}. Task completed."),
+            ],
+            StatesKeys.REPORT_PATH.value: str(path),
+        },
+    )
+
+
 @logger.catch
 async def tool_manager(state: ReportGeneratorState, config: RunnableConfig) -> dict[str, Any]:  # | Command[str]:
     """Tool manager to handle the execution of tools. It has single responsibility to save the markdown report into .md file with given format."""
@@ -154,47 +200,36 @@ async def tool_manager(state: ReportGeneratorState, config: RunnableConfig) -> d
         "model": config.mcp_tool_manager_model,
         "max_tokens": config.mcp_tool_manager_max_tokens,
     }
-    logger.info("Configuration for tool manager: {}", config)
-
-    max_retries: int = 3
-    current_retry: int = 0
+    sampled_debug("Configuration for tool manager: {}", brief(config))
 
     # Get actual tools from the service
     tools, _ = await mcp_tool_service.get_tools()
-    tool_manager_model = (
-        model_shell.bind_tools(tools)
-        .with_retry(stop_after_attempt=config.max_structured_output_retries)
-        .with_config(mcp_tool_manager_config)
-    )
+    tool_manager_model = model_shell.bind_tools(tools).with_config(mcp_tool_manager_config)
     prompt = f"""Conversation history:
     <messages>
     {get_buffer_string(tool_manager_messages)}
     </messages>
     here is the final report \n{final_report}"""
-    while current_retry <= max_retries:
-        try:
-            response = await tool_manager_model.ainvoke([HumanMessage(content=prompt)])
-
-            logger.debug("Tool Manager response:", response)
-            return {  # noqa: TRY300
-                StatesKeys.TOOL_MANAGER_MESSAGES.value: [response],
-                StatesKeys.FINAL_REPORT.value: final_report,
-            }
-
-        except Exception as e:
-            last_exception = e
-            current_retry += 1
-            logger.warning(f"Attempt {current_retry} to tool called failed: {e}")
-            if current_retry <= max_retries:
-                await asyncio.sleep(2)  # Small delay before retrying
-
-    error = f"Error generating tool call: Maximum retries exceeded, Last error: {last_exception}"
-    return Command(
-        goto=END,
-        update={
-            StatesKeys.TOOL_MANAGER_MESSAGES.value: [AIMessage(content=error)],
-        },
-    )
+    try:
+        response = await retry_engine.call(
+            lambda: tool_manager_model.ainvoke([HumanMessage(content=prompt)]),
+            model=config.mcp_tool_manager_model,
+            policy=MODEL_CALL_POLICY,
+        )
+    except Exception as e:
+        error = f"Error generating tool call: Maximum retries exceeded, Last error: {e}"
+        return Command(
+            goto=END,
+            update={
+                StatesKeys.TOOL_MANAGER_MESSAGES.value: [AIMessage(content=error)],
+            },
+        )
+
+    sampled_debug("Tool Manager response: {}", brief(response))
+    return {
+        StatesKeys.TOOL_MANAGER_MESSAGES.value: [response],
+        StatesKeys.FINAL_REPORT.value: final_report,
+    }
 
 
 @logger.catch
@@ -212,11 +247,11 @@ async def mcp_tool_call(state: ReportGeneratorState, config: RunnableConfig) ->
     last_message = messages[-1]
     tool_calls = last_message.tool_calls
 
-    # Execute tools step by step, because directory must be created first and the file creation
-    tool_results = [
-        await execute_tool_safely(tools_by_name[tool_call["name"]], tool_call["args"], config.model_dump())
-        for tool_call in tool_calls
-    ]
+    # A directory is created before the files written into it, independent calls run concurrently
+    tool_results = await run_tool_calls(
+        tool_calls,
+        lambda tool_call: execute_tool_safely(tools_by_name[tool_call["name"]], tool_call["args"], config.model_dump()),
+    )
 
     tool_outputs: list[ToolMessage] = [
         ToolMessage(
@@ -235,14 +270,27 @@ async def mcp_tool_call(state: ReportGeneratorState, config: RunnableConfig) ->
     )
 
 
-async def should_continue(state: ReportGeneratorState) -> Literal["human_tool_review_node", "mcp_tool_call", "__end__"]:
+async def should_continue(
+    state: ReportGeneratorState,
+    config: RunnableConfig,
+) -> Literal["human_tool_review_node", "mcp_tool_call", "__end__"]:
     logger.info("[INFO] Checking if we should continue...")
     messages = state.get(StatesKeys.TOOL_MANAGER_MESSAGES.value, [])
 
     last_message = messages[-1]
     # Check if it's an AI message with tool calls
     if isinstance(last_message, AIMessage) and last_message.tool_calls:
-        if any(tool_call["name"] in protected_tools for tool_call in last_message.tool_calls):
+        protected_calls = [tool_call for tool_call in last_message.tool_calls if tool_call["name"] in protected_tools]
+        if protected_calls:
+            configurable = Configuration.from_runnable_config(config)
+            policy = configurable.tool_approval_policy
+            if policy is not None:
+                # The filesystem MCP server exposes WORKSPACE, whatever the report root of the run
+                violations = policy.violations(protected_calls, os.environ.get("WORKSPACE"))
+                if not violations:
+                    logger.info("Protected tool calls auto-approved by the approval policy")
+                    return "mcp_tool_call"
+                logger.info("Approval policy violations: {}", violations)
             logger.info("Going to human_tool_review_node: last_message.tool_calls: ")
             return "human_tool_review_node"
 
@@ -305,7 +353,8 @@ async def human_tool_review_node(
 
 
 builder = StateGraph(ReportGeneratorState, config_schema=Configuration)
-builder.add_node("final_report_generation", final_report_generation, cache_policy=CachePolicy())
+builder.add_node("final_report_generation", final_report_generation, cache_policy=final_report_cache_policy)
+builder.add_node("save_report", save_report)
 builder.add_node("human_tool_review_node", human_tool_review_node)
 builder.add_node("tool_manager", tool_manager)  # , cache_policy=CachePolicy())
 builder.add_node("mcp_tool_call", mcp_tool_call)
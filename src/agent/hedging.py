@@ -0,0 +1,204 @@
+"""
+Hedged model calls, cutting the tail latency of a run.
+
+A few slow model calls decide the p99 run time: one stuck supervisor or report call keeps a whole run waiting.
+For the nodes in `Configuration.hedged_nodes` a call that has not answered after the `hedge_percentile` latency
+of the recent calls of the same node and model starts a backup request, to the same model or to
+`Configuration.hedge_backup_model`. The first answer wins and the other request is cancelled.
+
+Only the primary calls teach the latencies of a node and model: a backup may call another model and starts late.
+A primary call cancelled because its backup won is recorded with the time it had taken so far, leaving it out would
+hide the slow calls hedging is for.
+
+A backup doubles the cost of a call, so at most `max_hedge_rate` of the recent calls of a node and model are
+hedged, and nothing is hedged until `MIN_SAMPLES` latencies are known.
+
+Usage:
+    response = await hedged_ainvoke(build, messages, node="supervisor", model=config.research_model, config=config)
+"""
+
+import asyncio
+import contextlib
+import time
+from collections import Counter, deque
+from collections.abc import Awaitable, Callable
+from typing import Any, TypeVar
+
+from langchain_core.runnables import Runnable
+from loguru import logger
+
+try:
+    from .configuration import Configuration
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(search_from=__file__, indicator=[".git", "pyproject.toml"], pythonpath=True)
+    from src.agent.configuration import Configuration
+
+T = TypeVar("T")
+
+# Recent calls of a node and model the latency percentile and the hedge rate are taken over
+WINDOW = 100
+MIN_SAMPLES = 20
+
+
+class LatencyTracker:
+    """Latencies of the recent successful or cancelled calls of one node and model."""
+
+    def __init__(self, window: int = WINDOW) -> None:
+        self._samples: deque[float] = deque(maxlen=window)
+
+    def record(self, seconds: float) -> None:
+        self._samples.append(seconds)
+
+    def percentile(self, q: float) -> float | None:
+        """Nearest rank `q` percentile (0.95 for p95), `None` while fewer than `MIN_SAMPLES` calls are known."""
+        if len(self._samples) < MIN_SAMPLES:
+            return None
+        ordered = sorted(self._samples)
+        rank = min(len(ordered) - 1, max(0, round(q * len(ordered)) - 1))
+        return ordered[rank]
+
+
+class Hedger:
+    """Runs hedged calls and learns their latencies, shared by the whole process."""
+
+    _instance = None
+    _trackers: dict[str, LatencyTracker]
+    _hedged: dict[str, deque[bool]]
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, the latencies of every run of the process are learned in one place."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def tracker(self, key: str) -> LatencyTracker:
+        return self._trackers.setdefault(key, LatencyTracker())
+
+    async def _timed(self, key: str, call: Callable[[], Awaitable[T]]) -> T:
+        started = time.perf_counter()
+        try:
+            result = await call()
+        except asyncio.CancelledError:
+            # a cancelled call took at least this long
+            self.tracker(key).record(time.perf_counter() - started)
+            raise
+        self.tracker(key).record(time.perf_counter() - started)
+        return result
+
+    async def run(
+        self,
+        key: str,
+        primary: Callable[[], Awaitable[T]],
+        backup: Callable[[], Awaitable[T]],
+        *,
+        percentile: float = 0.95,
+        max_hedge_rate: float = 0.1,
+    ) -> T:
+        """
+        Await `primary()`, starting `backup()` when it has not answered after the learned latency percentile.
+
+        The first successful answer is returned and the other call is cancelled. When both calls fail the error
+        of the primary call is raised. Only the latencies of `primary()` are recorded under `key`.
+
+        Args:
+            key: Calls of one node and primary model sharing latencies and a hedge budget,
+                e.g. `"supervisor:openai:gpt-4o-mini"`.
+            primary: Starts the call.
+            backup: Starts the backup call, to the same or to another model.
+            percentile: Latency percentile of the recent calls after which the backup is started.
+            max_hedge_rate: Share of the recent calls that may be hedged.
+
+        """
+        self._counters["calls"] += 1
+        # hedge decisions of the recent calls
+        hedged = self._hedged.setdefault(key, deque(maxlen=WINDOW))
+        delay = self.tracker(key).percentile(percentile)
+        if delay is None:
+            hedged.append(False)
+            return await self._timed(key, primary)
+
+        primary_task = asyncio.ensure_future(self._timed(key, primary))
+        tasks = [primary_task]
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=delay)
+            hedge = not done and sum(hedged) + 1 <= max_hedge_rate * (len(hedged) + 1)
+            hedged.append(hedge)
+            if not hedge:
+                self._counters["skipped_by_rate_cap"] += not done
+                return await primary_task
+
+            self._counters["hedged"] += 1
+            logger.debug("Hedging {} after {:.2f}s", key, delay)
+            backup_task = asyncio.ensure_future(backup())
+            tasks.append(backup_task)
+            while True:
+                done, _ = await asyncio.wait(tasks, return_when=asyncio.FIRST_COMPLETED)
+                winner = next((task for task in done if task.exception() is None), None)
+                if winner is not None:
+                    self._counters["backup_wins" if winner is backup_task else "primary_wins"] += 1
+                    return winner.result()
+                tasks = [task for task in tasks if not task.done()]
+                if not tasks:
+                    self._counters["both_failed"] += 1
+                    return primary_task.result()
+        finally:
+            for task in (task for task in tasks if not task.done()):
+                self._counters["cancelled"] += 1
+                task.cancel()
+                with contextlib.suppress(asyncio.CancelledError):
+                    await task
+
+    def stats(self) -> dict[str, int]:
+        """e.g. `{"calls": 240, "hedged": 11, "backup_wins": 8, "primary_wins": 3, ...}`."""
+        return {
+            "calls": self._counters["calls"],
+            "hedged": self._counters["hedged"],
+            "backup_wins": self._counters["backup_wins"],
+            "primary_wins": self._counters["primary_wins"],
+            "both_failed": self._counters["both_failed"],
+            "cancelled": self._counters["cancelled"],
+            "skipped_by_rate_cap": self._counters["skipped_by_rate_cap"],
+        }
+
+    def reset(self) -> None:
+        self._trackers = {}
+        self._hedged = {}
+        self._counters = Counter()
+
+
+hedger = Hedger()
+
+
+async def hedged_ainvoke(
+    build: Callable[[str], Runnable],
+    messages: Any,
+    *,
+    node: str,
+    model: str,
+    config: Configuration,
+) -> Any:
+    """
+    Invoke `build(model)` with `messages`, hedged with `build(config.hedge_backup_model)` for hedged nodes.
+
+    Args:
+        build: Returns the runnable calling a model, e.g. the model with its tools, retries and settings.
+        messages: Input of the runnable.
+        node: Graph node making the call, hedged when it is in `config.hedged_nodes`.
+        model: Model of the call, the backup calls the same model when no backup model is configured.
+        config: Hedging settings.
+
+    """
+    if node not in config.hedged_nodes:
+        return await build(model).ainvoke(messages)
+    backup_model = config.hedge_backup_model or model
+    return await hedger.run(
+        f"{node}:{model}",
+        lambda: build(model).ainvoke(messages),
+        lambda: build(backup_model).with_config(metadata={"hedge": "backup"}).ainvoke(messages),
+        percentile=config.hedge_percentile,
+        max_hedge_rate=config.max_hedge_rate,
+    )
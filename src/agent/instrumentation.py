@@ -0,0 +1,631 @@
+"""
+Per node latency, token and cost instrumentation of graph runs.
+
+`GraphMetrics` is a LangChain callback handler, passed in `config["callbacks"]` it sees every node of the
+graph and every model, search and tool call made inside them, including the subgraphs. For each of them it records
+
+- calls, errors and retries (a call started again after a failed call of the same node run, e.g. by
+  `with_retry` or a retry loop of the node),
+- wall time and, for tool calls run by the `ToolExecutor`, the time spent waiting for a concurrency slot,
+- input and output tokens of model calls and their estimated cost from `MODEL_PRICES`,
+- the calls routed by the model router per task and model, with the latency and cost they saved.
+
+Model and tool calls are also added to the innermost node they run in, so the node table answers which node
+dominates latency and spend. Records are kept per run (one `ainvoke` / `astream` of the graph) and summed
+per thread, `report()` returns them as JSON and `to_prometheus()` renders the process totals in the
+Prometheus text exposition format, together with the stats of the shared components (tool registry,
+researcher novelty, MCP sessions, logging, node cache).
+
+Usage:
+    graph_metrics.register_component("node_cache", node_cache.stats)
+    await graph.ainvoke(graph_input, {"configurable": {"thread_id": "1"}, "callbacks": [graph_metrics]})
+    graph_metrics.write(Path("metrics.json"))  # or metrics.prom
+"""
+
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from collections.abc import Callable
+from dataclasses import asdict, dataclass, field, fields
+from pathlib import Path
+from typing import Any, override
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import ChatGeneration, LLMResult
+from langgraph.errors import GraphBubbleUp
+from loguru import logger
+
+try:
+    from .hedging import hedger
+    from .knowledge_base import knowledge_base_stats
+    from .log_utils import log_stats
+    from .mcp_tool_service import MCPToolService
+    from .model_router import model_router
+    from .novelty import novelty_stats
+    from .retry import retry_engine
+    from .search_cache import search_cache
+    from .tool_registry import tool_registry
+    from .utils import atomic_write_text
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.hedging import hedger
+    from src.agent.knowledge_base import knowledge_base_stats
+    from src.agent.log_utils import log_stats
+    from src.agent.mcp_tool_service import MCPToolService
+    from src.agent.model_router import model_router
+    from src.agent.novelty import novelty_stats
+    from src.agent.retry import retry_engine
+    from src.agent.search_cache import search_cache
+    from src.agent.tool_registry import tool_registry
+    from src.agent.utils import atomic_write_text
+
+# USD per million input and output tokens, keyed like the model settings of `Configuration`
+MODEL_PRICES: dict[str, tuple[float, float]] = {
+    "google_genai:gemini-2.0-flash": (0.10, 0.40),
+    "openai:gpt-4o-mini": (0.15, 0.60),
+    "openai:gpt-4o": (2.50, 10.00),
+    "perplexity:sonar": (1.00, 1.00),
+    "perplexity:sonar-pro": (3.00, 15.00),
+}
+# Providers running on local hardware, their calls cost nothing
+FREE_PROVIDERS = frozenset({"ollama"})
+SEARCH_TOOL_TYPE = "search"
+
+
+def estimate_cost(model: str, input_tokens: int, output_tokens: int) -> float | None:
+    """Cost in USD of a call to `model` (`provider:name`), `None` when the price of the model is unknown."""
+    if model.split(":", 1)[0] in FREE_PROVIDERS:
+        return 0.0
+    if model not in MODEL_PRICES:
+        return None
+    input_price, output_price = MODEL_PRICES[model]
+    return (input_tokens * input_price + output_tokens * output_price) / 1_000_000
+
+
+@dataclass
+class CallStats:
+    """Counters of the calls of one node, model or tool."""
+
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    wall_seconds: float = 0.0
+    queue_seconds: float = 0.0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cost_usd: float = 0.0
+
+    def add(self, other: "CallStats") -> None:
+        for stat in fields(self):
+            setattr(self, stat.name, getattr(self, stat.name) + getattr(other, stat.name))
+
+    def to_dict(self) -> dict[str, Any]:
+        stats = asdict(self)
+        for key in ("wall_seconds", "queue_seconds"):
+            stats[key] = round(stats[key], 4)
+        stats["cost_usd"] = round(stats["cost_usd"], 6)
+        return stats
+
+
+# Prometheus metric suffix and help of every `CallStats` field
+PROMETHEUS_STATS = {
+    "calls": ("calls_total", "Calls started"),
+    "errors": ("errors_total", "Calls that raised"),
+    "retries": ("retries_total", "Calls started again after a failed call"),
+    "wall_seconds": ("seconds_total", "Wall time of the calls"),
+    "queue_seconds": ("queue_seconds_total", "Time tool calls waited for a concurrency slot"),
+    "input_tokens": ("input_tokens_total", "Model input tokens"),
+    "output_tokens": ("output_tokens_total", "Model output tokens"),
+    "cost_usd": ("cost_usd_total", "Estimated model cost in USD"),
+}
+# Group of the report, Prometheus metric prefix and label name
+SCOPES = {
+    "nodes": ("genie_node", "node"),
+    "models": ("genie_model", "model"),
+    "searches": ("genie_search", "tool"),
+    "tools": ("genie_tool", "tool"),
+}
+
+
+@dataclass
+class RouteStats:
+    """Routed calls of one task and model, and what they saved against the configured model of the task."""
+
+    calls: int = 0
+    fallbacks: int = 0
+    input_tokens: int = 0
+    saved_seconds: float = 0.0
+    saved_cost_usd: float = 0.0
+
+    def add(self, other: "RouteStats") -> None:
+        for stat in fields(self):
+            setattr(self, stat.name, getattr(self, stat.name) + getattr(other, stat.name))
+
+    def to_dict(self) -> dict[str, Any]:
+        stats = asdict(self)
+        stats["saved_seconds"] = round(stats["saved_seconds"], 4)
+        stats["saved_cost_usd"] = round(stats["saved_cost_usd"], 6)
+        return stats
+
+
+PROMETHEUS_ROUTE_STATS = {
+    "calls": ("calls_total", "Routed model calls"),
+    "fallbacks": ("fallbacks_total", "Routed calls made after a smaller model failed"),
+    "input_tokens": ("input_tokens_total", "Input tokens of the routed calls"),
+    "saved_seconds": ("saved_seconds_total", "Estimated latency saved against the configured model"),
+    "saved_cost_usd": ("saved_cost_usd_total", "Estimated cost in USD saved against the configured model"),
+}
+
+
+def _merge(target: dict[str, Any], source: dict[str, Any], stats_type: type = CallStats) -> None:
+    for name, stats in source.items():
+        target.setdefault(name, stats_type()).add(stats)
+
+
+@dataclass
+class RunMetrics:
+    """Nodes, models and tools of one run of the graph."""
+
+    run_id: str
+    thread_id: str | None
+    started_at: float = field(default_factory=time.time)
+    status: str = "running"
+    wall_seconds: float = 0.0
+    nodes: dict[str, CallStats] = field(default_factory=dict)
+    models: dict[str, CallStats] = field(default_factory=dict)
+    searches: dict[str, CallStats] = field(default_factory=dict)
+    tools: dict[str, CallStats] = field(default_factory=dict)
+    # keyed by task and model, e.g. "summarization:ollama:qwen3:8b"
+    routes: dict[str, RouteStats] = field(default_factory=dict)
+
+    @property
+    def cost_usd(self) -> float:
+        return sum(stats.cost_usd for stats in self.models.values())
+
+    def to_dict(self) -> dict[str, Any]:
+        return {
+            "run_id": self.run_id,
+            "thread_id": self.thread_id,
+            "started_at": self.started_at,
+            "status": self.status,
+            "wall_seconds": round(self.wall_seconds, 4),
+            "cost_usd": round(self.cost_usd, 6),
+            **{scope: {name: stats.to_dict() for name, stats in getattr(self, scope).items()} for scope in SCOPES},
+            "routes": {name: stats.to_dict() for name, stats in self.routes.items()},
+        }
+
+
+@dataclass
+class _OpenCall:
+    """A run of the callback tree that did not end yet."""
+
+    root: UUID
+    started: float
+    # innermost node run the call belongs to, the call itself for node runs
+    node_run: UUID | None
+    node: str | None = None
+    scope: str | None = None
+    name: str | None = None
+    queue_seconds: float = 0.0
+    # "route_*" metadata of a call routed by the model router
+    route: dict[str, Any] | None = None
+
+
+class GraphMetrics(BaseCallbackHandler):
+    """
+    Callback handler aggregating node, model and tool metrics per run and per thread.
+
+    Args:
+        max_runs: Runs kept for `report`, the oldest finished runs are dropped first. Process totals for
+            `to_prometheus` are kept regardless.
+
+    """
+
+    run_inline = True
+
+    def __init__(self, max_runs: int = 1_000) -> None:
+        self.max_runs = max_runs
+        self.runs: OrderedDict[str, RunMetrics] = OrderedDict()
+        self.totals = RunMetrics(run_id="total", thread_id=None)
+        self.run_statuses: dict[str, int] = {}
+        self._components: dict[str, Callable[[], dict]] = {}
+        self._open: dict[UUID, _OpenCall] = {}
+        # (root, node run, scope, name) of calls whose last attempt failed
+        self._failed: set[tuple[UUID, UUID | None, str, str]] = set()
+        self._lock = threading.Lock()
+
+    def register_component(self, name: str, stats: Callable[[], dict]) -> None:
+        """Report `stats()` of a shared component, e.g. `register_component("node_cache", cache.stats)`."""
+        self._components[name] = stats
+
+    # ---- callbacks ----
+
+    @override
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        with self._lock:
+            parent = self._open.get(parent_run_id) if parent_run_id else None
+            if parent is None:
+                self._open[run_id] = _OpenCall(root=run_id, started=time.perf_counter(), node_run=None)
+                self._start_run(run_id, metadata.get("thread_id"))
+                return
+            node = metadata.get("langgraph_node")
+            if node is not None and kwargs.get("name") == node:
+                self._open[run_id] = call = _OpenCall(root=parent.root, started=time.perf_counter(), node_run=run_id)
+                self._start_call(call, "nodes", node)
+            else:
+                self._open[run_id] = _OpenCall(root=parent.root, started=parent.started, node_run=parent.node_run)
+
+    @override
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=None)
+
+    @override
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=error)
+
+    @override
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any] | None,
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start_leaf(
+            run_id,
+            parent_run_id,
+            metadata or {},
+            "models",
+            self._model_name(serialized, metadata, kwargs),
+        )
+
+    @override
+    def on_llm_start(
+        self,
+        serialized: dict[str, Any] | None,
+        prompts: list[str],
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        self._start_leaf(
+            run_id,
+            parent_run_id,
+            metadata or {},
+            "models",
+            self._model_name(serialized, metadata, kwargs),
+        )
+
+    @override
+    def on_llm_end(self, response: LLMResult, *, run_id: UUID, **kwargs: Any) -> None:
+        input_tokens = output_tokens = 0
+        for generations in response.generations:
+            for generation in generations:
+                usage = generation.message.usage_metadata if isinstance(generation, ChatGeneration) else None
+                if usage:
+                    input_tokens += usage.get("input_tokens", 0)
+                    output_tokens += usage.get("output_tokens", 0)
+        self._end(run_id, error=None, input_tokens=input_tokens, output_tokens=output_tokens)
+
+    @override
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=error)
+
+    @override
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any] | None,
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        metadata = metadata or {}
+        name = kwargs.get("name") or (serialized or {}).get("name") or "unknown"
+        scope = "searches" if metadata.get("type") == SEARCH_TOOL_TYPE else "tools"
+        self._start_leaf(run_id, parent_run_id, metadata, scope, name)
+
+    @override
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=None)
+
+    @override
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error=error)
+
+    # ---- bookkeeping ----
+
+    @staticmethod
+    def _model_name(serialized: dict[str, Any] | None, metadata: dict[str, Any] | None, kwargs: dict) -> str:
+        metadata = metadata or {}
+        params = kwargs.get("invocation_params") or {}
+        provider = metadata.get("ls_provider") or params.get("_type") or "unknown"
+        model = (
+            metadata.get("ls_model_name")
+            or params.get("model")
+            or params.get("model_name")
+            or (serialized or {}).get("name")
+            or "unknown"
+        )
+        return f"{provider}:{model}"
+
+    def _start_run(self, run_id: UUID, thread_id: str | None) -> None:
+        self.runs[str(run_id)] = RunMetrics(run_id=str(run_id), thread_id=thread_id)
+        while len(self.runs) > self.max_runs:
+            oldest = next((key for key, run in self.runs.items() if run.status != "running"), None)
+            if oldest is None:
+                break
+            del self.runs[oldest]
+
+    def _start_leaf(
+        self,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        metadata: dict[str, Any],
+        scope: str,
+        name: str,
+    ) -> None:
+        with self._lock:
+            parent = self._open.get(parent_run_id) if parent_run_id else None
+            if parent is None:  # called outside of a graph run
+                return
+            call = _OpenCall(
+                root=parent.root,
+                started=time.perf_counter(),
+                node_run=parent.node_run,
+                node=metadata.get("langgraph_node"),
+                # set by the `ToolExecutor` for the time the call waited for a concurrency slot
+                queue_seconds=float(metadata.get("queue_seconds") or 0.0),
+                route={key: value for key, value in metadata.items() if key.startswith("route_")} or None,
+            )
+            self._open[run_id] = call
+            self._start_call(call, scope, name)
+
+    def _start_call(self, call: _OpenCall, scope: str, name: str) -> None:
+        call.scope, call.name = scope, name
+        # a node retried by a retry policy is a new node run, compare it with its siblings instead
+        failed_key = (call.root, None if scope == "nodes" else call.node_run, scope, name)
+        retried = failed_key in self._failed
+        for stats in self._own_stats(call):
+            stats.calls += 1
+            stats.retries += retried
+
+    def _targets(self, call: _OpenCall) -> list[RunMetrics]:
+        """Process totals and, while it is kept, the run of `call`."""
+        run = self.runs.get(str(call.root))
+        return [self.totals] if run is None else [self.totals, run]
+
+    def _own_stats(self, call: _OpenCall) -> list[CallStats]:
+        return [getattr(target, call.scope).setdefault(call.name, CallStats()) for target in self._targets(call)]
+
+    def _node_stats(self, call: _OpenCall) -> list[CallStats]:
+        """Stats of the node a model or tool call runs in."""
+        if call.scope == "nodes" or call.node is None:
+            return []
+        return [target.nodes.setdefault(call.node, CallStats()) for target in self._targets(call)]
+
+    def _end(
+        self,
+        run_id: UUID,
+        error: BaseException | None,
+        input_tokens: int = 0,
+        output_tokens: int = 0,
+    ) -> None:
+        with self._lock:
+            call = self._open.pop(run_id, None)
+            if call is None:
+                return
+            wall_seconds = time.perf_counter() - call.started
+            if call.root == run_id:
+                self._end_run(call, wall_seconds, error)
+                return
+            if call.scope is None:
+                return
+            # the cancelled loser of a hedged call did not fail
+            failed = error is not None and not isinstance(error, GraphBubbleUp | asyncio.CancelledError)
+            cost = estimate_cost(call.name, input_tokens, output_tokens) if call.scope == "models" else 0.0
+            for stats in self._own_stats(call):
+                stats.errors += failed
+                stats.wall_seconds += wall_seconds
+            # the node already counts the wall time of the calls made inside it
+            for stats in self._own_stats(call) + self._node_stats(call):
+                stats.queue_seconds += call.queue_seconds
+                stats.input_tokens += input_tokens
+                stats.output_tokens += output_tokens
+                stats.cost_usd += cost or 0.0
+            if call.route and not failed:
+                self._record_route(call, wall_seconds, input_tokens, output_tokens)
+            failed_key = (call.root, None if call.scope == "nodes" else call.node_run, call.scope, call.name)
+            if failed:
+                self._failed.add(failed_key)
+            else:
+                self._failed.discard(failed_key)
+
+    def _record_route(self, call: _OpenCall, wall_seconds: float, input_tokens: int, output_tokens: int) -> None:
+        """
+        Count a routed call and estimate what it saved against the configured model of its task.
+
+        The latency of the configured model is estimated from its seconds per token so far, unknown until it
+        answered once.
+        """
+        task, default_model = call.route.get("route_task"), call.route.get("route_default")
+        saved_seconds = saved_cost = 0.0
+        if call.name != default_model:
+            default_stats = self.totals.models.get(default_model)
+            default_tokens = default_stats.input_tokens + default_stats.output_tokens if default_stats else 0
+            if default_tokens:
+                seconds_per_token = default_stats.wall_seconds / default_tokens
+                saved_seconds = seconds_per_token * (input_tokens + output_tokens) - wall_seconds
+            default_cost = estimate_cost(default_model, input_tokens, output_tokens)
+            cost = estimate_cost(call.name, input_tokens, output_tokens)
+            if default_cost is not None and cost is not None:
+                saved_cost = default_cost - cost
+        for target in self._targets(call):
+            stats = target.routes.setdefault(f"{task}:{call.name}", RouteStats())
+            stats.calls += 1
+            stats.fallbacks += bool(call.route.get("route_fallback"))
+            stats.input_tokens += input_tokens
+            stats.saved_seconds += saved_seconds
+            stats.saved_cost_usd += saved_cost
+
+    def _end_run(self, call: _OpenCall, wall_seconds: float, error: BaseException | None) -> None:
+        if error is None:
+            status = "completed"
+        elif isinstance(error, GraphBubbleUp):
+            status = "interrupted"
+        else:
+            status = "failed"
+        self.run_statuses[status] = self.run_statuses.get(status, 0) + 1
+        self._failed = {key for key in self._failed if key[0] != call.root}
+        if (run := self.runs.get(str(call.root))) is not None:
+            run.status, run.wall_seconds = status, wall_seconds
+            logger.debug(
+                "Run {} of thread {} {} in {:.2f}s, estimated cost ${:.4f}",
+                run.run_id,
+                run.thread_id,
+                status,
+                wall_seconds,
+                run.cost_usd,
+            )
+
+    # ---- export ----
+
+    def components(self) -> dict[str, dict]:
+        """Stats of the registered shared components, a failing component is reported as empty."""
+        stats = {}
+        for name, component_stats in self._components.items():
+            try:
+                stats[name] = component_stats()
+            except Exception:
+                logger.opt(exception=True).debug(f"Stats of {name} are not available")
+                stats[name] = {}
+        return stats
+
+    def report(self, thread_id: str | None = None) -> dict[str, Any]:
+        """Runs kept so far and their sums per thread, only those of `thread_id` when given."""
+        with self._lock:
+            runs = [run for run in self.runs.values() if thread_id is None or run.thread_id == thread_id]
+            threads: dict[str, RunMetrics] = {}
+            run_counts: dict[str, int] = {}
+            for run in runs:
+                key = str(run.thread_id)
+                thread = threads.setdefault(
+                    key,
+                    RunMetrics(run_id="", thread_id=run.thread_id, started_at=run.started_at),
+                )
+                run_counts[key] = run_counts.get(key, 0) + 1
+                thread.wall_seconds += run.wall_seconds
+                for scope in SCOPES:
+                    _merge(getattr(thread, scope), getattr(run, scope))
+                _merge(thread.routes, run.routes, RouteStats)
+            report = {
+                "runs": [run.to_dict() for run in runs],
+                "threads": {
+                    key: {"runs": run_counts[key]} | _without(thread.to_dict(), "run_id", "status")
+                    for key, thread in threads.items()
+                },
+            }
+        report["components"] = self.components()
+        return report
+
+    def to_prometheus(self) -> str:
+        """Process totals and component stats in the Prometheus text exposition format."""
+        lines = []
+        with self._lock:
+            lines += _prometheus_family(
+                "genie_runs_total",
+                "counter",
+                "Graph runs by status",
+                [({"status": status}, count) for status, count in sorted(self.run_statuses.items())],
+            )
+            for scope, (prefix, label) in SCOPES.items():
+                totals = getattr(self.totals, scope)
+                for stat, (suffix, help_text) in PROMETHEUS_STATS.items():
+                    samples = [({label: name}, getattr(stats, stat)) for name, stats in sorted(totals.items())]
+                    lines += _prometheus_family(f"{prefix}_{suffix}", "counter", help_text, samples)
+            routes = sorted(self.totals.routes.items())
+            for stat, (suffix, help_text) in PROMETHEUS_ROUTE_STATS.items():
+                samples = [
+                    (dict(zip(("task", "model"), name.split(":", 1), strict=True)), getattr(stats, stat))
+                    for name, stats in routes
+                ]
+                lines += _prometheus_family(f"genie_route_{suffix}", "counter", help_text, samples)
+        samples = [
+            ({"component": name, "stat": key}, value)
+            for name, stats in self.components().items()
+            for key, value in _flatten(stats)
+        ]
+        lines += _prometheus_family("genie_component_stat", "gauge", "Stats of the shared components", samples)
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: Path, thread_id: str | None = None) -> None:
+        """Write `to_prometheus()` to a `.prom` file and `report(thread_id)` as JSON to any other file."""
+        if path.suffix == ".prom":
+            text = self.to_prometheus()
+        else:
+            text = json.dumps(self.report(thread_id), indent=2, default=str)
+        atomic_write_text(path, text)
+        logger.info(f"Metrics written to {path}")
+
+
+def _without(values: dict, *keys: str) -> dict:
+    return {key: value for key, value in values.items() if key not in keys}
+
+
+def _flatten(stats: dict, prefix: str = "") -> list[tuple[str, float]]:
+    """Numeric leaves of nested component stats, e.g. `("filesystem.starts", 1)`."""
+    values = []
+    for key, value in stats.items():
+        if isinstance(value, dict):
+            values += _flatten(value, f"{prefix}{key}.")
+        elif isinstance(value, bool | int | float):
+            values.append((f"{prefix}{key}", float(value)))
+    return values
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _prometheus_family(name: str, kind: str, help_text: str, samples: list[tuple[dict, float]]) -> list[str]:
+    if not samples:
+        return []
+    lines = [f"# HELP {name} {help_text}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        label_text = ",".join(f'{key}="{_escape(str(label))}"' for key, label in labels.items())
+        lines.append(f"{name}{{{label_text}}} {value}")
+    return lines
+
+
+graph_metrics = GraphMetrics()
+graph_metrics.register_component("tool_registry", tool_registry.stats)
+graph_metrics.register_component("hedging", hedger.stats)
+graph_metrics.register_component("retry", retry_engine.stats)
+graph_metrics.register_component("model_routing", model_router.stats)
+graph_metrics.register_component("search_cache", search_cache.stats)
+graph_metrics.register_component("knowledge_base", knowledge_base_stats)
+graph_metrics.register_component("novelty", novelty_stats.stats)
+graph_metrics.register_component("mcp_sessions", MCPToolService().stats)
+graph_metrics.register_component("logging", log_stats.stats)
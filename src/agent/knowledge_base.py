@@ -0,0 +1,256 @@
+"""
+Local knowledge base of research findings, reused across runs on similar topics.
+
+Many project plans share sub-topics (OCR engines, LangGraph patterns, testing strategies) and every run used to
+research them again from scratch. With `Configuration.knowledge_base` enabled, `supervisor_tool` stores the
+`compressed_research` of every research unit with its topic, and answers a later `ConductResearch` call from a
+stored finding when its topic is similar enough and younger than `knowledge_base_max_age_days`. Only new topics
+go to live research.
+
+Topics are matched by a hybrid score: the cosine similarity of hashed word and bigram vectors, which tolerates
+rephrasing, averaged with the BM25 score of the topic's terms normalized to 0-1, which weighs rare terms such as
+product names. Findings are kept in a SQLite file and indexed in memory when it is opened, findings stored by
+another process are seen by the next one opening the file.
+
+Usage:
+    knowledge_base = open_knowledge_base(config.knowledge_base_path)
+    finding = await knowledge_base.alookup(topic, max_age_seconds=30 * 24 * 60 * 60, min_score=0.6)
+"""
+
+import array
+import asyncio
+import hashlib
+import itertools
+import json
+import math
+import re
+import sqlite3
+import threading
+import time
+from collections import Counter
+from dataclasses import dataclass
+from pathlib import Path
+
+from loguru import logger
+
+DEFAULT_KNOWLEDGE_BASE_DB = Path(".genie") / "knowledge_base.sqlite"
+VECTOR_DIM = 512
+BM25_K1 = 1.2
+BM25_B = 0.75
+# Weight of the vector similarity in the hybrid score, the rest is the normalized BM25 score
+VECTOR_WEIGHT = 0.5
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+STOPWORDS = frozenset(
+    TOKEN_PATTERN.findall(
+        "a an and are as at be by for from how i in into is it me my of on or our should that the this to we what "
+        "which with",
+    ),
+)
+
+
+def tokenize(text: str) -> list[str]:
+    return [token for token in TOKEN_PATTERN.findall(text.lower()) if token not in STOPWORDS]
+
+
+def hashed_vector(tokens: list[str]) -> array.array:
+    """Unit length vector of the hashed words and word bigrams of `tokens`, signed to cancel collisions."""
+    vector = array.array("f", bytes(4 * VECTOR_DIM))
+    for feature in [*tokens, *(f"{a} {b}" for a, b in itertools.pairwise(tokens))]:
+        digest = int.from_bytes(hashlib.blake2b(feature.encode(), digest_size=8).digest(), "little")
+        vector[digest % VECTOR_DIM] += 1.0 if digest >> 63 else -1.0
+    norm = math.sqrt(sum(value * value for value in vector))
+    return array.array("f", (value / norm for value in vector)) if norm else vector
+
+
+def cosine(a: array.array, b: array.array) -> float:
+    return sum(x * y for x, y in zip(a, b, strict=True))
+
+
+@dataclass(frozen=True)
+class Finding:
+    """A stored research finding and how well its topic matched the looked up one."""
+
+    topic: str
+    compressed_research: str
+    raw_notes: str
+    created_at: float
+    score: float
+
+
+@dataclass(frozen=True)
+class _Entry:
+    id: int
+    terms: Counter
+    length: int
+    vector: array.array
+    created_at: float
+
+
+class KnowledgeBase:
+    """
+    SQLite backed store of research findings with an in-memory hybrid index of their topics.
+
+    Args:
+        path: SQLite file, created with its parent directories if needed.
+        max_entries: The oldest findings are dropped above this number of findings.
+
+    """
+
+    def __init__(self, path: str | Path = DEFAULT_KNOWLEDGE_BASE_DB, *, max_entries: int = 5_000) -> None:
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self._counters: Counter = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS research_findings (
+                    id INTEGER PRIMARY KEY AUTOINCREMENT,
+                    topic TEXT NOT NULL,
+                    tokens TEXT NOT NULL,
+                    vector BLOB NOT NULL,
+                    compressed_research TEXT NOT NULL,
+                    raw_notes TEXT NOT NULL,
+                    created_at REAL NOT NULL
+                )""",
+            )
+            rows = self._conn.execute("SELECT id, tokens, vector, created_at FROM research_findings").fetchall()
+        self._entries: dict[int, _Entry] = {}
+        self._document_frequencies: Counter = Counter()
+        for id_, tokens, vector, created_at in rows:
+            self._index(id_, json.loads(tokens), array.array("f", vector), created_at)
+        logger.info("Opened knowledge base at {} with {} findings", self.path, len(self._entries))
+
+    # --- index ---------------------------------------------------------------------------------------
+
+    def _index(self, id_: int, tokens: list[str], vector: array.array, created_at: float) -> None:
+        entry = _Entry(id=id_, terms=Counter(tokens), length=len(tokens), vector=vector, created_at=created_at)
+        self._entries[id_] = entry
+        self._document_frequencies.update(entry.terms.keys())
+
+    def _unindex(self, id_: int) -> None:
+        entry = self._entries.pop(id_)
+        self._document_frequencies.subtract(entry.terms.keys())
+
+    def _bm25(self, query: Counter, terms: Counter, length: int, average_length: float) -> float:
+        score = 0.0
+        for term in query:
+            frequency = terms.get(term, 0)
+            if not frequency:
+                continue
+            documents = self._document_frequencies[term]
+            idf = math.log(1 + (len(self._entries) - documents + 0.5) / (documents + 0.5))
+            score += (
+                idf
+                * frequency
+                * (BM25_K1 + 1)
+                / (frequency + BM25_K1 * (1 - BM25_B + BM25_B * length / average_length))
+            )
+        return score
+
+    def _scores(self, tokens: list[str], entries: list[_Entry]) -> list[float]:
+        """Hybrid similarity between the topic `tokens` and the topics of `entries`, between 0.0 and 1.0."""
+        query = Counter(tokens)
+        vector = hashed_vector(tokens)
+        average_length = sum(entry.length for entry in self._entries.values()) / len(self._entries)
+        # BM25 of the topic against itself, the best a stored topic can score
+        best = self._bm25(query, query, len(tokens), average_length)
+        return [
+            VECTOR_WEIGHT * max(cosine(vector, entry.vector), 0.0)
+            + (1 - VECTOR_WEIGHT) * min(self._bm25(query, entry.terms, entry.length, average_length) / best, 1.0)
+            for entry in entries
+        ]
+
+    # --- lookup and storage --------------------------------------------------------------------------
+
+    def lookup(self, topic: str, *, max_age_seconds: float, min_score: float) -> Finding | None:
+        """The best matching finding younger than `max_age_seconds` scoring at least `min_score`, if any."""
+        tokens = tokenize(topic)
+        with self._lock:
+            now = time.time()
+            fresh = [entry for entry in self._entries.values() if now - entry.created_at <= max_age_seconds]
+            if not tokens or not fresh:
+                self._counters["misses"] += 1
+                return None
+            score, entry = max(zip(self._scores(tokens, fresh), fresh, strict=True), key=lambda pair: pair[0])
+            if score < min_score:
+                self._counters["misses"] += 1
+                logger.debug("No finding for {!r} in the knowledge base, best score {:.2f}", topic[:80], score)
+                return None
+            row = self._conn.execute(
+                "SELECT topic, compressed_research, raw_notes FROM research_findings WHERE id = ?",
+                (entry.id,),
+            ).fetchone()
+            self._counters["hits"] += 1
+        logger.info("Answering {!r} from the knowledge base (score {:.2f}, topic {!r})", topic[:80], score, row[0][:80])
+        return Finding(*row, created_at=entry.created_at, score=round(score, 4))
+
+    def add(self, topic: str, compressed_research: str, raw_notes: str = "") -> None:
+        """Store the finding of `topic`, replacing an earlier finding of the same topic."""
+        tokens = tokenize(topic)
+        if not tokens:
+            return
+        vector = hashed_vector(tokens)
+        now = time.time()
+        with self._lock:
+            replaced = [
+                id_
+                for (id_,) in self._conn.execute(
+                    "SELECT id FROM research_findings WHERE topic = ?",
+                    (topic,),
+                ).fetchall()
+            ]
+            kept = sorted(
+                (entry for entry in self._entries.values() if entry.id not in replaced),
+                key=lambda entry: entry.created_at,
+            )
+            evicted = [entry.id for entry in kept[: max(0, len(kept) + 1 - self.max_entries)]]
+            dropped = [*replaced, *evicted]
+            self._conn.executemany("DELETE FROM research_findings WHERE id = ?", [(id_,) for id_ in dropped])
+            id_ = self._conn.execute(
+                "INSERT INTO research_findings (topic, tokens, vector, compressed_research, raw_notes, created_at) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (topic, json.dumps(tokens), vector.tobytes(), compressed_research, raw_notes, now),
+            ).lastrowid
+            for dropped_id in dropped:
+                if dropped_id in self._entries:
+                    self._unindex(dropped_id)
+            self._index(id_, tokens, vector, now)
+            self._counters["stored"] += 1
+            self._counters["evicted"] += len(evicted)
+
+    async def alookup(self, topic: str, *, max_age_seconds: float, min_score: float) -> Finding | None:
+        return await asyncio.to_thread(self.lookup, topic, max_age_seconds=max_age_seconds, min_score=min_score)
+
+    async def aadd(self, topic: str, compressed_research: str, raw_notes: str = "") -> None:
+        await asyncio.to_thread(self.add, topic, compressed_research, raw_notes)
+
+    def stats(self) -> dict[str, int]:
+        """Findings stored and answered, e.g. `{"findings": 120, "hits": 3, "misses": 5, "stored": 5, ...}`."""
+        return {
+            "findings": len(self._entries),
+            **{key: self._counters[key] for key in ("hits", "misses", "stored", "evicted")},
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+_knowledge_bases: dict[Path, KnowledgeBase] = {}
+
+
+def open_knowledge_base(path: str | Path = DEFAULT_KNOWLEDGE_BASE_DB) -> KnowledgeBase:
+    """The knowledge base stored at `path`, opened once per process."""
+    path = Path(path).resolve()
+    if path not in _knowledge_bases:
+        _knowledge_bases[path] = KnowledgeBase(path)
+    return _knowledge_bases[path]
+
+
+def knowledge_base_stats() -> dict[str, dict[str, int]]:
+    """Stats of every knowledge base opened by the process, per file."""
+    return {str(path): knowledge_base.stats() for path, knowledge_base in _knowledge_bases.items()}
@@ -0,0 +1,286 @@
+"""
+Size bounded, lazy logging of large payloads.
+
+Nodes log configurations, model responses, notes and reports. Formatting them in full costs time on every call
+and writes megabytes per run to the DEBUG file. This module keeps both small:
+
+- `brief(value)` wraps a payload and only renders it when the level of the record is logged at all. Strings
+  longer than the limit are cut and tagged with their length and a hash, so equal payloads can still be matched
+  across records. Models, messages, mappings and sequences are rendered field by field, each field cut on its own,
+- `CallSiteSampler` keeps the first and then every n-th DEBUG record of each call site. Loguru formats a record
+  before the handler filters run, so `sampled_debug` asks `debug_sampler` before the record and its payloads are
+  formatted, the handler filter samples the other DEBUG records,
+- `BoundedFileSink` hands records to a writer thread through a bounded queue. When the queue is full the
+  record is dropped and counted instead of blocking the event loop,
+- `log_stats` counts records, bytes, drops, sampled out records, cut payloads and the time spent rendering
+  payloads, so logging overhead and volume per run are visible (`GraphMetrics` reports them).
+
+Usage:
+    configure_logging("genie.log")
+    sampled_debug("Supervisor response: {}", brief(response))
+"""
+
+import atexit
+import hashlib
+import logging
+import os
+import queue
+import sys
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping
+from logging.handlers import RotatingFileHandler
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from loguru import logger
+from pydantic import BaseModel
+
+DEFAULT_LIMIT = 300
+MAX_ITEMS = 10
+MAX_DEPTH = 3
+DEBUG_LEVEL_NO = 10
+# Strings at most this much longer than the limit are kept whole, the tag would not make them shorter
+CLIP_TAG_CHARS = 40
+
+
+class LogStats:
+    """Counters of the logging layer, shared by the whole process."""
+
+    _instance = None
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, every sink and payload of the process counts in the same place."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def record(self, counter: str, value: float = 1) -> None:
+        self._counters[counter] += value
+
+    def stats(self) -> dict[str, float]:
+        """e.g. `{"records": 1200, "bytes": 310000, "dropped": 0, "truncated_chars": 5800000, ...}`."""
+        return {
+            "records": self._counters["records"],
+            "bytes": self._counters["bytes"],
+            "dropped": self._counters["dropped"],
+            "sampled_out": self._counters["sampled_out"],
+            "truncated_payloads": self._counters["truncated_payloads"],
+            "truncated_chars": self._counters["truncated_chars"],
+            "render_seconds": round(self._counters["render_seconds"], 6),
+        }
+
+    def reset(self) -> None:
+        self._counters = Counter()
+
+
+log_stats = LogStats()
+
+
+def _clip(text: str, limit: int) -> str:
+    if len(text) <= limit + CLIP_TAG_CHARS:
+        return text
+    log_stats.record("truncated_payloads")
+    log_stats.record("truncated_chars", len(text) - limit)
+    digest = hashlib.sha1(text.encode("utf-8", "replace")).hexdigest()[:12]  # noqa: S324
+    return f"{text[:limit]}... [{len(text)} chars, sha1 {digest}]"
+
+
+def _render(value: Any, limit: int, depth: int = 0) -> str:
+    """`value` rendered with every string field cut to `limit` characters."""
+    if isinstance(value, str):
+        return _clip(value, limit)
+    if depth >= MAX_DEPTH:
+        size = f" of {len(value)}" if hasattr(value, "__len__") else ""
+        return f"<{type(value).__name__}{size}>"
+    if isinstance(value, BaseMessage):
+        parts = [f"content={_render(value.content, limit, depth + 1)}"]
+        if tool_calls := getattr(value, "tool_calls", None):
+            parts.append(f"tool_calls={[tool_call['name'] for tool_call in tool_calls]}")
+        return f"{type(value).__name__}({', '.join(parts)})"
+    if isinstance(value, BaseModel):
+        fields = ", ".join(
+            f"{name}={_render(getattr(value, name), limit, depth + 1)}" for name in type(value).model_fields
+        )
+        return f"{type(value).__name__}({fields})"
+    if isinstance(value, Mapping | list | tuple | set | frozenset):
+        if isinstance(value, Mapping):
+            items = [f"{key!s}: {_render(item, limit, depth + 1)}" for key, item in list(value.items())[:MAX_ITEMS]]
+        else:
+            items = [_render(item, limit, depth + 1) for item in list(value)[:MAX_ITEMS]]
+        more = [f"... +{len(value) - MAX_ITEMS} more"] if len(value) > MAX_ITEMS else []
+        opening, closing = "{}" if isinstance(value, Mapping) else "[]"
+        return opening + ", ".join(items + more) + closing
+    return _clip(str(value), limit)
+
+
+class Brief:
+    """A payload rendered when the record is formatted, see `brief`."""
+
+    __slots__ = ("limit", "value")
+
+    def __init__(self, value: Any, limit: int = DEFAULT_LIMIT) -> None:
+        self.value = value
+        self.limit = limit
+
+    def __str__(self) -> str:
+        started = time.perf_counter()
+        try:
+            return _render(self.value, self.limit)
+        finally:
+            log_stats.record("render_seconds", time.perf_counter() - started)
+
+    def __format__(self, format_spec: str) -> str:
+        return format(str(self), format_spec)
+
+
+def brief(value: Any, limit: int = DEFAULT_LIMIT) -> Brief:
+    """
+    Wrap `value` to be rendered lazily and cut to size when a record is formatted.
+
+    Usage: `logger.debug("Response: {}", brief(response))`
+
+    Args:
+        value: Any payload, nothing is rendered unless a handler takes records of the level.
+        limit: Characters kept of every string field.
+
+    """
+    return Brief(value, limit)
+
+
+class CallSiteSampler:
+    """
+    Handler filter keeping the first and then every `every`-th DEBUG record of each call site.
+
+    Records above DEBUG are always kept. `sampled_debug` asks `keep` before a record is formatted.
+    """
+
+    def __init__(self, every: int = 1) -> None:
+        self.reset(every)
+
+    def keep(self, site: tuple[str | None, int]) -> bool:
+        """Whether the next DEBUG record of `site`, its module and line, is kept."""
+        if self.every == 1:
+            return True
+        self._seen[site] += 1
+        if (self._seen[site] - 1) % self.every == 0:
+            return True
+        log_stats.record("sampled_out")
+        return False
+
+    def __call__(self, record: dict) -> bool:
+        # records of `sampled_debug` were sampled before they were formatted
+        if record["level"].no > DEBUG_LEVEL_NO or record["extra"].get("sampled"):
+            return True
+        return self.keep((record["name"], record["line"]))
+
+    def reset(self, every: int = 1) -> None:
+        self.every = max(1, every)
+        self._seen: Counter = Counter()
+
+
+debug_sampler = CallSiteSampler()
+
+
+def sampled_debug(message: str, *args: Any, **kwargs: Any) -> None:
+    """
+    `logger.debug(message, *args, **kwargs)`, sampled by `debug_sampler` before the message is formatted.
+
+    A sampled out record never renders its `brief` payloads. Usage: `sampled_debug("Response: {}", brief(response))`
+    """
+    caller = sys._getframe(1)  # noqa: SLF001
+    if debug_sampler.keep((caller.f_globals.get("__name__"), caller.f_lineno)):
+        logger.bind(sampled=True).opt(depth=1).debug(message, *args, **kwargs)
+
+
+class BoundedFileSink:
+    """
+    Loguru sink writing to a rotating file from a writer thread, dropping records when the queue is full.
+
+    Args:
+        path: Log file, rotated to `path.1`, `path.2`, ... when it reaches `max_bytes`.
+        max_queue: Records waiting for the writer before new records are dropped.
+        max_bytes: Size of a log file before it is rotated.
+        backup_count: Rotated files kept.
+
+    """
+
+    def __init__(
+        self,
+        path: str | Path,
+        *,
+        max_queue: int = 10_000,
+        max_bytes: int = 10 * 1024 * 1024,
+        backup_count: int = 3,
+    ) -> None:
+        Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self._handler = RotatingFileHandler(
+            path,
+            maxBytes=max_bytes,
+            backupCount=backup_count,
+            encoding="utf-8",
+            delay=True,
+        )
+        self._handler.setFormatter(logging.Formatter("%(message)s"))
+        self._queue: queue.Queue[str | None] = queue.Queue(maxsize=max_queue)
+        self._thread = threading.Thread(target=self._drain, name="log-writer", daemon=True)
+        self._thread.start()
+        self._stopped = False
+        # records still queued when the interpreter exits are written first
+        atexit.register(self.stop)
+
+    def write(self, message: str) -> None:
+        try:
+            self._queue.put_nowait(str(message))
+        except queue.Full:
+            log_stats.record("dropped")
+            return
+        log_stats.record("records")
+        log_stats.record("bytes", len(message))
+
+    def _drain(self) -> None:
+        while (message := self._queue.get()) is not None:
+            self._handler.emit(logging.makeLogRecord({"msg": message.rstrip("\n")}))
+
+    def stop(self) -> None:
+        """Write the queued records and close the file, called by loguru when the handler is removed."""
+        if self._stopped:
+            return
+        self._stopped = True
+        atexit.unregister(self.stop)
+        self._queue.put(None)
+        self._thread.join()
+        self._handler.close()
+
+
+def configure_logging(
+    log_file: str | Path,
+    *,
+    console_level: str = "INFO",
+    max_bytes: int = 10 * 1024 * 1024,
+    max_queue: int = 10_000,
+    debug_sample_every: int | None = None,
+) -> None:
+    """
+    Log `console_level` records to stdout and DEBUG records to a bounded, rotating `log_file`.
+
+    `debug_sample_every` defaults to the `LOG_DEBUG_SAMPLE_EVERY` environment variable, 1 keeps every record.
+    """
+    if debug_sample_every is None:
+        debug_sample_every = int(os.environ.get("LOG_DEBUG_SAMPLE_EVERY", "1"))
+    debug_sampler.reset(debug_sample_every)
+    logger.configure(
+        handlers=[
+            {"sink": sys.stdout, "level": console_level, "colorize": True},
+            {
+                "sink": BoundedFileSink(log_file, max_queue=max_queue, max_bytes=max_bytes),
+                "level": "DEBUG",
+                "filter": debug_sampler,
+                "colorize": False,
+            },
+        ],
+    )
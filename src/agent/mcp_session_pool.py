@@ -0,0 +1,247 @@
+"""
+Pool of long lived MCP sessions.
+
+Tools returned by `MultiServerMCPClient.get_tools()` open a new session for every call, with the stdio
+filesystem server configured in `mcp_config.json` that is a new `docker run` per tool call. `MCPSessionPool`
+
+- starts each server once and keeps its stdio session open on a dedicated event loop thread, so the session
+  is shared by every graph run, event loop and thread of the process,
+- pings a session that has been idle longer than `health_check_interval` before handing it out,
+- restarts a server whose session died and retries the failed call once.
+
+Tools loaded from the pool are regular LangChain tools bound to the pooled session.
+"""
+
+import asyncio
+import threading
+import time
+from collections.abc import Coroutine
+from typing import Any
+
+from langchain_core.tools import BaseTool
+from langchain_mcp_adapters.client import MultiServerMCPClient
+from langchain_mcp_adapters.tools import load_mcp_tools
+from loguru import logger
+from mcp import ClientSession
+
+
+class PooledSession:
+    """
+    Long lived session of one MCP server.
+
+    The session context is entered and left by a single background task, as required by the anyio task
+    groups of the stdio transport, while calls may come from any task of the pool loop.
+    """
+
+    def __init__(
+        self,
+        client: MultiServerMCPClient,
+        server_name: str,
+        health_check_interval: float,
+        health_check_timeout: float,
+    ) -> None:
+        self.client = client
+        self.server_name = server_name
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self.starts = 0
+        self.last_used = 0.0
+        self._session: ClientSession | None = None
+        self._task: asyncio.Task | None = None
+        self._closing = asyncio.Event()
+        self._ready = asyncio.Event()
+        self._error: BaseException | None = None
+        self._lock = asyncio.Lock()
+
+    async def _run(self) -> None:
+        try:
+            async with self.client.session(self.server_name) as session:
+                self._session = session
+                self._ready.set()
+                await self._closing.wait()
+        except Exception as e:
+            self._error = e
+            logger.warning("MCP server {} session ended: {}", self.server_name, e)
+        finally:
+            self._session = None
+            self._ready.set()
+
+    async def _start(self) -> None:
+        self._closing, self._ready, self._error = asyncio.Event(), asyncio.Event(), None
+        self._task = asyncio.create_task(self._run(), name=f"mcp-session-{self.server_name}")
+        await self._ready.wait()
+        if self._session is None:
+            msg = f"Could not start MCP server {self.server_name}"
+            raise ConnectionError(msg) from self._error
+        self.starts += 1
+        logger.info("MCP server {} started (start #{})", self.server_name, self.starts)
+
+    async def _stop(self) -> None:
+        if self._task is None:
+            return
+        self._closing.set()
+        try:
+            await asyncio.wait_for(self._task, timeout=self.health_check_timeout)
+        except Exception:
+            self._task.cancel()
+        self._task = None
+
+    @property
+    def connected(self) -> bool:
+        return self._session is not None
+
+    async def is_healthy(self) -> bool:
+        if self._session is None:
+            return False
+        try:
+            await asyncio.wait_for(self._session.send_ping(), timeout=self.health_check_timeout)
+        except Exception:
+            return False
+        return True
+
+    async def get(self) -> ClientSession:
+        """Return a live session, starting or restarting the server when needed."""
+        async with self._lock:
+            stale = time.monotonic() - self.last_used > self.health_check_interval
+            if self._session is None or (stale and not await self.is_healthy()):
+                if self._task is not None:
+                    logger.warning("MCP server {} is not answering, restarting it", self.server_name)
+                await self._stop()
+                await self._start()
+            self.last_used = time.monotonic()
+            return self._session
+
+    async def restart(self, session: ClientSession) -> None:
+        """Restart the server unless another caller already replaced `session`."""
+        async with self._lock:
+            if self._session is session and await self.is_healthy():
+                return
+            await self._stop()
+            await self._start()
+
+    async def close(self) -> None:
+        async with self._lock:
+            await self._stop()
+
+
+class _SessionProxy:
+    """Stands in for a `ClientSession` in tools loaded from the pool and forwards calls to the pool loop."""
+
+    def __init__(self, pool: "MCPSessionPool", server_name: str) -> None:
+        self.pool = pool
+        self.server_name = server_name
+
+    async def list_tools(self, cursor: str | None = None) -> Any:
+        return await self.pool.list_tools(self.server_name, cursor)
+
+    async def call_tool(self, name: str, arguments: dict[str, Any] | None = None, **_: Any) -> Any:
+        # Progress callbacks are dropped, they would run on the pool loop instead of the caller's
+        return await self.pool.call_tool(self.server_name, name, arguments)
+
+
+class MCPSessionPool:
+    """
+    Long lived sessions for every server of an MCP configuration.
+
+    Args:
+        connections: `mcpServers` section of the MCP configuration.
+        health_check_interval: Ping a session idle for longer than this many seconds before reusing it.
+        health_check_timeout: Seconds to wait for a ping answer or for a server to shut down.
+
+    """
+
+    def __init__(
+        self,
+        connections: dict[str, Any],
+        *,
+        health_check_interval: float = 30.0,
+        health_check_timeout: float = 5.0,
+    ) -> None:
+        self.client = MultiServerMCPClient(connections=connections)
+        self.health_check_interval = health_check_interval
+        self.health_check_timeout = health_check_timeout
+        self._sessions: dict[str, PooledSession] = {}
+        self._loop: asyncio.AbstractEventLoop | None = None
+        self._thread: threading.Thread | None = None
+        self._thread_lock = threading.Lock()
+
+    # --- pool loop -----------------------------------------------------------------------------------
+
+    def _ensure_loop(self) -> asyncio.AbstractEventLoop:
+        with self._thread_lock:
+            if self._loop is None or self._loop.is_closed():
+                self._loop = asyncio.new_event_loop()
+                self._thread = threading.Thread(target=self._loop.run_forever, name="mcp-session-pool", daemon=True)
+                self._thread.start()
+            return self._loop
+
+    async def run(self, coro: Coroutine[Any, Any, Any]) -> Any:
+        """Run `coro` on the pool loop and await its result from the caller's loop."""
+        future = asyncio.run_coroutine_threadsafe(coro, self._ensure_loop())
+        return await asyncio.wrap_future(future)
+
+    def _session(self, server_name: str) -> PooledSession:
+        if server_name not in self._sessions:
+            if server_name not in self.client.connections:
+                msg = f"Unknown MCP server {server_name}, expected one of {list(self.client.connections)}"
+                raise ValueError(msg)
+            self._sessions[server_name] = PooledSession(
+                self.client,
+                server_name,
+                self.health_check_interval,
+                self.health_check_timeout,
+            )
+        return self._sessions[server_name]
+
+    async def _list_tools(self, server_name: str, cursor: str | None) -> Any:
+        session = await self._session(server_name).get()
+        return await session.list_tools(cursor=cursor)
+
+    async def _call_tool(self, server_name: str, name: str, arguments: dict[str, Any] | None) -> Any:
+        pooled = self._session(server_name)
+        session = await pooled.get()
+        try:
+            return await session.call_tool(name, arguments)
+        except Exception as e:
+            if await pooled.is_healthy():
+                raise
+            logger.warning("MCP server {} failed during {}: {}, reconnecting", server_name, name, e)
+        await pooled.restart(session)
+        session = await pooled.get()
+        return await session.call_tool(name, arguments)
+
+    # --- public API ----------------------------------------------------------------------------------
+
+    async def list_tools(self, server_name: str, cursor: str | None = None) -> Any:
+        """One page of the MCP tool definitions of `server_name`."""
+        return await self.run(self._list_tools(server_name, cursor))
+
+    async def call_tool(self, server_name: str, name: str, arguments: dict[str, Any] | None = None) -> Any:
+        """Call an MCP tool on the pooled session of `server_name` and return the raw `CallToolResult`."""
+        return await self.run(self._call_tool(server_name, name, arguments))
+
+    async def get_tools(self) -> list[BaseTool]:
+        """Load the tools of every server, bound to the pooled sessions."""
+        tools: list[BaseTool] = []
+        for server_name in self.client.connections:
+            tools.extend(await load_mcp_tools(_SessionProxy(self, server_name), server_name=server_name))
+        return tools
+
+    def stats(self) -> dict[str, dict[str, Any]]:
+        """Number of starts of every server, more than one means the server was restarted."""
+        return {
+            name: {"starts": session.starts, "connected": session.connected} for name, session in self._sessions.items()
+        }
+
+    async def aclose(self) -> None:
+        """Stop every server and the pool loop."""
+        if self._loop is None or self._loop.is_closed():
+            return
+        for session in list(self._sessions.values()):
+            await self.run(session.close())
+        self._sessions.clear()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        if self._thread is not None:
+            await asyncio.to_thread(self._thread.join)
+        self._loop.close()
+        self._loop = None
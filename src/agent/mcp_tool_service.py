@@ -1,18 +1,42 @@
+import asyncio
+
 import rootutils
-from langchain_mcp_adapters.client import MultiServerMCPClient
 
 try:
+    from .filesystem_tools import DEFAULT_MOUNT, get_filesystem_tools
+    from .mcp_session_pool import MCPSessionPool
     from .my_mcps import mcp_config
 
 except ImportError:
     rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.filesystem_tools import DEFAULT_MOUNT, get_filesystem_tools
+    from src.agent.mcp_session_pool import MCPSessionPool
     from src.agent.my_mcps import mcp_config
 
+# Servers with this transport run inside the graph process, e.g.
+# "filesystem": {"transport": "in_process", "provider": "filesystem", "root": "${WORKSPACE}"}
+IN_PROCESS_TRANSPORT = "in_process"
+IN_PROCESS_PROVIDERS = {
+    "filesystem": lambda server_config: get_filesystem_tools(
+        server_config["root"],
+        server_config.get("mount", DEFAULT_MOUNT),
+    ),
+}
+
+
+def split_servers(servers: dict[str, dict]) -> tuple[dict[str, dict], dict[str, dict]]:
+    """Split the `mcpServers` configuration into in-process servers and servers reached over MCP."""
+    in_process = {name: server for name, server in servers.items() if server.get("transport") == IN_PROCESS_TRANSPORT}
+    remote = {name: server for name, server in servers.items() if name not in in_process}
+    return in_process, remote
+
 
 class MCPToolService:
     _instance = None
     _tools_cache = None
     _tools_by_name_cache = None
+    _session_pool: MCPSessionPool | None = None
+    _fetch_task: asyncio.Task | None = None
 
     def __new__(cls):
         """
@@ -28,16 +52,49 @@ class MCPToolService:
     async def get_tools(self):
         """Get tools, using cache if available."""
         if self._tools_cache is None:
-            await self._fetch_tools()
+            # A warm-up may already be starting the servers, wait for it instead of starting them twice
+            task = self._fetch_task
+            if task is None or task.done() or task.get_loop() is not asyncio.get_running_loop():
+                task = self._fetch_task = asyncio.ensure_future(self._fetch_tools())
+            await asyncio.shield(task)
         return self._tools_cache, self._tools_by_name_cache
 
+    @property
+    def session_pool(self) -> MCPSessionPool:
+        """Long lived MCP sessions, servers are started once and reused by every tool call."""
+        if self._session_pool is None:
+            _, remote = split_servers(mcp_config["mcpServers"])
+            self._session_pool = MCPSessionPool(connections=remote)
+        return self._session_pool
+
+    def stats(self) -> dict:
+        """Stats of the MCP session pool, without starting a pool when no remote server was used yet."""
+        return self._session_pool.stats() if self._session_pool is not None else {}
+
     async def _fetch_tools(self):
         """Fetch tools from MCP and cache them."""
-        client = MultiServerMCPClient(connections=mcp_config["mcpServers"])
-        tools = await client.get_tools()
+        in_process, remote = split_servers(mcp_config["mcpServers"])
+        tools = []
+        for name, server_config in in_process.items():
+            provider = server_config.get("provider", name)
+            if provider not in IN_PROCESS_PROVIDERS:
+                msg = f"Unknown in-process MCP provider {provider}, expected one of {list(IN_PROCESS_PROVIDERS)}"
+                raise ValueError(msg)
+            tools.extend(IN_PROCESS_PROVIDERS[provider](server_config))
+        if remote:
+            tools.extend(await self.session_pool.get_tools())
         self._tools_cache = tools
         self._tools_by_name_cache = {tool.name: tool for tool in tools if hasattr(tool, "name")}
 
+    async def aclose(self):
+        """Stop the MCP servers, tools are fetched again on next use."""
+        if self._session_pool is not None:
+            await self._session_pool.aclose()
+        self._session_pool = None
+        self._fetch_task = None
+        self._tools_cache = None
+        self._tools_by_name_cache = None
+
     # def get_tools_metadata(self, tools) -> dict:
     #     """Extract serializable metadata from tools."""
     #     return {
@@ -0,0 +1,122 @@
+"""
+Content length aware model routing for webpage summaries and research compression.
+
+Every page used to go to `Configuration.summarization_model` and every research bundle to
+`compression_model`, whatever their size: short snippets paid the latency of a big model. With
+`summarization_model_tiers` / `compression_model_tiers` configured, a request goes to the smallest tier whose
+`max_input_tokens` fits its estimated input tokens. A request larger than every tier, or whose call fails, goes
+to the next larger tier and finally to the configured model of the task.
+
+Routed calls carry `route_task`, `route_default` and `route_fallback` metadata, `GraphMetrics` reports the routing decisions of a
+run and the latency and cost saved against the configured model.
+
+Usage:
+    summary = await routed_ainvoke(build, messages, task="summarization", config=config)
+"""
+
+from collections import Counter
+from collections.abc import Callable
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langchain_core.runnables import Runnable
+from loguru import logger
+
+try:
+    from .configuration import Configuration
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(search_from=__file__, indicator=[".git", "pyproject.toml"], pythonpath=True)
+    from src.agent.configuration import Configuration
+
+# Rough size of a token in English text, good enough to pick a tier
+CHARS_PER_TOKEN = 4
+# Role and separators of a chat message
+MESSAGE_OVERHEAD_TOKENS = 4
+# Configured model and tiers of every routed task
+TASKS = {
+    "summarization": ("summarization_model", "summarization_model_tiers"),
+    "compression": ("compression_model", "compression_model_tiers"),
+}
+
+
+def estimate_tokens(value: str | BaseMessage | list) -> int:
+    """Estimated input tokens of a text, a message or a list of them."""
+    if isinstance(value, str):
+        return len(value) // CHARS_PER_TOKEN
+    if isinstance(value, BaseMessage):
+        return MESSAGE_OVERHEAD_TOKENS + estimate_tokens(str(value.content))
+    return sum(estimate_tokens(item) for item in value)
+
+
+def route(task: str, input_tokens: int, config: Configuration) -> list[str]:
+    """Models to try for `task` in order: the tiers fitting `input_tokens`, smallest first, then the task's model."""
+    model_field, tiers_field = TASKS[task]
+    default_model = getattr(config, model_field)
+    tiers = sorted(getattr(config, tiers_field), key=lambda tier: tier.max_input_tokens)
+    candidates = [tier.model for tier in tiers if tier.max_input_tokens >= input_tokens]
+    return list(dict.fromkeys([*candidates, default_model]))
+
+
+class ModelRouter:
+    """Counters of the routing decisions and fallbacks, shared by the whole process."""
+
+    _instance = None
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, the decisions of every run of the process are counted in one place."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def record(self, task: str, model: str, *, fallback: bool) -> None:
+        self._counters[f"{task}:{model}"] += 1
+        self._counters["fallbacks"] += fallback
+
+    def stats(self) -> dict[str, int]:
+        """Calls per task and model and the fallbacks, e.g. `{"summarization:ollama:qwen3:8b": 40, "fallbacks": 1}`."""
+        return dict(sorted(self._counters.items()))
+
+    def reset(self) -> None:
+        self._counters = Counter()
+
+
+model_router = ModelRouter()
+
+
+async def routed_ainvoke(
+    build: Callable[[str], Runnable],
+    messages: Any,
+    *,
+    task: str,
+    config: Configuration,
+) -> Any:
+    """
+    Invoke `build(model)` with `messages` for the model `route` picks, falling back to the next model on failure.
+
+    The error of the last model is raised.
+
+    Args:
+        build: Returns the runnable calling a model, e.g. the model with its structured output and settings.
+        messages: Input of the runnable, its size picks the model.
+        task: `"summarization"` or `"compression"`.
+        config: Configured model and tiers of the task.
+
+    """
+    input_tokens = estimate_tokens(messages)
+    *smaller_models, default_model = route(task, input_tokens, config)
+    metadata = {"route_task": task, "route_default": default_model, "route_input_tokens": input_tokens}
+    for position, model in enumerate(smaller_models):
+        model_router.record(task, model, fallback=position > 0)
+        try:
+            return (
+                await build(model).with_config(metadata={**metadata, "route_fallback": position > 0}).ainvoke(messages)
+            )
+        except Exception as error:
+            logger.warning("{} with {} failed, falling back to the next model: {}", task, model, error)
+    fallback = bool(smaller_models)
+    model_router.record(task, default_model, fallback=fallback)
+    return await build(default_model).with_config(metadata={**metadata, "route_fallback": fallback}).ainvoke(messages)
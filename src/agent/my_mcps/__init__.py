@@ -16,6 +16,15 @@ with mcp_config_file.open(mode="r", encoding="utf-8") as f:
     _mcp_config = json.load(f)
 
 
+def resolve_root(server: str, root: str) -> str:
+    """Workspace root of an in-process server, e.g. "${WORKSPACE}"."""
+    resolved = re.sub(r"\$\{([^}]+)\}", lambda match: os.environ.get(match.group(1), ""), root)
+    if resolved == "":
+        msg = f"Workspace root of MCP server {server} is not set"
+        raise ValueError(msg)
+    return resolved
+
+
 def resolve_env_vars(config: dict):
     for server, server_config in config["mcpServers"].items():
         if "env" in server_config:
@@ -24,6 +33,8 @@ def resolve_env_vars(config: dict):
                 if config["mcpServers"][server]["env"][env_var] == "":
                     msg = f"Environment variable {env_var} is not set"
                     raise ValueError(msg)
+        if "root" in server_config:
+            config["mcpServers"][server]["root"] = resolve_root(server, server_config["root"])
         if "args" in server_config:
             for i, arg in enumerate(server_config["args"]):
                 # Handle ${VAR} patterns anywhere in the string
@@ -0,0 +1,326 @@
+"""
+Persistent node cache shared across processes.
+
+A bare `CachePolicy()` hashes the whole node input with LangGraph's in-process cache, so nothing survives a
+restart and any incidental change in the input (message ids, iteration counters) is a miss. This module
+provides
+
+- `DiskNodeCache`, a LangGraph `BaseCache` stored in a local SQLite file with per entry TTL and LRU eviction
+  by entry count and total size, safe to share between processes through WAL mode,
+- explicit key functions for the expensive nodes. A key only hashes what decides the node output: the
+  research topic or brief, the message contents and tool calls, the configured model and search API and the
+  prompt version. Random message ids are left out so that the same request hits across runs, and
+  `supervisor_tool` is keyed on the requested research topics only, as the uncached supervisor makes new tool
+  call ids on every run.
+
+Usage:
+    graph = agent_builder.compile(checkpointer=checkpointer, cache=DiskNodeCache())
+"""
+
+import asyncio
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from collections import Counter
+from collections.abc import Mapping, Sequence
+from functools import cache
+from pathlib import Path
+from typing import Any
+
+from langchain_core.messages import BaseMessage
+from langgraph.cache.base import BaseCache, FullKey, Namespace, ValueT
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.config import get_config
+from langgraph.func import CachePolicy
+from loguru import logger
+
+try:
+    from . import prompts
+    from .checkpoint_serializer import state_serializer
+    from .configuration import Configuration
+    from .states import StatesKeys
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent import prompts
+    from src.agent.checkpoint_serializer import state_serializer
+    from src.agent.configuration import Configuration
+    from src.agent.states import StatesKeys
+
+DEFAULT_NODE_CACHE_DB = Path(".genie") / "node_cache.sqlite"
+# Search results go stale faster than model answers on the same inputs
+SEARCH_CACHE_TTL = 6 * 60 * 60
+MODEL_CACHE_TTL = 7 * 24 * 60 * 60
+
+
+class DiskNodeCache(BaseCache[ValueT]):
+    """
+    SQLite backed LangGraph cache with TTL and LRU eviction.
+
+    Args:
+        path: SQLite file, created with its parent directories if needed.
+        max_entries: Least recently used entries are evicted above this number of entries.
+        max_bytes: Least recently used entries are evicted above this total size of serialized values.
+        serde: Serializer for the cached node writes, defaults to `state_serializer()`.
+
+    """
+
+    def __init__(
+        self,
+        path: str | Path = DEFAULT_NODE_CACHE_DB,
+        *,
+        max_entries: int = 10_000,
+        max_bytes: int = 512 * 1024 * 1024,
+        serde: SerializerProtocol | None = None,
+    ) -> None:
+        super().__init__(serde=serde or state_serializer())
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._counters: Counter = Counter()
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(str(self.path), check_same_thread=False, isolation_level=None)
+        with self._lock:
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute("PRAGMA synchronous=NORMAL")
+            self._conn.execute("PRAGMA busy_timeout=5000")
+            self._conn.execute(
+                """CREATE TABLE IF NOT EXISTS node_cache (
+                    ns TEXT NOT NULL,
+                    key TEXT NOT NULL,
+                    expiry REAL,
+                    last_access REAL NOT NULL,
+                    size INTEGER NOT NULL,
+                    encoding TEXT NOT NULL,
+                    val BLOB NOT NULL,
+                    PRIMARY KEY (ns, key)
+                )""",
+            )
+            self._conn.execute("CREATE INDEX IF NOT EXISTS node_cache_last_access ON node_cache (last_access)")
+        logger.info("Opened node cache at {}", self.path)
+
+    # --- BaseCache -----------------------------------------------------------------------------------
+
+    def get(self, keys: Sequence[FullKey]) -> dict[FullKey, ValueT]:
+        if not keys:
+            return {}
+        now = time.time()
+        placeholders = ",".join("(?, ?)" for _ in keys)
+        params = [value for ns, key in keys for value in (_ns_to_str(ns), key)]
+        with self._lock:
+            rows = self._conn.execute(
+                f"SELECT ns, key, expiry, encoding, val FROM node_cache WHERE (ns, key) IN ({placeholders})",  # noqa: S608
+                params,
+            ).fetchall()
+            fresh = [row for row in rows if row[2] is None or row[2] > now]
+            expired = [(row[0], row[1]) for row in rows if row[2] is not None and row[2] <= now]
+            self._conn.executemany(
+                "UPDATE node_cache SET last_access = ? WHERE ns = ? AND key = ?",
+                [(now, ns, key) for ns, key, *_ in fresh],
+            )
+            self._conn.executemany("DELETE FROM node_cache WHERE ns = ? AND key = ?", expired)
+            found = {(ns, key) for ns, key, *_ in fresh}
+            for ns, key in keys:
+                self._counters[(_node_name(ns), "hits" if (_ns_to_str(ns), key) in found else "misses")] += 1
+
+        return {(_ns_from_str(ns), key): self.serde.loads_typed((encoding, val)) for ns, key, _, encoding, val in fresh}
+
+    async def aget(self, keys: Sequence[FullKey]) -> dict[FullKey, ValueT]:
+        return await asyncio.to_thread(self.get, keys)
+
+    def set(self, pairs: Mapping[FullKey, tuple[ValueT, int | None]]) -> None:
+        now = time.time()
+        rows = []
+        for (ns, key), (value, ttl) in pairs.items():
+            encoding, val = self.serde.dumps_typed(value)
+            rows.append((_ns_to_str(ns), key, now + ttl if ttl is not None else None, now, len(val), encoding, val))
+        with self._lock:
+            self._conn.executemany(
+                "INSERT OR REPLACE INTO node_cache (ns, key, expiry, last_access, size, encoding, val) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            self._evict_locked(now)
+
+    async def aset(self, pairs: Mapping[FullKey, tuple[ValueT, int | None]]) -> None:
+        await asyncio.to_thread(self.set, pairs)
+
+    def clear(self, namespaces: Sequence[Namespace] | None = None) -> None:
+        with self._lock:
+            if namespaces is None:
+                self._conn.execute("DELETE FROM node_cache")
+            else:
+                self._conn.executemany("DELETE FROM node_cache WHERE ns = ?", [(_ns_to_str(ns),) for ns in namespaces])
+
+    async def aclear(self, namespaces: Sequence[Namespace] | None = None) -> None:
+        await asyncio.to_thread(self.clear, namespaces)
+
+    # --- eviction and stats --------------------------------------------------------------------------
+
+    def _evict_locked(self, now: float) -> None:
+        self._counters[("", "expired")] += self._conn.execute(
+            "DELETE FROM node_cache WHERE expiry IS NOT NULL AND expiry <= ?",
+            (now,),
+        ).rowcount
+        entries, total_bytes = self._conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM node_cache").fetchone()
+        if entries <= self.max_entries and total_bytes <= self.max_bytes:
+            return
+        evicted = 0
+        for ns, key, size in self._conn.execute(
+            "SELECT ns, key, size FROM node_cache ORDER BY last_access ASC",
+        ).fetchall():
+            if entries <= self.max_entries and total_bytes <= self.max_bytes:
+                break
+            self._conn.execute("DELETE FROM node_cache WHERE ns = ? AND key = ?", (ns, key))
+            entries, total_bytes, evicted = entries - 1, total_bytes - size, evicted + 1
+        self._counters[("", "evicted")] += evicted
+        logger.debug("Node cache evicted {} least recently used entries", evicted)
+
+    def stats(self) -> dict[str, Any]:
+        """
+        Hit rate per node and eviction counters of this process.
+
+        e.g. `{"nodes": {"research_agent": {"hits": 3, "misses": 1, "hit_rate": 0.75}}, "evicted": 0, ...}`
+        """
+        nodes: dict[str, dict[str, float]] = {}
+        for (node, kind), count in self._counters.items():
+            if node:
+                nodes.setdefault(node, {"hits": 0, "misses": 0})[kind] = count
+        for counters in nodes.values():
+            lookups = counters["hits"] + counters["misses"]
+            counters["hit_rate"] = round(counters["hits"] / lookups, 4) if lookups else 0.0
+        with self._lock:
+            entries, total_bytes = self._conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM node_cache",
+            ).fetchone()
+        return {
+            "nodes": nodes,
+            "entries": entries,
+            "bytes": total_bytes,
+            "expired": self._counters[("", "expired")],
+            "evicted": self._counters[("", "evicted")],
+        }
+
+    def close(self) -> None:
+        with self._lock:
+            self._conn.close()
+
+
+def _ns_to_str(ns: Namespace) -> str:
+    return json.dumps(list(ns))
+
+
+def _ns_from_str(ns: str) -> Namespace:
+    return tuple(json.loads(ns))
+
+
+def _node_name(ns: Namespace) -> str:
+    # LangGraph namespaces node writes as ("__pregel_ns_writes", <function identifier>, <node name>)
+    return ns[-1] if ns else ""
+
+
+# --- key functions ---------------------------------------------------------------------------------
+
+
+@cache
+def prompt_version() -> str:
+    """Hash of every prompt template, a prompt change invalidates the cached nodes."""
+    templates = sorted(
+        (name, value) for name, value in vars(prompts).items() if name.isupper() and isinstance(value, str)
+    )
+    return hashlib.blake2b(json.dumps(templates).encode(), digest_size=8).hexdigest()
+
+
+def _configuration() -> Configuration:
+    # Key functions only get the node input, the config is read from the running graph when there is one
+    try:
+        return Configuration.from_runnable_config(get_config())
+    except RuntimeError:
+        return Configuration.from_runnable_config()
+
+
+def _message_fingerprint(message: Any) -> Any:
+    """Content and tool calls of a message, without the random message id."""
+    if isinstance(message, BaseMessage):
+        return [
+            message.type,
+            message.content,
+            [[call["name"], call["args"], call.get("id")] for call in getattr(message, "tool_calls", [])],
+            getattr(message, "tool_call_id", None),
+        ]
+    if isinstance(message, dict):
+        return {key: value for key, value in message.items() if key != "id"}
+    return str(message)
+
+
+def _cache_key(*parts: Any) -> str:
+    return json.dumps([prompt_version(), *parts], sort_keys=True, default=str)
+
+
+def research_agent_cache_key(state: Mapping[str, Any]) -> str:
+    config = _configuration()
+    return _cache_key(
+        "research_agent",
+        config.research_model,
+        config.research_model_max_tokens,
+        str(config.search_api),
+        state.get(StatesKeys.RESEARCH_TOPIC.value),
+        [_message_fingerprint(message) for message in state.get(StatesKeys.RESEARCH_MSGS.value, [])],
+    )
+
+
+def research_tools_cache_key(state: Mapping[str, Any]) -> str:
+    # The tool call ids are part of the fingerprint, a hit never answers calls of another AI message
+    config = _configuration()
+    return _cache_key(
+        "research_tools",
+        config.research_model,
+        str(config.search_api),
+        config.min_research_novelty,
+        state.get(StatesKeys.TOOL_CALL_ITERATIONS.value, 0),
+        [_message_fingerprint(message) for message in state.get(StatesKeys.RESEARCH_MSGS.value, [])],
+    )
+
+
+def final_report_cache_key(state: Mapping[str, Any]) -> str:
+    config = _configuration()
+    return _cache_key(
+        "final_report_generation",
+        config.final_report_generation_model,
+        config.final_report_generation_model_max_tokens,
+        # The cached command routes to the save step of the configured mode
+        str(config.report_save_mode),
+        state.get(StatesKeys.RESEARCH_BRIEF.value),
+        [_message_fingerprint(note) for note in state.get(StatesKeys.NOTES.value) or []],
+    )
+
+
+def supervisor_tool_cache_key(state: Mapping[str, Any]) -> str:
+    config = _configuration()
+    messages = state.get(StatesKeys.SUPERVISOR_MSGS.value, [])
+    return _cache_key(
+        "supervisor_tool",
+        config.research_model,
+        config.compression_model,
+        [tier.model_dump() for tier in config.compression_model_tiers],
+        str(config.search_api),
+        config.max_research_iterations,
+        config.max_concurrent_research_units,
+        # Topics answered from the knowledge base depend on its findings, not only on the inputs
+        config.knowledge_base,
+        state.get(StatesKeys.RESEARCH_BRIEF.value),
+        state.get(StatesKeys.RESEARCH_ITERATIONS.value, 0),
+        # Only the requested topics, the supervisor is not cached and its tool call ids and thoughts change on
+        # every run. `add_supervisor_messages` gives replayed tool messages the current tool call ids.
+        [[call["name"], call["args"]] for call in getattr(messages[-1], "tool_calls", [])] if messages else None,
+    )
+
+
+research_agent_cache_policy = CachePolicy(key_func=research_agent_cache_key, ttl=MODEL_CACHE_TTL)
+research_tools_cache_policy = CachePolicy(key_func=research_tools_cache_key, ttl=SEARCH_CACHE_TTL)
+final_report_cache_policy = CachePolicy(key_func=final_report_cache_key, ttl=MODEL_CACHE_TTL)
+supervisor_tool_cache_policy = CachePolicy(key_func=supervisor_tool_cache_key, ttl=SEARCH_CACHE_TTL)
@@ -0,0 +1,73 @@
+"""
+Novelty of new research against what a researcher has already seen.
+
+Search rounds late in a ReAct loop often return the same pages and summaries again. The novelty of a batch
+of tool outputs is the share of its word n-gram shingles that do not appear in earlier tool outputs; when it
+drops below `Configuration.min_research_novelty` the researcher stops searching and compresses what it has.
+"""
+
+import re
+import zlib
+from collections import Counter
+from collections.abc import Iterable
+
+from loguru import logger
+
+WORD_PATTERN = re.compile(r"[a-z0-9]+")
+SHINGLE_SIZE = 5
+
+
+def shingles(text: str, size: int = SHINGLE_SIZE) -> set[int]:
+    """Hashed word n-grams of `text`; texts shorter than `size` words give a single shingle."""
+    words = WORD_PATTERN.findall(text.lower())
+    if not words:
+        return set()
+    if len(words) < size:
+        return {zlib.crc32(" ".join(words).encode())}
+    return {zlib.crc32(" ".join(words[i : i + size]).encode()) for i in range(len(words) - size + 1)}
+
+
+def novelty(new_texts: Iterable[str], seen_texts: Iterable[str]) -> float:
+    """
+    Share of shingles in `new_texts` missing from `seen_texts`, between 0.0 (all seen) and 1.0 (all new).
+
+    An empty batch has no novelty.
+    """
+    new = set().union(*(shingles(text) for text in new_texts))
+    if not new:
+        return 0.0
+    seen = set().union(*(shingles(text) for text in seen_texts))
+    return len(new - seen) / len(new)
+
+
+class NoveltyStats:
+    """Counters of researcher loops stopped early and of the model and search calls that were saved."""
+
+    _instance = None
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, the counters are shared by every researcher of the process."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def record_early_stop(self, *, saved_llm_calls: int, saved_search_calls: int) -> None:
+        self._counters["early_stops"] += 1
+        self._counters["saved_llm_calls"] += saved_llm_calls
+        self._counters["saved_search_calls"] += saved_search_calls
+        logger.debug("Novelty stats: {}", self.stats())
+
+    def stats(self) -> dict[str, int]:
+        return {
+            "early_stops": self._counters["early_stops"],
+            "saved_llm_calls": self._counters["saved_llm_calls"],
+            "saved_search_calls": self._counters["saved_search_calls"],
+        }
+
+    def reset(self) -> None:
+        self._counters = Counter()
+
+
+novelty_stats = NoveltyStats()
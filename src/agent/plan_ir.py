@@ -0,0 +1,345 @@
+"""
+Typed intermediate representation of a generated project plan.
+
+The final report follows `SYSTEM_PROMPT_PROJECT_PLAN_STRUCTURE`: a `# Project:` title, a summary, a tech stack,
+`Must Have` / `Nice to Have` feature checklists, a build plan of `### Phase N: Title (Week 1-3)` sections
+with a `**Goal**` and task bullets, and further checklists like the README one. `parse_plan` reads such a
+report in one pass over its lines into a `Plan`, the renderers turn a `Plan` into other formats without any
+model call:
+
+    plan = parse_plan(report)
+    to_github_issues(plan)  # [{"title", "body", "labels", "milestone"}, ...]
+    to_csv(plan)  # one row per feature and build plan task
+    to_phase_files(plan)  # {"phase_1_foundation.md": "# Phase 1: Foundation ...", ...}
+
+Sections the parser does not know are skipped, so a report that drifts from the structure still yields
+whatever it has of it. Bulk export of saved reports:
+
+    python -m src.agent.plan_ir generated_examples/*.md --format csv --output plans/
+"""
+
+import argparse
+import csv
+import io
+import json
+import re
+from dataclasses import asdict, dataclass, field
+from enum import Enum
+from pathlib import Path
+
+try:
+    from .utils import atomic_write_text, report_file_name
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.utils import atomic_write_text, report_file_name
+
+
+class Priority(Enum):
+    """Priority of a feature, from the `### Must Have` / `### Nice to Have` heading it is listed under."""
+
+    MUST_HAVE = "must_have"
+    NICE_TO_HAVE = "nice_to_have"
+
+
+@dataclass
+class Task:
+    """A feature or a build plan task."""
+
+    title: str
+    description: str = ""
+    priority: Priority | None = None
+    checked: bool = False
+    patterns: list[str] = field(default_factory=list)
+    phase: int | None = None
+
+
+@dataclass
+class Phase:
+    """A `### Phase N: Title (Week 1-3)` section of the build plan."""
+
+    number: int
+    title: str
+    weeks: str = ""
+    goal: str = ""
+    tasks: list[Task] = field(default_factory=list)
+
+
+@dataclass
+class Plan:
+    """A parsed project plan."""
+
+    name: str = ""
+    summary: str = ""
+    tech_stack: dict[str, str] = field(default_factory=dict)
+    features: list[Task] = field(default_factory=list)
+    phases: list[Phase] = field(default_factory=list)
+    # heading: items of every other checkbox list, e.g. the `Impressive README Checklist`
+    checklists: dict[str, list[Task]] = field(default_factory=dict)
+
+
+_HEADING = re.compile(r"^(#{1,6})\s+(.*?)\s*#*\s*$")
+_BULLET = re.compile(r"^(\s*)(?:[-*+]|\d+[.)])\s+(?:\[([ xX])\]\s+)?(.*)$")
+_KEY_VALUE = re.compile(r"^\*\*(.+?)\*\*:?\s*:?\s*(.*)$")
+_PHASE = re.compile(r"^Phase\s+(\d+)\s*[:.\-\u2013\u2014]?\s*(.*?)\s*(?:\(([^()]*)\))?\s*$", re.IGNORECASE)
+_PHASE_REFERENCE = re.compile(r"Phase\s+(\d+)", re.IGNORECASE)
+# trailing ` - *Patterns: Strategy, Factory*` of a feature
+_PATTERNS = re.compile(r"\s+[-\u2013\u2014]\s+\*(?:[^*:]+:)?\s*([^*]+)\*\s*$")
+_DESCRIPTION = re.compile(r"\s+[-\u2013\u2014]\s+")
+_GOAL = re.compile(r"^\*\*Goal\*\*\s*:?\s*(.*)$", re.IGNORECASE)
+_MARKUP = re.compile(r"\*\*|__|`")
+
+
+_FENCE = "```"
+_SECTION_LEVEL = 2
+_PRIORITIES = (("must", Priority.MUST_HAVE), ("nice", Priority.NICE_TO_HAVE))
+
+
+class _Section(Enum):
+    SUMMARY = "summary"
+    TECH_STACK = "tech_stack"
+    FEATURES = "features"
+    BUILD_PLAN = "build_plan"
+    OTHER = "other"
+
+
+_SECTIONS = (
+    (re.compile(r"what am i building|executive summary", re.IGNORECASE), _Section.SUMMARY),
+    (re.compile(r"tech(nology)? stack", re.IGNORECASE), _Section.TECH_STACK),
+    (re.compile(r"features to build", re.IGNORECASE), _Section.FEATURES),
+    (re.compile(r"build plan|development plan", re.IGNORECASE), _Section.BUILD_PLAN),
+)
+
+
+def _plain(text: str) -> str:
+    """Heading text without emphasis, leading emoji or numbering, e.g. `📅 Build Plan` -> `Build Plan`."""
+    text = _MARKUP.sub("", text).strip()
+    return re.sub(r"^(?:[^\w(]+|\d+\.\s*)+", "", text).strip().rstrip(":")
+
+
+def _section(heading: str) -> _Section:
+    return next((section for pattern, section in _SECTIONS if pattern.search(heading)), _Section.OTHER)
+
+
+def _task(text: str, *, checked: bool, priority: Priority | None = None, phase: int | None = None) -> Task:
+    patterns = []
+    if match := _PATTERNS.search(text):
+        patterns = [pattern.strip() for pattern in re.split(r",(?![^()]*\))", match.group(1)) if pattern.strip()]
+        text = text[: match.start()]
+    title, *description = _DESCRIPTION.split(text.strip(), maxsplit=1)
+    return Task(_MARKUP.sub("", title).strip(), "".join(description).strip(), priority, checked, patterns, phase)
+
+
+class _PlanParser:
+    """Line by line state of `parse_plan`: the current section, heading, phase and last item."""
+
+    def __init__(self) -> None:
+        self.plan = Plan()
+        self.summary: list[str] = []
+        self.section, self.heading = _Section.OTHER, ""
+        self.phase: Phase | None = None
+        self.priority: Priority | None = None
+        self.feature_phase: int | None = None
+        self.last: Task | None = None
+
+    def heading_line(self, level: int, heading: str) -> None:
+        self.heading, self.last = heading, None
+        if level == 1:
+            self.plan.name = re.sub(r"^Project(?: Blueprint)?\s*:\s*", "", heading, flags=re.IGNORECASE)
+        elif level == _SECTION_LEVEL:
+            self.section, self.phase, self.priority, self.feature_phase = _section(heading), None, None, None
+        elif self.section is _Section.FEATURES:
+            lowered = heading.lower()
+            self.priority = next((priority for key, priority in _PRIORITIES if key in lowered), None)
+            reference = _PHASE_REFERENCE.search(heading)
+            self.feature_phase = int(reference.group(1)) if reference else None
+        elif self.section is _Section.BUILD_PLAN and (match := _PHASE.match(heading)):
+            number, title, weeks = match.groups()
+            self.phase = Phase(int(number), title.strip(), (weeks or "").strip())
+            self.plan.phases.append(self.phase)
+
+    def text_line(self, line: str) -> None:
+        if self.phase is not None and (goal := _GOAL.match(line)):
+            self.phase.goal = goal.group(1).strip()
+        elif self.section is _Section.SUMMARY:
+            self.summary.append(line)
+
+    def bullet_line(self, line: str, indent: str, box: str | None, text: str) -> None:
+        checked = box is not None and box.lower() == "x"
+        if indent and self.last is not None:
+            # nested bullets detail the item above them
+            self.last.description = "; ".join(filter(None, (self.last.description, _MARKUP.sub("", text).strip())))
+            return
+        self.last = None
+        if self.section is _Section.TECH_STACK and (key_value := _KEY_VALUE.match(text)):
+            self.plan.tech_stack[key_value.group(1).strip().rstrip(":")] = key_value.group(2).strip()
+        elif self.section is _Section.FEATURES and self.priority is not None:
+            self.last = _task(text, checked=checked, priority=self.priority, phase=self.feature_phase)
+            self.plan.features.append(self.last)
+        elif self.phase is not None:
+            self.last = _task(text, checked=checked, phase=self.phase.number)
+            self.phase.tasks.append(self.last)
+        elif self.section is _Section.SUMMARY:
+            self.summary.append(line)
+        elif box is not None:
+            self.last = _task(text, checked=checked)
+            self.plan.checklists.setdefault(self.heading, []).append(self.last)
+
+
+def parse_plan(report: str) -> Plan:
+    """Parse a report following `SYSTEM_PROMPT_PROJECT_PLAN_STRUCTURE` into a `Plan`."""
+    parser = _PlanParser()
+    in_code = False
+    for line in report.splitlines():
+        stripped = line.strip()
+        if stripped.startswith(_FENCE):
+            in_code = not in_code
+        elif in_code or not stripped:
+            continue
+        elif heading := _HEADING.match(line):
+            parser.heading_line(len(heading.group(1)), _plain(heading.group(2)))
+        elif bullet := _BULLET.match(line):
+            parser.bullet_line(stripped, *bullet.groups())
+        else:
+            parser.text_line(stripped)
+    parser.plan.summary = " ".join(parser.summary)
+    return parser.plan
+
+
+def _enum_values(items: list[tuple[str, object]]) -> dict[str, object]:
+    return {key: value.value if isinstance(value, Enum) else value for key, value in items}
+
+
+def to_dict(plan: Plan) -> dict:
+    """The plan as JSON compatible dict, priorities as their values."""
+    return asdict(plan, dict_factory=_enum_values)
+
+
+def to_json(plan: Plan, indent: int | None = 2) -> str:
+    return json.dumps(to_dict(plan), indent=indent, ensure_ascii=False)
+
+
+def _phase_title(plan: Plan, number: int | None) -> str | None:
+    if number is None:
+        return None
+    phase = next((phase for phase in plan.phases if phase.number == number), None)
+    return f"Phase {number}: {phase.title}" if phase and phase.title else f"Phase {number}"
+
+
+def _checkbox(task: Task) -> str:
+    text = f"{task.title} — {task.description}" if task.description else task.title
+    patterns = f" - *Patterns: {', '.join(task.patterns)}*" if task.patterns else ""
+    return f"- [{'x' if task.checked else ' '}] {text}{patterns}"
+
+
+def to_github_issues(plan: Plan) -> list[dict]:
+    """
+    One issue per feature and build plan task, as accepted by the GitHub `POST /repos/{owner}/{repo}/issues` API.
+
+    Milestones are the phase titles, the caller creates them and replaces the titles by their numbers.
+    """
+    issues = []
+    for feature in plan.features:
+        body = [feature.description] if feature.description else []
+        if feature.patterns:
+            body.append(f"**Patterns**: {', '.join(feature.patterns)}")
+        labels = ["feature", feature.priority.value.replace("_", "-")] if feature.priority else ["feature"]
+        if feature.phase is not None:
+            labels.append(f"phase-{feature.phase}")
+        issues.append(
+            {
+                "title": feature.title,
+                "body": "\n\n".join(body),
+                "labels": labels,
+                "milestone": _phase_title(plan, feature.phase),
+            },
+        )
+    for phase in plan.phases:
+        for task in phase.tasks:
+            body = [part for part in (task.description, f"**Goal**: {phase.goal}" if phase.goal else "") if part]
+            issues.append(
+                {
+                    "title": task.title,
+                    "body": "\n\n".join(body),
+                    "labels": ["task", f"phase-{phase.number}"],
+                    "milestone": _phase_title(plan, phase.number),
+                },
+            )
+    return issues
+
+
+CSV_COLUMNS = ("kind", "phase", "priority", "title", "description", "patterns", "checked")
+
+
+def to_csv(plan: Plan) -> str:
+    """A task list with one row per feature and build plan task, columns are `CSV_COLUMNS`."""
+    output = io.StringIO()
+    writer = csv.writer(output, lineterminator="\n")
+    writer.writerow(CSV_COLUMNS)
+    rows = [("feature", feature) for feature in plan.features]
+    rows.extend(("task", task) for phase in plan.phases for task in phase.tasks)
+    writer.writerows(
+        (
+            kind,
+            "" if task.phase is None else task.phase,
+            task.priority.value if task.priority else "",
+            task.title,
+            task.description,
+            "; ".join(task.patterns),
+            task.checked,
+        )
+        for kind, task in rows
+    )
+    return output.getvalue()
+
+
+def to_phase_files(plan: Plan) -> dict[str, str]:
+    """One markdown checklist per phase with its goal, tasks and features, by file name."""
+    files = {}
+    for phase in plan.phases:
+        lines = [f"# {_phase_title(plan, phase.number)}", ""]
+        if plan.name:
+            lines += [f"Project: {plan.name}", ""]
+        if phase.weeks:
+            lines += [f"*{phase.weeks}*", ""]
+        if phase.goal:
+            lines += [f"**Goal**: {phase.goal}", ""]
+        lines += ["## Tasks", "", *map(_checkbox, phase.tasks), ""]
+        features = [feature for feature in plan.features if feature.phase == phase.number]
+        if features:
+            lines += ["## Features", "", *map(_checkbox, features), ""]
+        files[report_file_name(f"phase {phase.number} {phase.title}")] = "\n".join(lines)
+    return files
+
+
+RENDERERS = {
+    "json": lambda plan: {".json": to_json(plan)},
+    "github": lambda plan: {".issues.json": json.dumps(to_github_issues(plan), indent=2, ensure_ascii=False)},
+    "csv": lambda plan: {".csv": to_csv(plan)},
+    "phases": lambda plan: {f"/{name}": text for name, text in to_phase_files(plan).items()},
+}
+
+
+def export_plans(reports: list[Path], output: Path, output_format: str = "json") -> list[Path]:
+    """Render every report into `output`, named after the report, e.g. `plan.csv` or `plan/phase_1_setup.md`."""
+    written = []
+    for report in reports:
+        plan = parse_plan(report.read_text(encoding="utf-8"))
+        for suffix, text in RENDERERS[output_format](plan).items():
+            written.append(atomic_write_text(output / f"{report.stem}{suffix}", text))
+    return written
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Export generated project plans to other formats.")
+    parser.add_argument("reports", nargs="+", type=Path, help="Markdown reports to export.")
+    parser.add_argument("--format", choices=sorted(RENDERERS), default="json", help="Output format.")
+    parser.add_argument("--output", type=Path, default=Path("plan_exports"), help="Directory to write to.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    for path in export_plans(args.reports, args.output, args.format):
+        print(path)
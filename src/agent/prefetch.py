@@ -0,0 +1,79 @@
+"""
+Speculative research prefetch while the user answers a clarification question.
+
+When `clarify_with_user` asks a question the graph ends and nothing runs until the user answers. With
+`Configuration.speculative_prefetch` the most topical sentences of the user's messages are searched in the
+background and their pages summarized into the search cache of the thread (`search_cache.py`), so the
+researchers of the clarified run start with warm caches. The research brief decides what is kept: results of
+queries unrelated to it are dropped and their searches cancelled by `search_cache.settle`.
+
+Deriving the queries costs no model call, prefetching only spends search and summarization calls on time the
+run would otherwise spend waiting.
+"""
+
+import asyncio
+import re
+
+from langchain_core.messages import HumanMessage
+from loguru import logger
+
+try:
+    from .configuration import Configuration, SearchAPI
+    from .search_cache import search_cache, terms
+    from .utils import get_config_value, search_and_summarize
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(search_from=__file__, indicator=[".git", "pyproject.toml"], pythonpath=True)
+    from src.agent.configuration import Configuration, SearchAPI
+    from src.agent.search_cache import search_cache, terms
+    from src.agent.utils import get_config_value, search_and_summarize
+
+# Search engines answer short keyword queries best
+MAX_QUERY_WORDS = 12
+# Sentences naming fewer topic terms than this make poor queries, e.g. "Thanks!" or "Sounds good to me."
+MIN_QUERY_TERMS = 2
+
+
+def speculative_queries(messages: list, limit: int) -> list[str]:
+    """
+    Likely search queries of the user's messages: their `limit` sentences or list items naming the most terms.
+
+    e.g. `["FastAPI backend with a repository pattern over PostgreSQL"]`.
+    """
+    text = "\n".join(str(message.content) for message in messages if isinstance(message, HumanMessage))
+    candidates = {}
+    for part in re.split(r"[.!?;\n]+", text):
+        query = " ".join(part.strip(" -*#\t").split()[:MAX_QUERY_WORDS])
+        if len(terms(query)) >= MIN_QUERY_TERMS:
+            candidates.setdefault(query.lower(), query)
+    ranked = sorted(candidates.values(), key=lambda query: len(terms(query)), reverse=True)
+    return ranked[:limit]
+
+
+async def _prefetch(query: str, config: Configuration, scope: str) -> None:
+    try:
+        await search_and_summarize([query], config, scope=scope, origin=query)
+    except asyncio.CancelledError:
+        logger.debug("Speculative prefetch of {!r} cancelled", query)
+        raise
+    except Exception as error:
+        logger.warning("Speculative prefetch of {!r} failed: {}", query, error)
+
+
+def start_prefetch(messages: list, config: Configuration, scope: str | None) -> list[asyncio.Task]:
+    """
+    Start prefetching the likely queries of `messages` into the search cache of the thread `scope`.
+
+    Nothing is prefetched without a thread, whose next run would find the results, or without the Tavily search
+    API, whose results are cached. The tasks run in the background, past the end of the current run.
+    """
+    if scope is None or SearchAPI(get_config_value(config.search_api)) != SearchAPI.TAVILY:
+        return []
+    tasks = []
+    for query in speculative_queries(messages, config.speculative_prefetch_queries):
+        task = asyncio.create_task(_prefetch(query, config, scope), name=f"prefetch:{query}")
+        search_cache.speculate(scope, query, task)
+        tasks.append(task)
+    logger.info("Speculatively prefetching {} queries for thread {}", len(tasks), scope)
+    return tasks
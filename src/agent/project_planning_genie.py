@@ -1,14 +1,18 @@
-import sys
+from collections.abc import AsyncIterator
+from contextlib import asynccontextmanager
 from pathlib import Path
 
-from langgraph.func import CachePolicy
 from langgraph.graph import START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
 from loguru import logger
 
 try:
     from .clarification_agent_subgraph import clarify_with_user, write_research_brief
     from .configuration import Configuration
+    from .durable_checkpointer import DEFAULT_CHECKPOINT_DB, open_durable_checkpointer
     from .final_report_generation import final_report_graph
+    from .log_utils import configure_logging
+    from .node_cache import supervisor_tool_cache_policy
     from .states import (
         AgentInputState,
         AgentState,
@@ -25,7 +29,10 @@ except ImportError:
         write_research_brief,
     )
     from src.agent.configuration import Configuration
+    from src.agent.durable_checkpointer import DEFAULT_CHECKPOINT_DB, open_durable_checkpointer
     from src.agent.final_report_generation import final_report_graph
+    from src.agent.log_utils import configure_logging
+    from src.agent.node_cache import supervisor_tool_cache_policy
     from src.agent.states import (
         AgentInputState,
         AgentState,
@@ -33,26 +40,12 @@ except ImportError:
     )
     from src.agent.supervisor_agent import supervisor, supervisor_tool
 
-config = {
-    "handlers": [
-        {"sink": sys.stdout, "level": "ERROR", "colorize": True},
-        {
-            "sink": f"{Path.cwd().parent.parent / f'{__name__}.log'}",
-            "enqueue": True,
-            "level": "DEBUG",
-            "rotation": "10 MB",
-            "compression": "zip",
-        },
-    ],
-}
-
-
-logger.configure(**config)
+configure_logging(Path.cwd().parent.parent / f"{__name__}.log", console_level="ERROR")
 
 logger.info("Initializing Project Planning Genie...")
 supervisor_builder = StateGraph(SupervisorState, context_schema=Configuration)
 supervisor_builder.add_node("supervisor", supervisor)
-supervisor_builder.add_node("supervisor_tool", supervisor_tool, cache_policy=CachePolicy())
+supervisor_builder.add_node("supervisor_tool", supervisor_tool, cache_policy=supervisor_tool_cache_policy)
 supervisor_builder.add_edge(START, "supervisor")
 supervisor_subgraph = supervisor_builder.compile(name="Supervisor")
 
@@ -75,3 +68,22 @@ agent_builder.add_edge(
 )
 logger.info("Compiling Project Planning Genie...")
 project_planning_genie_graph = agent_builder.compile(name="Project Planning Genie")
+
+
+@asynccontextmanager
+async def durable_project_planning_genie(
+    db_path: str | Path = DEFAULT_CHECKPOINT_DB,
+    **compile_kwargs,
+) -> AsyncIterator[CompiledStateGraph]:
+    """
+    Compile the graph with a durable SQLite checkpointer.
+
+    A crashed run can be resumed with `graph.astream(None, {"configurable": {"thread_id": ...}})`, which continues
+    from the last completed node without re-running finished research.
+    """
+    async with open_durable_checkpointer(db_path) as checkpointer:
+        yield agent_builder.compile(
+            name=compile_kwargs.pop("name", "Project Planning Genie"),
+            checkpointer=checkpointer,
+            **compile_kwargs,
+        )
@@ -254,6 +254,11 @@ def read_prompt(file_name: str, prompt_dir: Path = Path(__file__).parent) -> str
 
 CLARIFY_WITH_USER_INSTRUCTIONS = read_prompt(file_name="clarify_with_user_system_prompt")
 
+# The clarification prompt asking for the research brief in the same call
+CLARIFY_WITH_USER_AND_BRIEF_INSTRUCTIONS = CLARIFY_WITH_USER_INSTRUCTIONS + read_prompt(
+    file_name="research_brief_fast_path_prompt",
+)
+
 SYSTEM_PROMPT_PROJECT_PLAN_STRUCTURE = read_prompt(file_name="system_prompt_project_plan_structure")
 
 TRANSFORM_MESSAGES_INTO_RESEARCH_TOPIC_PROMPT = read_prompt(
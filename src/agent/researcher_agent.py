@@ -1,12 +1,10 @@
 """Research Agent Subgraph."""
 
-import asyncio
 from typing import Literal
 
 from langchain.chat_models import init_chat_model
-from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage, filter_messages
-from langchain_core.runnables import RunnableConfig
-from langgraph.func import CachePolicy
+from langchain_core.messages import HumanMessage, SystemMessage, filter_messages
+from langchain_core.runnables import Runnable, RunnableConfig
 from langgraph.graph import END, START, StateGraph
 from langgraph.graph.state import CompiledStateGraph
 from langgraph.types import Command
@@ -14,13 +12,18 @@ from loguru import logger
 
 try:
     from .configuration import Configuration
+    from .hedging import hedged_ainvoke
+    from .log_utils import brief, sampled_debug
+    from .model_router import routed_ainvoke
+    from .node_cache import research_agent_cache_policy, research_tools_cache_policy
+    from .novelty import novelty, novelty_stats
     from .prompts import COMPRESS_RESEARCH_SIMPLE_HUMAN_MESSAGE, COMPRESS_RESEARCH_SYSTEM_PROMPT
-    from .states import ResearcherOutputState, ResearchState, StatesKeys
+    from .retry import RetryPolicy, retry_engine
+    from .states import Note, ResearcherOutputState, ResearchState, StatesKeys
+    from .tool_executor import tool_executor
+    from .tool_registry import tool_registry
     from .utils import (
-        execute_tool_safely,
-        get_all_tools,
         get_today_str,
-        is_token_limit_exceeded,
         openai_websearch_called,
         remove_up_to_last_ai_message,
     )
@@ -29,13 +32,18 @@ except ImportError:
 
     rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
     from src.agent.configuration import Configuration
+    from src.agent.hedging import hedged_ainvoke
+    from src.agent.log_utils import brief, sampled_debug
+    from src.agent.model_router import routed_ainvoke
+    from src.agent.node_cache import research_agent_cache_policy, research_tools_cache_policy
+    from src.agent.novelty import novelty, novelty_stats
     from src.agent.prompts import COMPRESS_RESEARCH_SIMPLE_HUMAN_MESSAGE, COMPRESS_RESEARCH_SYSTEM_PROMPT
-    from src.agent.states import ResearcherOutputState, ResearchState, StatesKeys
+    from src.agent.retry import RetryPolicy, retry_engine
+    from src.agent.states import Note, ResearcherOutputState, ResearchState, StatesKeys
+    from src.agent.tool_executor import tool_executor
+    from src.agent.tool_registry import tool_registry
     from src.agent.utils import (
-        execute_tool_safely,
-        get_all_tools,
         get_today_str,
-        is_token_limit_exceeded,
         openai_websearch_called,
         remove_up_to_last_ai_message,
     )
@@ -67,33 +75,32 @@ async def research_agent(
     """
     logger.info("Research agent invoked.")
     config = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for research agent: {}", config)
+    sampled_debug("Configuration for research agent: {}", brief(config))
     research_msgs = state.get(StatesKeys.RESEARCH_MSGS.value, [])
-    tools = await get_all_tools(config)
+    toolset = await tool_registry.get_toolset(config)
 
-    if len(tools) <= 1:  # ResearchComplete is default tool in the list
+    if len(toolset.tools) <= 1:  # ResearchComplete is default tool in the list
         msg = "No tools found to conduct research, please configure Search API"
         logger.error(msg)
         raise ValueError(msg)
 
-    research_model_config = {
-        "model": config.research_model,
-        "max_tokens": config.research_model_max_tokens,
-        # "api_key": config.research_model_api_key,
+    # Tools are bound once per search API and model settings, see ToolRegistry
+    models = {config.research_model}
+    if "research_agent" in config.hedged_nodes:
+        models.add(config.hedge_backup_model or config.research_model)
+    research_models = {
+        model: await tool_registry.get_bound_model(researcher_model, config, model_name=model) for model in models
     }
 
-    research_model = (
-        researcher_model.bind_tools(
-            tools,
-        )
-        .with_retry(stop_after_attempt=config.max_structured_output_retries)
-        .with_config(research_model_config)
-    )
-
-    response = await research_model.ainvoke(
+    response = await hedged_ainvoke(
+        research_models.__getitem__,
         research_msgs,
+        node="research_agent",
+        model=config.research_model,
+        config=config,
     )
-    logger.debug("Research agent response: {}", response)
+    sampled_debug("Research agent response: {}", brief(response))
+    logger.debug("Tool registry stats: {}", tool_registry.stats())
     return Command(
         goto="research_tools",
         update={
@@ -113,11 +120,12 @@ async def research_tools(
     If no tool calls were made (or only native web search calls), then immediately go to compress_research.
     Otherwise, execute each tool call and gather the results.
     If we have exceeded our max guardrail tool call iterations or the most recent message contains ResearchComplete tool call, then go to compress_research.
+    If the new search results are mostly content the researcher has already seen (novelty below min_research_novelty), then go to compress_research.
     Otherwise, go back to research_agent.
     """
     logger.info("Executing research tools...")
-    config = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for research tools: {}", config)
+    configurable = Configuration.from_runnable_config(config)
+    sampled_debug("Configuration for research tools: {}", brief(configurable))
     research_msgs = state.get(StatesKeys.RESEARCH_MSGS.value, [])
     most_recent_message = research_msgs[-1]
 
@@ -127,29 +135,18 @@ async def research_tools(
         return Command(goto="compress_research")
 
     # Otherwise, execute tools and gather results
-    tools = await get_all_tools(config)
-
-    tools_by_name = {tool.name if hasattr(tool, "name") else tool.get("name", "web_search"): tool for tool in tools}
+    tools_by_name = (await tool_registry.get_toolset(configurable)).tools_by_name
 
     tool_calls = most_recent_message.tool_calls
 
-    async_responses = [
-        execute_tool_safely(tools_by_name[tool_call["name"]], tool_call["args"], config.model_dump())
-        for tool_call in tool_calls
-    ]
-    observations = await asyncio.gather(*async_responses)
-    tool_outputs = [
-        ToolMessage(
-            content=observation,
-            name=tool_call["name"],
-            tool_call_id=tool_call["id"],
-        )
-        for observation, tool_call in zip(observations, tool_calls, strict=True)
-    ]
+    # Bounded per tool type, with per call deadlines; timing lands in each ToolMessage's response_metadata
+    results = await tool_executor.execute(tool_calls, tools_by_name, configurable, config)
+    tool_outputs = [result.to_message() for result in results]
     # Late Exit Criteria: We have exceeded our max guardrail tool call iterations or the most recent message contains ResearchComplete tool call
     # These are late exit criteria because we need to add ToolMessage
     update = {StatesKeys.RESEARCH_MSGS.value: tool_outputs}
-    if state.get(StatesKeys.TOOL_CALL_ITERATIONS.value, 0) >= config.max_react_tool_calls or any(
+    tool_call_iterations = state.get(StatesKeys.TOOL_CALL_ITERATIONS.value, 0)
+    if tool_call_iterations >= configurable.max_react_tool_calls or any(
         tool_call["name"] == "ResearchComplete" for tool_call in tool_calls
     ):
         logger.info("Exiting to compress_research due to max tool call iterations or ResearchComplete tool call.")
@@ -157,12 +154,28 @@ async def research_tools(
             goto="compress_research",
             update=update,
         )
+    # Novelty Exit Criteria: the new search results mostly repeat what the researcher has already seen
+    search_results = [
+        result.content for result in results if result.tool_type == "search" and result.status == "success"
+    ]
+    seen_results = [str(msg.content) for msg in filter_messages(research_msgs, include_types="tool")]
+    if configurable.min_research_novelty > 0 and search_results and seen_results:
+        batch_novelty = novelty(search_results, seen_results)
+        logger.debug("Novelty of new search results: {:.2f}", batch_novelty)
+        if batch_novelty < configurable.min_research_novelty:
+            remaining_iterations = configurable.max_react_tool_calls - tool_call_iterations
+            novelty_stats.record_early_stop(
+                saved_llm_calls=remaining_iterations,
+                saved_search_calls=remaining_iterations * len(search_results),
+            )
+            logger.info("Exiting to compress_research, new search results are only {:.0%} novel.", batch_novelty)
+            return Command(goto="compress_research", update=update)
     logger.info("Continuing to research_agent for more iterations.")
     return Command(goto="research_agent", update=update)
 
 
 @logger.catch
-async def compress_research(state: ResearchState, config: RunnableConfig) -> dict[str : str | list[str]]:
+async def compress_research(state: ResearchState, config: RunnableConfig) -> dict[str, str | list[Note]]:
     """
     Compress research messages into a concise report.
 
@@ -188,15 +201,18 @@ async def compress_research(state: ResearchState, config: RunnableConfig) -> dic
     """
     logger.info("Compressing research...")
     config = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for compression: {}", config)
-    synthesize_attempts = 0
-    compression_model = researcher_model.with_config(
-        {
-            "model": config.compression_model,
-            "max_tokens": config.compression_model_max_tokens,
-            # "api_key": config.compress_model_api_key,
-        },
-    )
+    sampled_debug("Configuration for compression: {}", brief(config))
+
+    # Research bundles are routed to a model by their length, see `routed_ainvoke`
+    def compression_model(model: str) -> Runnable:
+        return researcher_model.with_config(
+            {
+                "model": model,
+                "max_tokens": config.compression_model_max_tokens,
+                # "api_key": config.compress_model_api_key,
+            },
+        )
+
     researcher_msgs = state.get(StatesKeys.RESEARCH_MSGS.value, [])
 
     # Update the system prompts to now focus on compression rather than research
@@ -204,40 +220,46 @@ async def compress_research(state: ResearchState, config: RunnableConfig) -> dic
         content=COMPRESS_RESEARCH_SYSTEM_PROMPT.format(date=get_today_str()),
     )
     researcher_msgs.append(HumanMessage(content=COMPRESS_RESEARCH_SIMPLE_HUMAN_MESSAGE))
-    while synthesize_attempts < config.compression_attempts:
-        try:
-            response = await compression_model.ainvoke(
-                researcher_msgs,
-            )
-            logger.debug("Compressed research content: {}", response.content)
-            return {
-                StatesKeys.COMPRESSED_RESEARCH.value: str(response.content),
-                StatesKeys.RAW_NOTES.value: [
-                    "\n".join(
-                        [str(m.content) for m in filter_messages(researcher_msgs, include_types=["tool", "ai"])],
-                    ),
-                ],
-            }
-        except Exception as e:
-            synthesize_attempts += 1
-            if is_token_limit_exceeded(e, config.research_model):
-                researcher_msgs = remove_up_to_last_ai_message(researcher_msgs)
-                logger.warning("Token limit exceeded while synthesizing: {}. Pruning the messages to try again.", e)
-                continue
-            logger.error("Error synthesizing research report: {}", e)
-    logger.error("Error synthesizing research report: Maximum retries exceeded")
+
+    def prune_messages(error: BaseException) -> bool:
+        nonlocal researcher_msgs
+        pruned = remove_up_to_last_ai_message(researcher_msgs)
+        if len(pruned) == len(researcher_msgs):
+            return False
+        researcher_msgs = pruned
+        logger.warning("Token limit exceeded while synthesizing: {}. Pruning the messages to try again.", error)
+        return True
+
+    try:
+        response = await retry_engine.call(
+            lambda: routed_ainvoke(compression_model, researcher_msgs, task="compression", config=config),
+            model=config.compression_model,
+            policy=RetryPolicy(max_attempts=config.compression_attempts),
+            on_context_overflow=prune_messages,
+        )
+    except Exception as e:
+        logger.error("Error synthesizing research report: {}", e)
+        compressed_research = "Error synthesizing research report: Maximum retries exceeded"
+    else:
+        sampled_debug("Compressed research content: {}", brief(response.content))
+        compressed_research = str(response.content)
     return {
-        StatesKeys.COMPRESSED_RESEARCH.value: "Error synthesizing research report: Maximum retries exceeded",
+        StatesKeys.COMPRESSED_RESEARCH.value: compressed_research,
         StatesKeys.RAW_NOTES.value: [
-            "\n".join([str(m.content) for m in filter_messages(researcher_msgs, include_types=["tool", "ai"])]),
+            Note(
+                content="\n".join(
+                    [str(m.content) for m in filter_messages(researcher_msgs, include_types=["tool", "ai"])],
+                ),
+                topic=state.get(StatesKeys.RESEARCH_TOPIC.value, ""),
+            ),
         ],
     }
 
 
 logger.info("Research agent subgraph initialized.")
 research_builder = StateGraph(ResearchState, output_schema=ResearcherOutputState, config_schema=Configuration)
-research_builder.add_node("research_agent", research_agent, cache_policy=CachePolicy())
-research_builder.add_node("research_tools", research_tools, cache_policy=CachePolicy())
+research_builder.add_node("research_agent", research_agent, cache_policy=research_agent_cache_policy)
+research_builder.add_node("research_tools", research_tools, cache_policy=research_tools_cache_policy)
 research_builder.add_node("compress_research", compress_research)
 
 research_builder.add_edge(START, "research_agent")
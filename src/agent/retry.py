@@ -0,0 +1,354 @@
+"""
+One retry engine for the model calls of every node.
+
+Errors are classified per provider into four kinds:
+
+- `RETRYABLE`: timeouts, dropped connections, 5xx and overloaded providers, and errors nothing is known about,
+- `RATE_LIMITED`: 429 and exhausted quotas, retried after the provider's `Retry-After` when it sends one,
+- `CONTEXT_OVERFLOW`: the prompt does not fit the model, only retried when the caller can shrink the prompt,
+- `FATAL`: authentication, unknown models, invalid requests and programming errors, never retried.
+
+Retries wait an exponential backoff with jitter. Each provider has a circuit breaker: after `FAILURE_THRESHOLD`
+retryable or rate limited failures in a row, calls to the provider fail fast with `CircuitOpenError` for
+`OPEN_SECONDS` (or the provider's `Retry-After`), then a single trial call decides whether it closes again.
+
+Usage:
+    response = await retry_engine.call(lambda: model.ainvoke(messages), model=config.research_model)
+"""
+
+import asyncio
+import random
+import re
+import time
+from collections import Counter
+from collections.abc import Awaitable, Callable
+from dataclasses import dataclass
+from email.utils import parsedate_to_datetime
+from enum import Enum
+from typing import Any, TypeVar
+
+from langgraph.errors import GraphBubbleUp
+from loguru import logger
+
+T = TypeVar("T")
+
+FAILURE_THRESHOLD = 5
+OPEN_SECONDS = 30.0
+
+# Providers of model names without a "provider:" prefix
+MODEL_PREFIXES = {
+    "gpt": "openai",
+    "o1": "openai",
+    "o3": "openai",
+    "gemini": "google_genai",
+    "sonar": "perplexity",
+    "claude": "anthropic",
+}
+CONTEXT_OVERFLOW_MARKERS = {
+    "openai": ("context_length_exceeded", "maximum context length", "reduce the length of the messages"),
+    "google_genai": ("exceeds the maximum number of tokens", "input token count", "context window"),
+    "perplexity": ("maximum context length", "prompt is too long", "context window"),
+    "anthropic": ("prompt is too long",),
+    "ollama": ("context length", "exceeds the context"),
+}
+GENERIC_CONTEXT_OVERFLOW_MARKERS = ("context length", "context window", "maximum context", "too many tokens")
+RATE_LIMIT_MARKERS = ("rate limit", "rate_limit", "quota", "too many requests", "resource_exhausted")
+RATE_LIMIT_ERRORS = {"RateLimitError", "ResourceExhausted", "TooManyRequests"}
+RETRYABLE_ERRORS = {
+    "APIConnectionError",
+    "APITimeoutError",
+    "InternalServerError",
+    "ServiceUnavailable",
+    "DeadlineExceeded",
+    "OverloadedError",
+    "TransportError",
+    "TimeoutException",
+}
+FATAL_ERRORS = {
+    "AuthenticationError",
+    "PermissionDeniedError",
+    "NotFoundError",
+    "BadRequestError",
+    "UnprocessableEntityError",
+    "InvalidArgument",
+    "PermissionDenied",
+    "Unauthenticated",
+}
+RETRYABLE_STATUS = {408, 409, 425, 500, 502, 503, 504, 529}
+FATAL_STATUS = {400, 401, 403, 404, 422}
+RATE_LIMIT_STATUS = 429
+RETRY_IN_PATTERN = re.compile(r"(?:retry|try again) (?:in|after) (\d+(?:\.\d+)?) ?(ms|s|seconds?)\b", re.IGNORECASE)
+
+
+class ErrorKind(Enum):
+    """How a failed model call is handled."""
+
+    RETRYABLE = "retryable"
+    RATE_LIMITED = "rate_limited"
+    CONTEXT_OVERFLOW = "context_overflow"
+    FATAL = "fatal"
+
+
+class CircuitOpenError(RuntimeError):
+    """Raised instead of calling a provider whose circuit breaker is open."""
+
+    def __init__(self, provider: str, retry_in: float) -> None:
+        self.provider = provider
+        self.retry_in = retry_in
+        super().__init__(f"Circuit breaker of {provider} is open, calls fail fast for {retry_in:.1f}s")
+
+
+def provider_of(model_name: str | None) -> str:
+    """Provider of a model, e.g. `"google_genai"` for `"google_genai:gemini-2.0-flash"` or `"gemini-2.0-flash"`."""
+    if not model_name:
+        return "unknown"
+    name = model_name.lower()
+    if ":" in name:
+        return name.split(":", 1)[0]
+    return next((provider for prefix, provider in MODEL_PREFIXES.items() if name.startswith(prefix)), name)
+
+
+def status_code(error: BaseException) -> int | None:
+    """HTTP status of a provider error, from the error or its response."""
+    for value in (
+        getattr(error, "status_code", None),
+        getattr(getattr(error, "response", None), "status_code", None),
+        getattr(error, "code", None),
+    ):
+        if isinstance(value, int):
+            return value
+    return None
+
+
+def retry_after(error: BaseException) -> float | None:
+    """Seconds the provider asks to wait, from the `Retry-After` headers or the error message."""
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    for header, scale in (("retry-after-ms", 0.001), ("retry-after", 1.0)):
+        value = headers.get(header) or headers.get(header.title())
+        if value is None:
+            continue
+        try:
+            return max(0.0, float(value) * scale)
+        except ValueError:
+            try:
+                return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+            except (TypeError, ValueError):
+                continue
+    if match := RETRY_IN_PATTERN.search(str(error)):
+        return float(match.group(1)) / (1000 if match.group(2).lower() == "ms" else 1)
+    return None
+
+
+def classify_error(error: BaseException, model_name: str | None = None) -> ErrorKind:
+    """Kind of a model call failure, using the status, the error classes and the messages of the provider."""
+    provider = provider_of(model_name)
+    names = {cls.__name__ for cls in type(error).__mro__}
+    status = status_code(error)
+    message = str(error).lower()
+
+    markers = CONTEXT_OVERFLOW_MARKERS.get(provider, ()) + GENERIC_CONTEXT_OVERFLOW_MARKERS
+    if getattr(error, "code", None) == "context_length_exceeded" or any(marker in message for marker in markers):
+        return ErrorKind.CONTEXT_OVERFLOW
+    if (
+        status == RATE_LIMIT_STATUS
+        or names & RATE_LIMIT_ERRORS
+        or any(marker in message for marker in RATE_LIMIT_MARKERS)
+    ):
+        return ErrorKind.RATE_LIMITED
+    if status in RETRYABLE_STATUS or names & RETRYABLE_ERRORS or isinstance(error, TimeoutError | ConnectionError):
+        return ErrorKind.RETRYABLE
+    if (
+        status in FATAL_STATUS
+        or names & FATAL_ERRORS
+        or isinstance(error, TypeError | AttributeError | NotImplementedError | ImportError)
+    ):
+        return ErrorKind.FATAL
+    return ErrorKind.RETRYABLE
+
+
+@dataclass(frozen=True)
+class RetryPolicy:
+    """
+    How often and how long a call is retried.
+
+    Args:
+        max_attempts: Calls made before the last error is raised.
+        base_delay: Backoff before the first retry, doubled for every further retry.
+        max_delay: Longest backoff.
+        max_retry_after: Longest `Retry-After` waited for, a provider asking for more fails the call.
+
+    """
+
+    max_attempts: int = 4
+    base_delay: float = 1.0
+    max_delay: float = 30.0
+    max_retry_after: float = 60.0
+
+    def delay(self, attempt: int, retry_after: float | None = None) -> float | None:
+        """Seconds to wait after failed attempt `attempt` (1 based), `None` when the provider asks for too long."""
+        backoff = min(self.max_delay, self.base_delay * 2 ** (attempt - 1))
+        # equal jitter: retries of concurrent calls spread out but never start right away
+        jittered = backoff / 2 + random.uniform(0, backoff / 2)
+        if retry_after is None:
+            return jittered
+        if retry_after > self.max_retry_after:
+            return None
+        return max(retry_after, jittered)
+
+
+class CircuitBreaker:
+    """Consecutive failures of one provider, open while the provider is failing."""
+
+    def __init__(self, failure_threshold: int = FAILURE_THRESHOLD, open_seconds: float = OPEN_SECONDS) -> None:
+        self.failure_threshold = failure_threshold
+        self.open_seconds = open_seconds
+        self.failures = 0
+        self.open_until = 0.0
+        self.trial_running = False
+
+    @property
+    def state(self) -> str:
+        if self.failures < self.failure_threshold:
+            return "closed"
+        return "open" if time.monotonic() < self.open_until else "half_open"
+
+    def check(self) -> float | None:
+        """`None` when a call may go ahead, otherwise the seconds until the provider is tried again."""
+        state = self.state
+        if state == "closed":
+            return None
+        if state == "open":
+            return self.open_until - time.monotonic()
+        if self.trial_running:
+            return self.open_seconds
+        self.trial_running = True
+        return None
+
+    def record_success(self) -> None:
+        self.failures = 0
+        self.trial_running = False
+
+    def release(self) -> None:
+        """Let another trial call go ahead, the call was cancelled or interrupted before it answered."""
+        self.trial_running = False
+
+    def record_failure(self, retry_after: float | None = None) -> bool:
+        """Count a failure of the provider, `True` when it opens the breaker."""
+        was_half_open = self.trial_running
+        self.trial_running = False
+        self.failures += 1
+        if self.failures < self.failure_threshold:
+            return False
+        self.open_until = time.monotonic() + max(self.open_seconds, retry_after or 0.0)
+        return self.failures == self.failure_threshold or was_half_open
+
+
+class RetryEngine:
+    """Retries model calls and keeps the circuit breakers of the providers, shared by the whole process."""
+
+    _instance = None
+    _breakers: dict[str, CircuitBreaker]
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, every node of every run sees the same provider health."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def breaker(self, provider: str) -> CircuitBreaker:
+        return self._breakers.setdefault(provider, CircuitBreaker())
+
+    async def call(
+        self,
+        call: Callable[[], Awaitable[T]],
+        *,
+        model: str,
+        policy: RetryPolicy | None = None,
+        on_context_overflow: Callable[[BaseException], bool] | None = None,
+    ) -> T:
+        """
+        Await `call()` until it succeeds, retrying the failures its error kind allows.
+
+        The error of the last attempt is raised, or `CircuitOpenError` while the provider's breaker is open.
+
+        Args:
+            call: Starts the model call, called again for every attempt.
+            model: Model of the call, its provider picks the error markers and the circuit breaker.
+            policy: Attempts and backoff, `RetryPolicy()` by default.
+            on_context_overflow: Shrinks the prompt after a context overflow, returns `False` when it can not.
+
+        """
+        policy = policy or RetryPolicy()
+        provider = provider_of(model)
+        breaker = self.breaker(provider)
+        for attempt in range(1, policy.max_attempts + 1):
+            if (retry_in := breaker.check()) is not None:
+                self._counters["failed_fast"] += 1
+                raise CircuitOpenError(provider, retry_in)
+            self._counters["attempts"] += 1
+            self._counters["retries"] += attempt > 1
+            try:
+                result = await call()
+            except (GraphBubbleUp, asyncio.CancelledError):
+                breaker.release()
+                raise
+            except Exception as error:
+                kind = classify_error(error, model)
+                wait = retry_after(error) if kind is ErrorKind.RATE_LIMITED else None
+                self._record_failure(breaker, provider, kind, wait)
+                if attempt == policy.max_attempts or kind is ErrorKind.FATAL:
+                    raise
+                if kind is ErrorKind.CONTEXT_OVERFLOW:
+                    if on_context_overflow is None or not on_context_overflow(error):
+                        raise
+                    continue
+                if (delay := policy.delay(attempt, wait)) is None:
+                    raise
+                logger.warning(
+                    "Attempt {}/{} of {} failed ({}): {}. Retrying in {:.1f}s",
+                    attempt,
+                    policy.max_attempts,
+                    model,
+                    kind.value,
+                    error,
+                    delay,
+                )
+                self._counters["sleep_seconds"] += delay
+                await asyncio.sleep(delay)
+            else:
+                breaker.record_success()
+                return result
+        msg = "RetryPolicy.max_attempts must be at least 1"
+        raise ValueError(msg)
+
+    def _record_failure(self, breaker: CircuitBreaker, provider: str, kind: ErrorKind, wait: float | None) -> None:
+        self._counters[kind.value] += 1
+        if kind not in {ErrorKind.RETRYABLE, ErrorKind.RATE_LIMITED}:
+            # the request was wrong, not the provider
+            breaker.record_success()
+        elif breaker.record_failure(wait):
+            self._counters["breaker_opened"] += 1
+            logger.warning("Circuit breaker of {} opened after {} failures", provider, breaker.failures)
+
+    def stats(self) -> dict[str, Any]:
+        """e.g. `{"attempts": 80, "retries": 6, "rate_limited": 4, "breaker_opened": 0, "failed_fast": 0, ...}`."""
+        return {
+            "attempts": self._counters["attempts"],
+            "retries": self._counters["retries"],
+            "retryable": self._counters["retryable"],
+            "rate_limited": self._counters["rate_limited"],
+            "context_overflow": self._counters["context_overflow"],
+            "fatal": self._counters["fatal"],
+            "breaker_opened": self._counters["breaker_opened"],
+            "failed_fast": self._counters["failed_fast"],
+            "sleep_seconds": round(self._counters["sleep_seconds"], 3),
+        }
+
+    def reset(self) -> None:
+        self._breakers = {}
+        self._counters = Counter()
+
+
+retry_engine = RetryEngine()
@@ -0,0 +1,207 @@
+"""
+Run scoped cache of web searches and page summaries, warmed speculatively while the user answers.
+
+Researchers of one run often search the same queries and land on the same pages, and summarizing a page is the
+most expensive part of a search. Searches and summaries are cached per thread (`configurable.thread_id`), so a
+clarification answer, which continues the thread in a new invocation, finds the work of the previous one.
+
+While the user answers a clarification question, `prefetch.start_prefetch` searches likely topics in the
+background and stores the results as speculative entries of their query. Once the research brief is written,
+`settle` keeps the speculative entries relevant to the brief and drops the others, cancelling their searches
+when they are still running.
+
+Usage:
+    scope = scope_of(config)
+    response = search_cache.get_search(scope, query, options)
+"""
+
+import asyncio
+import re
+import time
+from collections import Counter, OrderedDict
+from dataclasses import dataclass, field
+from typing import Any
+
+from langchain_core.runnables import RunnableConfig
+from loguru import logger
+
+try:
+    from .node_cache import SEARCH_CACHE_TTL
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(search_from=__file__, indicator=[".git", "pyproject.toml"], pythonpath=True)
+    from src.agent.node_cache import SEARCH_CACHE_TTL
+
+# Threads whose searches are kept, the least recently used are dropped first
+MAX_SCOPES = 64
+# Share of a speculative query's terms the research brief must contain for its results to be kept
+MIN_RELEVANCE = 0.5
+# Words shorter than this carry little topic, e.g. "the", "app", "for"
+MIN_TERM_LENGTH = 4
+TERM_PATTERN = re.compile(r"[a-z0-9]+")
+
+
+def scope_of(config: RunnableConfig | None) -> str | None:
+    """Thread of a run, searches are only cached for runs with a `thread_id`."""
+    thread_id = ((config or {}).get("configurable") or {}).get("thread_id")
+    return None if thread_id is None else str(thread_id)
+
+
+def normalize_query(query: str) -> str:
+    return " ".join(query.lower().split())
+
+
+def terms(text: str) -> set[str]:
+    return {term for term in TERM_PATTERN.findall(text.lower()) if len(term) >= MIN_TERM_LENGTH}
+
+
+def relevance(query: str, text: str) -> float:
+    """Share of the terms of `query` found in `text`, between 0.0 and 1.0."""
+    query_terms = terms(query)
+    if not query_terms:
+        return 0.0
+    return len(query_terms & terms(text)) / len(query_terms)
+
+
+@dataclass
+class Scope:
+    """Cached searches and summaries of one thread."""
+
+    searches: dict[tuple[str, tuple], dict] = field(default_factory=dict)
+    summaries: dict[str, str] = field(default_factory=dict)
+    # Speculative query of the entries not settled yet, and the prefetches still running
+    origins: dict[tuple, str] = field(default_factory=dict)
+    pending: dict[str, asyncio.Task | None] = field(default_factory=dict)
+    # Entries kept from a speculative prefetch, their hits are counted as `speculative_hits`
+    prefetched: set[tuple] = field(default_factory=set)
+    accepted: set[str] = field(default_factory=set)
+    touched: float = field(default_factory=time.monotonic)
+
+
+class SearchCache:
+    """Searches and page summaries per thread, shared by the whole process."""
+
+    _instance = None
+    _scopes: OrderedDict[str, Scope]
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, a clarification answer runs in a new invocation of the same thread."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.reset()
+        return cls._instance
+
+    def _scope(self, scope: str) -> Scope:
+        now = time.monotonic()
+        for key in [key for key, entries in self._scopes.items() if now - entries.touched > SEARCH_CACHE_TTL]:
+            self._drop(key)
+        entries = self._scopes.get(scope) or Scope()
+        entries.touched = now
+        self._scopes[scope] = entries
+        self._scopes.move_to_end(scope)
+        while len(self._scopes) > MAX_SCOPES:
+            self._drop(next(iter(self._scopes)))
+        return entries
+
+    def _drop(self, scope: str) -> None:
+        for task in self._scopes.pop(scope).pending.values():
+            if task is not None:
+                task.cancel()
+
+    def _get(self, scope: str | None, entry: tuple[str, Any]) -> Any:
+        if scope is None:
+            return None
+        entries = self._scope(scope)
+        table, key = entry
+        value = getattr(entries, table).get(key)
+        self._counters[f"{table}_hits" if value is not None else f"{table}_misses"] += 1
+        self._counters["speculative_hits"] += value is not None and entry in entries.prefetched
+        return value
+
+    def _put(self, scope: str | None, entry: tuple[str, Any], value: Any, origin: str | None) -> None:
+        if scope is None:
+            return
+        entries = self._scope(scope)
+        table, key = entry
+        getattr(entries, table)[key] = value
+        if origin is None:
+            return
+        self._counters[f"prefetched_{table}"] += 1
+        if origin in entries.pending:
+            entries.origins[entry] = origin
+        elif origin in entries.accepted:
+            entries.prefetched.add(entry)
+
+    def get_search(self, scope: str | None, query: str, options: tuple = ()) -> dict | None:
+        """Cached search response of `query` with the search `options`, e.g. `(max_results, topic)`."""
+        return self._get(scope, ("searches", (normalize_query(query), options)))
+
+    def put_search(
+        self,
+        scope: str | None,
+        query: str,
+        options: tuple,
+        response: dict,
+        *,
+        origin: str | None = None,
+    ) -> None:
+        """Cache a search response, as an entry of the speculative query `origin` when given."""
+        self._put(scope, ("searches", (normalize_query(query), options)), response, origin)
+
+    def get_summary(self, scope: str | None, url: str) -> str | None:
+        return self._get(scope, ("summaries", url))
+
+    def put_summary(self, scope: str | None, url: str, summary: str, *, origin: str | None = None) -> None:
+        self._put(scope, ("summaries", url), summary, origin)
+
+    def speculate(self, scope: str, query: str, task: asyncio.Task | None = None) -> None:
+        """Register a speculative prefetch of `query`, its entries are kept or dropped by `settle`."""
+        self._scope(scope).pending[query] = task
+        self._counters["speculative_queries"] += 1
+
+    def settle(self, scope: str | None, research_brief: str) -> list[str]:
+        """
+        Keep the speculative entries relevant to `research_brief`, drop the others and cancel their prefetches.
+
+        Returns the dropped speculative queries.
+        """
+        if scope is None or scope not in self._scopes:
+            return []
+        entries = self._scope(scope)
+        dropped = [query for query in entries.pending if relevance(query, research_brief) < MIN_RELEVANCE]
+        for query in dropped:
+            task = entries.pending[query]
+            if task is not None and not task.done():
+                task.cancel()
+                self._counters["cancelled"] += 1
+        for entry, origin in entries.origins.items():
+            table, key = entry
+            if origin in dropped:
+                getattr(entries, table).pop(key, None)
+                self._counters["discarded"] += 1
+            else:
+                entries.prefetched.add(entry)
+        kept = [query for query in entries.pending if query not in dropped]
+        # Prefetches still running for a kept query add their results to the kept entries
+        entries.accepted.update(kept)
+        entries.origins, entries.pending = {}, {}
+        self._counters["kept_queries"] += len(kept)
+        self._counters["dropped_queries"] += len(dropped)
+        if kept or dropped:
+            logger.info("Speculative prefetch of thread {}: kept {}, dropped {}", scope, kept, dropped)
+        return dropped
+
+    def stats(self) -> dict[str, int]:
+        """Hits and misses of searches and summaries, and the outcome of the speculative prefetches."""
+        return {"scopes": len(self._scopes), **dict(sorted(self._counters.items()))}
+
+    def reset(self) -> None:
+        for scope in list(getattr(self, "_scopes", {})):
+            self._drop(scope)
+        self._scopes = OrderedDict()
+        self._counters = Counter()
+
+
+search_cache = SearchCache()
@@ -1,10 +1,13 @@
 """State of conversation between Agent and User."""
 
 import operator
+from collections.abc import Iterable, Iterator, Sequence
+from dataclasses import dataclass, field
 from enum import Enum
-from typing import Annotated, TypedDict
+from itertools import islice
+from typing import Annotated, Any, TypedDict
 
-from langchain_core.messages import MessageLikeRepresentation
+from langchain_core.messages import AIMessage, MessageLikeRepresentation, ToolMessage, convert_to_messages
 from langgraph.graph import MessagesState
 from langgraph.graph.message import add_messages
 from pydantic import BaseModel, Field
@@ -27,6 +30,133 @@ class StatesKeys(str, Enum):
     TOOL_MANAGER_MESSAGES = "tool_manager_messages"
     MCP_TOOLS = "mcp_tools"
     MCP_TOOLS_BY_NAME = "mcp_tools_by_name"
+    REPORT_PATH = "report_path"
+
+
+# --- Notes --------------------------------------------------------------------------------
+
+
+@dataclass(frozen=True, slots=True)
+class Note:
+    """A research finding, e.g. the compressed research or the raw tool outputs of one research topic."""
+
+    content: str
+    topic: str = ""
+
+    def __str__(self) -> str:
+        return self.content
+
+
+@dataclass(frozen=True, slots=True, eq=False)
+class NoteLog(Sequence[Note]):
+    """
+    Immutable, append-only sequence of notes sharing one backing list with the logs it was extended from.
+
+    A log is the first `length` notes of `items`. Extending the newest log appends to the shared list in place,
+    amortized O(1) per note; extending an older log copies its notes first, so no log ever changes.
+    """
+
+    items: list[Note] = field(default_factory=list)
+    # None for all of `items`, e.g. when a validator rebuilds the log from a list
+    length: int | None = None
+
+    def __post_init__(self) -> None:
+        if self.length is None:
+            object.__setattr__(self, "length", len(self.items))
+
+    def extend(self, notes: Iterable[Note]) -> "NoteLog":
+        items = self.items if self.length == len(self.items) else self.items[: self.length]
+        items.extend(notes)
+        return NoteLog(items, len(items))
+
+    def __len__(self) -> int:
+        return self.length
+
+    def __getitem__(self, index: Any) -> Any:
+        if isinstance(index, slice):
+            return self.items[slice(*index.indices(self.length))]
+        if not -self.length <= index < self.length:
+            msg = "note index out of range"
+            raise IndexError(msg)
+        return self.items[index % self.length]
+
+    def __iter__(self) -> Iterator[Note]:
+        return islice(self.items, self.length)
+
+    def __eq__(self, other: object) -> bool:
+        return isinstance(other, Sequence) and not isinstance(other, str) and list(self) == list(other)
+
+    def __repr__(self) -> str:
+        return f"NoteLog({list(self)!r})"
+
+    def _asdict(self) -> dict[str, list[Note]]:
+        # Serializers encoding objects by `_asdict` (LangGraph's `JsonPlusSerializer`) store the notes of this log
+        # only, not the notes newer logs appended to the shared list
+        return {"items": list(self)}
+
+    # Equal to any sequence of the same notes, like a list it is not hashable
+    __hash__ = None
+
+
+def as_note(note: Note | str) -> Note:
+    return note if isinstance(note, Note) else Note(content=str(note))
+
+
+def append_notes(left: Sequence[Note] | None, right: Note | str | Iterable[Note | str] | None) -> NoteLog:
+    """
+    Reducer of the note channels, appending `right` to `left` without copying `left`.
+
+    Plain strings are wrapped in a `Note`, lists (e.g. the initial channel value or a restored checkpoint) are
+    copied into a `NoteLog` once.
+    """
+    log = left if isinstance(left, NoteLog) else NoteLog().extend(as_note(note) for note in left or ())
+    if right is None:
+        return log
+    if isinstance(right, (Note, str)):
+        right = [right]
+    return log.extend(as_note(note) for note in right)
+
+
+# The concrete types let LangGraph add them to the msgpack allowlist of strict checkpointers when compiling
+Notes = Annotated[NoteLog | list[Note], append_notes]
+# Custom types stored in checkpoints, e.g. for `JsonPlusSerializer(allowed_msgpack_modules=...)`
+CHECKPOINTED_TYPES = (Note, NoteLog)
+
+
+# --- Supervisor messages ------------------------------------------------------------------
+
+
+def add_supervisor_messages(
+    left: list[MessageLikeRepresentation] | None,
+    right: MessageLikeRepresentation | list[MessageLikeRepresentation],
+) -> list[MessageLikeRepresentation]:
+    """
+    `add_messages` answering the open tool calls of the last AI message with tool messages of an earlier run.
+
+    The node cache replays the tool messages of `supervisor_tool` for the same research topics, their
+    `tool_call_id`s are those the provider made in the run that cached them. Tool messages answering no tool call
+    of the last AI message take its open tool call ids in order.
+    """
+    left_messages = convert_to_messages(left or [])
+    right_messages = convert_to_messages(right if isinstance(right, list) else [right])
+    last_ai = next(
+        (index for index in range(len(left_messages) - 1, -1, -1) if isinstance(left_messages[index], AIMessage)),
+        None,
+    )
+    if last_ai is not None:
+        call_ids = [call["id"] for call in left_messages[last_ai].tool_calls]
+        answered = {
+            message.tool_call_id for message in left_messages[last_ai + 1 :] if isinstance(message, ToolMessage)
+        }
+        answered.update(message.tool_call_id for message in right_messages if isinstance(message, ToolMessage))
+        open_ids = iter([call_id for call_id in call_ids if call_id not in answered])
+        right_messages = [
+            message.model_copy(update={"tool_call_id": next(open_ids, message.tool_call_id), "id": None})
+            if isinstance(message, ToolMessage) and message.tool_call_id not in call_ids
+            else message
+            for message in right_messages
+        ]
+    return add_messages(left_messages, right_messages)
 
 
 # --- Clarification Agent ------------------------------------------------------------------
@@ -39,21 +169,23 @@ class AgentInputState(MessagesState):
 class AgentState(MessagesState):
     """Agents States."""
 
-    supervisor_messages: Annotated[list[MessageLikeRepresentation], add_messages]
+    supervisor_messages: Annotated[list[MessageLikeRepresentation], add_supervisor_messages]
     research_brief: str | None
-    raw_notes: Annotated[list[str] | None, operator.add] = None
-    notes: Annotated[list[str] | None, operator.add] = None
+    raw_notes: Notes = None
+    notes: Notes = None
     final_report: str = Annotated[str, "Final report Generated by Research Agents"]
+    report_path: str | None = None
 
 
 class ReportGeneratorState(TypedDict):
     research_brief: str | None
-    raw_notes: Annotated[list[str] | None, operator.add]
-    notes: Annotated[list[str] | None, operator.add]
+    raw_notes: Notes
+    notes: Notes
     final_report: str
     mcp_tools: list[dict]
     mcp_tools_by_name: dict[str, dict]
     tool_manager_messages: Annotated[list[MessageLikeRepresentation], add_messages]
+    report_path: str | None
 
 
 class Summary(BaseModel):
@@ -77,6 +209,15 @@ class ClarifyWithUser(BaseModel):
     )
 
 
+class ClarifyWithUserAndBrief(ClarifyWithUser):
+    """Clarification decision and, when no clarification is needed, the research brief in one call."""
+
+    research_brief: str = Field(
+        default="",
+        description="A research question that will be used to guide the research, empty when clarification is needed.",
+    )
+
+
 class ResearchQuestion(BaseModel):
     """Research questions to guide the research."""
 
@@ -99,10 +240,10 @@ class ConductResearch(BaseModel):
 class SupervisorState(TypedDict):
     """Supervisor State."""
 
-    supervisor_messages: Annotated[list[MessageLikeRepresentation], add_messages]
+    supervisor_messages: Annotated[list[MessageLikeRepresentation], add_supervisor_messages]
     research_brief: str | None
-    raw_notes: Annotated[list[str] | None, add_messages] = None
-    notes: Annotated[list[str] | None, add_messages] = None
+    raw_notes: Notes = None
+    notes: Notes = None
     research_iterations: int = 0
 
 
@@ -120,9 +261,9 @@ class ResearchState(TypedDict):
     tool_call_iterations: int = 0
     research_topic: str
     compressed_research: str
-    raw_notes: Annotated[list[str] | None, add_messages] = None
+    raw_notes: Notes = None
 
 
 class ResearcherOutputState(BaseModel):
     compressed_research: str
-    raw_notes: Annotated[list[str] | None, add_messages] = None
+    raw_notes: Notes = None
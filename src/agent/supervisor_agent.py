@@ -1,29 +1,37 @@
 """Supervisor Agent Subgraph."""
 
 import asyncio
+import sqlite3
 from typing import Literal
 
 from langchain.chat_models import init_chat_model
 from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import Runnable, RunnableConfig
+from langchain_core.runnables.config import merge_configs
 from langgraph.graph import END, START, StateGraph
 from langgraph.types import Command
 from loguru import logger
 
 try:
     from .configuration import Configuration
+    from .hedging import hedged_ainvoke
+    from .knowledge_base import open_knowledge_base
+    from .log_utils import brief, sampled_debug
     from .prompts import RESEARCH_SYSTEM_PROMPT
     from .researcher_agent import researcher_subgraph
-    from .states import ConductResearch, ResearchComplete, StatesKeys, SupervisorState
+    from .states import ConductResearch, Note, ResearchComplete, StatesKeys, SupervisorState
     from .utils import get_notes_from_tool_calls, is_token_limit_exceeded
 except ImportError:
     import rootutils
 
     rootutils.setup_root(search_from=__file__, indicator=[".git", "pyproject.toml"], pythonpath=True)
     from src.agent.configuration import Configuration
+    from src.agent.hedging import hedged_ainvoke
+    from src.agent.knowledge_base import open_knowledge_base
+    from src.agent.log_utils import brief, sampled_debug
     from src.agent.prompts import RESEARCH_SYSTEM_PROMPT
     from src.agent.researcher_agent import researcher_subgraph
-    from src.agent.states import ConductResearch, ResearchComplete, StatesKeys, SupervisorState
+    from src.agent.states import ConductResearch, Note, ResearchComplete, StatesKeys, SupervisorState
     from src.agent.utils import get_notes_from_tool_calls, is_token_limit_exceeded
 
 # Initialize a configurable model that we will use throughout the agent
@@ -48,7 +56,7 @@ async def supervisor(state: SupervisorState, config: RunnableConfig) -> Command[
     """
     logger.info("Supervisor agent invoked.")
     config = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for supervisor: {}", config)
+    sampled_debug("Configuration for supervisor: {}", brief(config))
     research_model_config = {
         "model": config.research_model,
         "max_tokens": config.research_model_max_tokens,
@@ -56,16 +64,25 @@ async def supervisor(state: SupervisorState, config: RunnableConfig) -> Command[
     logger.debug("Model configuration for supervisor: {}", research_model_config)
 
     lead_research_tool = [ConductResearch, ResearchComplete]
-    research_model = (
-        supervisor_model.bind_tools(lead_research_tool)
-        .with_retry(stop_after_attempt=config.max_structured_output_retries)
-        .with_config(
-            research_model_config,
+
+    def research_model(model: str) -> Runnable:
+        return (
+            supervisor_model.bind_tools(lead_research_tool)
+            .with_retry(stop_after_attempt=config.max_structured_output_retries)
+            .with_config(
+                {**research_model_config, "model": model},
+            )
         )
-    )
+
     supervisor_message = state.get(StatesKeys.SUPERVISOR_MSGS.value, [])
-    response = await research_model.ainvoke(supervisor_message)
-    logger.debug("Supervisor response: {}", response)
+    response = await hedged_ainvoke(
+        research_model,
+        supervisor_message,
+        node="supervisor",
+        model=config.research_model,
+        config=config,
+    )
+    sampled_debug("Supervisor response: {}", brief(response))
     logger.info("going to supervisor_tool")
     return Command(
         goto="supervisor_tool",
@@ -76,6 +93,59 @@ async def supervisor(state: SupervisorState, config: RunnableConfig) -> Command[
     )
 
 
+async def conduct_research(research_topic: str, config: RunnableConfig, configurable: Configuration) -> dict:
+    """
+    Research `research_topic` with a researcher subgraph, or answer it from the knowledge base.
+
+    With `knowledge_base` enabled, a stored finding of a similar topic younger than `knowledge_base_max_age_days`
+    answers the topic, and the findings of live research are stored for later runs. Errors of the knowledge base
+    fall back to live research, errors of the research propagate to `supervisor_tool`.
+    """
+    knowledge_base = None
+    finding = None
+    if configurable.knowledge_base:
+        try:
+            knowledge_base = open_knowledge_base(configurable.knowledge_base_path)
+            finding = await knowledge_base.alookup(
+                research_topic,
+                max_age_seconds=configurable.knowledge_base_max_age_days * 24 * 60 * 60,
+                min_score=configurable.knowledge_base_min_score,
+            )
+        except sqlite3.Error as error:
+            logger.warning("Knowledge base lookup of {!r} failed, researching it: {}", research_topic[:80], error)
+        if finding is not None:
+            return {
+                StatesKeys.COMPRESSED_RESEARCH.value: finding.compressed_research,
+                StatesKeys.RAW_NOTES.value: [Note(content=finding.raw_notes, topic=finding.topic)],
+            }
+    observation = await researcher_subgraph.ainvoke(
+        {
+            StatesKeys.RESEARCH_MSGS.value: [
+                SystemMessage(content=RESEARCH_SYSTEM_PROMPT),
+                HumanMessage(content=research_topic),
+            ],
+            StatesKeys.RESEARCH_TOPIC.value: research_topic,
+        },
+        # named so that traces show which researcher ran how long
+        merge_configs(
+            config,
+            {
+                "run_name": "researcher_subgraph",
+                "metadata": {"research_topic": research_topic[:200]},
+            },
+        ),
+    )
+    compressed_research = observation.get(StatesKeys.COMPRESSED_RESEARCH.value, "")
+    # Failed research is not worth keeping
+    if knowledge_base is not None and compressed_research and not compressed_research.startswith("Error"):
+        raw_notes = "\n".join(str(note) for note in observation.get(StatesKeys.RAW_NOTES.value) or [])
+        try:
+            await knowledge_base.aadd(research_topic, compressed_research, raw_notes)
+        except sqlite3.Error as error:
+            logger.warning("Could not store the finding of {!r} in the knowledge base: {}", research_topic[:80], error)
+    return observation
+
+
 @logger.catch
 async def supervisor_tool(state: SupervisorState, config: RunnableConfig) -> Command[Literal["supervisor", "__end__"]]:
     """
@@ -90,7 +160,7 @@ async def supervisor_tool(state: SupervisorState, config: RunnableConfig) -> Com
     Otherwise, we continue with research.
     We take all ConductResearch tool calls and:
     1. Limit total concurrent research units/calls to max_concurrent_research_units.
-    2. Execute each tool call and gather the results.
+    2. Execute each tool call and gather the results, answering topics found in the knowledge base without research.
     3. Handle any tool calls made > max_concurrent_research_units.
     4. Return to supervisor with the tool results.
 
@@ -98,7 +168,7 @@ async def supervisor_tool(state: SupervisorState, config: RunnableConfig) -> Com
     """
     logger.info("Supervisor tool invoked.")
     configurable = Configuration.from_runnable_config(config)
-    logger.debug("Configuration for supervisor tool: {}", configurable)
+    sampled_debug("Configuration for supervisor tool: {}", brief(configurable))
     supervisor_messages = state.get(StatesKeys.SUPERVISOR_MSGS.value, [])
     research_iterations = state.get(StatesKeys.RESEARCH_ITERATIONS.value, 0)
     most_recent_message = supervisor_messages[-1]
@@ -133,16 +203,7 @@ async def supervisor_tool(state: SupervisorState, config: RunnableConfig) -> Com
         overflow_conduct_research_calls = all_conduct_research[configurable.max_concurrent_research_units :]
 
         coros = [
-            researcher_subgraph.ainvoke(
-                {
-                    StatesKeys.RESEARCH_MSGS.value: [
-                        SystemMessage(content=RESEARCH_SYSTEM_PROMPT),
-                        HumanMessage(content=tool_call["args"][StatesKeys.RESEARCH_TOPIC.value]),
-                    ],
-                    StatesKeys.RESEARCH_TOPIC.value: tool_call["args"][StatesKeys.RESEARCH_TOPIC.value],
-                },
-                config,
-            )
+            conduct_research(tool_call["args"][StatesKeys.RESEARCH_TOPIC.value], config, configurable)
             for tool_call in conduct_research_calls
         ]
         tool_results = await asyncio.gather(*coros)
@@ -166,16 +227,15 @@ async def supervisor_tool(state: SupervisorState, config: RunnableConfig) -> Com
                     tool_call_id=overflow_conduct_research_call["id"],
                 ),
             )
-        raw_notes_concat = "\n".join(
-            ["\n".join(observation.get(StatesKeys.RAW_NOTES.value, [])) for observation in tool_results],
-        )
-        logger.debug("raw_notes_concat: {}", raw_notes_concat)
+        # One note per research topic, appended to the supervisor's notes without copying them
+        raw_notes = [note for observation in tool_results for note in observation.get(StatesKeys.RAW_NOTES.value) or []]
+        sampled_debug("raw_notes: {}", brief(raw_notes))
         logger.info("Returning to supervisor with tool results.")
         return Command(
             goto="supervisor",
             update={
                 StatesKeys.SUPERVISOR_MSGS.value: tool_messages,
-                StatesKeys.RAW_NOTES.value: [raw_notes_concat],
+                StatesKeys.RAW_NOTES.value: raw_notes,
             },
         )
     except Exception as e:
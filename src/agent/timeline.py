@@ -0,0 +1,426 @@
+"""
+Span timeline of graph runs with a critical path analyzer and Chrome trace export.
+
+`SpanRecorder` is a LangChain callback handler recording a span with its parent for every graph, node, model
+and tool run, e.g. `supervisor_tool` -> `researcher_subgraph` -> `research_tools` -> `tavily_search` ->
+`summarize_webpage`. `to_chrome_trace()` turns the spans of a thread into the Chrome trace event format, which
+opens in https://ui.perfetto.dev or `chrome://tracing` without any service behind it. The trace keeps the span
+ids, so it is also the input of the offline analyzer:
+
+- `critical_path()` walks down from a run, picking at each level the child that finished last and then the
+  children that finished before it started, every span on the path delayed the end of the run,
+- `fan_outs()` reports every span whose children overlapped: the slots used at the peak, the time
+  parallelism saved compared to running the children one after the other, the parallel efficiency and the
+  idle slot time (a slot waiting for the slowest sibling).
+
+Usage:
+    python -m src.agent.timeline trace.json [--top 10]
+"""
+
+import argparse
+import asyncio
+import json
+import threading
+import time
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, override
+from uuid import UUID
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langgraph.errors import GraphBubbleUp
+
+try:
+    from .utils import atomic_write_text
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.utils import atomic_write_text
+
+# Metadata copied into the span attributes
+SPAN_ATTRIBUTES = ("research_topic", "queue_seconds", "ls_model_name", "type", "hedge")
+
+
+@dataclass
+class Span:
+    """One run of the callback tree, times are `time.perf_counter()` seconds."""
+
+    span_id: str
+    parent_id: str | None
+    name: str
+    kind: str  # graph, node, chain, model or tool
+    start: float
+    end: float | None = None
+    status: str = "ok"
+    thread_id: str | None = None
+    attributes: dict[str, Any] = field(default_factory=dict)
+
+    @property
+    def duration(self) -> float:
+        return (self.end if self.end is not None else self.start) - self.start
+
+
+class SpanRecorder(BaseCallbackHandler):
+    """
+    Callback handler recording the spans of every graph run it is passed to.
+
+    Args:
+        max_runs: Graph runs kept, the spans of the oldest run are dropped first.
+
+    """
+
+    run_inline = True
+
+    def __init__(self, max_runs: int = 200) -> None:
+        self.max_runs = max_runs
+        # spans by graph run, the graph run itself first
+        self.runs: OrderedDict[str, dict[str, Span]] = OrderedDict()
+        self._roots: dict[str, str] = {}
+        self._lock = threading.Lock()
+
+    def _start(
+        self,
+        run_id: UUID,
+        parent_run_id: UUID | None,
+        name: str,
+        kind: str,
+        metadata: dict[str, Any] | None,
+    ) -> None:
+        metadata = metadata or {}
+        span_id, parent_id = str(run_id), str(parent_run_id) if parent_run_id else None
+        with self._lock:
+            root = self._roots.get(parent_id) if parent_id else None
+            if root is None:
+                root, parent_id = span_id, None
+                kind = "graph" if kind in {"chain", "node"} else kind
+                self.runs[root] = {}
+                while len(self.runs) > self.max_runs:
+                    _, dropped = self.runs.popitem(last=False)
+                    for dropped_id in dropped:
+                        self._roots.pop(dropped_id, None)
+            self._roots[span_id] = root
+            self.runs[root][span_id] = Span(
+                span_id=span_id,
+                parent_id=parent_id,
+                name=name,
+                kind=kind,
+                start=time.perf_counter(),
+                thread_id=metadata.get("thread_id"),
+                attributes={key: metadata[key] for key in SPAN_ATTRIBUTES if key in metadata},
+            )
+
+    def _end(self, run_id: UUID, error: BaseException | None = None) -> None:
+        span_id = str(run_id)
+        with self._lock:
+            root = self._roots.pop(span_id, None)
+            span = self.runs.get(root, {}).get(span_id) if root else None
+            if span is None:
+                return
+            span.end = time.perf_counter()
+            if isinstance(error, GraphBubbleUp):
+                span.status = "interrupted"
+            elif isinstance(error, asyncio.CancelledError):
+                span.status = "cancelled"
+            elif error is not None:
+                span.status = "error"
+                span.attributes["error"] = f"{type(error).__name__}: {error}"[:200]
+
+    @override
+    def on_chain_start(
+        self,
+        serialized: dict[str, Any] | None,
+        inputs: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "chain"
+        kind = "node" if (metadata or {}).get("langgraph_node") == name else "chain"
+        self._start(run_id, parent_run_id, name, kind, metadata)
+
+    @override
+    def on_chain_end(self, outputs: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    @override
+    def on_chain_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    @override
+    def on_chat_model_start(
+        self,
+        serialized: dict[str, Any] | None,
+        messages: Any,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = (metadata or {}).get("ls_model_name") or (serialized or {}).get("name") or "model"
+        self._start(run_id, parent_run_id, name, "model", metadata)
+
+    @override
+    def on_llm_end(self, response: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    @override
+    def on_llm_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    @override
+    def on_tool_start(
+        self,
+        serialized: dict[str, Any] | None,
+        input_str: str,
+        *,
+        run_id: UUID,
+        parent_run_id: UUID | None = None,
+        metadata: dict[str, Any] | None = None,
+        **kwargs: Any,
+    ) -> None:
+        name = kwargs.get("name") or (serialized or {}).get("name") or "tool"
+        self._start(run_id, parent_run_id, name, "tool", metadata)
+
+    @override
+    def on_tool_end(self, output: Any, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id)
+
+    @override
+    def on_tool_error(self, error: BaseException, *, run_id: UUID, **kwargs: Any) -> None:
+        self._end(run_id, error)
+
+    def spans(self, thread_id: str | None = None) -> list[Span]:
+        """Spans of every kept run, only of the runs of `thread_id` when given."""
+        with self._lock:
+            return [
+                span
+                for spans in self.runs.values()
+                for span in spans.values()
+                if thread_id is None or next(iter(spans.values())).thread_id == thread_id
+            ]
+
+    def write(self, path: Path, thread_id: str | None = None) -> None:
+        """Write the spans of `thread_id` (all when `None`) as a Chrome trace."""
+        atomic_write_text(path, json.dumps(to_chrome_trace(self.spans(thread_id))))
+
+
+# ---- Chrome trace ----
+
+
+def _lanes(spans: list[Span]) -> dict[str, int]:
+    """
+    Lane (trace `tid`) of every span.
+
+    Slices of one lane must nest, so a span shares the lane of its parent unless a sibling running at the same
+    time took it, then it gets the first lane free for its whole duration.
+    """
+    lanes: dict[str, int] = {}
+    # per lane, the spans open at the current time as a stack of (span id, end)
+    open_spans: list[list[tuple[str, float]]] = []
+    for span in sorted(spans, key=lambda span: (span.start, -span.duration)):
+        end = span.start + span.duration
+        for stack in open_spans:
+            while stack and stack[-1][1] <= span.start:
+                stack.pop()
+
+        def fits(lane: int, span: Span = span, end: float = end) -> bool:
+            stack = open_spans[lane]
+            return not stack or (stack[-1][0] == span.parent_id and stack[-1][1] >= end)
+
+        parent_lane = lanes.get(span.parent_id) if span.parent_id else None
+        if parent_lane is not None and fits(parent_lane):
+            lane = parent_lane
+        else:
+            lane = next((lane for lane in range(len(open_spans)) if not open_spans[lane]), len(open_spans))
+            if lane == len(open_spans):
+                open_spans.append([])
+        open_spans[lane].append((span.span_id, end))
+        lanes[span.span_id] = lane
+    return lanes
+
+
+def to_chrome_trace(spans: list[Span]) -> dict[str, Any]:
+    """Spans as Chrome trace events, one process per thread id and one lane per concurrently running span."""
+    if not spans:
+        return {"traceEvents": [], "displayTimeUnit": "ms"}
+    origin = min(span.start for span in spans)
+    lanes = _lanes(spans)
+    processes: dict[str | None, int] = {}
+    events: list[dict[str, Any]] = []
+    for span in spans:
+        if span.thread_id not in processes:
+            processes[span.thread_id] = pid = len(processes) + 1
+            events.append(
+                {"name": "process_name", "ph": "M", "pid": pid, "args": {"name": f"thread {span.thread_id}"}},
+            )
+        events.append(
+            {
+                "name": span.name,
+                "cat": span.kind,
+                "ph": "X",
+                "ts": round((span.start - origin) * 1e6, 1),
+                "dur": round(span.duration * 1e6, 1),
+                "pid": processes[span.thread_id],
+                "tid": lanes[span.span_id],
+                "args": {
+                    "span_id": span.span_id,
+                    "parent_id": span.parent_id,
+                    "status": span.status,
+                    "thread_id": span.thread_id,
+                    **span.attributes,
+                },
+            },
+        )
+    return {"traceEvents": events, "displayTimeUnit": "ms"}
+
+
+def from_chrome_trace(trace: dict[str, Any]) -> list[Span]:
+    """Spans of a trace written by `to_chrome_trace`, times in seconds since the first span."""
+    return [
+        Span(
+            span_id=event["args"]["span_id"],
+            parent_id=event["args"]["parent_id"],
+            name=event["name"],
+            kind=event["cat"],
+            start=event["ts"] / 1e6,
+            end=(event["ts"] + event["dur"]) / 1e6,
+            status=event["args"]["status"],
+            thread_id=event["args"]["thread_id"],
+            attributes={
+                key: value
+                for key, value in event["args"].items()
+                if key not in {"span_id", "parent_id", "status", "thread_id"}
+            },
+        )
+        for event in trace["traceEvents"]
+        if event.get("ph") == "X"
+    ]
+
+
+# ---- analysis ----
+
+
+@dataclass(frozen=True)
+class PathStep:
+    """A span on the critical path and the part of the path spent in the span itself, not in a child."""
+
+    span: Span
+    depth: int
+    self_seconds: float
+
+
+@dataclass(frozen=True)
+class FanOut:
+    """Children of a span that ran at the same time."""
+
+    span: Span
+    children: int
+    peak_slots: int
+    window_seconds: float  # from the first child starting to the last one ending
+    busy_seconds: float  # sum of the child durations
+
+    @property
+    def saved_seconds(self) -> float:
+        """Time saved compared to running the children one after the other."""
+        return self.busy_seconds - self.window_seconds
+
+    @property
+    def idle_slot_seconds(self) -> float:
+        """Slot time spent waiting for other children, e.g. for the slowest researcher."""
+        return self.peak_slots * self.window_seconds - self.busy_seconds
+
+    @property
+    def efficiency(self) -> float:
+        """Busy share of the slot time, 1.0 when every slot was busy for the whole window."""
+        slot_seconds = self.peak_slots * self.window_seconds
+        return self.busy_seconds / slot_seconds if slot_seconds else 1.0
+
+
+def _children(spans: list[Span]) -> dict[str | None, list[Span]]:
+    children: dict[str | None, list[Span]] = {}
+    for span in spans:
+        children.setdefault(span.parent_id, []).append(span)
+    return children
+
+
+def critical_path(spans: list[Span], root: Span | None = None) -> list[PathStep]:
+    """Spans that decided the end time of `root` (the longest graph run by default), outermost first."""
+    if not spans:
+        return []
+    children = _children(spans)
+    root = root or max(children.get(None, spans), key=lambda span: span.duration)
+    path: list[PathStep] = []
+
+    def walk(span: Span, depth: int) -> None:
+        cursor, on_path = span.start + span.duration, []
+        # latest finishing child first, then the ones that finished before it started
+        by_end = sorted(children.get(span.span_id, []), key=lambda child: child.start + child.duration, reverse=True)
+        for child in by_end:
+            child_end = child.start + child.duration
+            if span.start < child_end <= cursor:
+                on_path.append(child)
+                cursor = child.start
+        path.append(PathStep(span, depth, max(0.0, span.duration - sum(child.duration for child in on_path))))
+        for child in reversed(on_path):
+            walk(child, depth + 1)
+
+    walk(root, 0)
+    return path
+
+
+def _peak(intervals: list[tuple[float, float]]) -> int:
+    peak = running = 0
+    for _, delta in sorted([(start, 1) for start, _ in intervals] + [(end, -1) for _, end in intervals]):
+        running += delta
+        peak = max(peak, running)
+    return peak
+
+
+def fan_outs(spans: list[Span]) -> list[FanOut]:
+    """Every span whose children overlapped in time, the most time saved first."""
+    result = []
+    for parent_id, children in _children(spans).items():
+        parent = next((span for span in spans if span.span_id == parent_id), None)
+        intervals = [(child.start, child.start + child.duration) for child in children]
+        if parent is None or len(children) < 2 or (peak := _peak(intervals)) < 2:  # noqa: PLR2004
+            continue
+        window = max(end for _, end in intervals) - min(start for start, _ in intervals)
+        busy = sum(end - start for start, end in intervals)
+        result.append(FanOut(parent, len(children), peak, window, busy))
+    return sorted(result, key=lambda fan_out: fan_out.saved_seconds, reverse=True)
+
+
+def summarize(spans: list[Span], top: int = 10) -> str:
+    """Text report of the critical path and the fan-outs."""
+    lines = ["Critical path:"]
+    for step in critical_path(spans):
+        span = step.span
+        lines.append(
+            f"{'  ' * step.depth}{span.name} [{span.kind}] {span.duration:.3f}s (self {step.self_seconds:.3f}s)",
+        )
+    lines.append("")
+    lines.append("Fan-outs:")
+    for fan_out in fan_outs(spans)[:top]:
+        lines.append(
+            f"{fan_out.span.name}: {fan_out.children} children, {fan_out.peak_slots} slots at peak, "
+            f"saved {fan_out.saved_seconds:.3f}s, efficiency {fan_out.efficiency:.0%}, "
+            f"idle slots {fan_out.idle_slot_seconds:.3f}s",
+        )
+    return "\n".join(lines)
+
+
+def parse_args() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Critical path and parallelism of a recorded Chrome trace.")
+    parser.add_argument("trace", type=Path, help="Trace written by `SpanRecorder.write`.")
+    parser.add_argument("--top", type=int, default=10, help="Number of fan-outs to list.")
+    return parser.parse_args()
+
+
+if __name__ == "__main__":
+    args = parse_args()
+    print(summarize(from_chrome_trace(json.loads(args.trace.read_text(encoding="utf-8"))), top=args.top))
@@ -0,0 +1,108 @@
+"""
+Dependency aware execution of filesystem tool calls.
+
+The tool manager can ask for several filesystem operations at once, e.g. a directory and one file per phase
+of the plan. Only some of them have to wait for others: a write into a directory waits for its creation, a
+move waits for the writes to its source. Two calls depend on each other when one writes a path that the
+other reads or writes, where a directory covers everything below it. Calls are started in their original
+order and each one waits only for the earlier calls it depends on, independent calls run concurrently.
+
+Tools without known path arguments are treated as barriers, they run after every earlier call and before
+every later one.
+"""
+
+import asyncio
+import posixpath
+from collections.abc import Awaitable, Callable, Sequence
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.messages import ToolCall
+
+# tool name: (argument names of read paths, argument names of written paths)
+PATH_ARGUMENTS: dict[str, tuple[tuple[str, ...], tuple[str, ...]]] = {
+    "read_file": (("path",), ()),
+    "read_text_file": (("path",), ()),
+    "read_media_file": (("path",), ()),
+    "read_multiple_files": (("paths",), ()),
+    "list_directory": (("path",), ()),
+    "list_directory_with_sizes": (("path",), ()),
+    "directory_tree": (("path",), ()),
+    "search_files": (("path",), ()),
+    "get_file_info": (("path",), ()),
+    "list_allowed_directories": ((), ()),
+    "write_file": ((), ("path",)),
+    "edit_file": ((), ("path",)),
+    "create_directory": ((), ("path",)),
+    "move_file": ((), ("source", "destination")),
+}
+
+
+@dataclass(frozen=True)
+class PathAccess:
+    """Paths read and written by a tool call, `None` when the tool is unknown."""
+
+    reads: frozenset[str]
+    writes: frozenset[str]
+
+
+def _normalize(path: str) -> str:
+    return posixpath.normpath(path.strip() or ".")
+
+
+def _overlaps(path: str, other: str) -> bool:
+    """Whether one path is the other or one of its ancestors."""
+    return path == other or path.startswith(other.rstrip("/") + "/") or other.startswith(path.rstrip("/") + "/")
+
+
+def get_path_access(tool_call: ToolCall) -> PathAccess | None:
+    if tool_call["name"] not in PATH_ARGUMENTS:
+        return None
+    read_args, write_args = PATH_ARGUMENTS[tool_call["name"]]
+
+    def paths(arg_names: tuple[str, ...]) -> frozenset[str]:
+        values = []
+        for name in arg_names:
+            value = tool_call["args"].get(name)
+            values.extend(value if isinstance(value, list) else [value] if value else [])
+        return frozenset(_normalize(str(value)) for value in values)
+
+    return PathAccess(reads=paths(read_args), writes=paths(write_args))
+
+
+def _depends_on(later: PathAccess | None, earlier: PathAccess | None) -> bool:
+    if later is None or earlier is None:
+        return True
+    # read or write after write, then write after read
+    later_paths = later.reads | later.writes
+    return any(_overlaps(written, path) for written in earlier.writes for path in later_paths) or any(
+        _overlaps(written, read) for written in later.writes for read in earlier.reads
+    )
+
+
+def plan_dependencies(tool_calls: Sequence[ToolCall]) -> list[set[int]]:
+    """For every call, the indexes of the earlier calls it must wait for."""
+    accesses = [get_path_access(tool_call) for tool_call in tool_calls]
+    return [{j for j in range(i) if _depends_on(accesses[i], accesses[j])} for i in range(len(tool_calls))]
+
+
+async def run_tool_calls(
+    tool_calls: Sequence[ToolCall],
+    run: Callable[[ToolCall], Awaitable[Any]],
+) -> list[Any]:
+    """Run `run(tool_call)` for every call as soon as the calls it depends on are done, results in call order."""
+    dependencies = plan_dependencies(tool_calls)
+    tasks: list[asyncio.Task] = []
+
+    async def run_after(index: int) -> Any:
+        await asyncio.gather(*(tasks[j] for j in dependencies[index]))
+        return await run(tool_calls[index])
+
+    # Every task is created before any of them starts, so `tasks[j]` is always set
+    tasks.extend(asyncio.create_task(run_after(i)) for i in range(len(tool_calls)))
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
@@ -0,0 +1,196 @@
+"""
+Bounded, deadline aware executor for researcher tool calls.
+
+`research_tools` used to fire every tool call of an AI message through `asyncio.gather`, so one hanging search
+held the whole researcher and a burst of calls could exceed provider rate limits. `ToolExecutor`
+
+- limits concurrency per tool type (`search`, `control`, ...) across every researcher of the process,
+- gives each call a deadline and turns timeouts and errors into tool output immediately,
+- when `ResearchComplete` is among the calls, gives the other calls a short grace period and cancels stragglers,
+- records queue wait and run time of every call so it can be attached to the `ToolMessage` and show up in traces.
+"""
+
+import asyncio
+import time
+import weakref
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from typing import Any, Literal
+
+from langchain_core.messages import ToolCall, ToolMessage
+from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables.config import merge_configs
+from loguru import logger
+
+try:
+    from .configuration import Configuration
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.configuration import Configuration
+
+RESEARCH_COMPLETE = "ResearchComplete"
+CONTROL_TOOL_TYPE = "control"
+
+ToolCallStatus = Literal["success", "error", "timeout", "cancelled"]
+
+
+@dataclass
+class ToolCallResult:
+    """Outcome and timing of a single tool call."""
+
+    tool_call: ToolCall
+    tool_type: str
+    content: str = ""
+    status: ToolCallStatus = "cancelled"
+    enqueued_at: float = field(default_factory=time.perf_counter)
+    started_at: float | None = None
+    finished_at: float | None = None
+
+    @property
+    def queue_seconds(self) -> float:
+        return (self.started_at or self.finished_at or time.perf_counter()) - self.enqueued_at
+
+    @property
+    def run_seconds(self) -> float:
+        if self.started_at is None:
+            return 0.0
+        return (self.finished_at or time.perf_counter()) - self.started_at
+
+    def timing(self) -> dict[str, Any]:
+        """Timing metadata, attached to the tool message as `response_metadata["tool_timing"]`."""
+        return {
+            "tool_type": self.tool_type,
+            "status": self.status,
+            "queue_seconds": round(self.queue_seconds, 4),
+            "run_seconds": round(self.run_seconds, 4),
+        }
+
+    def to_message(self) -> ToolMessage:
+        return ToolMessage(
+            content=self.content,
+            name=self.tool_call["name"],
+            tool_call_id=self.tool_call["id"],
+            status="success" if self.status == "success" else "error",
+            response_metadata={"tool_timing": self.timing()},
+        )
+
+
+def get_tool_type(tool_call: ToolCall, tool: Any) -> str:
+    """Tool type used for concurrency limits, taken from the tool metadata and falling back to its name."""
+    if tool_call["name"] == RESEARCH_COMPLETE:
+        return CONTROL_TOOL_TYPE
+    metadata = getattr(tool, "metadata", None) or {}
+    return metadata.get("type", tool_call["name"])
+
+
+class ToolExecutor:
+    """
+    Execute tool calls with per type concurrency limits and per call deadlines.
+
+    Args:
+        max_concurrency: Maximum number of concurrent calls per tool type, e.g. `{"search": 4}`.
+        default_max_concurrency: Limit for tool types missing from `max_concurrency`.
+
+    """
+
+    def __init__(self, max_concurrency: dict[str, int] | None = None, default_max_concurrency: int = 8) -> None:
+        self.max_concurrency = dict(max_concurrency or {})
+        self.default_max_concurrency = default_max_concurrency
+        self._semaphores: weakref.WeakKeyDictionary[
+            asyncio.AbstractEventLoop,
+            dict[tuple[str, int], asyncio.Semaphore],
+        ] = weakref.WeakKeyDictionary()
+
+    def _semaphore(self, tool_type: str, limits: dict[str, int]) -> asyncio.Semaphore:
+        # Semaphores are bound to an event loop, keep one per loop, tool type and limit. A semaphore that made a
+        # call wait references its loop, which keeps the weak key alive, so the entries of closed loops are dropped.
+        for closed in [loop for loop in self._semaphores if loop.is_closed()]:
+            del self._semaphores[closed]
+        limit = limits.get(tool_type, self.default_max_concurrency)
+        semaphores = self._semaphores.setdefault(asyncio.get_running_loop(), {})
+        if (tool_type, limit) not in semaphores:
+            semaphores[tool_type, limit] = asyncio.Semaphore(limit)
+        return semaphores[tool_type, limit]
+
+    async def execute(
+        self,
+        tool_calls: Sequence[ToolCall],
+        tools_by_name: dict[str, Any],
+        configurable: Configuration,
+        config: RunnableConfig | None = None,
+    ) -> list[ToolCallResult]:
+        """Run `tool_calls` and return one result per call, in the original order."""
+        limits = {"search": configurable.max_concurrent_search_calls, **self.max_concurrency}
+        results = [
+            ToolCallResult(
+                tool_call=tool_call,
+                tool_type=get_tool_type(tool_call, tools_by_name.get(tool_call["name"])),
+            )
+            for tool_call in tool_calls
+        ]
+        # Control tools are instant, start them first so they never queue behind searches
+        ordered = sorted(results, key=lambda result: result.tool_type != CONTROL_TOOL_TYPE)
+        tasks = [
+            asyncio.create_task(
+                self._run(
+                    result,
+                    tools_by_name.get(result.tool_call["name"]),
+                    limits,
+                    configurable.tool_call_timeout,
+                    config,
+                ),
+            )
+            for result in ordered
+        ]
+        research_complete = any(tool_call["name"] == RESEARCH_COMPLETE for tool_call in tool_calls)
+        if research_complete and len(tasks) > 1:
+            _, pending = await asyncio.wait(tasks, timeout=configurable.research_complete_grace_period)
+            for task in pending:
+                task.cancel()
+            await asyncio.gather(*pending, return_exceptions=True)
+            if pending:
+                logger.info("Cancelled {} straggling tool calls after ResearchComplete", len(pending))
+        else:
+            await asyncio.gather(*tasks)
+
+        for result in results:
+            if result.status == "cancelled":
+                result.content = f"Cancelled: {result.tool_call['name']} was still running when research was completed"
+            logger.debug("Tool call {} timing: {}", result.tool_call["name"], result.timing())
+        return results
+
+    async def _run(
+        self,
+        result: ToolCallResult,
+        tool: Any,
+        limits: dict[str, int],
+        deadline: float,
+        config: RunnableConfig | None,
+    ) -> None:
+        name = result.tool_call["name"]
+        if tool is None:
+            result.status, result.content = "error", f"Error executing tool: unknown tool {name}"
+            result.finished_at = time.perf_counter()
+            return
+        try:
+            async with self._semaphore(result.tool_type, limits):
+                result.started_at = time.perf_counter()
+                # the queue wait is picked up by callback handlers such as `GraphMetrics`
+                call_config = merge_configs(config, {"metadata": {"queue_seconds": round(result.queue_seconds, 4)}})
+                output = await asyncio.wait_for(tool.ainvoke(result.tool_call["args"], call_config), timeout=deadline)
+            result.status, result.content = "success", output if isinstance(output, str) else str(output)
+        except TimeoutError:
+            result.status = "timeout"
+            result.content = f"Error executing tool: {name} did not answer within {deadline} seconds"
+        except asyncio.CancelledError:
+            result.status = "cancelled"
+            raise
+        except Exception as e:
+            result.status, result.content = "error", f"Error executing tool: {e}"
+        finally:
+            result.finished_at = time.perf_counter()
+
+
+tool_executor = ToolExecutor()
@@ -0,0 +1,121 @@
+"""
+Process wide registry of research tools.
+
+`research_agent` and `research_tools` run on every ReAct iteration of every researcher. Building the tool
+list, the name map and binding the tool schemas to the model only depends on the search API and the model
+settings, so the registry does it once per key and serves later calls from a dict lookup.
+"""
+
+from collections import Counter
+from dataclasses import dataclass
+from typing import Any
+
+from langchain_core.runnables import Runnable
+from loguru import logger
+
+try:
+    from .configuration import Configuration, SearchAPI
+    from .utils import get_all_tools, get_config_value
+except ImportError:
+    import rootutils
+
+    rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+    from src.agent.configuration import Configuration, SearchAPI
+    from src.agent.utils import get_all_tools, get_config_value
+
+
+@dataclass(frozen=True)
+class ToolSet:
+    """Tools available to a researcher for one search API."""
+
+    search_api: SearchAPI
+    tools: tuple[Any, ...]
+    tools_by_name: dict[str, Any]
+
+
+class ToolRegistry:
+    _instance = None
+    _toolsets: dict[SearchAPI, ToolSet]
+    _bound_models: dict[tuple, tuple[Any, Runnable]]
+    _counters: Counter
+
+    def __new__(cls):
+        """Enforce singleton pattern, tools are shared by every researcher of the process."""
+        if cls._instance is None:
+            cls._instance = super().__new__(cls)
+            cls._instance.clear()
+        return cls._instance
+
+    async def get_toolset(self, config: Configuration) -> ToolSet:
+        """Return the tools and name map for the configured search API."""
+        search_api = SearchAPI(get_config_value(config.search_api))
+        toolset = self._toolsets.get(search_api)
+        if toolset is not None:
+            self._counters["toolset_hits"] += 1
+            return toolset
+
+        self._counters["toolset_misses"] += 1
+        tools = await get_all_tools(config)
+        toolset = ToolSet(
+            search_api=search_api,
+            tools=tuple(tools),
+            tools_by_name={
+                tool.name if hasattr(tool, "name") else tool.get("name", "web_search"): tool for tool in tools
+            },
+        )
+        self._toolsets[search_api] = toolset
+        logger.debug("Tool registry built toolset for {}: {}", search_api.value, list(toolset.tools_by_name))
+        return toolset
+
+    async def get_bound_model(self, model: Any, config: Configuration, model_name: str | None = None) -> Runnable:
+        """
+        Return `model` with the research tools bound, retries and model settings applied.
+
+        `model_name` replaces `config.research_model`, e.g. for the backup of a hedged call. The cache key includes
+        the model object itself so a different (or patched) model never receives a stale binding.
+        """
+        model_name = model_name or config.research_model
+        toolset = await self.get_toolset(config)
+        key = (
+            id(model),
+            toolset.search_api,
+            model_name,
+            config.research_model_max_tokens,
+            config.max_structured_output_retries,
+        )
+        cached = self._bound_models.get(key)
+        if cached is not None and cached[0] is model:
+            self._counters["bound_model_hits"] += 1
+            return cached[1]
+
+        self._counters["bound_model_misses"] += 1
+        bound_model = (
+            model.bind_tools(list(toolset.tools))
+            .with_retry(stop_after_attempt=config.max_structured_output_retries)
+            .with_config(
+                {
+                    "model": model_name,
+                    "max_tokens": config.research_model_max_tokens,
+                },
+            )
+        )
+        self._bound_models[key] = (model, bound_model)
+        return bound_model
+
+    def stats(self) -> dict[str, int]:
+        """Hit and miss counters, e.g. `{"toolset_hits": 12, "toolset_misses": 1, ...}`."""
+        return {
+            "toolset_hits": self._counters["toolset_hits"],
+            "toolset_misses": self._counters["toolset_misses"],
+            "bound_model_hits": self._counters["bound_model_hits"],
+            "bound_model_misses": self._counters["bound_model_misses"],
+        }
+
+    def clear(self) -> None:
+        """Drop every cached tool and binding and reset the counters."""
+        self._toolsets = {}
+        self._bound_models = {}
+        self._counters = Counter()
+
+
+tool_registry = ToolRegistry()
@@ -1,25 +1,36 @@
 import asyncio
 import datetime
+import functools
+import os
+import re
+import tempfile
+from collections.abc import Callable
+from pathlib import Path
 from typing import Annotated, Literal
 
 from langchain.chat_models import init_chat_model
-from langchain_core.language_models import BaseChatModel
 from langchain_core.messages import AIMessage, HumanMessage, MessageLikeRepresentation, filter_messages
-from langchain_core.runnables import RunnableConfig
+from langchain_core.runnables import Runnable, RunnableConfig
 from langchain_core.tools import InjectedToolArg, tool
 from loguru import logger
 from tavily import AsyncTavilyClient
 
 try:
     from .configuration import Configuration, SearchAPI
+    from .model_router import routed_ainvoke
     from .prompts import SUMMARIZE_WEBPAGE_PROMPT
+    from .retry import ErrorKind, classify_error
+    from .search_cache import scope_of, search_cache
     from .states import ResearchComplete, Summary
 except ImportError:
     import rootutils
 
     rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
     from src.agent.configuration import Configuration, SearchAPI
+    from src.agent.model_router import routed_ainvoke
     from src.agent.prompts import SUMMARIZE_WEBPAGE_PROMPT
+    from src.agent.retry import ErrorKind, classify_error
+    from src.agent.search_cache import scope_of, search_cache
     from src.agent.states import ResearchComplete, Summary
 
 
@@ -57,11 +68,14 @@ async def tavily_search_sync(
     return search_doc
 
 
-async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
+async def summarize_webpage(build: Callable[[str], Runnable], webpage_content: str, config: Configuration) -> str:
     try:
         summary = await asyncio.wait_for(
-            model.ainvoke(
+            routed_ainvoke(
+                build,
                 [HumanMessage(content=SUMMARIZE_WEBPAGE_PROMPT.format(webpage_content=webpage_content))],
+                task="summarization",
+                config=config,
             ),
             timeout=60.0,
         )
@@ -76,21 +90,44 @@ async def summarize_webpage(model: BaseChatModel, webpage_content: str) -> str:
         return formatted_summary
 
 
-@tool(description=TAVILY_SEARCH_DESCRIPTION)
-async def tavily_search(
+async def cached_tavily_search(
     queries: list[str],
-    max_results: Annotated[int, InjectedToolArg] = 5,
-    # tavily topic hints
-    topic: Annotated[Literal["general", "news", "finance"], InjectedToolArg] = "general",
-    config: RunnableConfig | None = None,
-):
-    """Fetch results from Tavily Search."""
-    search_results = await tavily_search_sync(
-        search_queries=queries,
-        max_results=max_results,
-        topic=topic,
-        include_raw_content=True,
-    )
+    options: tuple[int, str],
+    scope: str | None,
+    origin: str | None = None,
+) -> list[dict]:
+    """Tavily responses of `queries` searched with `(max_results, topic)`, from the search cache of `scope` when cached."""
+    cached = {query: search_cache.get_search(scope, query, options) for query in queries}
+    missing = [query for query, response in cached.items() if response is None]
+    if missing:
+        max_results, topic = options
+        search_results = await tavily_search_sync(
+            search_queries=missing,
+            max_results=max_results,
+            topic=topic,
+            include_raw_content=True,
+        )
+        for query, response in zip(missing, search_results, strict=True):
+            search_cache.put_search(scope, query, options, response, origin=origin)
+            cached[query] = response
+    return list(cached.values())
+
+
+async def search_and_summarize(
+    queries: list[str],
+    config: Configuration,
+    *,
+    scope: str | None = None,
+    options: tuple[int, str] = (5, "general"),
+    origin: str | None = None,
+) -> dict[str, dict]:
+    """
+    Search `queries` with Tavily and summarize the pages, e.g. `{url: {"title": ..., "content": ...}}`.
+
+    Searches (with `(max_results, topic)` options) and summaries are served from and stored in the search cache
+    of the thread `scope`, as entries of the speculative query `origin` when prefetching.
+    """
+    search_results = await cached_tavily_search(queries, options, scope, origin)
     # Format the search results and deduplicate the  results by URL
     unique_results = {}
     for response in search_results:
@@ -98,30 +135,58 @@ async def tavily_search(
             url = result["url"]
             if url not in unique_results:
                 unique_results[url] = {**result, "query": response["query"]}
-    config = Configuration.from_runnable_config(config)
-    summarization_model = init_chat_model(
-        model=config.summarization_model,
-        max_tokens=config.summarization_model_max_tokens,
-    )
-    structured_summarize_model = summarization_model.with_structured_output(
-        Summary,
-    ).with_retry(stop_after_attempt=config.max_structured_output_retries)
+
+    # Pages are routed to a model by their length, see `routed_ainvoke`
+    @functools.cache
+    def structured_summarize_model(model: str) -> Runnable:
+        return (
+            init_chat_model(model=model, max_tokens=config.summarization_model_max_tokens)
+            .with_structured_output(Summary)
+            .with_retry(stop_after_attempt=config.max_structured_output_retries)
+            .with_config(run_name="summarize_webpage")
+        )
+
     max_char_to_include = 10_000  #  Kept under max input token limit
 
     async def _noop():
         return None
 
+    async def _summarize(url: str, raw_content: str) -> str:
+        summary = search_cache.get_summary(scope, url)
+        if summary is None:
+            content = raw_content[:max_char_to_include]
+            summary = await summarize_webpage(structured_summarize_model, content, config)
+            # A failed summary falls back to the page itself, the next search tries again
+            if summary is not content:
+                search_cache.put_summary(scope, url, summary, origin=origin)
+        return summary
+
     summarization_tasks = [
-        _noop()
-        if not result.get("raw_content")
-        else summarize_webpage(structured_summarize_model, result["raw_content"][:max_char_to_include])
-        for result in unique_results.values()
+        _noop() if not result.get("raw_content") else _summarize(url, result["raw_content"])
+        for url, result in unique_results.items()
     ]
     summaries = await asyncio.gather(*summarization_tasks)
-    summarized_results = {
+    return {
         url: {"title": result["title"], "content": result["content"] if summary is None else summary}
         for url, result, summary in zip(unique_results.keys(), unique_results.values(), summaries, strict=False)
     }
+
+
+@tool(description=TAVILY_SEARCH_DESCRIPTION)
+async def tavily_search(
+    queries: list[str],
+    max_results: Annotated[int, InjectedToolArg] = 5,
+    # tavily topic hints
+    topic: Annotated[Literal["general", "news", "finance"], InjectedToolArg] = "general",
+    config: RunnableConfig | None = None,
+):
+    """Fetch results from Tavily Search."""
+    summarized_results = await search_and_summarize(
+        queries,
+        Configuration.from_runnable_config(config),
+        scope=scope_of(config),
+        options=(max_results, topic),
+    )
     formatted_output = "Search Results:\n"
     for i, (url, result) in enumerate(summarized_results.items()):
         formatted_output += f"\n\n--- SOURCE {i + 1}: {result['title']} ---\n"
@@ -183,99 +248,50 @@ async def execute_tool_safely(tool, args, config: dict | None = None):
         return f"Error executing tool: {e}"
 
 
-def get_today_str() -> str:
-    """Get current date in a human-readable format."""
-    return datetime.datetime.now(tz=datetime.UTC).strftime("%a %b %-d, %Y")
-
-
-def is_token_limit_exceeded(exception: Exception, model_name: str | None = None):
-    """
-    Checks if a given exception indicates that the token limit for a specific model provider has been exceeded.
-
-        exception (Exception): The exception to inspect.
-        model_name (str | None, optional): The name of the model that raised the exception. Used to determine the provider.
-
-        bool: True if the exception is due to exceeding the token limit for the detected provider, False otherwise.
-
-    Supported Providers:
-        - OpenAI (model_name starts with "openai")
-        - Gemini/Google (model_name starts with "gemini:" or "google:")
-        - Perplexity (model_name starts with "sonar")
-
-    Note:
-        If model_name is not provided or does not match a supported provider, returns False.
-
+def report_file_name(research_brief: str | None, max_words: int = 8, max_chars: int = 60) -> str:
     """
-    error_str = str(exception).lower()
-    provider = None
-    if model_name:
-        model_name = model_name.lower()
-        if model_name.startswith("openai"):
-            provider = "openai"
-        elif model_name.startswith(("gemini:", "google:")):
-            provider = "gemini"
-        elif model_name.startswith("sonar"):
-            provider = "perplexity"
-
-    if provider == "openai":
-        return _check_openai_token_limit(exception, error_str)
-    if provider == "gemini":
-        return _check_gemini_token_limit(exception, error_str)
-    if provider == "perplexity":
-        return _check_perplexity_ai_token_limit(exception, error_str)
-    return False
-
+    File name of a report, e.g. `ai_note_taking_app_with_langgraph.md`.
 
-def _check_openai_token_limit(exception: Exception, error_message: str | None = None):
+    Built from the first sentence of the brief's first line (a markdown heading when there is one), keeping
+    only alphanumerics, underscores and hyphens like the tool manager prompt asks for.
     """
-    Check if the given exception is related to OpenAI token limit issues.
+    lines = [line.strip().lstrip("#").strip() for line in (research_brief or "").splitlines() if line.strip()]
+    title = re.split(r"[.;!?](?:\s|$)", lines[0], maxsplit=1)[0] if lines else ""
+    words = re.findall(r"[a-z0-9]+(?:-[a-z0-9]+)*", title.lower())[:max_words]
+    slug = "_".join(words)[:max_chars].rstrip("_-")
+    return f"{slug or 'project_plan'}.md"
+
+
+def atomic_write_text(path: str | Path, text: str) -> Path:
+    """Write `text` to `path` through a temporary file and a rename, readers never see a partial file."""
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    fd, tmp_name = tempfile.mkstemp(dir=path.parent, prefix=f".{path.name}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+            f.flush()
+            os.fsync(f.fileno())
+        Path(tmp_name).replace(path)
+    except BaseException:
+        Path(tmp_name).unlink(missing_ok=True)
+        raise
+    return path
 
-    This function determines whether an exception is specifically due to exceeding OpenAI's
-    token limits by inspecting the exception type, class name, and module. It checks for
-    OpenAI-related errors that indicate token or context length issues.
 
-    Args:
-        exception (Exception): The exception to examine.
-        error_message (str | None): Optional additional error message to search for keywords.
+def get_today_str() -> str:
+    """Get current date in a human-readable format."""
+    return datetime.datetime.now(tz=datetime.UTC).strftime("%a %b %-d, %Y")
 
-    Returns:
-        bool: True if the exception indicates a token limit issue with OpenAI, False otherwise.
 
+def is_token_limit_exceeded(exception: Exception, model_name: str | None = None) -> bool:
     """
-    exception_type = str(type(exception))
-    class_name = exception.__class__.__name__
-    module_name = getattr(exception.__class__, "__module__", "")
-    is_openai_exception = "openai" in exception_type.lower() or "openai" in module_name.lower()
-
-    is_bad_request = class_name == ["BadRequestError", "InvalidRequestError"]
-    if is_openai_exception and is_bad_request:
-        token_keywords = ("token", "context", "length", "maximum context", "reduce")
-        if any(keyword in error_message for keyword in token_keywords):
-            return True
-    return bool(
-        hasattr(exception, "code")
-        and hasattr(exception, "type")
-        and (
-            getattr(exception, "code", "") == "context_length_exceeded"
-            or getattr(exception, "type", "") == "invalid_request_error"
-        ),
-    )
-
-
-def _check_perplexity_ai_token_limit(exception: Exception, error_message: str | None = None):
-    raise NotImplementedError
+    Checks if a given exception indicates that the prompt exceeded the context window of the model.
 
-
-def _check_gemini_token_limit(exception: Exception):
-    exception_type = str(type(exception))
-    class_name = exception.__class__.__name__
-    module_name = getattr(exception.__class__, "__module__", "")
-
-    is_google_exception = "google" in exception_type.lower() or "google" in module_name.lower()
-    is_resource_exhausted = class_name in ["ResourceExhausted", "GoogleGenerativeAIFetchError"]
-    if is_google_exception and is_resource_exhausted:
-        return True
-    return "google.api_core.exceptions.resourceexhausted" in exception_type.lower()
+    The provider of `model_name` (e.g. `openai:gpt-4o-mini`, `perplexity:sonar` or `google_genai:gemini-2.0-flash`)
+    picks the error markers, see `classify_error`.
+    """
+    return classify_error(exception, model_name) is ErrorKind.CONTEXT_OVERFLOW
 
 
 def remove_up_to_last_ai_message(messages: list[MessageLikeRepresentation]) -> list[MessageLikeRepresentation]:
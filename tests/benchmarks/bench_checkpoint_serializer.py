@@ -0,0 +1,116 @@
+"""
+Benchmark the compact checkpoint serializer against LangGraph's default serializer.
+
+Simulates a researcher thread where every step appends an AI tool call and a large search result, and
+the state carries growing raw notes. Reports bytes per checkpoint and save/load latency.
+
+Usage:
+    python tests/benchmarks/bench_checkpoint_serializer.py [--steps 40]
+"""
+
+import argparse
+import random
+import string
+import time
+from typing import Any
+
+import rootutils
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.base import SerializerProtocol
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import START, StateGraph
+from langgraph.graph.message import add_messages
+from typing_extensions import Annotated, TypedDict
+
+rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+from src.agent.checkpoint_serializer import CompactSerializer  # noqa: E402
+
+
+class CountingSerializer(SerializerProtocol):
+    """Record the number of bytes written through a serializer."""
+
+    def __init__(self, serde: SerializerProtocol) -> None:
+        self.serde = serde
+        self.bytes_written = 0
+        self.writes = 0
+
+    def dumps_typed(self, obj: Any) -> tuple[str, bytes]:
+        type_, payload = self.serde.dumps_typed(obj)
+        self.bytes_written += len(payload)
+        self.writes += 1
+        return type_, payload
+
+    def loads_typed(self, data: tuple[str, bytes]) -> Any:
+        return self.serde.loads_typed(data)
+
+
+class BenchState(TypedDict):
+    messages: Annotated[list, add_messages]
+    raw_notes: list[str]
+
+
+def _search_dump(rng: random.Random, size: int = 8_000) -> str:
+    words = ["".join(rng.choices(string.ascii_lowercase, k=rng.randint(3, 9))) for _ in range(400)]
+    return " ".join(rng.choices(words, k=size // 6))
+
+
+def _build_graph(serde: SerializerProtocol, steps: int):
+    rng = random.Random(42)
+    dumps = [_search_dump(rng) for _ in range(steps)]
+
+    def research_step(state: BenchState) -> dict:
+        step = len(state["raw_notes"])
+        call_id = f"call_{step}"
+        return {
+            "messages": [
+                AIMessage(content="", tool_calls=[{"name": "tavily_search", "args": {"q": f"q{step}"}, "id": call_id}]),
+                ToolMessage(content=dumps[step], name="tavily_search", tool_call_id=call_id),
+            ],
+            "raw_notes": [*state["raw_notes"], dumps[step]],
+        }
+
+    builder = StateGraph(BenchState)
+    builder.add_node("research_step", research_step)
+    builder.add_edge(START, "research_step")
+    return builder.compile(checkpointer=MemorySaver(serde=serde))
+
+
+def run(name: str, serde: SerializerProtocol, steps: int) -> None:
+    counting = CountingSerializer(serde)
+    graph = _build_graph(counting, steps)
+    config = {"configurable": {"thread_id": name}}
+
+    start = time.perf_counter()
+    state: dict = {"messages": [HumanMessage(content="Plan an OCR note taking app")], "raw_notes": []}
+    for _ in range(steps):
+        graph.invoke(state, config)
+        state = {"messages": []}
+    save_seconds = time.perf_counter() - start
+
+    start = time.perf_counter()
+    history = list(graph.get_state_history(config))
+    load_seconds = time.perf_counter() - start
+
+    checkpoints = len(history)
+    extra = ""
+    if isinstance(serde, CompactSerializer):
+        extra = f"  (+{serde.store.nbytes / 1024:.0f} KiB content store, {len(serde.store)} entries)"
+    print(
+        f"{name:<10} checkpoints={checkpoints:<4} "
+        f"bytes/checkpoint={counting.bytes_written / checkpoints:>10.0f} "
+        f"save={save_seconds * 1000 / steps:>7.2f} ms/step "
+        f"load_history={load_seconds * 1000:>8.2f} ms{extra}",
+    )
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--steps", type=int, default=40)
+    args = parser.parse_args()
+    run("default", JsonPlusSerializer(), args.steps)
+    run("compact", CompactSerializer(), args.steps)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,52 @@
+"""
+Benchmark the note reducers: `add_messages` on strings, `operator.add` and the append-only `append_notes`.
+
+Simulates a supervisor collecting one note per research unit, every note merged into the channel value on its
+own like LangGraph does for each node update. Reports the total and per-append reducer time at each size.
+
+Usage:
+    python tests/benchmarks/bench_note_reducers.py [--notes 10000]
+"""
+
+import argparse
+import operator
+import time
+from collections.abc import Callable
+from typing import Any
+
+import rootutils
+from langgraph.graph.message import add_messages
+
+rootutils.setup_root(__file__, indicator=".git", pythonpath=True)
+from src.agent.states import Note, append_notes  # noqa: E402
+
+REDUCERS: dict[str, tuple[Callable[[Any, Any], Any], Callable[[int], Any]]] = {
+    "add_messages": (add_messages, lambda i: [f"note {i}"]),
+    "operator.add": (operator.add, lambda i: [f"note {i}"]),
+    "append_notes": (append_notes, lambda i: [Note(content=f"note {i}", topic="OCR engines")]),
+}
+
+
+def run(name: str, notes: int) -> None:
+    reducer, update = REDUCERS[name]
+    updates = [update(i) for i in range(notes)]
+    value: Any = []
+    start = time.perf_counter()
+    for item in updates:
+        value = reducer(value, item)
+    seconds = time.perf_counter() - start
+    assert len(value) == notes
+    print(f"{name:<13} notes={notes:<7} total={seconds * 1000:>10.1f} ms  per_append={seconds * 1e6 / notes:>8.2f} us")
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--notes", type=int, default=10_000)
+    args = parser.parse_args()
+    for notes in (args.notes // 10, args.notes):
+        for name in REDUCERS:
+            run(name, notes)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,85 @@
+"""Tests for the auto-approval policy of protected tool calls."""
+
+import json
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage, ToolCall
+from langchain_core.runnables import RunnableConfig
+
+from src.agent.approval_policy import ApprovalPolicy
+from src.agent.final_report_generation import should_continue
+
+REPORTS = "/projects/workspace/generated_examples"
+
+
+def call(name: str, **args: object) -> ToolCall:
+    return ToolCall(name=name, args=args, id=name)
+
+
+@pytest.fixture
+def policy() -> ApprovalPolicy:
+    """Provides a policy allowing new reports in the generated_examples directory."""
+    return ApprovalPolicy(allowed_paths=(f"{REPORTS}/**",), max_file_bytes=100)
+
+
+def test_report_save_is_approved(policy: ApprovalPolicy, tmp_path: Path) -> None:
+    """Test that creating the report directory and a new report need no review."""
+    calls = [call("create_directory", path=REPORTS), call("write_file", path=f"{REPORTS}/plan.md", content="# Plan")]
+
+    assert policy.violations(calls, tmp_path) == []
+
+
+@pytest.mark.parametrize(
+    ("tool_call", "violation"),
+    [
+        (call("move_file", source=f"{REPORTS}/a.md", destination=f"{REPORTS}/b.md"), "not an auto-approved tool"),
+        (call("write_file", path="/projects/workspace/plan.md", content="x"), "outside of the allowed paths"),
+        (call("write_file", path=f"{REPORTS}/../../secret.md", content="x"), "outside of the allowed paths"),
+        (call("write_file", path=f"{REPORTS}/plan.md", content="x" * 101), "more than 100"),
+    ],
+)
+def test_violations(policy: ApprovalPolicy, tmp_path: Path, tool_call: ToolCall, violation: str) -> None:
+    """Test that calls outside the policy are reported."""
+    violations = policy.violations([tool_call], tmp_path)
+
+    assert any(violation in reason for reason in violations)
+
+
+def test_overwrite_needs_review(policy: ApprovalPolicy, tmp_path: Path) -> None:
+    """Test that an existing file is only replaced without review when overwrites are allowed."""
+    (tmp_path / "generated_examples").mkdir()
+    (tmp_path / "generated_examples" / "plan.md").write_text("old")
+    calls = [call("write_file", path=f"{REPORTS}/plan.md", content="new")]
+
+    assert policy.violations(calls, tmp_path) == [f"write_file may overwrite {REPORTS}/plan.md"]
+    assert policy.model_copy(update={"allow_overwrite": True}).violations(calls, tmp_path) == []
+
+
+def test_edit_needs_review_without_overwrites(policy: ApprovalPolicy, tmp_path: Path) -> None:
+    """Test that editing an existing file is treated as an overwrite."""
+    (tmp_path / "generated_examples").mkdir()
+    (tmp_path / "generated_examples" / "plan.md").write_text("# Plan")
+    policy = policy.model_copy(update={"allowed_tools": ("edit_file",)})
+    calls = [call("edit_file", path=f"{REPORTS}/plan.md", edits=[{"oldText": "# Plan", "newText": "# Final"}])]
+
+    assert policy.violations(calls, tmp_path) == [f"edit_file may overwrite {REPORTS}/plan.md"]
+    assert policy.model_copy(update={"allow_overwrite": True}).violations(calls, tmp_path) == []
+
+
+@pytest.mark.anyio
+async def test_should_continue_skips_review_for_approved_calls(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that only calls violating the configured policy interrupt the graph."""
+    monkeypatch.setenv("WORKSPACE", str(tmp_path))
+    monkeypatch.setenv("TOOL_APPROVAL_POLICY", json.dumps({"allowed_paths": [f"{REPORTS}/**"]}))
+    config = RunnableConfig(configurable={})
+
+    def state(path: str) -> dict:
+        message = AIMessage(content="", tool_calls=[call("write_file", path=path, content="# Plan")])
+        return {"tool_manager_messages": [message]}
+
+    assert await should_continue(state(f"{REPORTS}/plan.md"), config) == "mcp_tool_call"
+    assert await should_continue(state("/projects/workspace/plan.md"), config) == "human_tool_review_node"
+
+    monkeypatch.delenv("TOOL_APPROVAL_POLICY")
+    assert await should_continue(state(f"{REPORTS}/plan.md"), config) == "human_tool_review_node"
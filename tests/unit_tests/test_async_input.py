@@ -0,0 +1,99 @@
+"""Tests for asking the user without blocking the event loop."""
+
+import asyncio
+import os
+from collections.abc import Iterator
+
+import pytest
+
+from frontend.async_input import QueueInput, StdinReader, TerminalInput
+from frontend.utils import handle_clarification
+
+
+@pytest.fixture
+def terminal() -> Iterator[tuple[StdinReader, int]]:
+    """Provides a reader of a pipe and the file descriptor to type into."""
+    read_fd, write_fd = os.pipe()
+    with os.fdopen(read_fd) as stream:
+        yield StdinReader(stream), write_fd
+        os.close(write_fd)
+
+
+@pytest.mark.anyio
+async def test_waiting_for_input_does_not_block(terminal: tuple[StdinReader, int]) -> None:
+    """Test that other tasks keep running while a question waits for its answer."""
+    reader, keyboard = terminal
+    ticks = 0
+
+    async def background() -> None:
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    ticker = asyncio.create_task(background())
+    question = asyncio.create_task(TerminalInput(reader=reader).ask("Which platform? "))
+    await asyncio.sleep(0.05)
+    os.write(keyboard, b" web \n")
+
+    assert await question == "web"
+    assert ticks > 3  # noqa: PLR2004
+    ticker.cancel()
+
+
+@pytest.mark.anyio
+async def test_cancelled_question_keeps_its_line(terminal: tuple[StdinReader, int]) -> None:
+    """Test that a line typed for a cancelled question answers the next one."""
+    reader, keyboard = terminal
+    question = asyncio.create_task(reader.readline())
+    await asyncio.sleep(0.01)
+    question.cancel()
+    os.write(keyboard, b"accept\n")
+
+    assert await reader.readline() == "accept"
+
+
+@pytest.mark.anyio
+async def test_sessions_take_turns(terminal: tuple[StdinReader, int], capsys: pytest.CaptureFixture) -> None:
+    """Test that concurrent sessions share the terminal one question at a time."""
+    reader, keyboard = terminal
+    os.write(keyboard, b"first\nsecond\n")
+
+    answers = await asyncio.gather(
+        TerminalInput("plan-a", reader).ask("Action: "),
+        TerminalInput("plan-b", reader).ask("Action: "),
+    )
+
+    assert answers == ["first", "second"]
+    assert capsys.readouterr().out == "[plan-a] Action: [plan-b] Action: "
+
+
+@pytest.mark.anyio
+async def test_end_of_input() -> None:
+    """Test that a closed terminal raises EOFError instead of hanging."""
+    read_fd, write_fd = os.pipe()
+    os.write(write_fd, b"last\n")
+    os.close(write_fd)
+    with os.fdopen(read_fd) as stream:
+        reader = StdinReader(stream)
+
+        assert await reader.readline() == "last"
+        with pytest.raises(EOFError):
+            await reader.readline()
+
+
+@pytest.mark.anyio
+async def test_handle_clarification_with_queue_input() -> None:
+    """Test that the clarification question is answered through the given input source."""
+    source = QueueInput()
+    source.answer("Web only")
+
+    clarification = '{"need_clarification": true, "question": "Which platform?", "verification": ""}'
+    response = await handle_clarification(clarification, source)
+
+    assert response["messages"][0].content == "Web only"
+    assert source.questions.get_nowait().strip() == "User Clarification needed:"
+
+    source.close()
+    with pytest.raises(EOFError):
+        await source.ask("Anything else? ")
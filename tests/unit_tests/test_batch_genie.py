@@ -0,0 +1,111 @@
+"""Tests for the batch planning mode."""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AnyMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.graph.state import CompiledStateGraph
+
+from frontend.batch_genie import BatchItem, BatchRunner, load_items
+from src.agent.final_report_generation import save_report
+
+REPORT = """# Project: Habit Tracker
+
+## 📅 Build Plan
+
+### Phase 1: Foundation (Week 1-2)
+
+- Set up the repository
+- Implement the habit repository
+"""
+
+
+class PlanState(TypedDict, total=False):
+    messages: Annotated[list[AnyMessage], add_messages]
+    research_brief: str
+    final_report: str
+    report_path: str
+    tool_manager_messages: list[AnyMessage]
+
+
+def planning_graph(failures: set[str], running: list[int]) -> CompiledStateGraph:
+    """A graph that researches and writes a report, failing once for the ideas in `failures`."""
+
+    async def research(state: PlanState, config: RunnableConfig) -> dict:
+        assert config["configurable"]["allow_clarification"] is False
+        running.append(running[-1] + 1)
+        await asyncio.sleep(0.02)
+        running.append(running[-1] - 1)
+        return {"research_brief": state["messages"][0].content}
+
+    async def write(state: PlanState, config: RunnableConfig) -> dict:
+        if state["research_brief"] in failures:
+            failures.discard(state["research_brief"])
+            msg = "model overloaded"
+            raise RuntimeError(msg)
+        saved = await save_report({**state, "final_report": REPORT}, config)
+        return {"final_report": REPORT, **saved.update}
+
+    builder = StateGraph(PlanState)
+    builder.add_node("research", research)
+    builder.add_node("write", write)
+    builder.add_edge(START, "research")
+    builder.add_edge("research", "write")
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def read_metrics(output: Path) -> list[dict]:
+    return [json.loads(line) for line in (output / "metrics.jsonl").read_text().splitlines()]
+
+
+def test_load_items(tmp_path: Path) -> None:
+    """Test that ideas are read from directories and JSONL files with stable ids."""
+    (tmp_path / "ideas").mkdir()
+    (tmp_path / "ideas" / "habit tracker.md").write_text("A habit tracker\n")
+    (tmp_path / "ideas" / "notes.json").write_text("{}")
+    jsonl = tmp_path / "ideas.jsonl"
+    jsonl.write_text('{"id": "a", "idea": "A todo app"}\n\n{"description": "A notes app"}\n')
+
+    assert load_items(tmp_path / "ideas") == [BatchItem("habit_tracker", "A habit tracker")]
+    items = load_items(jsonl)
+    assert items[0] == BatchItem("a", "A todo app")
+    assert items[1].idea == "A notes app"
+    assert load_items(jsonl)[1].id == items[1].id
+
+    jsonl.write_text('{"id": "a", "idea": "x"}\n{"id": "a", "idea": "y"}\n')
+    with pytest.raises(ValueError, match="duplicate ids"):
+        load_items(jsonl)
+
+
+@pytest.mark.anyio
+async def test_batch_is_bounded_and_resumable(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that runs share the concurrency budget, failures are resumed and completed items skipped."""
+    monkeypatch.setenv("WORKSPACE", str(tmp_path / "workspace"))
+    items = [BatchItem(f"idea-{i}", f"Idea {i}") for i in range(5)]
+    running = [0]
+    runner = BatchRunner(planning_graph({"Idea 3"}, running), tmp_path, max_concurrent_runs=2)
+
+    metrics = await runner.run(items)
+
+    assert max(running) == 2
+    assert [record["status"] for record in metrics] == ["completed"] * 3 + ["failed", "completed"]
+    assert metrics[0]["plan"] == {"phases": 1, "tasks": 2, "features": 0}
+    assert set(metrics[0]["node_seconds"]) == {"research", "write"}
+    assert Path(metrics[0]["report_path"]) == tmp_path / "reports" / "idea-0" / "idea_0.md"
+    assert metrics[3]["error"] == "RuntimeError: model overloaded"
+
+    metrics = await runner.run(items)
+
+    assert [(record["id"], record["status"], record["resumed"]) for record in metrics] == [
+        ("idea-3", "completed", True),
+    ]
+    assert len(read_metrics(tmp_path)) == len(items) + 1
+    summary = json.loads((tmp_path / "summary.json").read_text())
+    assert (summary["runs"], summary["skipped"], summary["statuses"]) == (1, 4, {"completed": 1})
@@ -0,0 +1,91 @@
+"""Tests for the compact checkpoint serializer."""
+
+import logging
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.checkpoint.serde.jsonplus import JsonPlusSerializer
+from langgraph.graph import START, MessagesState, StateGraph
+
+from src.agent.checkpoint_serializer import CompactSerializer, InMemoryContentStore, state_serializer
+from src.agent.states import Note, append_notes
+
+LONG_TEXT = "search result " * 100
+
+
+def test_round_trip_preserves_messages() -> None:
+    """Test that messages, tool calls and plain values survive a dump/load cycle."""
+    serializer = CompactSerializer()
+    state = {
+        "messages": [
+            HumanMessage(content="short idea", id="1"),
+            AIMessage(content="", id="2", tool_calls=[{"name": "tavily_search", "args": {"q": "x"}, "id": "c1"}]),
+            ToolMessage(content=LONG_TEXT, name="tavily_search", tool_call_id="c1", id="3"),
+        ],
+        "research_iterations": 2,
+        "final_report": LONG_TEXT,
+    }
+
+    assert serializer.loads_typed(serializer.dumps_typed(state)) == state
+
+
+def test_repeated_contents_are_stored_once() -> None:
+    """Test that the same large content is deduplicated across checkpoints."""
+    store = InMemoryContentStore()
+    serializer = CompactSerializer(store=store)
+
+    first = serializer.dumps_typed([ToolMessage(content=LONG_TEXT, tool_call_id="c1")])
+    second = serializer.dumps_typed({"notes": [LONG_TEXT], "final_report": LONG_TEXT})
+
+    assert len(store) == 1
+    assert len(first[1]) < len(LONG_TEXT)
+    assert len(second[1]) < len(LONG_TEXT)
+
+
+def test_notes_are_compact_records() -> None:
+    """Test that research notes survive a dump/load cycle with their contents deduplicated."""
+    store = InMemoryContentStore()
+    serializer = CompactSerializer(store=store)
+    notes = append_notes(None, [Note(content=LONG_TEXT, topic="OCR engines"), "short note"])
+
+    loaded = serializer.loads_typed(serializer.dumps_typed({"raw_notes": notes}))
+
+    assert loaded == {"raw_notes": [Note(content=LONG_TEXT, topic="OCR engines"), Note(content="short note")]}
+    assert len(store) == 1
+
+
+def test_state_serializer_registers_notes(caplog: pytest.LogCaptureFixture) -> None:
+    """Test that notes load without the unregistered type warning and a log stores only its own notes."""
+    log = append_notes(None, [Note(content="OCR engines", topic="OCR"), "short note"])
+    append_notes(log, ["note of a newer log"])
+    serializer = state_serializer()
+
+    with caplog.at_level(logging.WARNING):
+        loaded = serializer.loads_typed(serializer.dumps_typed({"raw_notes": log}))
+
+    assert loaded == {"raw_notes": [Note(content="OCR engines", topic="OCR"), Note(content="short note")]}
+    assert loaded["raw_notes"].items == list(log)
+    assert caplog.records == []
+
+
+def test_loads_checkpoints_written_by_inner_serializer() -> None:
+    """Test that checkpoints written before enabling the serializer can still be read."""
+    legacy = JsonPlusSerializer().dumps_typed({"research_brief": "brief"})
+
+    assert CompactSerializer().loads_typed(legacy) == {"research_brief": "brief"}
+
+
+def test_plugs_into_checkpointer() -> None:
+    """Test that the serializer works as the serde of a LangGraph checkpointer."""
+    builder = StateGraph(MessagesState)
+    builder.add_node("echo", lambda state: {"messages": [AIMessage(content=LONG_TEXT)]})
+    builder.add_edge(START, "echo")
+    graph = builder.compile(checkpointer=MemorySaver(serde=CompactSerializer()))
+    config = {"configurable": {"thread_id": "1"}}
+
+    graph.invoke({"messages": [HumanMessage(content="hi")]}, config)
+    graph.invoke({"messages": [HumanMessage(content="again")]}, config)
+
+    messages = graph.get_state(config).values["messages"]
+    assert [message.content for message in messages] == ["hi", LONG_TEXT, "again", LONG_TEXT]
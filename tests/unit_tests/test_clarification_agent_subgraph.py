@@ -10,10 +10,11 @@ from langgraph.types import Command
 
 from src.agent.clarification_agent_subgraph import (
     clarify_with_user,
+    is_well_specified,
     write_research_brief,
 )
 from src.agent.prompts import LEAD_RESEARCHER_PROMPT
-from src.agent.states import AgentState, ClarifyWithUser, ResearchQuestion, StatesKeys
+from src.agent.states import AgentState, ClarifyWithUser, ClarifyWithUserAndBrief, ResearchQuestion, StatesKeys
 from src.agent.utils import get_today_str
 
 
@@ -137,3 +138,62 @@ async def test_write_research_brief(mock_model) -> None:
     assert supervisor_messages[1].content == "This is the research brief."
 
     mock_chain.ainvoke.assert_called_once()
+
+
+DETAILED_IDEA = """I want to build a command line expense tracker in Python 3.12 to showcase clean architecture.
+- Expenses are stored in SQLite through a repository interface so the storage can be swapped.
+- Categories and monthly budgets are configured in a TOML file and validated with pydantic.
+- Reports are rendered as tables or exported to CSV through a strategy per output format.
+- The project uses pytest with fixtures, typed code checked by mypy and a custom exception hierarchy.
+"""
+
+
+def test_is_well_specified() -> None:
+    """Test that only long requests with several requirements skip clarification."""
+    assert is_well_specified([HumanMessage(content=DETAILED_IDEA)], min_words=50)
+    assert not is_well_specified([HumanMessage(content=DETAILED_IDEA)], min_words=500)
+    assert not is_well_specified([HumanMessage(content=DETAILED_IDEA)], min_words=0)
+    assert not is_well_specified([HumanMessage(content="word " * 200)], min_words=50)
+    assert not is_well_specified([AIMessage(content=DETAILED_IDEA)], min_words=50)
+
+
+@pytest.mark.anyio
+@patch("src.agent.clarification_agent_subgraph.clarification_model", new_callable=MagicMock)
+async def test_clarify_with_user_skips_well_specified_request(mock_model) -> None:
+    """Test that a long and detailed request goes to the research brief without a clarification call."""
+    state = AgentState(messages=[HumanMessage(content=DETAILED_IDEA)])
+    config = RunnableConfig(configurable={"skip_clarification_min_words": 50})
+
+    result = await clarify_with_user(state, config)
+
+    assert result.goto == "write_research_brief"
+    mock_model.with_structured_output.assert_not_called()
+
+
+@pytest.mark.anyio
+@patch("src.agent.clarification_agent_subgraph.clarification_model", new_callable=MagicMock)
+async def test_clarify_with_user_fast_path(mock_model) -> None:
+    """Test that a clarification call writing the research brief hands it straight to the supervisor."""
+    state = AgentState(messages=[HumanMessage(content="test idea")])
+    config = RunnableConfig(configurable={"max_concurrent_research_units": 3})
+    mock_chain = AsyncMock()
+    mock_chain.ainvoke.return_value = ClarifyWithUserAndBrief(
+        need_clarification=False,
+        question="",
+        verification="Starting the research.",
+        research_brief="This is the research brief.",
+    )
+    mock_model.with_structured_output.return_value.with_retry.return_value.with_config.return_value = mock_chain
+
+    result = await clarify_with_user(state, config)
+
+    mock_model.with_structured_output.assert_called_once_with(ClarifyWithUserAndBrief)
+    assert result.goto == "supervisor_subgraph"
+    assert result.update[StatesKeys.MSGS.value][-1].content == "Starting the research."
+    assert result.update[StatesKeys.RESEARCH_BRIEF.value] == "This is the research brief."
+    system_message, brief_message = result.update[StatesKeys.SUPERVISOR_MSGS.value]
+    assert system_message.content == LEAD_RESEARCHER_PROMPT.format(
+        date=get_today_str(),
+        max_concurrent_research_units=3,
+    )
+    assert brief_message.content == "This is the research brief."
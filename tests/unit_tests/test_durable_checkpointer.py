@@ -0,0 +1,75 @@
+"""Tests for the durable SQLite checkpointer."""
+
+import operator
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+import pytest
+from langgraph.graph import END, START, StateGraph
+
+from src.agent.durable_checkpointer import open_durable_checkpointer
+
+
+class FanOutState(TypedDict):
+    notes: Annotated[list[str], operator.add]
+
+
+def _build_graph(calls: list[str], *, fail: bool) -> StateGraph:
+    """Two parallel researchers followed by a report, `fail` crashes the second researcher."""
+
+    async def researcher_a(state: FanOutState) -> dict:
+        calls.append("researcher_a")
+        return {"notes": ["a"]}
+
+    async def researcher_b(state: FanOutState) -> dict:
+        calls.append("researcher_b")
+        if fail:
+            msg = "process died"
+            raise RuntimeError(msg)
+        return {"notes": ["b"]}
+
+    async def report(state: FanOutState) -> dict:
+        calls.append("report")
+        return {"notes": ["report"]}
+
+    builder = StateGraph(FanOutState)
+    builder.add_node("researcher_a", researcher_a)
+    builder.add_node("researcher_b", researcher_b)
+    builder.add_node("report", report)
+    builder.add_edge(START, "researcher_a")
+    builder.add_edge(START, "researcher_b")
+    builder.add_edge(["researcher_a", "researcher_b"], "report")
+    builder.add_edge("report", END)
+    return builder
+
+
+@pytest.mark.anyio
+async def test_resume_does_not_rerun_completed_nodes(tmp_path: Path) -> None:
+    """Test that a resumed thread skips nodes that finished before the crash."""
+    db_path = tmp_path / "checkpoints.sqlite"
+    config = {"configurable": {"thread_id": "plan-1"}}
+    first_calls: list[str] = []
+
+    async with open_durable_checkpointer(db_path) as checkpointer:
+        graph = _build_graph(first_calls, fail=True).compile(checkpointer=checkpointer)
+        with pytest.raises(RuntimeError):
+            await graph.ainvoke({"notes": []}, config)
+
+    resumed_calls: list[str] = []
+    async with open_durable_checkpointer(db_path) as checkpointer:
+        graph = _build_graph(resumed_calls, fail=False).compile(checkpointer=checkpointer)
+        result = await graph.ainvoke(None, config)
+
+    assert "researcher_a" in first_calls
+    assert resumed_calls == ["researcher_b", "report"]
+    assert sorted(result["notes"]) == ["a", "b", "report"]
+
+
+@pytest.mark.anyio
+async def test_database_uses_wal_mode(tmp_path: Path) -> None:
+    """Test that the checkpoint database is opened in WAL mode."""
+    async with open_durable_checkpointer(tmp_path / "checkpoints.sqlite") as checkpointer:
+        async with checkpointer.conn.execute("PRAGMA journal_mode") as cursor:
+            (mode,) = await cursor.fetchone()
+
+    assert mode == "wal"
@@ -0,0 +1,119 @@
+"""Tests for the in-process filesystem tools."""
+
+import asyncio
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+from langchain_core.tools import BaseTool
+
+from src.agent import mcp_tool_service as mcp_tool_service_module
+from src.agent.filesystem_tools import get_filesystem_tools
+from src.agent.mcp_tool_service import MCPToolService
+
+MCP_FILESYSTEM_TOOLS = {
+    "read_file",
+    "read_text_file",
+    "read_multiple_files",
+    "write_file",
+    "edit_file",
+    "create_directory",
+    "list_directory",
+    "directory_tree",
+    "move_file",
+    "search_files",
+    "get_file_info",
+    "list_allowed_directories",
+}
+
+
+@pytest.fixture
+def tools(tmp_path: Path) -> dict[str, BaseTool]:
+    """Provides the filesystem tools confined to a temporary workspace."""
+    return {tool.name: tool for tool in get_filesystem_tools(tmp_path / "workspace")}
+
+
+def test_tool_names_match_mcp_server(tools: dict[str, BaseTool]) -> None:
+    """Test that every tool of the docker filesystem server is available."""
+    assert set(tools) == MCP_FILESYSTEM_TOOLS
+    assert tools["edit_file"].args.keys() == {"path", "edits", "dryRun"}
+    assert tools["move_file"].args.keys() == {"source", "destination"}
+
+
+@pytest.mark.anyio
+async def test_report_save_workflow(tools: dict[str, BaseTool], tmp_path: Path) -> None:
+    """Test the create directory, write, edit and read calls made by the tool manager."""
+    report = "/projects/workspace/generated_examples/plan.md"
+
+    await tools["create_directory"].ainvoke({"path": "/projects/workspace/generated_examples"})
+    assert await tools["write_file"].ainvoke({"path": report, "content": "# Plan\nDraft\n"}) == (
+        f"Successfully wrote to {report}"
+    )
+    diff = await tools["edit_file"].ainvoke({"path": report, "edits": [{"oldText": "Draft", "newText": "Final"}]})
+
+    assert "+Final" in diff
+    assert (tmp_path / "workspace" / "generated_examples" / "plan.md").read_text() == "# Plan\nFinal\n"
+    assert await tools["read_file"].ainvoke({"path": "generated_examples/plan.md", "head": 1}) == "# Plan"
+
+
+@pytest.mark.anyio
+@pytest.mark.parametrize("path", ["/etc/passwd", "/projects/workspace/../secret.md", "../secret.md"])
+async def test_paths_outside_workspace_are_refused(tools: dict[str, BaseTool], tmp_path: Path, path: str) -> None:
+    """Test that no path can escape the workspace root."""
+    result = await tools["write_file"].ainvoke({"path": path, "content": "x"})
+
+    assert result.startswith("Error: Access denied")
+    assert not (tmp_path / "secret.md").exists()
+
+
+@pytest.mark.anyio
+async def test_symlink_out_of_workspace_is_refused(tools: dict[str, BaseTool], tmp_path: Path) -> None:
+    """Test that a symlink inside the workspace cannot be used to reach outside of it."""
+    (tmp_path / "outside").mkdir()
+    (tmp_path / "workspace" / "link").symlink_to(tmp_path / "outside")
+
+    result = await tools["write_file"].ainvoke({"path": "/projects/workspace/link/x.md", "content": "x"})
+
+    assert result.startswith("Error: Access denied")
+
+
+@pytest.fixture
+async def service(monkeypatch: pytest.MonkeyPatch, tmp_path: Path) -> AsyncIterator[MCPToolService]:
+    """Provides the tool service configured with the in-process filesystem server only."""
+    config = {
+        "mcpServers": {"filesystem": {"transport": "in_process", "provider": "filesystem", "root": str(tmp_path)}},
+    }
+    monkeypatch.setattr(mcp_tool_service_module, "mcp_config", config)
+    service = MCPToolService()
+    await service.aclose()
+    yield service
+    await service.aclose()
+
+
+@pytest.mark.anyio
+async def test_service_serves_in_process_tools(service: MCPToolService) -> None:
+    """Test that an in-process server is used without starting any MCP session."""
+    tools, tools_by_name = await service.get_tools()
+
+    assert set(tools_by_name) == MCP_FILESYSTEM_TOOLS
+    assert len(tools) == len(MCP_FILESYSTEM_TOOLS)
+    assert service.session_pool.stats() == {}
+
+
+@pytest.mark.anyio
+async def test_concurrent_get_tools_fetch_once(service: MCPToolService, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a tool use during a warm-up waits for the warm-up instead of loading the tools again."""
+    fetches = []
+    fetch_tools = MCPToolService._fetch_tools
+
+    async def slow_fetch(self: MCPToolService) -> None:
+        fetches.append(1)
+        await asyncio.sleep(0.01)
+        await fetch_tools(self)
+
+    monkeypatch.setattr(MCPToolService, "_fetch_tools", slow_fetch)
+
+    (warm_up, _), (tools, _) = await asyncio.gather(service.get_tools(), service.get_tools())
+
+    assert fetches == [1]
+    assert warm_up is tools
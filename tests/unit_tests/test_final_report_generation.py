@@ -1,13 +1,19 @@
 """Tests for the final_report_generation function."""
 
+from collections.abc import Iterator
+from pathlib import Path
 from unittest.mock import AsyncMock, MagicMock, patch
 
 import pytest
-from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage
 from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END
 
-from src.agent.final_report_generation import final_report_generation
+from src.agent.final_report_generation import MODEL_CALL_POLICY, final_report_generation, save_report
+from src.agent.prompts import TOOL_MANAGER_PROMPT
+from src.agent.retry import retry_engine
 from src.agent.states import AgentState, StatesKeys
+from src.agent.utils import report_file_name
 
 
 @pytest.fixture
@@ -27,6 +33,14 @@ def mock_config() -> RunnableConfig:
     )
 
 
+@pytest.fixture(autouse=True)
+def fresh_retry_engine() -> Iterator[None]:
+    """Provides a retry engine with closed circuit breakers."""
+    retry_engine.reset()
+    yield
+    retry_engine.reset()
+
+
 @pytest.mark.anyio
 @patch("src.agent.final_report_generation.init_chat_model")
 @patch("src.agent.final_report_generation.get_today_str", return_value="2023-10-27")
@@ -38,24 +52,28 @@ async def test_final_report_generation_success_first_try(
 ) -> None:
     """Test successful final report generation on the first attempt."""
     # Arrange
-    mock_report_model = MagicMock()
+    model_shell = MagicMock()
     mock_ainvoke = AsyncMock(return_value=AIMessage(content="This is the final report."))
-    mock_report_model.with_config.return_value.ainvoke = mock_ainvoke
-    mock_init_chat_model.return_value = mock_report_model
+    model_shell.with_config.return_value.ainvoke = mock_ainvoke
+    mock_init_chat_model.return_value = model_shell
 
     # Act
     result = await final_report_generation(mock_state, mock_config)
 
     # Assert
-    assert StatesKeys.FINAL_REPORT.value in result
-    assert result[StatesKeys.FINAL_REPORT.value] == "This is the final report."
-    assert StatesKeys.MSGS.value in result
-    assert result[StatesKeys.MSGS.value] == [HumanMessage(content="This is the final report.")]
+    assert result.goto == "save_report"
+    assert result.update[StatesKeys.FINAL_REPORT.value] == "This is the final report."
+    assert result.update[StatesKeys.TOOL_MANAGER_MESSAGES.value] == [SystemMessage(content=TOOL_MANAGER_PROMPT)]
+    model_shell.with_config.assert_called_once_with({"model": "test-model", "max_tokens": 1000})
     mock_ainvoke.assert_called_once()
+    (prompt,) = mock_ainvoke.call_args.args[0]
+    assert isinstance(prompt, HumanMessage)
+    assert "Test research brief" in prompt.content
+    assert retry_engine.stats()["retries"] == 0
 
 
 @pytest.mark.anyio
-@patch("src.agent.final_report_generation.asyncio.sleep", new_callable=AsyncMock)
+@patch("src.agent.retry.asyncio.sleep", new_callable=AsyncMock)
 @patch("src.agent.final_report_generation.init_chat_model")
 @patch("src.agent.final_report_generation.get_today_str", return_value="2023-10-27")
 async def test_final_report_generation_success_on_retry(
@@ -67,30 +85,29 @@ async def test_final_report_generation_success_on_retry(
 ) -> None:
     """Test successful final report generation after one failed attempt."""
     # Arrange
-    mock_report_model = MagicMock()
+    model_shell = MagicMock()
     mock_ainvoke = AsyncMock(
         side_effect=[
             Exception("First attempt failed"),
             AIMessage(content="This is the final report."),
         ],
     )
-    mock_report_model.with_config.return_value.ainvoke = mock_ainvoke
-    mock_init_chat_model.return_value = mock_report_model
+    model_shell.with_config.return_value.ainvoke = mock_ainvoke
+    mock_init_chat_model.return_value = model_shell
 
     # Act
     result = await final_report_generation(mock_state, mock_config)
 
     # Assert
-    assert StatesKeys.FINAL_REPORT.value in result
-    assert result[StatesKeys.FINAL_REPORT.value] == "This is the final report."
-    assert StatesKeys.MSGS.value in result
-    assert result[StatesKeys.MSGS.value] == [HumanMessage(content="This is the final report.")]
-    assert mock_ainvoke.call_count == 2
-    mock_sleep.assert_called_once_with(0.1)
+    assert result.goto == "save_report"
+    assert result.update[StatesKeys.FINAL_REPORT.value] == "This is the final report."
+    assert mock_ainvoke.call_count == 2  # noqa: PLR2004
+    mock_sleep.assert_called_once()
+    assert retry_engine.stats()["retries"] == 1
 
 
 @pytest.mark.anyio
-@patch("src.agent.final_report_generation.asyncio.sleep", new_callable=AsyncMock)
+@patch("src.agent.retry.asyncio.sleep", new_callable=AsyncMock)
 @patch("src.agent.final_report_generation.init_chat_model")
 @patch("src.agent.final_report_generation.get_today_str", return_value="2023-10-27")
 async def test_final_report_generation_max_retries_exceeded(
@@ -102,19 +119,77 @@ async def test_final_report_generation_max_retries_exceeded(
 ) -> None:
     """Test final report generation failure after exceeding max retries."""
     # Arrange
-    mock_report_model = MagicMock()
+    model_shell = MagicMock()
     test_exception = Exception("Model always fails")
     mock_ainvoke = AsyncMock(side_effect=test_exception)
-    mock_report_model.with_config.return_value.ainvoke = mock_ainvoke
-    mock_init_chat_model.return_value = mock_report_model
+    model_shell.with_config.return_value.ainvoke = mock_ainvoke
+    mock_init_chat_model.return_value = model_shell
 
     # Act
     result = await final_report_generation(mock_state, mock_config)
 
     # Assert
-    assert StatesKeys.FINAL_REPORT.value in result
-    assert "Error generating final report: Maximum retries exceeded" in result[StatesKeys.FINAL_REPORT.value]
-    assert "Last error: Model always fails" in result[StatesKeys.FINAL_REPORT.value]
-    assert StatesKeys.MSGS.value not in result
-    assert mock_ainvoke.call_count == 4  # Initial call + 3 retries
-    assert mock_sleep.call_count == 3  # Sleep between retries
+    assert result.goto == END
+    assert result.update == {
+        StatesKeys.FINAL_REPORT.value: (
+            "Error generating final report: Maximum retries exceeded, Last error: Model always fails"
+        ),
+    }
+    assert mock_ainvoke.call_count == MODEL_CALL_POLICY.max_attempts  # Initial call + 3 retries
+    assert mock_sleep.call_count == MODEL_CALL_POLICY.max_attempts - 1  # Sleep between retries
+
+
+@pytest.mark.parametrize(
+    ("research_brief", "file_name"),
+    [
+        ("# AI Note Taking App\nBuild an app.", "ai_note_taking_app.md"),
+        ("Develop an agent-powered note app. It must use LangGraph.", "develop_an_agent-powered_note_app.md"),
+        ("Plan: a/b ../etc/passwd", "plan_a_b_etc_passwd.md"),
+        (None, "project_plan.md"),
+    ],
+)
+def test_report_file_name(research_brief: str | None, file_name: str) -> None:
+    """Test that report file names come from the brief title and are safe to use as a path."""
+    assert report_file_name(research_brief) == file_name
+
+
+@pytest.mark.anyio
+async def test_save_report_writes_without_llm(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the direct mode writes the report file and ends the graph."""
+    monkeypatch.delenv("WORKSPACE", raising=False)
+    state = {"research_brief": "# Notes App", "final_report": "# Plan"}
+    config = RunnableConfig(configurable={"report_root": str(tmp_path)})
+
+    result = await save_report(state, config)
+
+    report = tmp_path / "generated_examples" / "notes_app.md"
+    assert result.goto == "__end__"
+    assert result.update[StatesKeys.REPORT_PATH.value] == str(report)
+    assert report.read_text() == "# Plan"
+    assert list(report.parent.iterdir()) == [report]
+
+
+@pytest.mark.anyio
+async def test_save_report_root_of_the_run(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that reports go to the report root of the run, and to WORKSPACE without one."""
+    monkeypatch.setenv("WORKSPACE", str(tmp_path / "workspace"))
+    state = {"research_brief": "# Notes App", "final_report": "# Plan"}
+
+    await save_report(state, RunnableConfig(configurable={"report_root": str(tmp_path / "batch")}))
+    await save_report(state, RunnableConfig(configurable={}))
+
+    assert (tmp_path / "batch" / "generated_examples" / "notes_app.md").read_text() == "# Plan"
+    assert (tmp_path / "workspace" / "generated_examples" / "notes_app.md").read_text() == "# Plan"
+
+
+@pytest.mark.anyio
+async def test_save_report_falls_back_to_tool_manager(tmp_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the LLM tool manager takes over when the report can not be written."""
+    monkeypatch.delenv("WORKSPACE", raising=False)
+    (tmp_path / "generated_examples").write_text("not a directory")
+    state = {"research_brief": "# Notes App", "final_report": "# Plan"}
+    config = RunnableConfig(configurable={"report_root": str(tmp_path)})
+
+    result = await save_report(state, config)
+
+    assert result.goto == "tool_manager"
@@ -0,0 +1,177 @@
+"""Tests for the multi-session planning HTTP service."""
+
+import asyncio
+import json
+from collections.abc import AsyncIterator
+from typing import Annotated, TypedDict
+
+import httpx
+import pytest
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, AnyMessage, HumanMessage
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import END, START, StateGraph
+from langgraph.graph.message import add_messages
+from langgraph.graph.state import CompiledStateGraph
+from langgraph.types import Command, interrupt
+
+from frontend.genie_server import JobStatus, PlanningService, create_app
+
+
+class PlanState(TypedDict, total=False):
+    messages: Annotated[list[AnyMessage], add_messages]
+    final_report: str
+    report_path: str
+
+
+def planning_graph(release: asyncio.Event | None = None) -> CompiledStateGraph:
+    """A graph that asks one clarification question, streams a plan and waits for a tool review."""
+
+    async def clarify(state: PlanState) -> Command:
+        if sum(isinstance(message, HumanMessage) for message in state["messages"]) < 2:  # noqa: PLR2004
+            return Command(goto=END, update={"messages": [AIMessage(content="Which platform?")]})
+        return Command(goto="write")
+
+    async def write(state: PlanState) -> dict:
+        if release is not None:
+            await release.wait()
+        if state["messages"][0].content == "fail":
+            msg = "search is down"
+            raise RuntimeError(msg)
+        model = GenericFakeChatModel(messages=iter([AIMessage(content="# Plan for the web")]))
+        return {"final_report": (await model.ainvoke(state["messages"])).content}
+
+    async def save(state: PlanState) -> dict:  # noqa: ARG001
+        review = interrupt({"message": "Save the report?", "tool_calls": [{"name": "write_file", "args": {}}]})
+        return {"report_path": "plan.md" if review["action"] == "accept" else None}
+
+    builder = StateGraph(PlanState)
+    builder.add_node("clarify", clarify)
+    builder.add_node("write", write)
+    builder.add_node("save", save)
+    builder.add_edge(START, "clarify")
+    builder.add_edge("write", "save")
+    return builder.compile(checkpointer=MemorySaver())
+
+
+@pytest.fixture
+async def service() -> AsyncIterator[PlanningService]:
+    """Provides a started service around the test planning graph."""
+    async with PlanningService(planning_graph(), max_concurrent_jobs=2) as service:
+        yield service
+
+
+@pytest.fixture
+async def client(service: PlanningService) -> AsyncIterator[httpx.AsyncClient]:
+    """Provides an HTTP client of the service."""
+    app = create_app()
+    app.state.service = service
+    async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://genie") as client:
+        yield client
+
+
+async def wait_for(client: httpx.AsyncClient, job_id: str, status: str) -> dict:
+    for _ in range(200):
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] == status:
+            return job
+        await asyncio.sleep(0.01)
+    pytest.fail(f"job stayed {job['status']}")
+
+
+def parse_events(body: str) -> list[dict]:
+    events = []
+    for block in body.strip().split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines())
+        events.append({"id": int(fields["id"]), "event": fields["event"], "data": json.loads(fields["data"])})
+    return events
+
+
+@pytest.mark.anyio
+async def test_job_lifecycle(client: httpx.AsyncClient) -> None:
+    """Test a job through clarification, streaming, tool review and completion."""
+    response = await client.post("/jobs", json={"idea": "A habit tracker"})
+    assert response.status_code == 202
+    job_id = response.json()["job_id"]
+
+    job = await wait_for(client, job_id, "waiting_for_input")
+    assert job["pending"] == {"kind": "clarification", "question": "Which platform?"}
+
+    assert (await client.post(f"/jobs/{job_id}/resume", json={"answer": "web"})).status_code == 202
+    job = await wait_for(client, job_id, "waiting_for_input")
+    assert job["pending"]["kind"] == "tool_review"
+    assert job["pending"]["interrupts"][0]["value"]["message"] == "Save the report?"
+
+    assert (await client.post(f"/jobs/{job_id}/resume", json={"action": "accept"})).status_code == 202
+    job = await wait_for(client, job_id, "completed")
+    assert job["final_report"] == "# Plan for the web"
+    assert job["report_path"] == "plan.md"
+
+    events = parse_events((await client.get(f"/jobs/{job_id}/events")).text)
+    streamed = "".join(event["data"]["text"] for event in events if event["event"] == "message")
+    assert streamed == "# Plan for the web"
+    assert events[-1]["data"]["status"] == "completed"
+
+    replayed = parse_events((await client.get(f"/jobs/{job_id}/events", headers={"Last-Event-ID": "3"})).text)
+    assert [event["id"] for event in replayed] == [event["id"] for event in events[3:]]
+
+    thread = (await client.get(f"/jobs/{job_id}/metrics")).json()["threads"][job_id]
+    assert thread["runs"] == 3
+    assert thread["nodes"]["save"]["calls"] == 2
+    assert 'genie_node_calls_total{node="write"}' in (await client.get("/metrics")).text
+    trace = (await client.get(f"/jobs/{job_id}/trace")).json()
+    assert {"clarify", "write", "save"} <= {event["name"] for event in trace["traceEvents"]}
+
+
+@pytest.mark.anyio
+async def test_invalid_requests(client: httpx.AsyncClient) -> None:
+    """Test that unknown jobs, empty ideas and unexpected resumes are refused."""
+    assert (await client.get("/jobs/unknown")).status_code == 404
+    assert (await client.post("/jobs", json={"idea": " "})).status_code == 400
+
+    job_id = (await client.post("/jobs", json={"idea": "A habit tracker"})).json()["job_id"]
+    await wait_for(client, job_id, "waiting_for_input")
+    response = await client.post(f"/jobs/{job_id}/resume", json={"action": "accept"})
+
+    assert response.status_code == 409
+    assert "answer" in response.json()["error"]
+
+
+@pytest.mark.anyio
+async def test_failed_job_reports_error(client: httpx.AsyncClient) -> None:
+    """Test that an exception in the graph fails the job instead of the worker."""
+    job_id = (await client.post("/jobs", json={"idea": "fail"})).json()["job_id"]
+    await wait_for(client, job_id, "waiting_for_input")
+    await client.post(f"/jobs/{job_id}/resume", json={"answer": "web"})
+
+    job = await wait_for(client, job_id, "failed")
+
+    assert job["error"] == "RuntimeError: search is down"
+    assert (await client.get("/health")).json()["jobs"]["failed"] == 1
+
+
+@pytest.mark.anyio
+async def test_admission_control() -> None:
+    """Test that new jobs are refused once the queue is full, while resumed jobs are always queued."""
+    release = asyncio.Event()
+    async with PlanningService(planning_graph(release), max_concurrent_jobs=1, max_queued_jobs=1) as service:
+        first = await service.submit("A habit tracker")
+        await asyncio.sleep(0.05)
+        await service.resume(first.id, {"answer": "web"})
+        await asyncio.sleep(0.05)
+        assert first.status is JobStatus.RUNNING
+
+        second = await service.submit("A todo app")
+        app = create_app(retry_after=7)
+        app.state.service = service
+        async with httpx.AsyncClient(transport=httpx.ASGITransport(app=app), base_url="http://genie") as client:
+            response = await client.post("/jobs", json={"idea": "A notes app"})
+
+        assert response.status_code == 429
+        assert response.headers["Retry-After"] == "7"
+        assert second.status is JobStatus.QUEUED
+
+        release.set()
+        await asyncio.sleep(0.05)
+        assert first.status is JobStatus.WAITING_FOR_INPUT
+        assert second.status is JobStatus.WAITING_FOR_INPUT
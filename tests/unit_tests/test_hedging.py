@@ -0,0 +1,150 @@
+"""Tests for the hedged model calls."""
+
+import asyncio
+from collections.abc import Iterator
+
+import pytest
+from langchain_core.runnables import Runnable, RunnableLambda
+
+from src.agent.configuration import Configuration
+from src.agent.hedging import MIN_SAMPLES, LatencyTracker, hedged_ainvoke, hedger
+
+
+@pytest.fixture(autouse=True)
+def fresh_hedger() -> Iterator[None]:
+    """Provides a hedger without learned latencies."""
+    hedger.reset()
+    yield
+    hedger.reset()
+
+
+def warm_up(key: str, seconds: float = 0.01) -> None:
+    for _ in range(MIN_SAMPLES):
+        hedger.tracker(key).record(seconds)
+
+
+class Call:
+    """A model call answering `answer` after `seconds`, or failing."""
+
+    def __init__(self, answer: str, seconds: float, *, fails: bool = False) -> None:
+        self.answer = answer
+        self.seconds = seconds
+        self.fails = fails
+        self.cancelled = False
+
+    async def __call__(self) -> str:
+        try:
+            await asyncio.sleep(self.seconds)
+        except asyncio.CancelledError:
+            self.cancelled = True
+            raise
+        if self.fails:
+            msg = f"{self.answer} failed"
+            raise RuntimeError(msg)
+        return self.answer
+
+
+def test_latency_percentile() -> None:
+    """Test that no percentile is known before enough calls and the nearest rank after."""
+    tracker = LatencyTracker()
+    for seconds in range(1, MIN_SAMPLES):
+        tracker.record(seconds)
+    assert tracker.percentile(0.95) is None
+
+    tracker.record(MIN_SAMPLES)
+
+    assert tracker.percentile(0.95) == 19  # noqa: PLR2004
+    assert tracker.percentile(0.5) == 10  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_backup_wins_and_primary_is_cancelled() -> None:
+    """Test that a call slower than the learned latency is hedged and the slow call is cancelled."""
+    warm_up("supervisor")
+    primary, backup = Call("primary", 5), Call("backup", 0.01)
+
+    assert await hedger.run("supervisor", primary, backup, max_hedge_rate=1) == "backup"
+
+    assert primary.cancelled
+    stats = hedger.stats()
+    assert (stats["hedged"], stats["backup_wins"], stats["cancelled"]) == (1, 1, 1)
+
+
+@pytest.mark.anyio
+async def test_only_primary_latencies_are_learned() -> None:
+    """Test that a cancelled primary call is recorded with its time so far and the backup call is not recorded."""
+    warm_up("supervisor")
+
+    assert await hedger.run("supervisor", Call("primary", 5), Call("backup", 0.05), max_hedge_rate=1) == "backup"
+
+    samples = list(hedger.tracker("supervisor")._samples)  # noqa: SLF001
+    assert len(samples) == MIN_SAMPLES + 1
+    assert 0.06 <= samples[-1] < 5  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_no_hedge_before_latencies_are_known() -> None:
+    """Test that calls are not hedged until enough latencies are known."""
+    assert await hedger.run("supervisor", Call("primary", 0.05), Call("backup", 0)) == "primary"
+    assert hedger.stats()["hedged"] == 0
+
+
+@pytest.mark.anyio
+async def test_hedge_rate_is_capped() -> None:
+    """Test that at most `max_hedge_rate` of the recent calls are hedged."""
+    warm_up("research_agent", seconds=0.001)
+
+    answers = [
+        await hedger.run("research_agent", Call("primary", 0.05), Call("backup", 0), percentile=0.5, max_hedge_rate=0.5)
+        for _ in range(4)
+    ]
+
+    assert answers == ["primary", "backup", "primary", "backup"]
+    assert hedger.stats()["skipped_by_rate_cap"] == 2  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_failures() -> None:
+    """Test that a failed call leaves the answer to the other one and both failing raises the primary error."""
+    warm_up("final_report_generation")
+
+    answer = await hedger.run(
+        "final_report_generation",
+        Call("primary", 0.05, fails=True),
+        Call("backup", 0.1),
+        max_hedge_rate=1,
+    )
+    assert answer == "backup"
+
+    with pytest.raises(RuntimeError, match="primary failed"):
+        await hedger.run(
+            "final_report_generation",
+            Call("primary", 0.05, fails=True),
+            Call("backup", 0.1, fails=True),
+            max_hedge_rate=1,
+        )
+    assert hedger.stats()["both_failed"] == 1
+
+
+@pytest.mark.anyio
+async def test_hedged_ainvoke_uses_the_backup_model() -> None:
+    """Test that only configured nodes are hedged, with the backup model."""
+
+    def build(model: str) -> Runnable:
+        async def call(messages: str) -> str:
+            await asyncio.sleep(5 if model == "slow:model" else 0)
+            return f"{model} answered {messages}"
+
+        return RunnableLambda(call)
+
+    config = Configuration(hedged_nodes="supervisor", hedge_backup_model="fast:model", max_hedge_rate=1)
+    warm_up("supervisor:slow:model")
+
+    response = await hedged_ainvoke(build, "plan", node="supervisor", model="slow:model", config=config)
+
+    assert response == "fast:model answered plan"
+    assert "supervisor:fast:model" not in hedger._trackers  # noqa: SLF001
+    assert config.hedged_nodes == ["supervisor"]
+    response = await hedged_ainvoke(build, "plan", node="research_agent", model="fast:model", config=config)
+    assert response == "fast:model answered plan"
+    assert hedger.stats()["calls"] == 1
@@ -0,0 +1,152 @@
+"""Tests for the per node instrumentation of graph runs."""
+
+import json
+from pathlib import Path
+from typing import Any, TypedDict, override
+
+import pytest
+from langchain_core.language_models import LangSmithParams
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.tools import tool
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+
+from src.agent.instrumentation import GraphMetrics, estimate_cost
+
+
+class FlakyMiniModel(GenericFakeChatModel):
+    """Fake `openai:gpt-4o-mini` failing its first `failures` calls."""
+
+    failures: int = 0
+
+    @override
+    def _get_ls_params(self, stop: list[str] | None = None, **kwargs: Any) -> LangSmithParams:
+        return LangSmithParams(ls_provider="openai", ls_model_name="gpt-4o-mini", ls_model_type="chat")
+
+    @override
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> ChatResult:
+        if self.failures:
+            self.failures -= 1
+            msg = "rate limited"
+            raise RuntimeError(msg)
+        return await super()._agenerate(*args, **kwargs)
+
+
+class PlanState(TypedDict, total=False):
+    brief: str
+    notes: str
+
+
+@tool
+def web_search(query: str) -> str:
+    """Search the web."""
+    return f"results for {query}"
+
+
+web_search.metadata = {"type": "search"}
+
+
+def planning_graph(model: FlakyMiniModel) -> CompiledStateGraph:
+    """A graph whose research subgraph calls `model` with retries and a search tool."""
+
+    async def research(state: PlanState) -> dict:
+        message = await model.with_retry(stop_after_attempt=3, wait_exponential_jitter=False).ainvoke(state["brief"])
+        await web_search.ainvoke({"query": state["brief"]}, {"metadata": {"queue_seconds": 0.25}})
+        return {"notes": message.content}
+
+    async def write(state: PlanState) -> dict:
+        return {"notes": state["notes"] + " written"}
+
+    research_builder = StateGraph(PlanState)
+    research_builder.add_node("research", research)
+    research_builder.add_edge(START, "research")
+
+    builder = StateGraph(PlanState)
+    builder.add_node("research_subgraph", research_builder.compile(name="Research"))
+    builder.add_node("write", write)
+    builder.add_edge(START, "research_subgraph")
+    builder.add_edge("research_subgraph", "write")
+    return builder.compile(checkpointer=MemorySaver())
+
+
+def mini_model(failures: int = 0) -> FlakyMiniModel:
+    usage = {"input_tokens": 1_000_000, "output_tokens": 2_000_000, "total_tokens": 3_000_000}
+    return FlakyMiniModel(messages=iter([AIMessage(content="notes", usage_metadata=usage)]), failures=failures)
+
+
+def test_estimate_cost() -> None:
+    """Test that costs follow the price table, local models are free and unknown models have no cost."""
+    assert estimate_cost("openai:gpt-4o-mini", 1_000_000, 1_000_000) == pytest.approx(0.75)
+    assert estimate_cost("ollama:qwen3:8b", 10_000, 10_000) == 0.0
+    assert estimate_cost("acme:unknown", 10, 10) is None
+
+
+@pytest.mark.anyio
+async def test_nodes_models_and_tools_are_recorded() -> None:
+    """Test that nodes, model calls with retries and search calls are aggregated per run and per thread."""
+    metrics = GraphMetrics()
+    graph = planning_graph(mini_model(failures=2))
+    config = {"configurable": {"thread_id": "plan-1"}, "callbacks": [metrics]}
+
+    await graph.ainvoke({"brief": "habit tracker"}, config)
+
+    report = metrics.report()
+    (run,) = report["runs"]
+    assert (run["thread_id"], run["status"]) == ("plan-1", "completed")
+    assert set(run["nodes"]) == {"research_subgraph", "research", "write"}
+    model = run["models"]["openai:gpt-4o-mini"]
+    assert (model["calls"], model["errors"], model["retries"]) == (3, 2, 2)
+    assert (model["input_tokens"], model["output_tokens"]) == (1_000_000, 2_000_000)
+    assert model["cost_usd"] == pytest.approx(1.35)
+    assert run["searches"]["web_search"]["queue_seconds"] == pytest.approx(0.25)
+    # the model and search calls are added to the innermost node they run in
+    research = run["nodes"]["research"]
+    assert (research["calls"], research["input_tokens"], research["queue_seconds"]) == (1, 1_000_000, 0.25)
+    assert run["nodes"]["research_subgraph"]["input_tokens"] == 0
+    assert research["wall_seconds"] >= model["wall_seconds"]
+    assert report["threads"]["plan-1"]["runs"] == 1
+    assert report["threads"]["plan-1"]["cost_usd"] == pytest.approx(1.35)
+
+
+@pytest.mark.anyio
+async def test_report_of_a_thread_and_run_limit() -> None:
+    """Test that a thread report only sums its own runs and that old runs are dropped."""
+    metrics = GraphMetrics(max_runs=2)
+    for thread_id in ("a", "b", "b"):
+        config = {"configurable": {"thread_id": thread_id}, "callbacks": [metrics]}
+        await planning_graph(mini_model()).ainvoke({"brief": "notes app"}, config)
+
+    assert [run["thread_id"] for run in metrics.report()["runs"]] == ["b", "b"]
+    report = metrics.report("b")
+    assert list(report["threads"]) == ["b"]
+    assert report["threads"]["b"]["models"]["openai:gpt-4o-mini"]["calls"] == 2
+    # process totals still count the dropped run
+    assert metrics.totals.models["openai:gpt-4o-mini"].calls == 3
+
+
+@pytest.mark.anyio
+async def test_prometheus_and_json_export(tmp_path: Path) -> None:
+    """Test that totals and component stats are exported in the Prometheus text format and as JSON."""
+    metrics = GraphMetrics()
+    metrics.register_component("node_cache", lambda: {"hits": 3, "misses": 1})
+    metrics.register_component("broken", lambda: 1 / 0)
+    config = {"configurable": {"thread_id": "t"}, "callbacks": [metrics]}
+    await planning_graph(mini_model(failures=1)).ainvoke({"brief": 'say "hi"'}, config)
+
+    text = metrics.to_prometheus()
+
+    assert "# TYPE genie_model_calls_total counter" in text
+    assert 'genie_model_retries_total{model="openai:gpt-4o-mini"} 1' in text
+    assert 'genie_runs_total{status="completed"} 1' in text
+    assert 'genie_search_queue_seconds_total{tool="web_search"} 0.25' in text
+    assert 'genie_component_stat{component="node_cache",stat="hits"} 3.0' in text
+
+    metrics.write(tmp_path / "metrics.prom")
+    metrics.write(tmp_path / "metrics.json", thread_id="t")
+    assert (tmp_path / "metrics.prom").read_text() == text
+    report = json.loads((tmp_path / "metrics.json").read_text())
+    assert report["components"]["broken"] == {}
+    assert report["runs"][0]["nodes"]["write"]["calls"] == 1
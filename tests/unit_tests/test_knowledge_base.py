@@ -0,0 +1,163 @@
+"""Tests for the cross-run research knowledge base."""
+
+import sqlite3
+import time
+from pathlib import Path
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage
+from langchain_core.runnables import RunnableConfig
+from langgraph.graph import END
+from loguru import logger
+
+from src.agent.configuration import Configuration
+from src.agent.knowledge_base import KnowledgeBase, hashed_vector, tokenize
+from src.agent.states import Note, StatesKeys, SupervisorState
+from src.agent.supervisor_agent import conduct_research, supervisor_tool
+
+DAY = 24 * 60 * 60
+OCR = "Open source OCR engines for handwritten notes: accuracy, licensing and Python bindings"
+TESTING = "Testing strategies for LangGraph agents with pytest and fake chat models"
+REPOSITORY = "Repository pattern with SQLAlchemy in a FastAPI backend"
+
+
+@pytest.fixture
+def knowledge_base(tmp_path: Path) -> KnowledgeBase:
+    """Provides a knowledge base with findings on three topics."""
+    knowledge_base = KnowledgeBase(tmp_path / "knowledge_base.sqlite")
+    for topic in (OCR, TESTING, REPOSITORY):
+        knowledge_base.add(topic, f"findings on {topic}", f"sources on {topic}")
+    return knowledge_base
+
+
+def test_hashed_vector() -> None:
+    """Test that topic vectors have unit length and ignore stopwords."""
+    assert tokenize("How should I test the LangGraph agents?") == ["test", "langgraph", "agents"]
+    assert sum(value * value for value in hashed_vector(tokenize(OCR))) == pytest.approx(1)
+
+
+def test_similar_topics_are_answered(knowledge_base: KnowledgeBase) -> None:
+    """Test that rephrased topics find their findings and new topics do not."""
+    finding = knowledge_base.lookup(
+        "Compare open source OCR engines for handwritten notes (accuracy, licensing, Python bindings)",
+        max_age_seconds=DAY,
+        min_score=0.6,
+    )
+    assert (finding.topic, finding.compressed_research, finding.raw_notes) == (
+        OCR,
+        f"findings on {OCR}",
+        f"sources on {OCR}",
+    )
+    assert knowledge_base.lookup(
+        "How to test LangGraph agents using pytest and fake chat models",
+        max_age_seconds=DAY,
+        min_score=0.6,
+    )
+    assert knowledge_base.lookup("OCR engines for scanning receipts", max_age_seconds=DAY, min_score=0.6) is None
+    assert knowledge_base.lookup("A chess engine in Rust", max_age_seconds=DAY, min_score=0.6) is None
+    assert knowledge_base.stats() == {"findings": 3, "hits": 2, "misses": 2, "stored": 3, "evicted": 0}
+
+
+def test_findings_expire_and_persist(knowledge_base: KnowledgeBase) -> None:
+    """Test that old findings are not served, and findings survive reopening the file."""
+    time.sleep(0.01)
+    assert knowledge_base.lookup(OCR, max_age_seconds=0.005, min_score=0.6) is None
+
+    knowledge_base.add(OCR, "newer findings")
+    reopened = KnowledgeBase(knowledge_base.path, max_entries=3)
+
+    assert reopened.lookup(OCR, max_age_seconds=DAY, min_score=0.99).compressed_research == "newer findings"
+    reopened.add("Design patterns for plugin systems in Python", "plugins")
+    assert reopened.stats()["findings"] == 3  # noqa: PLR2004
+    assert reopened.lookup(TESTING, max_age_seconds=DAY, min_score=0.6) is None
+
+
+@pytest.mark.anyio
+@patch("src.agent.supervisor_agent.researcher_subgraph", new_callable=AsyncMock)
+async def test_supervisor_tool_reuses_findings(mock_researcher_subgraph: AsyncMock, tmp_path: Path) -> None:
+    """Test that only new topics are researched and their findings are stored for later runs."""
+    path = tmp_path / "knowledge_base.sqlite"
+    KnowledgeBase(path).add(OCR, "stored OCR findings", "stored OCR sources")
+    state = SupervisorState(
+        supervisor_messages=[
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "ConductResearch", "args": {"research_topic": OCR}, "id": "1"},
+                    {"name": "ConductResearch", "args": {"research_topic": TESTING}, "id": "2"},
+                ],
+            ),
+        ],
+        research_iterations=1,
+    )
+    config = RunnableConfig(configurable={"knowledge_base": True, "knowledge_base_path": str(path)})
+    mock_researcher_subgraph.ainvoke.return_value = {
+        StatesKeys.COMPRESSED_RESEARCH.value: "live testing findings",
+        StatesKeys.RAW_NOTES.value: [Note(content="live testing sources", topic=TESTING)],
+    }
+
+    result = await supervisor_tool(state, config)
+
+    mock_researcher_subgraph.ainvoke.assert_called_once()
+    assert [message.content for message in result.update[StatesKeys.SUPERVISOR_MSGS.value]] == [
+        "stored OCR findings",
+        "live testing findings",
+    ]
+    assert result.update[StatesKeys.RAW_NOTES.value][0] == Note(content="stored OCR sources", topic=OCR)
+    stored = KnowledgeBase(path).lookup(TESTING, max_age_seconds=DAY, min_score=0.99)
+    assert (stored.compressed_research, stored.raw_notes) == ("live testing findings", "live testing sources")
+
+
+@pytest.mark.anyio
+@patch("src.agent.supervisor_agent.researcher_subgraph", new_callable=AsyncMock)
+async def test_failing_research_ends_supervision(mock_researcher_subgraph: AsyncMock, tmp_path: Path) -> None:
+    """Test that an error of one researcher reaches the supervisor tool's error handling and ends the research."""
+    state = SupervisorState(
+        supervisor_messages=[
+            AIMessage(
+                content="",
+                tool_calls=[
+                    {"name": "ConductResearch", "args": {"research_topic": OCR}, "id": "1"},
+                    {"name": "ConductResearch", "args": {"research_topic": TESTING}, "id": "2"},
+                ],
+            ),
+        ],
+        research_iterations=1,
+    )
+    path = tmp_path / "knowledge_base.sqlite"
+    config = RunnableConfig(configurable={"knowledge_base": True, "knowledge_base_path": str(path)})
+    mock_researcher_subgraph.ainvoke.side_effect = [
+        RuntimeError("search API unavailable"),
+        {StatesKeys.COMPRESSED_RESEARCH.value: "live testing findings"},
+    ]
+
+    messages = []
+    sink = logger.add(messages.append, format="{message}", level="ERROR")
+    try:
+        result = await supervisor_tool(state, config)
+    finally:
+        logger.remove(sink)
+
+    assert result.goto == END
+    assert [message.strip() for message in messages] == ["Other error in reflection phase: search API unavailable"]
+    assert KnowledgeBase(path).lookup(OCR, max_age_seconds=DAY, min_score=0.6) is None
+
+
+@pytest.mark.anyio
+@patch("src.agent.supervisor_agent.open_knowledge_base")
+@patch("src.agent.supervisor_agent.researcher_subgraph", new_callable=AsyncMock)
+async def test_knowledge_base_errors_fall_back_to_research(
+    mock_researcher_subgraph: AsyncMock,
+    mock_open_knowledge_base: MagicMock,
+) -> None:
+    """Test that a failing knowledge base does not fail the research of its topic."""
+    mock_open_knowledge_base.return_value.alookup = AsyncMock(side_effect=sqlite3.OperationalError("disk I/O error"))
+    mock_open_knowledge_base.return_value.aadd = AsyncMock(side_effect=sqlite3.OperationalError("disk I/O error"))
+    mock_researcher_subgraph.ainvoke.return_value = {StatesKeys.COMPRESSED_RESEARCH.value: "live OCR findings"}
+    config = RunnableConfig(configurable={"knowledge_base": True})
+
+    observation = await conduct_research(OCR, config, Configuration.from_runnable_config(config))
+
+    assert observation == {StatesKeys.COMPRESSED_RESEARCH.value: "live OCR findings"}
+    mock_open_knowledge_base.return_value.aadd.assert_awaited_once()
@@ -0,0 +1,136 @@
+"""Tests for the size bounded, lazy logging layer."""
+
+import sys
+import threading
+from collections.abc import Iterator
+from pathlib import Path
+
+import pytest
+from langchain_core.messages import AIMessage
+from loguru import logger
+
+from src.agent.configuration import Configuration
+from src.agent.log_utils import BoundedFileSink, CallSiteSampler, brief, debug_sampler, log_stats, sampled_debug
+
+
+@pytest.fixture(autouse=True)
+def stats() -> Iterator[None]:
+    """Provides fresh logging counters."""
+    log_stats.reset()
+    yield
+    log_stats.reset()
+
+
+class Exploding:
+    def __str__(self) -> str:
+        msg = "rendered"
+        raise AssertionError(msg)
+
+
+class Rendered:
+    def __init__(self) -> None:
+        self.count = 0
+
+    def __str__(self) -> str:
+        self.count += 1
+        return f"rendered {self.count}"
+
+
+def test_brief_cuts_every_field() -> None:
+    """Test that long strings are cut with their size and hash, field by field."""
+    report = "# Plan\n" + "x" * 10_000
+    message = AIMessage(content=report, tool_calls=[{"name": "tavily_search", "args": {}, "id": "1"}])
+
+    text = str(brief(message, limit=20))
+
+    assert text.startswith("AIMessage(content=# Plan\nxxxxxxxxxxxxx... [10007 chars, sha1 ")
+    assert text.endswith("tool_calls=['tavily_search'])")
+    assert str(brief(report, limit=20)).split("sha1")[1] == str(brief(report, limit=30)).split("sha1")[1]
+    assert str(brief({"notes": list(range(15))})) == "{notes: [0, 1, 2, 3, 4, 5, 6, 7, 8, 9, ... +5 more]}"
+    configuration = str(brief(Configuration(research_model="x" * 1_000)))
+    assert configuration.startswith("Configuration(clarification_model=perplexity:sonar-pro, ")
+    assert "[1000 chars, sha1 " in configuration
+    assert log_stats.stats()["truncated_payloads"] == 4  # noqa: PLR2004
+
+
+def test_brief_is_lazy() -> None:
+    """Test that a payload is not rendered when no handler accepts the record."""
+    logger.remove()
+    logger.add(lambda _: None, level="INFO")
+    try:
+        logger.debug("Response: {}", brief(Exploding()))
+        with pytest.raises(AssertionError, match="rendered"):
+            logger.info("Response: {}", brief(Exploding()))
+    finally:
+        logger.remove()
+        logger.add(sys.stderr)
+
+
+def test_call_site_sampler() -> None:
+    """Test that the first and then every n-th DEBUG record of a call site is kept."""
+    records: list[str] = []
+    handler_id = logger.add(records.append, level="DEBUG", filter=CallSiteSampler(every=3), format="{message}")
+    try:
+        for i in range(7):
+            logger.debug("tick {}", i)
+        logger.info("always kept")
+    finally:
+        logger.remove(handler_id)
+
+    assert [record.strip() for record in records] == ["tick 0", "tick 3", "tick 6", "always kept"]
+    assert log_stats.stats()["sampled_out"] == 4  # noqa: PLR2004
+
+
+def test_sampled_out_records_are_not_rendered() -> None:
+    """Test that `sampled_debug` renders the payloads of the kept records only, each record once."""
+    records: list[str] = []
+    payload = Rendered()
+    debug_sampler.reset(every=3)
+    handler_id = logger.add(records.append, level="DEBUG", filter=debug_sampler, format="{message}")
+    try:
+        for _ in range(7):
+            sampled_debug("Response: {}", brief(payload))
+    finally:
+        logger.remove(handler_id)
+        debug_sampler.reset()
+
+    assert [record.strip() for record in records] == [
+        "Response: rendered 1",
+        "Response: rendered 2",
+        "Response: rendered 3",
+    ]
+    assert payload.count == 3  # noqa: PLR2004
+    assert log_stats.stats()["sampled_out"] == 4  # noqa: PLR2004
+
+
+def test_bounded_sink_drops_instead_of_blocking(tmp_path: Path) -> None:
+    """Test that records are dropped and counted while the writer is stuck, and the rest are written."""
+    sink = BoundedFileSink(tmp_path / "genie.log", max_queue=2)
+    writer_released = threading.Event()
+    emit = sink._handler.emit  # noqa: SLF001
+
+    def slow_emit(record: object) -> None:
+        writer_released.wait()
+        emit(record)
+
+    sink._handler.emit = slow_emit  # noqa: SLF001
+    handler_id = logger.add(sink, level="DEBUG", format="{message}")
+    for i in range(10):
+        logger.debug("record {}", i)
+    writer_released.set()
+    logger.remove(handler_id)
+
+    lines = (tmp_path / "genie.log").read_text().splitlines()
+    stats = log_stats.stats()
+    assert lines[0] == "record 0"
+    assert len(lines) == stats["records"] < 10  # noqa: PLR2004
+    assert stats["dropped"] == 10 - stats["records"]
+
+
+def test_log_volume_is_bounded(tmp_path: Path) -> None:
+    """Test that logging a whole report writes a bounded line."""
+    handler_id = logger.add(BoundedFileSink(tmp_path / "genie.log"), level="DEBUG", format="{message}")
+    logger.info("Final report generated: {}", brief("# Plan\n" + "- task\n" * 100_000))
+    logger.remove(handler_id)
+
+    assert (tmp_path / "genie.log").stat().st_size < 500  # noqa: PLR2004
@@ -0,0 +1,82 @@
+"""Tests for the pool of long lived MCP sessions."""
+
+import asyncio
+import os
+import signal
+import sys
+import threading
+from collections.abc import AsyncIterator
+from pathlib import Path
+
+import pytest
+
+from src.agent.mcp_session_pool import MCPSessionPool
+
+SERVER = """
+import os
+from mcp.server.fastmcp import FastMCP
+
+mcp = FastMCP("pid")
+
+
+@mcp.tool()
+def pid() -> str:
+    \"\"\"Process id of the server.\"\"\"
+    return str(os.getpid())
+
+
+mcp.run()
+"""
+
+
+@pytest.fixture
+async def pool(tmp_path: Path) -> AsyncIterator[MCPSessionPool]:
+    """Provides a pool for a stdio MCP server reporting its process id."""
+    server = tmp_path / "server.py"
+    server.write_text(SERVER)
+    pool = MCPSessionPool(
+        {"pid": {"command": sys.executable, "args": [str(server)], "transport": "stdio"}},
+        health_check_interval=0.0,
+    )
+    yield pool
+    await pool.aclose()
+
+
+async def call_pid(pool: MCPSessionPool) -> str:
+    tools = await pool.get_tools()
+    blocks = await tools[0].ainvoke({})
+    return blocks[0]["text"]
+
+
+@pytest.mark.anyio
+async def test_server_is_started_once(pool: MCPSessionPool) -> None:
+    """Test that tool calls reuse the same server process."""
+    first = await call_pid(pool)
+    second = await call_pid(pool)
+
+    assert first == second
+    assert pool.stats() == {"pid": {"starts": 1, "connected": True}}
+
+
+@pytest.mark.anyio
+async def test_session_is_shared_across_threads(pool: MCPSessionPool) -> None:
+    """Test that a call from another thread and event loop reuses the session."""
+    first = await call_pid(pool)
+    result = []
+    thread = threading.Thread(target=lambda: result.append(asyncio.run(call_pid(pool))))
+    thread.start()
+    await asyncio.to_thread(thread.join)
+
+    assert result == [first]
+
+
+@pytest.mark.anyio
+async def test_dead_server_is_restarted(pool: MCPSessionPool) -> None:
+    """Test that a killed server is detected by the health check and started again."""
+    first = await call_pid(pool)
+    os.kill(int(first), signal.SIGKILL)
+
+    second = await call_pid(pool)
+
+    assert second != first
+    assert pool.stats() == {"pid": {"starts": 2, "connected": True}}
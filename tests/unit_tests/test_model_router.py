@@ -0,0 +1,122 @@
+"""Tests for the content length aware model routing."""
+
+from collections.abc import Iterator
+from typing import Any, TypedDict, override
+
+import pytest
+from langchain_core.language_models import LangSmithParams
+from langchain_core.language_models.fake_chat_models import GenericFakeChatModel
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.outputs import ChatResult
+from langchain_core.runnables import Runnable
+from langgraph.graph import START, StateGraph
+
+from src.agent.configuration import Configuration
+from src.agent.instrumentation import GraphMetrics
+from src.agent.model_router import estimate_tokens, model_router, route, routed_ainvoke
+
+CONFIG = Configuration(
+    summarization_model="openai:gpt-4o",
+    summarization_model_tiers=[
+        {"model": "ollama:qwen3:8b", "max_input_tokens": 50},
+        {"model": "openai:gpt-4o-mini", "max_input_tokens": 500},
+    ],
+)
+
+
+class PricedModel(GenericFakeChatModel):
+    """Fake chat model reporting `model` to the callbacks, failing when `fails` is set."""
+
+    model: str
+    fails: bool = False
+
+    @override
+    def _get_ls_params(self, stop: list[str] | None = None, **kwargs: Any) -> LangSmithParams:
+        provider, name = self.model.split(":", 1)
+        return LangSmithParams(ls_provider=provider, ls_model_name=name, ls_model_type="chat")
+
+    @override
+    async def _agenerate(self, *args: Any, **kwargs: Any) -> ChatResult:
+        if self.fails:
+            msg = f"{self.model} is down"
+            raise RuntimeError(msg)
+        return await super()._agenerate(*args, **kwargs)
+
+
+def build_models(*failing: str) -> Runnable:
+    def build(model: str) -> Runnable:
+        usage = {"input_tokens": 1_000_000, "output_tokens": 0, "total_tokens": 1_000_000}
+        answer = AIMessage(content=f"summary by {model}", usage_metadata=usage)
+        return PricedModel(messages=iter([answer]), model=model, fails=model in failing)
+
+    return build
+
+
+@pytest.fixture(autouse=True)
+def fresh_router() -> Iterator[None]:
+    """Provides routing counters starting at zero."""
+    model_router.reset()
+    yield
+    model_router.reset()
+
+
+def test_route() -> None:
+    """Test that a request goes to the smallest tier it fits, then to the larger ones and the configured model."""
+    assert estimate_tokens([HumanMessage(content="x" * 400)]) == 104  # noqa: PLR2004
+
+    assert route("summarization", 10, CONFIG) == ["ollama:qwen3:8b", "openai:gpt-4o-mini", "openai:gpt-4o"]
+    assert route("summarization", 100, CONFIG) == ["openai:gpt-4o-mini", "openai:gpt-4o"]
+    assert route("summarization", 10_000, CONFIG) == ["openai:gpt-4o"]
+    assert route("compression", 10, CONFIG) == [CONFIG.compression_model]
+
+
+@pytest.mark.anyio
+async def test_routed_ainvoke_falls_back() -> None:
+    """Test that a failed call falls back to the next larger model."""
+    short, long = [HumanMessage(content="a short snippet")], [HumanMessage(content="page " * 1_000)]
+
+    answer = await routed_ainvoke(build_models("ollama:qwen3:8b"), short, task="summarization", config=CONFIG)
+    assert answer.content == "summary by openai:gpt-4o-mini"
+    answer = await routed_ainvoke(build_models(), long, task="summarization", config=CONFIG)
+    assert answer.content == "summary by openai:gpt-4o"
+    with pytest.raises(RuntimeError, match="openai:gpt-4o is down"):
+        await routed_ainvoke(build_models("openai:gpt-4o"), long, task="summarization", config=CONFIG)
+
+    assert model_router.stats() == {
+        "fallbacks": 1,
+        "summarization:ollama:qwen3:8b": 1,
+        "summarization:openai:gpt-4o": 2,
+        "summarization:openai:gpt-4o-mini": 1,
+    }
+
+
+class PageState(TypedDict):
+    pages: list[str]
+    summaries: list[str]
+
+
+@pytest.mark.anyio
+async def test_routing_is_reported_per_run() -> None:
+    """Test that the metrics of a run report its routing decisions and the cost saved against the configured model."""
+
+    async def summarize(state: PageState) -> dict:
+        summaries = [
+            await routed_ainvoke(build_models(), [HumanMessage(content=page)], task="summarization", config=CONFIG)
+            for page in state["pages"]
+        ]
+        return {"summaries": [summary.content for summary in summaries]}
+
+    builder = StateGraph(PageState)
+    builder.add_node("summarize", summarize)
+    builder.add_edge(START, "summarize")
+    metrics = GraphMetrics()
+
+    await builder.compile().ainvoke({"pages": ["page " * 1_000, "snippet " * 50]}, {"callbacks": [metrics]})
+
+    (run,) = metrics.report()["runs"]
+    routed = run["routes"]["summarization:openai:gpt-4o-mini"]
+    assert (routed["calls"], routed["fallbacks"], routed["input_tokens"]) == (1, 0, 1_000_000)
+    # 1M input tokens cost $2.50 on gpt-4o and $0.15 on gpt-4o-mini
+    assert routed["saved_cost_usd"] == pytest.approx(2.35)
+    assert run["routes"]["summarization:openai:gpt-4o"]["saved_cost_usd"] == 0
+    assert 'genie_route_calls_total{task="summarization",model="openai:gpt-4o-mini"} 1' in metrics.to_prometheus()
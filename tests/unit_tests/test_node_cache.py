@@ -0,0 +1,192 @@
+"""Tests for the persistent node cache."""
+
+import time
+from itertools import count
+from pathlib import Path
+from typing import Annotated, TypedDict
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.func import CachePolicy
+from langgraph.graph import START, StateGraph
+
+from src.agent.node_cache import (
+    DiskNodeCache,
+    final_report_cache_key,
+    research_agent_cache_key,
+    research_tools_cache_key,
+    supervisor_tool_cache_key,
+)
+from src.agent.states import add_supervisor_messages
+
+NS = ("__pregel_ns_writes", "module.node", "research_agent")
+
+
+@pytest.fixture
+def cache_path(tmp_path: Path) -> Path:
+    """Provides a node cache file in a temporary directory."""
+    return tmp_path / "node_cache.sqlite"
+
+
+def test_values_survive_reopening(cache_path: Path) -> None:
+    """Test that a second cache on the same file sees the entries of the first one."""
+    first = DiskNodeCache(cache_path)
+    first.set({(NS, "key"): ([("messages", "hello")], None)})
+    first.close()
+
+    second = DiskNodeCache(cache_path)
+    assert second.get([(NS, "key"), (NS, "other")]) == {(NS, "key"): [["messages", "hello"]]}
+    assert second.stats()["nodes"]["research_agent"] == {"hits": 1, "misses": 1, "hit_rate": 0.5}
+
+
+def test_expired_entries_are_misses(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that an entry is not served after its TTL."""
+    cache = DiskNodeCache(cache_path)
+    cache.set({(NS, "key"): ("value", 10)})
+    now = time.time()
+    monkeypatch.setattr(time, "time", lambda: now + 11)
+
+    assert cache.get([(NS, "key")]) == {}
+    assert cache.stats()["entries"] == 0
+
+
+def test_least_recently_used_entries_are_evicted(cache_path: Path, monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that the oldest accessed entry is evicted when the cache is full."""
+    clock = iter(range(1_000, 2_000))
+    monkeypatch.setattr(time, "time", lambda: next(clock))
+    cache = DiskNodeCache(cache_path, max_entries=2)
+    cache.set({(NS, "a"): ("a", None)})
+    cache.set({(NS, "b"): ("b", None)})
+    cache.get([(NS, "a")])
+    cache.set({(NS, "c"): ("c", None)})
+
+    assert set(cache.get([(NS, "a"), (NS, "b"), (NS, "c")])) == {(NS, "a"), (NS, "c")}
+    assert cache.stats()["evicted"] == 1
+
+
+def test_clear_namespace(cache_path: Path) -> None:
+    """Test that clearing a namespace keeps the other namespaces."""
+    other = ("__pregel_ns_writes", "module.node", "research_tools")
+    cache = DiskNodeCache(cache_path)
+    cache.set({(NS, "key"): ("a", None), (other, "key"): ("b", None)})
+
+    cache.clear([NS])
+
+    assert cache.get([(NS, "key"), (other, "key")]) == {(other, "key"): "b"}
+
+
+def test_research_agent_key_ignores_message_ids() -> None:
+    """Test that the same research request has the same key across runs."""
+    state = {"research_topic": "topic", "research_messages": [HumanMessage(content="topic", id="run-1")]}
+    same = {"research_topic": "topic", "research_messages": [HumanMessage(content="topic", id="run-2")]}
+    other = {"research_topic": "other", "research_messages": [HumanMessage(content="other")]}
+
+    assert research_agent_cache_key(state) == research_agent_cache_key(same)
+    assert research_agent_cache_key(state) != research_agent_cache_key(other)
+
+
+def test_research_tools_key_includes_tool_call_ids() -> None:
+    """Test that cached tool outputs are never replayed for tool calls with other ids."""
+
+    def state(call_id: str) -> dict:
+        call = {"name": "tavily_search", "args": {"queries": ["q"]}, "id": call_id}
+        return {"research_messages": [AIMessage(content="", tool_calls=[call])]}
+
+    assert research_tools_cache_key(state("call-1")) == research_tools_cache_key(state("call-1"))
+    assert research_tools_cache_key(state("call-1")) != research_tools_cache_key(state("call-2"))
+
+
+def test_final_report_key_depends_on_model(monkeypatch: pytest.MonkeyPatch) -> None:
+    """Test that a different report model does not hit the cached report."""
+    state = {"research_brief": "brief", "notes": ["note"]}
+    monkeypatch.setenv("FINAL_REPORT_GENERATION_MODEL", "model-a")
+    key_a = final_report_cache_key(state)
+    monkeypatch.setenv("FINAL_REPORT_GENERATION_MODEL", "model-b")
+
+    assert final_report_cache_key(state) != key_a
+
+
+class CountState(TypedDict):
+    value: str
+    calls: int
+
+
+@pytest.mark.anyio
+async def test_graph_reuses_node_output_across_processes(cache_path: Path) -> None:
+    """Test that a graph compiled on a reopened cache file skips a node it already ran."""
+    calls = []
+
+    async def node(state: CountState) -> dict:
+        calls.append(state["value"])
+        return {"value": state["value"].upper()}
+
+    builder = StateGraph(CountState)
+    builder.add_node("node", node, cache_policy=CachePolicy(key_func=lambda state: state["value"]))
+    builder.add_edge(START, "node")
+
+    for _ in range(2):
+        cache = DiskNodeCache(cache_path)
+        result = await builder.compile(cache=cache).ainvoke({"value": "plan", "calls": 0})
+        cache.close()
+        assert result["value"] == "PLAN"
+
+    assert calls == ["plan"]
+
+
+def test_supervisor_tool_key_ignores_tool_call_ids() -> None:
+    """Test that the same research topics have the same key whatever the supervisor's tool call ids and thoughts."""
+
+    def state(call_id: str, content: str, topic: str = "OCR engines") -> dict:
+        call = {"name": "ConductResearch", "args": {"research_topic": topic}, "id": call_id}
+        return {"research_brief": "brief", "supervisor_messages": [AIMessage(content=content, tool_calls=[call])]}
+
+    assert supervisor_tool_cache_key(state("call-1", "Let me research")) == supervisor_tool_cache_key(
+        state("call-2", ""),
+    )
+    assert supervisor_tool_cache_key(state("call-1", "")) != supervisor_tool_cache_key(state("call-1", "", "Rust"))
+
+
+class SupervisorCacheState(TypedDict):
+    research_brief: str
+    supervisor_messages: Annotated[list, add_supervisor_messages]
+
+
+@pytest.mark.anyio
+async def test_cached_research_answers_new_tool_call_ids(cache_path: Path) -> None:
+    """Test that research replayed from the cache answers the tool call ids of the current run."""
+    call_ids = count()
+    researched = []
+
+    async def supervisor(_state: SupervisorCacheState) -> dict:
+        calls = [
+            {"name": "ConductResearch", "args": {"research_topic": topic}, "id": f"call-{next(call_ids)}"}
+            for topic in ("OCR engines", "Rust")
+        ]
+        return {"supervisor_messages": [AIMessage(content="", tool_calls=calls)]}
+
+    async def supervisor_tool(state: SupervisorCacheState) -> dict:
+        calls = state["supervisor_messages"][-1].tool_calls
+        researched.extend(call["args"]["research_topic"] for call in calls)
+        return {
+            "supervisor_messages": [
+                ToolMessage(content=f"findings on {call['args']['research_topic']}", tool_call_id=call["id"])
+                for call in calls
+            ],
+        }
+
+    builder = StateGraph(SupervisorCacheState)
+    builder.add_node("supervisor", supervisor)
+    builder.add_node("supervisor_tool", supervisor_tool, cache_policy=CachePolicy(key_func=supervisor_tool_cache_key))
+    builder.add_edge(START, "supervisor")
+    builder.add_edge("supervisor", "supervisor_tool")
+
+    for _ in range(2):
+        cache = DiskNodeCache(cache_path)
+        result = await builder.compile(cache=cache).ainvoke({"research_brief": "brief", "supervisor_messages": []})
+        cache.close()
+
+    assert researched == ["OCR engines", "Rust"]
+    assert [(message.tool_call_id, message.content) for message in result["supervisor_messages"][1:]] == [
+        ("call-2", "findings on OCR engines"),
+        ("call-3", "findings on Rust"),
+    ]
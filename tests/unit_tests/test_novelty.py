@@ -0,0 +1,72 @@
+"""Tests for novelty based early stopping of the researcher loop."""
+
+from unittest.mock import AsyncMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, SystemMessage, ToolMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.agent.novelty import novelty, novelty_stats
+from src.agent.researcher_agent import research_tools
+from src.agent.states import ResearchState, StatesKeys
+from src.agent.tool_executor import ToolCallResult
+
+SEEN = "PaddleOCR and TrOCR are open source engines for handwriting recognition with strong accuracy on notes"
+NEW = "Notion API integrations use an internal token and the blocks endpoint to append rich text content"
+
+
+def test_novelty_bounds() -> None:
+    """Test that repeated text has no novelty and unrelated text is fully novel."""
+    assert novelty([SEEN], [SEEN]) == 0.0
+    assert novelty([NEW], [SEEN]) == 1.0
+    assert novelty([], [SEEN]) == 0.0
+    assert 0.0 < novelty([f"{SEEN} {NEW}"], [SEEN]) < 1.0
+
+
+def _state_with_search_call() -> ResearchState:
+    return ResearchState(
+        research_messages=[
+            SystemMessage(content="system"),
+            HumanMessage(content="topic"),
+            AIMessage(content="", tool_calls=[{"name": "tavily_search", "args": {"queries": ["ocr"]}, "id": "1"}]),
+            ToolMessage(content=SEEN, name="tavily_search", tool_call_id="1"),
+            AIMessage(content="", tool_calls=[{"name": "tavily_search", "args": {"queries": ["ocr"]}, "id": "2"}]),
+        ],
+        tool_call_iterations=2,
+    )
+
+
+def _search_result(content: str) -> ToolCallResult:
+    return ToolCallResult(
+        tool_call={"name": "tavily_search", "args": {}, "id": "2", "type": "tool_call"},
+        tool_type="search",
+        content=content,
+        status="success",
+    )
+
+
+@pytest.mark.anyio
+@patch("src.agent.researcher_agent.tool_executor.execute", new_callable=AsyncMock)
+async def test_research_tools_stops_on_repeated_results(mock_execute: AsyncMock) -> None:
+    """Test that research_tools routes to compress_research when the new results were already seen."""
+    mock_execute.return_value = [_search_result(SEEN)]
+    novelty_stats.reset()
+    config = RunnableConfig(configurable={"max_react_tool_calls": 5, "min_research_novelty": 0.2})
+
+    result = await research_tools(_state_with_search_call(), config)
+
+    assert result.goto == "compress_research"
+    assert result.update[StatesKeys.RESEARCH_MSGS.value][0].content == SEEN
+    assert novelty_stats.stats() == {"early_stops": 1, "saved_llm_calls": 3, "saved_search_calls": 3}
+
+
+@pytest.mark.anyio
+@patch("src.agent.researcher_agent.tool_executor.execute", new_callable=AsyncMock)
+async def test_research_tools_continues_on_novel_results(mock_execute: AsyncMock) -> None:
+    """Test that research_tools keeps researching when the new results are novel."""
+    mock_execute.return_value = [_search_result(NEW)]
+    config = RunnableConfig(configurable={"max_react_tool_calls": 5, "min_research_novelty": 0.2})
+
+    result = await research_tools(_state_with_search_call(), config)
+
+    assert result.goto == "research_agent"
@@ -0,0 +1,169 @@
+"""Tests for the plan intermediate representation and its renderers."""
+
+import csv
+import io
+import json
+from pathlib import Path
+
+import pytest
+
+from src.agent.plan_ir import Plan, Priority, export_plans, parse_plan, to_csv, to_github_issues, to_phase_files
+
+EXAMPLES = Path(__file__).parents[2] / "generated_examples"
+
+REPORT = """# Project: Habit Tracker
+
+## 🎯 What Am I Building?
+
+A habit tracker
+with streaks.
+
+## 🛠️ Tech Stack
+
+- **Frontend**: React
+- **Backend**: FastAPI
+
+## 📋 Features to Build
+
+### Must Have (Phase 1: Foundation)
+
+- [ ] Habit CRUD — create and edit habits - *Patterns: Repository, Factory (habit creation)*
+- [x] Auth - login with OAuth
+
+### Nice to Have (Phase 2: Enhancement)
+
+- [ ] Reminders - *Patterns: Observer*
+
+## 📅 Build Plan
+
+### Phase 1: Foundation (Week 1-2)
+
+**Goal**: A working backend
+
+- Set up the repository
+- Implement the habit repository
+  - with an in-memory fake for tests
+
+```
+# not a heading
+- not a task
+```
+
+### Phase 2: Enhancement (Week 3)
+
+- Send reminders
+
+## 📝 GitHub Setup
+
+### Impressive README Checklist:
+
+- [x] Clear project description
+- [ ] Architecture diagram
+"""
+
+
+@pytest.fixture
+def plan() -> Plan:
+    """Provides the parsed sample report."""
+    return parse_plan(REPORT)
+
+
+def test_parse_plan(plan: Plan) -> None:
+    """Test that every part of the plan structure is parsed."""
+    assert plan.name == "Habit Tracker"
+    assert plan.summary == "A habit tracker with streaks."
+    assert plan.tech_stack == {"Frontend": "React", "Backend": "FastAPI"}
+
+    habit, auth, reminders = plan.features
+    assert (habit.title, habit.description, habit.priority, habit.phase) == (
+        "Habit CRUD",
+        "create and edit habits",
+        Priority.MUST_HAVE,
+        1,
+    )
+    assert habit.patterns == ["Repository", "Factory (habit creation)"]
+    assert auth.checked
+    assert auth.description == "login with OAuth"
+    assert (reminders.priority, reminders.patterns, reminders.phase) == (Priority.NICE_TO_HAVE, ["Observer"], 2)
+
+    foundation, enhancement = plan.phases
+    assert (foundation.number, foundation.title, foundation.weeks, foundation.goal) == (
+        1,
+        "Foundation",
+        "Week 1-2",
+        "A working backend",
+    )
+    assert [task.title for task in foundation.tasks] == ["Set up the repository", "Implement the habit repository"]
+    assert foundation.tasks[1].description == "with an in-memory fake for tests"
+    assert [task.title for task in enhancement.tasks] == ["Send reminders"]
+    assert [(item.title, item.checked) for item in plan.checklists["Impressive README Checklist"]] == [
+        ("Clear project description", True),
+        ("Architecture diagram", False),
+    ]
+
+
+def test_github_issues(plan: Plan) -> None:
+    """Test that features and tasks become labelled issues with their phase as milestone."""
+    issues = to_github_issues(plan)
+
+    assert len(issues) == 6
+    assert issues[0] == {
+        "title": "Habit CRUD",
+        "body": "create and edit habits\n\n**Patterns**: Repository, Factory (habit creation)",
+        "labels": ["feature", "must-have", "phase-1"],
+        "milestone": "Phase 1: Foundation",
+    }
+    assert issues[3]["labels"] == ["task", "phase-1"]
+    assert issues[3]["body"] == "**Goal**: A working backend"
+    json.dumps(issues)
+
+
+def test_csv(plan: Plan) -> None:
+    """Test that the CSV has one row per feature and task."""
+    rows = list(csv.DictReader(io.StringIO(to_csv(plan))))
+
+    assert [row["kind"] for row in rows] == ["feature"] * 3 + ["task"] * 3
+    assert rows[1] == {
+        "kind": "feature",
+        "phase": "1",
+        "priority": "must_have",
+        "title": "Auth",
+        "description": "login with OAuth",
+        "patterns": "",
+        "checked": "True",
+    }
+
+
+def test_phase_files(plan: Plan) -> None:
+    """Test that each phase gets a checklist with its tasks and features."""
+    files = to_phase_files(plan)
+
+    assert list(files) == ["phase_1_foundation.md", "phase_2_enhancement.md"]
+    assert "- [ ] Set up the repository" in files["phase_1_foundation.md"]
+    assert "- [x] Auth — login with OAuth" in files["phase_1_foundation.md"]
+    assert "- [ ] Reminders - *Patterns: Observer*" in files["phase_2_enhancement.md"]
+
+
+@pytest.mark.parametrize("report", sorted(EXAMPLES.glob("*.md")), ids=lambda path: path.stem)
+def test_generated_examples(report: Path) -> None:
+    """Test that the saved example reports parse into complete plans."""
+    plan = parse_plan(report.read_text(encoding="utf-8"))
+
+    assert plan.name
+    assert plan.summary
+    assert plan.tech_stack
+    assert {feature.priority for feature in plan.features} == set(Priority)
+    assert [phase.number for phase in plan.phases] == [1, 2, 3]
+    assert all(phase.tasks for phase in plan.phases)
+
+
+def test_export_plans(tmp_path: Path) -> None:
+    """Test that reports are exported next to each other under their own names."""
+    (tmp_path / "habits.md").write_text(REPORT)
+
+    written = export_plans([tmp_path / "habits.md"], tmp_path / "out", "phases")
+
+    assert [path.relative_to(tmp_path) for path in written] == [
+        Path("out/habits/phase_1_foundation.md"),
+        Path("out/habits/phase_2_enhancement.md"),
+    ]
@@ -0,0 +1,143 @@
+"""Tests for the run scoped search cache and the speculative research prefetch."""
+
+import asyncio
+from collections.abc import Iterator
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage
+from langchain_core.runnables import RunnableConfig
+
+from src.agent.clarification_agent_subgraph import clarify_with_user
+from src.agent.configuration import Configuration
+from src.agent.prefetch import speculative_queries, start_prefetch
+from src.agent.search_cache import scope_of, search_cache
+from src.agent.states import AgentState, ClarifyWithUserAndBrief
+from src.agent.utils import search_and_summarize
+
+CONFIG = Configuration(search_api="tavily", speculative_prefetch_queries=2)
+MESSAGES = [
+    HumanMessage(content="I want a recipe manager.\n- Recipes are parsed with an OCR engine\n- Thanks!"),
+    AIMessage(content="Which platforms should it support?"),
+    HumanMessage(content="An Android client talking to a FastAPI backend with PostgreSQL storage."),
+]
+
+
+@pytest.fixture(autouse=True)
+def fresh_cache() -> Iterator[None]:
+    """Provides an empty search cache."""
+    search_cache.reset()
+    yield
+    search_cache.reset()
+
+
+def search_response(query: str) -> dict:
+    url = f"https://example.com/{'-'.join(query.lower().split())}"
+    return {"query": query, "results": [{"url": url, "title": query, "content": "", "raw_content": "page"}]}
+
+
+@pytest.fixture
+def tavily() -> Iterator[AsyncMock]:
+    """Provides a fake Tavily search answering every query with one page, and a summarizer prefixing the page."""
+
+    async def search(*, search_queries: list[str], **_kwargs) -> list[dict]:
+        return [search_response(query) for query in search_queries]
+
+    async def summarize(_build, webpage_content: str, _config: Configuration) -> str:
+        return f"summary of {webpage_content}"
+
+    with (
+        patch("src.agent.utils.tavily_search_sync", new=AsyncMock(side_effect=search)) as mock_search,
+        patch("src.agent.utils.summarize_webpage", new=AsyncMock(side_effect=summarize)),
+    ):
+        yield mock_search
+
+
+def test_speculative_queries() -> None:
+    """Test that the user's sentences naming the most topic terms become the queries."""
+    assert speculative_queries(MESSAGES, limit=2) == [
+        "An Android client talking to a FastAPI backend with PostgreSQL storage",
+        "Recipes are parsed with an OCR engine",
+    ]
+    assert scope_of(RunnableConfig(configurable={"thread_id": 7})) == "7"
+    assert scope_of(None) is None
+
+
+@pytest.mark.anyio
+async def test_searches_are_cached_per_thread(tavily: AsyncMock) -> None:
+    """Test that a thread repeating a search is served from the cache and other threads are not."""
+    await search_and_summarize(["ocr engines"], CONFIG, scope="thread-1")
+    results = await search_and_summarize(["OCR  engines", "tesseract"], CONFIG, scope="thread-1")
+    await search_and_summarize(["ocr engines"], CONFIG, scope="thread-2")
+    await search_and_summarize(["ocr engines"], CONFIG)
+
+    assert [call.kwargs["search_queries"] for call in tavily.await_args_list] == [
+        ["ocr engines"],
+        ["tesseract"],
+        ["ocr engines"],
+        ["ocr engines"],
+    ]
+    assert results["https://example.com/ocr-engines"]["content"] == "summary of page"
+    stats = search_cache.stats()
+    assert (stats["scopes"], stats["searches_hits"], stats["summaries_hits"]) == (2, 1, 1)
+
+
+@pytest.mark.anyio
+async def test_prefetch_warms_the_cache_of_the_brief(tavily: AsyncMock) -> None:
+    """Test that prefetched results relevant to the brief are kept for the researchers and the others dropped."""
+    tasks = start_prefetch(MESSAGES, CONFIG, scope="thread-1")
+    await asyncio.gather(*tasks)
+
+    dropped = search_cache.settle("thread-1", "Plan an Android recipe manager with a FastAPI backend and PostgreSQL.")
+
+    assert dropped == ["Recipes are parsed with an OCR engine"]
+    query = "An Android client talking to a FastAPI backend with PostgreSQL storage"
+    await search_and_summarize([query], CONFIG, scope="thread-1")
+    assert tavily.await_count == 2  # noqa: PLR2004
+    await search_and_summarize(["Recipes are parsed with an OCR engine"], CONFIG, scope="thread-1")
+    assert tavily.await_count == 3  # noqa: PLR2004
+    stats = search_cache.stats()
+    assert (stats["kept_queries"], stats["discarded"], stats["speculative_hits"]) == (1, 2, 2)
+
+
+@pytest.mark.anyio
+async def test_irrelevant_prefetch_is_cancelled() -> None:
+    """Test that a prefetch still running for a dropped query is cancelled."""
+    searching = asyncio.Event()
+
+    async def slow_search(**_kwargs) -> list[dict]:
+        searching.set()
+        await asyncio.sleep(5)
+        return []
+
+    with patch("src.agent.utils.tavily_search_sync", new=slow_search):
+        (task,) = start_prefetch([HumanMessage(content="Compare OCR engines for receipts")], CONFIG, "thread-1")
+        await searching.wait()
+
+        assert search_cache.settle("thread-1", "A chess engine in Rust") == ["Compare OCR engines for receipts"]
+
+        with pytest.raises(asyncio.CancelledError):
+            await task
+    assert search_cache.stats()["cancelled"] == 1
+    assert start_prefetch(MESSAGES, CONFIG, scope=None) == []
+
+
+@pytest.mark.anyio
+@patch("src.agent.clarification_agent_subgraph.start_prefetch")
+@patch("src.agent.clarification_agent_subgraph.clarification_model", new_callable=MagicMock)
+async def test_clarification_question_starts_prefetch(mock_model, mock_prefetch) -> None:
+    """Test that asking the user a question starts the speculative prefetch of the thread."""
+    mock_chain = AsyncMock()
+    mock_chain.ainvoke.return_value = ClarifyWithUserAndBrief(
+        need_clarification=True,
+        question="Which platforms?",
+        verification="",
+    )
+    mock_model.with_structured_output.return_value.with_retry.return_value.with_config.return_value = mock_chain
+    state = AgentState(messages=MESSAGES[:1])
+    config = RunnableConfig(configurable={"thread_id": "thread-1", "speculative_prefetch": True})
+
+    await clarify_with_user(state, config)
+
+    messages, configuration, scope = mock_prefetch.call_args.args
+    assert (messages, configuration.speculative_prefetch, scope) == (MESSAGES[:1], True, "thread-1")
@@ -0,0 +1,179 @@
+"""Tests for the shared retry engine and its error classifier."""
+
+import asyncio
+from collections.abc import Iterator
+from types import SimpleNamespace
+
+import pytest
+
+from src.agent.retry import (
+    FAILURE_THRESHOLD,
+    CircuitOpenError,
+    ErrorKind,
+    RetryPolicy,
+    classify_error,
+    provider_of,
+    retry_after,
+    retry_engine,
+)
+from src.agent.utils import is_token_limit_exceeded
+
+FAST = RetryPolicy(max_attempts=3, base_delay=0.001)
+
+
+class RateLimitError(Exception):
+    """Shaped like the rate limit error of the OpenAI client."""
+
+    def __init__(self, message: str, headers: dict[str, str]) -> None:
+        super().__init__(message)
+        self.status_code = 429
+        self.response = SimpleNamespace(status_code=429, headers=headers)
+
+
+class BadRequestError(Exception):
+    status_code = 400
+
+
+class AuthenticationError(Exception):
+    status_code = 401
+
+
+class ResourceExhausted(Exception):  # noqa: N818
+    code = 429
+
+
+@pytest.fixture(autouse=True)
+def fresh_engine() -> Iterator[None]:
+    """Provides a retry engine with closed circuit breakers."""
+    retry_engine.reset()
+    yield
+    retry_engine.reset()
+
+
+class Flaky:
+    """A model call raising `errors` one after the other, then answering."""
+
+    def __init__(self, *errors: Exception) -> None:
+        self.errors = list(errors)
+        self.calls = 0
+
+    async def __call__(self) -> str:
+        self.calls += 1
+        if self.errors:
+            raise self.errors.pop(0)
+        return "answer"
+
+
+def test_provider_of() -> None:
+    """Test that providers come from the model prefix or the model family."""
+    assert provider_of("google_genai:gemini-2.0-flash") == "google_genai"
+    assert provider_of("ollama:qwen3:8b") == "ollama"
+    assert provider_of("sonar-pro") == "perplexity"
+    assert provider_of(None) == "unknown"
+
+
+def test_classify_error() -> None:
+    """Test the error kinds of the providers' errors."""
+    context = "This model's maximum context length is 128000 tokens. Please reduce the length of the messages."
+    assert classify_error(BadRequestError(context), "openai:gpt-4o-mini") is ErrorKind.CONTEXT_OVERFLOW
+    assert classify_error(BadRequestError("Prompt is too long"), "perplexity:sonar") is ErrorKind.CONTEXT_OVERFLOW
+    assert classify_error(BadRequestError("Prompt is too long"), "openai:gpt-4o") is ErrorKind.FATAL
+    assert classify_error(RateLimitError("slow down", {}), "openai:gpt-4o") is ErrorKind.RATE_LIMITED
+    assert classify_error(ResourceExhausted("quota"), "google_genai:gemini-2.0-flash") is ErrorKind.RATE_LIMITED
+    assert classify_error(AuthenticationError("bad key"), "openai:gpt-4o") is ErrorKind.FATAL
+    assert classify_error(TimeoutError(), "ollama:qwen3:8b") is ErrorKind.RETRYABLE
+    assert classify_error(ValueError("Failed to parse ClarifyWithUser"), "openai:gpt-4o") is ErrorKind.RETRYABLE
+
+
+def test_is_token_limit_exceeded() -> None:
+    """Test that context overflows are recognized for every provider, Perplexity included."""
+    error = BadRequestError("Request exceeds the maximum context length of the model")
+    assert is_token_limit_exceeded(error, "perplexity:sonar")
+    assert is_token_limit_exceeded(error, "openai:gpt-4o-mini")
+    assert not is_token_limit_exceeded(RateLimitError("slow down", {}), "openai:gpt-4o-mini")
+
+
+def test_retry_after() -> None:
+    """Test that waits come from the Retry-After headers or the message."""
+    assert retry_after(RateLimitError("", {"retry-after": "7"})) == 7.0  # noqa: PLR2004
+    assert retry_after(RateLimitError("", {"retry-after-ms": "1500"})) == 1.5  # noqa: PLR2004
+    assert retry_after(RateLimitError("Please retry in 12.5s.", {})) == 12.5  # noqa: PLR2004
+    assert retry_after(RateLimitError("", {})) is None
+
+
+def test_backoff() -> None:
+    """Test that backoff doubles with jitter up to its maximum and never waits less than Retry-After."""
+    policy = RetryPolicy(base_delay=1, max_delay=4, max_retry_after=10)
+
+    assert 0.5 <= policy.delay(1) <= 1  # noqa: PLR2004
+    assert 2 <= policy.delay(3) <= 4  # noqa: PLR2004
+    assert 2 <= policy.delay(10) <= 4  # noqa: PLR2004
+    assert policy.delay(1, retry_after=8) == 8  # noqa: PLR2004
+    assert policy.delay(1, retry_after=60) is None
+
+
+@pytest.mark.anyio
+async def test_retries_until_success() -> None:
+    """Test that retryable and rate limited errors are retried."""
+    call = Flaky(TimeoutError(), RateLimitError("slow down", {"retry-after": "0.01"}))
+
+    assert await retry_engine.call(call, model="openai:gpt-4o-mini", policy=FAST) == "answer"
+
+    stats = retry_engine.stats()
+    assert (call.calls, stats["retries"], stats["retryable"], stats["rate_limited"]) == (3, 2, 1, 1)
+    assert stats["sleep_seconds"] >= 0.01  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_fatal_and_exhausted_errors_are_raised() -> None:
+    """Test that fatal errors are not retried and the last error is raised once the attempts are used up."""
+    fatal = Flaky(AuthenticationError("bad key"))
+    with pytest.raises(AuthenticationError):
+        await retry_engine.call(fatal, model="openai:gpt-4o-mini", policy=FAST)
+    assert fatal.calls == 1
+
+    failing = Flaky(*(ConnectionError(f"reset {i}") for i in range(3)))
+    with pytest.raises(ConnectionError, match="reset 2"):
+        await retry_engine.call(failing, model="ollama:qwen3:8b", policy=FAST)
+    assert failing.calls == 3  # noqa: PLR2004
+
+
+@pytest.mark.anyio
+async def test_context_overflow_shrinks_the_prompt() -> None:
+    """Test that a context overflow is retried only while the caller can shrink the prompt."""
+    shrinks = [True, False]
+    call = Flaky(*(BadRequestError("maximum context length exceeded") for _ in range(2)))
+
+    with pytest.raises(BadRequestError):
+        await retry_engine.call(
+            call,
+            model="perplexity:sonar",
+            policy=FAST,
+            on_context_overflow=lambda _: shrinks.pop(0),
+        )
+
+    assert call.calls == 2  # noqa: PLR2004
+    assert retry_engine.stats()["sleep_seconds"] == 0
+
+
+@pytest.mark.anyio
+async def test_circuit_breaker() -> None:
+    """Test that a failing provider fails fast and a successful trial call closes its breaker."""
+    breaker = retry_engine.breaker("perplexity")
+    breaker.open_seconds = 0.05
+    for _ in range(FAILURE_THRESHOLD):
+        with pytest.raises(ConnectionError):
+            await retry_engine.call(Flaky(ConnectionError()), model="perplexity:sonar", policy=RetryPolicy(1))
+
+    call = Flaky()
+    with pytest.raises(CircuitOpenError):
+        await retry_engine.call(call, model="perplexity:sonar-pro", policy=FAST)
+    assert call.calls == 0
+    # other providers are not affected
+    assert await retry_engine.call(Flaky(), model="openai:gpt-4o-mini") == "answer"
+
+    await asyncio.sleep(0.06)
+    assert breaker.state == "half_open"
+    assert await retry_engine.call(call, model="perplexity:sonar") == "answer"
+    assert breaker.state == "closed"
+    assert (retry_engine.stats()["breaker_opened"], retry_engine.stats()["failed_fast"]) == (1, 1)
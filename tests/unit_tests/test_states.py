@@ -0,0 +1,58 @@
+"""Tests for the typed research notes and their append-only reducer."""
+
+import operator
+from typing import Annotated, TypedDict
+
+from langgraph.checkpoint.memory import MemorySaver
+from langgraph.graph import START, StateGraph
+
+from src.agent.states import Note, NoteLog, Notes, append_notes
+
+
+def test_append_notes() -> None:
+    """Test that strings are wrapped in notes and appends share the backing list of the newest log."""
+    first = append_notes(None, "finding 1")
+    second = append_notes(first, [Note(content="finding 2", topic="OCR engines")])
+    third = append_notes(second, None)
+
+    assert second == [Note(content="finding 1"), Note(content="finding 2", topic="OCR engines")]
+    assert third is second
+    assert second.items is first.items
+    assert (len(first), first[-1], second[1:], str(second[1])) == (1, Note("finding 1"), [second[1]], "finding 2")
+    assert append_notes(["restored"], "new") == [Note("restored"), Note("new")]
+
+
+def test_older_logs_never_change() -> None:
+    """Test that extending an older log copies it instead of changing the logs extended from it."""
+    base = append_notes(None, ["a", "b"])
+    left = append_notes(base, "left")
+    right = append_notes(base, "right")
+
+    assert (list(base), list(left), list(right)) == (
+        [Note("a"), Note("b")],
+        [Note("a"), Note("b"), Note("left")],
+        [Note("a"), Note("b"), Note("right")],
+    )
+    assert right.items is not base.items
+    assert NoteLog([Note("x"), Note("y")], length=1) == [Note("x")]
+
+
+class NotesState(TypedDict):
+    notes: Notes
+    steps: Annotated[list[int], operator.add]
+
+
+def test_notes_channel_keeps_checkpoints_intact() -> None:
+    """Test that appending notes in later steps leaves the notes of earlier checkpoints unchanged."""
+    builder = StateGraph(NotesState)
+    builder.add_node("research", lambda state: {"notes": [f"note {len(state['steps'])}"], "steps": [1]})
+    builder.add_edge(START, "research")
+    graph = builder.compile(checkpointer=MemorySaver())
+    config = {"configurable": {"thread_id": "1"}}
+
+    for _ in range(3):
+        graph.invoke({"steps": []}, config)
+
+    history = [snapshot.values.get("notes", []) for snapshot in graph.get_state_history(config)]
+    assert history[0] == [Note("note 0"), Note("note 1"), Note("note 2")]
+    assert sorted(len(notes) for notes in history) == [0, 0, 1, 1, 1, 2, 2, 2, 3]
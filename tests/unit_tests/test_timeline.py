@@ -0,0 +1,135 @@
+"""Tests for the span timeline, its critical path analyzer and the Chrome trace export."""
+
+import asyncio
+import json
+from pathlib import Path
+from typing import TypedDict
+
+import pytest
+from langchain_core.runnables import RunnableConfig, RunnableLambda
+from langchain_core.tools import tool
+from langgraph.graph import START, StateGraph
+from langgraph.graph.state import CompiledStateGraph
+
+from src.agent.timeline import (
+    Span,
+    SpanRecorder,
+    critical_path,
+    fan_outs,
+    from_chrome_trace,
+    summarize,
+    to_chrome_trace,
+)
+
+
+def span(span_id: str, parent_id: str | None, start: float, end: float) -> Span:
+    return Span(span_id=span_id, parent_id=parent_id, name=span_id, kind="node", start=start, end=end)
+
+
+class ResearchState(TypedDict, total=False):
+    topic: str
+    notes: str
+
+
+async def summarize_page(page: str) -> str:
+    await asyncio.sleep(0.01)
+    return page
+
+
+@tool
+async def tavily_search(query: str) -> str:
+    """Search the web and summarize the pages."""
+    await asyncio.sleep(float(query))
+    return await RunnableLambda(summarize_page).ainvoke(query, {"run_name": "summarize_webpage"})
+
+
+def supervisor_graph() -> CompiledStateGraph:
+    """A supervisor fanning out to three researchers, the researcher of topic 0.06 is the slowest."""
+
+    async def research_tools(state: ResearchState) -> dict:
+        return {"notes": await tavily_search.ainvoke({"query": state["topic"]})}
+
+    research_builder = StateGraph(ResearchState)
+    research_builder.add_node("research_tools", research_tools)
+    research_builder.add_edge(START, "research_tools")
+    researcher_subgraph = research_builder.compile(name="Research Agent")
+
+    async def supervisor_tool(state: ResearchState, config: RunnableConfig) -> dict:  # noqa: ARG001
+        results = await asyncio.gather(
+            *(
+                researcher_subgraph.ainvoke({"topic": topic}, {**config, "run_name": "researcher_subgraph"})
+                for topic in ("0.02", "0.06", "0.03")
+            ),
+        )
+        return {"notes": "\n".join(result["notes"] for result in results)}
+
+    builder = StateGraph(ResearchState)
+    builder.add_node("supervisor_tool", supervisor_tool)
+    builder.add_edge(START, "supervisor_tool")
+    return builder.compile()
+
+
+def test_critical_path_and_fan_out() -> None:
+    """Test the critical path and the parallelism figures of a known timeline."""
+    spans = [span("run", None, 0, 10), span("a", "run", 0, 4), span("b", "run", 0, 8), span("c", "run", 8, 10)]
+
+    path = critical_path(spans)
+
+    assert [(step.span.name, step.depth) for step in path] == [("run", 0), ("b", 1), ("c", 1)]
+    assert path[0].self_seconds == pytest.approx(0.0)
+    (fan_out,) = fan_outs(spans)
+    assert (fan_out.span.name, fan_out.children, fan_out.peak_slots) == ("run", 3, 2)
+    assert fan_out.saved_seconds == pytest.approx(4.0)
+    assert fan_out.idle_slot_seconds == pytest.approx(6.0)
+    assert fan_out.efficiency == pytest.approx(0.7)
+
+
+@pytest.mark.anyio
+async def test_recorded_fan_out(tmp_path: Path) -> None:
+    """Test that the slowest researcher is on the critical path down to the webpage summary."""
+    recorder = SpanRecorder()
+    await supervisor_graph().ainvoke({"topic": ""}, {"callbacks": [recorder]})
+
+    path = [step.span for step in critical_path(recorder.spans())]
+
+    assert [span.name for span in path] == [
+        "LangGraph",
+        "supervisor_tool",
+        "researcher_subgraph",
+        "research_tools",
+        "tavily_search",
+        "summarize_webpage",
+    ]
+    assert path[0].kind == "graph"
+    assert path[4].kind == "tool"
+    assert path[4].duration >= 0.06  # noqa: PLR2004
+    fan_out = next(fan_out for fan_out in fan_outs(recorder.spans()) if fan_out.span.name == "supervisor_tool")
+    assert fan_out.peak_slots == 3  # noqa: PLR2004
+    assert 0 < fan_out.efficiency < 1
+    assert "supervisor_tool: 3 children" in summarize(recorder.spans())
+
+    recorder.write(tmp_path / "trace.json")
+    trace = json.loads((tmp_path / "trace.json").read_text())
+    spans = from_chrome_trace(trace)
+    assert [step.span.name for step in critical_path(spans)] == [span.name for span in path]
+
+
+@pytest.mark.anyio
+async def test_trace_lanes_nest() -> None:
+    """Test that the slices of a lane nest, concurrent researchers get lanes of their own."""
+    recorder = SpanRecorder()
+    await supervisor_graph().ainvoke({"topic": ""}, {"callbacks": [recorder]})
+
+    events = [event for event in to_chrome_trace(recorder.spans())["traceEvents"] if event["ph"] == "X"]
+
+    lanes: dict[int, list[tuple[float, float]]] = {}
+    for event in events:
+        lanes.setdefault(event["tid"], []).append((event["ts"], event["ts"] + event["dur"]))
+    for slices in lanes.values():
+        for start, end in slices:
+            for other_start, other_end in slices:
+                overlapping = start < other_end and other_start < end
+                nested = (start <= other_start and other_end <= end) or (other_start <= start and end <= other_end)
+                assert not overlapping or nested
+    researcher_lanes = {event["tid"] for event in events if event["name"] == "researcher_subgraph"}
+    assert len(researcher_lanes) == 3  # noqa: PLR2004
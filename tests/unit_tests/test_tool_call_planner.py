@@ -0,0 +1,74 @@
+"""Tests for the dependency aware tool call planner."""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import ToolCall
+
+from src.agent.tool_call_planner import plan_dependencies, run_tool_calls
+
+ROOT = "/projects/workspace/generated_examples"
+
+
+def call(name: str, **args: str) -> ToolCall:
+    return ToolCall(name=name, args=args, id=f"{name}-{len(args)}")
+
+
+def test_writes_wait_for_their_directory() -> None:
+    """Test that files wait for the directory they are written to, and not for each other."""
+    calls = [
+        call("create_directory", path=ROOT),
+        call("write_file", path=f"{ROOT}/phase_1.md", content="1"),
+        call("write_file", path=f"{ROOT}/phase_2.md", content="2"),
+        call("write_file", path="/projects/workspace/README.md", content="r"),
+    ]
+
+    assert plan_dependencies(calls) == [set(), {0}, {0}, set()]
+
+
+def test_move_waits_for_write_to_its_source() -> None:
+    """Test that a move follows the write of its source and a read of the destination follows the move."""
+    calls = [
+        call("write_file", path=f"{ROOT}/draft.md", content="x"),
+        call("write_file", path=f"{ROOT}/other.md", content="y"),
+        call("move_file", source=f"{ROOT}/draft.md", destination=f"{ROOT}/plan.md"),
+        call("read_file", path=f"{ROOT}/plan.md"),
+    ]
+
+    assert plan_dependencies(calls) == [set(), set(), {0}, {2}]
+
+
+def test_unknown_tools_are_barriers() -> None:
+    """Test that a tool without known paths is ordered with every other call."""
+    calls = [
+        call("write_file", path="a.md", content="a"),
+        call("notion_create_page", title="t"),
+        call("write_file", path="b.md", content="b"),
+    ]
+
+    assert plan_dependencies(calls) == [set(), {0}, {1}]
+
+
+@pytest.mark.anyio
+async def test_independent_calls_run_concurrently() -> None:
+    """Test that independent writes overlap while dependent ones wait, results keep the call order."""
+    calls = [
+        call("create_directory", path=ROOT),
+        call("write_file", path=f"{ROOT}/phase_1.md", content="1"),
+        call("write_file", path=f"{ROOT}/phase_2.md", content="2"),
+    ]
+    running, events = set(), []
+
+    async def run(tool_call: ToolCall) -> str:
+        path = tool_call["args"]["path"]
+        running.add(path)
+        events.append((path, set(running)))
+        await asyncio.sleep(0.01)
+        running.discard(path)
+        return path
+
+    results = await run_tool_calls(calls, run)
+
+    assert results == [ROOT, f"{ROOT}/phase_1.md", f"{ROOT}/phase_2.md"]
+    assert events[0] == (ROOT, {ROOT})
+    assert events[2][1] == {f"{ROOT}/phase_1.md", f"{ROOT}/phase_2.md"}
@@ -0,0 +1,106 @@
+"""Tests for the bounded research tool executor."""
+
+import asyncio
+import gc
+import weakref
+
+import pytest
+from langchain_core.tools import tool
+
+from src.agent.configuration import Configuration
+from src.agent.tool_executor import ToolExecutor
+
+
+@tool
+async def slow_search(query: str) -> str:
+    """Search that takes a while."""
+    await asyncio.sleep(0.2)
+    return f"results for {query}"
+
+
+@tool
+async def broken_search(query: str) -> str:
+    """Search that always fails."""
+    msg = "quota exceeded"
+    raise RuntimeError(msg)
+
+
+@tool
+def ResearchComplete() -> str:  # noqa: N802
+    """Mark research as complete."""
+    return "done"
+
+
+slow_search.metadata = {"type": "search"}
+TOOLS_BY_NAME = {t.name: t for t in (slow_search, broken_search, ResearchComplete)}
+
+
+def _call(name: str, call_id: str, args: dict | None = None) -> dict:
+    return {"name": name, "args": args if args is not None else {"query": call_id}, "id": call_id, "type": "tool_call"}
+
+
+@pytest.mark.anyio
+async def test_timeouts_and_errors_become_tool_output() -> None:
+    """Test that a slow call hits its deadline and a failing call is reported without raising."""
+    configurable = Configuration(tool_call_timeout=0.05)
+
+    results = await ToolExecutor().execute(
+        [_call("slow_search", "1"), _call("broken_search", "2"), _call("missing", "3", {})],
+        TOOLS_BY_NAME,
+        configurable,
+    )
+
+    assert [result.status for result in results] == ["timeout", "error", "error"]
+    assert "quota exceeded" in results[1].content
+    assert all(message.status == "error" for message in (result.to_message() for result in results))
+
+
+@pytest.mark.anyio
+async def test_search_concurrency_is_limited() -> None:
+    """Test that search calls beyond the limit wait in the queue."""
+    configurable = Configuration(max_concurrent_search_calls=1)
+
+    results = await ToolExecutor().execute(
+        [_call("slow_search", "1"), _call("slow_search", "2")],
+        TOOLS_BY_NAME,
+        configurable,
+    )
+
+    assert [result.status for result in results] == ["success", "success"]
+    assert max(result.queue_seconds for result in results) >= 0.15  # noqa: PLR2004
+    message = results[0].to_message()
+    assert message.content == "results for 1"
+    assert message.response_metadata["tool_timing"]["tool_type"] == "search"
+
+
+@pytest.mark.anyio
+async def test_stragglers_cancelled_after_research_complete() -> None:
+    """Test that calls still running after the grace period are cancelled when research is complete."""
+    configurable = Configuration(research_complete_grace_period=0.01)
+
+    results = await ToolExecutor().execute(
+        [_call("slow_search", "1"), _call("ResearchComplete", "2", {})],
+        TOOLS_BY_NAME,
+        configurable,
+    )
+
+    assert [result.status for result in results] == ["cancelled", "success"]
+    assert results[0].content.startswith("Cancelled")
+
+
+def test_semaphores_do_not_keep_closed_loops() -> None:
+    """Test that the semaphores of an event loop are released once the loop is closed."""
+    executor = ToolExecutor()
+    configurable = Configuration(max_concurrent_search_calls=1)
+    loops = []
+
+    async def execute() -> None:
+        loops.append(weakref.ref(asyncio.get_running_loop()))
+        await executor.execute([_call("slow_search", "1"), _call("slow_search", "2")], TOOLS_BY_NAME, configurable)
+
+    asyncio.run(execute())
+    asyncio.run(execute())
+    gc.collect()
+
+    assert loops[0]() is None
+    assert len(executor._semaphores) == 1  # noqa: SLF001
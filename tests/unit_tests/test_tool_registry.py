@@ -0,0 +1,52 @@
+"""Tests for the research tool registry."""
+
+from unittest.mock import MagicMock
+
+import pytest
+
+from src.agent.configuration import Configuration, SearchAPI
+from src.agent.tool_registry import ToolRegistry
+
+
+@pytest.fixture
+def registry() -> ToolRegistry:
+    """Provides an empty registry."""
+    registry = ToolRegistry()
+    registry.clear()
+    return registry
+
+
+@pytest.mark.anyio
+async def test_toolset_is_built_once(registry: ToolRegistry) -> None:
+    """Test that repeated lookups for the same search API reuse the same toolset."""
+    config = Configuration(search_api=SearchAPI.TAVILY)
+
+    first = await registry.get_toolset(config)
+    second = await registry.get_toolset(config)
+
+    assert first is second
+    assert set(first.tools_by_name) == {"ResearchComplete", "tavily_search"}
+    assert registry.stats()["toolset_misses"] == 1
+    assert registry.stats()["toolset_hits"] == 1
+
+
+@pytest.mark.anyio
+async def test_bound_model_is_cached_per_model_settings(registry: ToolRegistry) -> None:
+    """Test that tools are bound once per model settings and rebound when they change."""
+    model = MagicMock()
+    config = Configuration(search_api=SearchAPI.TAVILY, research_model="model-a")
+
+    first = await registry.get_bound_model(model, config)
+    second = await registry.get_bound_model(model, config)
+    other = await registry.get_bound_model(model, Configuration(search_api=SearchAPI.TAVILY, research_model="model-b"))
+
+    assert first is second
+    assert model.bind_tools.call_count == 2  # noqa: PLR2004
+    assert other is not None
+    assert registry.stats()["bound_model_hits"] == 1
+    assert registry.stats()["bound_model_misses"] == 2  # noqa: PLR2004
+
+
+def test_registry_is_singleton() -> None:
+    """Test that every researcher shares the same registry."""
+    assert ToolRegistry() is ToolRegistry()